@@ -59,9 +59,10 @@ def upgrade() -> None:
         sa.Column("grand_total", sa.Float(), nullable=False),
         sa.Column("grand_total_words", sa.String(length=255), nullable=False),
         sa.Column("created_at", sa.DateTime(), nullable=False),
+        # Inline: SQLite cannot add a constraint to an existing table.
+        sa.UniqueConstraint("invoice_number", name="uq_invoices_invoice_number"),
     )
     op.create_index(op.f("ix_invoices_id"), "invoices", ["id"], unique=False)
-    op.create_unique_constraint("uq_invoices_invoice_number", "invoices", ["invoice_number"])
 
     op.create_table(
         "invoice_items",
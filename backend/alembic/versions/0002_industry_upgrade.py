@@ -3,13 +3,18 @@
 from alembic import op
 import sqlalchemy as sa
 
+from app.db.online_migration import forget, online
+
 revision = "0002_industry_upgrade"
 down_revision = "0001_init"
 branch_labels = None
 depends_on = None
 
 
-def upgrade() -> None:
+STATUS = "CASE status WHEN 'draft' THEN 'DRAFT' WHEN 'finalized' THEN 'FINAL' ELSE status END"
+
+
+def _tables() -> None:
     op.add_column("sellers", sa.Column("composition_flag", sa.Boolean(), server_default=sa.false(), nullable=False))
 
     op.create_table(
@@ -29,23 +34,6 @@ def upgrade() -> None:
     )
     op.create_index(op.f("ix_invoice_sequences_id"), "invoice_sequences", ["id"], unique=False)
 
-    op.add_column("invoices", sa.Column("export_flag", sa.Boolean(), server_default=sa.false(), nullable=False))
-    op.add_column("invoices", sa.Column("composition_flag", sa.Boolean(), server_default=sa.false(), nullable=False))
-    op.add_column("invoices", sa.Column("tax_shifted_to_recipient", sa.Boolean(), server_default=sa.false(), nullable=False))
-
-    op.execute("UPDATE invoices SET status = 'DRAFT' WHERE status = 'draft'")
-    op.execute("UPDATE invoices SET status = 'FINAL' WHERE status = 'finalized'")
-    with op.batch_alter_table("invoices") as batch_op:
-        batch_op.create_check_constraint("ck_invoice_status", "status IN ('DRAFT', 'FINAL')")
-        batch_op.create_check_constraint("ck_supply_type", "supply_type IN ('intra', 'inter', 'export')")
-
-    op.add_column("invoice_items", sa.Column("hsn_code", sa.String(length=8), nullable=True))
-    op.execute("UPDATE invoice_items SET hsn_code = hsn_sac")
-    with op.batch_alter_table("invoice_items") as batch_op:
-        batch_op.drop_column("hsn_sac")
-        batch_op.alter_column("hsn_code", nullable=False)
-        batch_op.create_foreign_key("fk_invoice_items_hsn_code", "hsn_master", ["hsn_code"], ["code"])
-
     op.create_table(
         "idempotency_keys",
         sa.Column("key", sa.String(length=128), primary_key=True),
@@ -56,7 +44,42 @@ def upgrade() -> None:
     )
 
 
+def upgrade() -> None:
+    # invoices and invoice_items are rewritten in chunks through shadow
+    # tables, so a large database stays writable and an interrupted run
+    # resumes (see app/db/online_migration.py).
+    with online(op, revision) as migration:
+        migration.once("tables", _tables)
+        migration.copy_and_swap(
+            "invoices",
+            columns=[
+                sa.Column("export_flag", sa.Boolean(), server_default=sa.false(), nullable=False),
+                sa.Column("composition_flag", sa.Boolean(), server_default=sa.false(), nullable=False),
+                sa.Column("tax_shifted_to_recipient", sa.Boolean(), server_default=sa.false(), nullable=False),
+            ],
+            constraints=[
+                sa.CheckConstraint("status IN ('DRAFT', 'FINAL')", name="ck_invoice_status"),
+                sa.CheckConstraint("supply_type IN ('intra', 'inter', 'export')", name="ck_supply_type"),
+            ],
+            values={"status": STATUS},
+        )
+        migration.copy_and_swap(
+            "invoice_items",
+            drop=["hsn_sac"],
+            columns=[
+                sa.Column(
+                    "hsn_code",
+                    sa.String(length=8),
+                    sa.ForeignKey("hsn_master.code", name="fk_invoice_items_hsn_code"),
+                    nullable=False,
+                )
+            ],
+            values={"hsn_code": "hsn_sac"},
+        )
+
+
 def downgrade() -> None:
+    forget(op, revision)
     op.drop_table("idempotency_keys")
     with op.batch_alter_table("invoice_items") as batch_op:
         batch_op.add_column(sa.Column("hsn_sac", sa.String(length=12), nullable=True))
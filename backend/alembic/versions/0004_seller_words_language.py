@@ -0,0 +1,17 @@
+"""seller amount-in-words language"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_seller_words_language"
+down_revision = "0003_invoice_ui_metadata"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sellers", sa.Column("words_language", sa.String(length=8), nullable=False, server_default="en"))
+
+
+def downgrade() -> None:
+    op.drop_column("sellers", "words_language")
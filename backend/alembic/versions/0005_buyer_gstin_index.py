@@ -0,0 +1,16 @@
+"""index buyers by gstin"""
+
+from alembic import op
+
+revision = "0005_buyer_gstin_index"
+down_revision = "0004_seller_words_language"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f("ix_buyers_gstin"), "buyers", ["gstin"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_buyers_gstin"), table_name="buyers")
@@ -0,0 +1,95 @@
+"""tenant-scoped buyers with fts5 search index"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_buyer_search"
+down_revision = "0005_buyer_gstin_index"
+branch_labels = None
+depends_on = None
+
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS buyers_fts USING fts5("
+    "name, gstin, address, content='buyers', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS buyers_fts_ai AFTER INSERT ON buyers BEGIN "
+    "INSERT INTO buyers_fts(rowid, name, gstin, address) VALUES (new.id, new.name, new.gstin, new.address); END",
+    "CREATE TRIGGER IF NOT EXISTS buyers_fts_ad AFTER DELETE ON buyers BEGIN "
+    "INSERT INTO buyers_fts(buyers_fts, rowid, name, gstin, address) "
+    "VALUES ('delete', old.id, old.name, old.gstin, old.address); END",
+    "CREATE TRIGGER IF NOT EXISTS buyers_fts_au AFTER UPDATE OF name, gstin, address ON buyers BEGIN "
+    "INSERT INTO buyers_fts(buyers_fts, rowid, name, gstin, address) "
+    "VALUES ('delete', old.id, old.name, old.gstin, old.address); "
+    "INSERT INTO buyers_fts(rowid, name, gstin, address) VALUES (new.id, new.name, new.gstin, new.address); END",
+]
+
+
+def _assign_owners() -> None:
+    """Give every buyer to the user who invoiced it; never leave one unowned.
+
+    A buyer invoiced by several users is copied, one per user, and each
+    user's invoices point at their own copy.
+    """
+    bind = op.get_bind()
+    op.execute(
+        "UPDATE buyers SET user_id = ("
+        "SELECT sellers.user_id FROM invoices JOIN sellers ON sellers.id = invoices.seller_id "
+        "WHERE invoices.buyer_id = buyers.id ORDER BY invoices.id LIMIT 1)"
+    )
+    shared = bind.execute(
+        sa.text(
+            "SELECT DISTINCT invoices.buyer_id, sellers.user_id FROM invoices "
+            "JOIN sellers ON sellers.id = invoices.seller_id JOIN buyers ON buyers.id = invoices.buyer_id "
+            "WHERE sellers.user_id != buyers.user_id ORDER BY invoices.buyer_id, sellers.user_id"
+        )
+    ).all()
+    for buyer_id, user_id in shared:
+        copy_id = bind.execute(
+            sa.text(
+                "INSERT INTO buyers (user_id, name, gstin, address, state_code) "
+                "SELECT :user_id, name, gstin, address, state_code FROM buyers WHERE id = :buyer_id RETURNING id"
+            ),
+            {"user_id": user_id, "buyer_id": buyer_id},
+        ).scalar_one()
+        bind.execute(
+            sa.text(
+                "UPDATE invoices SET buyer_id = :copy_id WHERE buyer_id = :buyer_id "
+                "AND seller_id IN (SELECT id FROM sellers WHERE user_id = :user_id)"
+            ),
+            {"copy_id": copy_id, "buyer_id": buyer_id, "user_id": user_id},
+        )
+    # Only buyers nobody has invoiced are left; upgrade() has checked that
+    # there is exactly one user to give them to.
+    op.execute("UPDATE buyers SET user_id = (SELECT min(id) FROM users) WHERE user_id IS NULL")
+
+
+def upgrade() -> None:
+    # Checked before any DDL, so a refused upgrade leaves the database as it was.
+    bind = op.get_bind()
+    users = bind.scalar(sa.text("SELECT count(*) FROM users"))
+    uninvoiced = bind.scalar(sa.text("SELECT count(*) FROM buyers WHERE id NOT IN (SELECT buyer_id FROM invoices)"))
+    if uninvoiced and users != 1:
+        raise RuntimeError(
+            f"{uninvoiced} buyers have never been invoiced, so there is no user to give them to; "
+            "delete them or invoice them before upgrading"
+        )
+    with op.batch_alter_table("buyers") as batch_op:
+        batch_op.add_column(sa.Column("user_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_buyers_user_id", "users", ["user_id"], ["id"])
+    _assign_owners()
+    op.create_index("ix_buyers_user_name", "buyers", ["user_id", sa.text("lower(name)"), "id"], unique=False)
+
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO buyers_fts(buyers_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        for trigger in ("buyers_fts_ai", "buyers_fts_ad", "buyers_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS buyers_fts")
+    op.drop_index("ix_buyers_user_name", table_name="buyers")
+    with op.batch_alter_table("buyers") as batch_op:
+        batch_op.drop_constraint("fk_buyers_user_id", type_="foreignkey")
+        batch_op.drop_column("user_id")
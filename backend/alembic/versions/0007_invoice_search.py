@@ -0,0 +1,35 @@
+"""fts5 search index over invoices, items and parties"""
+
+from alembic import op
+
+revision = "0007_invoice_search"
+down_revision = "0006_buyer_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Search documents are rebuilt per invoice from its lines.
+    op.create_index("ix_invoice_items_invoice_id", "invoice_items", ["invoice_id"], unique=False)
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS invoices_fts USING fts5("
+        "invoice_number, parties, items, hsn, owner, tokenize='unicode61')"
+    )
+    op.execute(
+        "INSERT INTO invoices_fts(rowid, invoice_number, parties, items, hsn, owner) "
+        "SELECT invoices.id, invoices.invoice_number, "
+        "sellers.name || ' ' || sellers.gstin || ' ' || buyers.name || ' ' || coalesce(buyers.gstin, ''), "
+        "coalesce(group_concat(invoice_items.name, ' '), ''), coalesce(group_concat(DISTINCT invoice_items.hsn_code), ''), "
+        "'u' || sellers.user_id "
+        "FROM invoices JOIN sellers ON sellers.id = invoices.seller_id JOIN buyers ON buyers.id = invoices.buyer_id "
+        "LEFT JOIN invoice_items ON invoice_items.invoice_id = invoices.id "
+        "GROUP BY invoices.id"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS invoices_fts")
+    op.drop_index("ix_invoice_items_invoice_id", table_name="invoice_items")
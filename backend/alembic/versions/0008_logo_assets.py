@@ -0,0 +1,125 @@
+"""store invoice logos once in a content-addressed assets table"""
+
+import base64
+import binascii
+import hashlib
+from typing import Iterator
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_logo_assets"
+down_revision = "0007_invoice_search"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+SIGNATURES = {b"\x89PNG\r\n\x1a\n": "image/png", b"\xff\xd8\xff": "image/jpeg", b"GIF87a": "image/gif", b"GIF89a": "image/gif"}
+
+assets = sa.table(
+    "assets",
+    sa.column("id", sa.Integer),
+    sa.column("sha256", sa.String),
+    sa.column("content_type", sa.String),
+    sa.column("size", sa.Integer),
+    sa.column("data", sa.LargeBinary),
+    sa.column("created_at", sa.DateTime),
+)
+invoices = sa.table(
+    "invoices",
+    sa.column("id", sa.Integer),
+    sa.column("logo_base64", sa.Text),
+    sa.column("logo_asset_id", sa.Integer),
+)
+
+
+def _decode(encoded: str) -> tuple[bytes, str] | None:
+    _, marker, payload = encoded.partition("base64,")
+    try:
+        data = base64.b64decode("".join((payload if marker else encoded).split()), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    content_type = next((kind for signature, kind in SIGNATURES.items() if data.startswith(signature)), None)
+    return (data, content_type) if content_type and data else None
+
+
+def _logo_batches(bind) -> Iterator[list]:
+    # Walk invoices in id order so only one batch of logos is in memory.
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(invoices.c.id, invoices.c.logo_base64)
+            .where(invoices.c.id > last_id, invoices.c.logo_base64.is_not(None), invoices.c.logo_base64 != "")
+            .order_by(invoices.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows
+
+
+def upgrade() -> None:
+    # Dropping logo_base64 would lose logos that cannot be moved to assets,
+    # so refuse before any DDL; SQLite does not roll DDL back here.
+    bind = op.get_bind()
+    undecodable = [row.id for rows in _logo_batches(bind) for row in rows if _decode(row.logo_base64) is None]
+    if undecodable:
+        shown = ", ".join(map(str, undecodable[:20])) + (", ..." if len(undecodable) > 20 else "")
+        raise RuntimeError(
+            f"{len(undecodable)} invoice logos are not base64 PNG, JPEG or GIF images (invoice ids {shown}); "
+            "fix or clear their logo_base64 before upgrading"
+        )
+
+    op.create_table(
+        "assets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("content_type", sa.String(length=100), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.current_timestamp()),
+    )
+    op.create_index("ix_assets_id", "assets", ["id"], unique=False)
+    op.create_index("ix_assets_sha256", "assets", ["sha256"], unique=True)
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.add_column(sa.Column("logo_asset_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_invoices_logo_asset_id", "assets", ["logo_asset_id"], ["id"])
+
+    # Identical logos collapse onto one asset row by digest.
+    asset_ids: dict[str, int] = {}
+    for rows in _logo_batches(bind):
+        updates = []
+        for row in rows:
+            data, content_type = _decode(row.logo_base64)
+            digest = hashlib.sha256(data).hexdigest()
+            if digest not in asset_ids:
+                asset_ids[digest] = bind.execute(
+                    assets.insert()
+                    .values(sha256=digest, content_type=content_type, size=len(data), data=data)
+                    .returning(assets.c.id)
+                ).scalar_one()
+            updates.append({"invoice_id": row.id, "asset_id": asset_ids[digest]})
+        if updates:
+            bind.execute(
+                invoices.update().where(invoices.c.id == sa.bindparam("invoice_id")).values(logo_asset_id=sa.bindparam("asset_id")),
+                updates,
+            )
+
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.drop_column("logo_base64")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.add_column(sa.Column("logo_base64", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    for asset in bind.execute(sa.select(assets.c.id, assets.c.content_type, assets.c.data)):
+        encoded = f"data:{asset.content_type};base64,{base64.b64encode(asset.data).decode('ascii')}"
+        bind.execute(invoices.update().where(invoices.c.logo_asset_id == asset.id).values(logo_base64=encoded))
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.drop_constraint("fk_invoices_logo_asset_id", type_="foreignkey")
+        batch_op.drop_column("logo_asset_id")
+    op.drop_index("ix_assets_sha256", table_name="assets")
+    op.drop_index("ix_assets_id", table_name="assets")
+    op.drop_table("assets")
@@ -0,0 +1,20 @@
+"""assign invoice numbers at finalization; drafts carry none"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_number_at_finalize"
+down_revision = "0008_logo_assets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.alter_column("invoice_number", existing_type=sa.String(length=50), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE invoices SET invoice_number = 'DRAFT-' || id WHERE invoice_number IS NULL")
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.alter_column("invoice_number", existing_type=sa.String(length=50), nullable=False)
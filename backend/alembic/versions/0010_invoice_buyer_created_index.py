@@ -0,0 +1,16 @@
+"""index invoices by buyer and date for GSTR-2B reconciliation"""
+
+from alembic import op
+
+revision = "0010_invoice_buyer_created_index"
+down_revision = "0009_number_at_finalize"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_invoices_buyer_created", "invoices", ["buyer_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_buyer_created", table_name="invoices")
@@ -0,0 +1,28 @@
+"""append-only invoice change feed"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_invoice_events"
+down_revision = "0010_invoice_buyer_created_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "invoice_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=False),
+        sa.Column("type", sa.String(length=32), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_invoice_events_user_offset", "invoice_events", ["user_id", "id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoice_events_user_offset", table_name="invoice_events")
+    op.drop_table("invoice_events")
@@ -0,0 +1,63 @@
+"""recurring invoice templates"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_recurring_templates"
+down_revision = "0011_invoice_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recurring_templates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("seller_id", sa.Integer(), sa.ForeignKey("sellers.id"), nullable=False),
+        sa.Column("buyer_id", sa.Integer(), sa.ForeignKey("buyers.id"), nullable=False),
+        sa.Column("invoice_type", sa.String(length=3), nullable=False),
+        sa.Column("reverse_charge", sa.Boolean(), nullable=False),
+        sa.Column("cadence", sa.String(length=16), nullable=False),
+        sa.Column("start_on", sa.Date(), nullable=False),
+        sa.Column("periods_generated", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("next_run_on", sa.Date(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_recurring_templates_id", "recurring_templates", ["id"], unique=False)
+    op.create_index("ix_recurring_templates_user_id", "recurring_templates", ["user_id"], unique=False)
+    op.create_index("ix_recurring_templates_due", "recurring_templates", ["active", "next_run_on"], unique=False)
+    op.create_table(
+        "recurring_template_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("template_id", sa.Integer(), sa.ForeignKey("recurring_templates.id"), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("hsn_sac", sa.String(length=12), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+        sa.Column("discount", sa.Float(), nullable=False),
+        sa.Column("gst_rate", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_recurring_template_items_id", "recurring_template_items", ["id"], unique=False)
+    op.create_index("ix_recurring_template_items_template_id", "recurring_template_items", ["template_id"], unique=False)
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.add_column(sa.Column("recurring_template_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("recurring_period", sa.Date(), nullable=True))
+        batch_op.create_foreign_key("fk_invoices_recurring_template_id", "recurring_templates", ["recurring_template_id"], ["id"])
+    op.create_index("ux_invoices_recurring_period", "invoices", ["recurring_template_id", "recurring_period"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_invoices_recurring_period", table_name="invoices")
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.drop_constraint("fk_invoices_recurring_template_id", type_="foreignkey")
+        batch_op.drop_column("recurring_period")
+        batch_op.drop_column("recurring_template_id")
+    op.drop_index("ix_recurring_template_items_template_id", table_name="recurring_template_items")
+    op.drop_index("ix_recurring_template_items_id", table_name="recurring_template_items")
+    op.drop_table("recurring_template_items")
+    op.drop_index("ix_recurring_templates_due", table_name="recurring_templates")
+    op.drop_index("ix_recurring_templates_user_id", table_name="recurring_templates")
+    op.drop_index("ix_recurring_templates_id", table_name="recurring_templates")
+    op.drop_table("recurring_templates")
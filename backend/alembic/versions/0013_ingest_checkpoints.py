@@ -0,0 +1,26 @@
+"""bulk ingest checkpoints"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_ingest_checkpoints"
+down_revision = "0012_recurring_templates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_checkpoints",
+        sa.Column("source", sa.String(length=1024), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("source_size", sa.Integer(), nullable=False),
+        sa.Column("records_done", sa.Integer(), nullable=False),
+        sa.Column("invoices", sa.Integer(), nullable=False),
+        sa.Column("lines", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_checkpoints")
@@ -0,0 +1,42 @@
+"""product catalog and catalog-filled invoice lines"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online_migration import forget, online
+
+revision = "0014_products"
+down_revision = "0013_ingest_checkpoints"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    forget(op, f"{revision}_downgrade")
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.Column("hsn_sac", sa.String(length=12), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+        sa.Column("gst_rate", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_products_id", "products", ["id"], unique=False)
+    op.create_index("ix_products_user_id", "products", ["user_id"], unique=False)
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite adds a nullable reference column in place, without copying
+        # invoice_items; alembic would insist on a batch table rebuild.
+        op.execute("ALTER TABLE invoice_items ADD COLUMN product_id INTEGER REFERENCES products (id)")
+    else:
+        op.add_column("invoice_items", sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=True))
+
+
+def downgrade() -> None:
+    # SQLite cannot drop a column that is part of a foreign key.
+    with online(op, "0014_products_downgrade") as migration:
+        migration.copy_and_swap("invoice_items", drop=["product_id"])
+    op.drop_index("ix_products_user_id", table_name="products")
+    op.drop_index("ix_products_id", table_name="products")
+    op.drop_table("products")
@@ -0,0 +1,95 @@
+"""index invoice lines by HSN/SAC and rate for draft re-pricing"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online_migration import forget, online
+
+revision = "0015_invoice_items_hsn_rate_index"
+down_revision = "0014_products"
+branch_labels = None
+depends_on = None
+
+# 0002 stored statuses as DRAFT/FINAL while the application kept writing
+# draft/finalized.
+LOWER_STATUS = "CASE status WHEN 'DRAFT' THEN 'draft' WHEN 'FINAL' THEN 'finalized' ELSE status END"
+UPPER_STATUS = "CASE status WHEN 'draft' THEN 'DRAFT' WHEN 'finalized' THEN 'FINAL' ELSE status END"
+
+
+def _line_columns() -> set[str]:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns("invoice_items")}
+
+
+def _status_checked() -> bool:
+    return "ck_invoice_status" in {check["name"] for check in sa.inspect(op.get_bind()).get_check_constraints("invoices")}
+
+
+def _seller_gstin_unique() -> bool:
+    inspector = sa.inspect(op.get_bind())
+    unique = [c["column_names"] for c in inspector.get_unique_constraints("sellers")]
+    unique += [i["column_names"] for i in inspector.get_indexes("sellers") if i["unique"]]
+    return ["gstin"] in unique
+
+
+def _align_with_models(migration) -> None:
+    """Undo where the revision chain drifted from the models.
+
+    Databases created from the models already match them, so every step
+    checks first.
+    """
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    if _status_checked():
+        if sqlite:
+            migration.copy_and_swap("invoices", values={"status": LOWER_STATUS}, drop_checks=["ck_invoice_status"])
+        else:
+            op.drop_constraint("ck_invoice_status", "invoices", type_="check")
+            op.execute(f"UPDATE invoices SET status = {LOWER_STATUS}")
+    # 0002 renamed the column to hsn_code, while the models kept hsn_sac.
+    if "hsn_code" in _line_columns():
+        if sqlite:
+            migration.copy_and_swap(
+                "invoice_items",
+                drop=["hsn_code"],
+                columns=[sa.Column("hsn_sac", sa.String(length=12), nullable=False)],
+                values={"hsn_sac": "hsn_code"},
+            )
+        else:
+            op.drop_constraint("fk_invoice_items_hsn_code", "invoice_items", type_="foreignkey")
+            op.alter_column("invoice_items", "hsn_code", new_column_name="hsn_sac", type_=sa.String(length=12), existing_nullable=False)
+    if not _seller_gstin_unique():
+        duplicated = op.get_bind().scalar(sa.text("SELECT count(*) FROM (SELECT 1 FROM sellers GROUP BY gstin HAVING count(*) > 1)"))
+        if duplicated:
+            raise RuntimeError(f"{duplicated} GSTINs are registered by more than one seller; they must be unique before upgrading")
+        op.create_index("ux_sellers_gstin", "sellers", ["gstin"], unique=True)
+
+
+def upgrade() -> None:
+    forget(op, f"{revision}_downgrade")
+    if op.get_bind().dialect.name == "sqlite":
+        with online(op, revision) as migration:
+            _align_with_models(migration)
+    else:
+        _align_with_models(None)
+    op.create_index("ix_invoice_items_hsn_rate", "invoice_items", ["hsn_sac", "gst_rate", "invoice_id"], unique=False)
+
+
+def downgrade() -> None:
+    forget(op, revision)
+    op.drop_index("ix_invoice_items_hsn_rate", table_name="invoice_items")
+    if "ux_sellers_gstin" in {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("sellers")}:
+        op.drop_index("ux_sellers_gstin", table_name="sellers")
+    status_check = sa.CheckConstraint("status IN ('DRAFT', 'FINAL')", name="ck_invoice_status")
+    if op.get_bind().dialect.name == "sqlite":
+        with online(op, f"{revision}_downgrade") as migration:
+            migration.copy_and_swap(
+                "invoice_items",
+                drop=["hsn_sac"],
+                columns=[sa.Column("hsn_code", sa.String(length=8), sa.ForeignKey("hsn_master.code", name="fk_invoice_items_hsn_code"), nullable=False)],
+                values={"hsn_code": "hsn_sac"},
+            )
+            migration.copy_and_swap("invoices", values={"status": UPPER_STATUS}, constraints=[status_check])
+    else:
+        op.alter_column("invoice_items", "hsn_sac", new_column_name="hsn_code", type_=sa.String(length=8), existing_nullable=False)
+        op.create_foreign_key("fk_invoice_items_hsn_code", "invoice_items", "hsn_master", ["hsn_code"], ["code"])
+        op.execute(f"UPDATE invoices SET status = {UPPER_STATUS}")
+        op.create_check_constraint("ck_invoice_status", "invoices", "status IN ('DRAFT', 'FINAL')")
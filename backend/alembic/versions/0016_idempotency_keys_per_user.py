@@ -0,0 +1,40 @@
+"""scope idempotency keys to their user"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016_idempotency_keys_per_user"
+down_revision = "0015_invoice_items_hsn_rate_index"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "user_id, key, request_hash, invoice_id, created_at"
+
+
+def _rebuild(primary_key: list[str]) -> None:
+    # Keys live for a day at most, so the table is small; a plain copy will do.
+    op.create_table(
+        "_idempotency_keys_new",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("key", sa.String(length=128), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint(*primary_key),
+    )
+    op.execute(f"INSERT INTO _idempotency_keys_new ({COLUMNS}) SELECT {COLUMNS} FROM idempotency_keys")
+    op.drop_table("idempotency_keys")
+    op.rename_table("_idempotency_keys_new", "idempotency_keys")
+
+
+def upgrade() -> None:
+    _rebuild(["user_id", "key"])
+
+
+def downgrade() -> None:
+    # Two users may now share a key; the oldest row keeps it.
+    op.execute(
+        "DELETE FROM idempotency_keys WHERE EXISTS (SELECT 1 FROM idempotency_keys older "
+        "WHERE older.key = idempotency_keys.key AND (older.created_at, older.user_id) < (idempotency_keys.created_at, idempotency_keys.user_id))"
+    )
+    _rebuild(["key"])
@@ -0,0 +1,82 @@
+"""number invoices per seller and record their issue date"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.online_migration import forget, online
+
+revision = "0017_per_seller_numbering"
+down_revision = "0016_idempotency_keys_per_user"
+branch_labels = None
+depends_on = None
+
+# FY/STATE/SEQ numbers handed out by the sequences: "2026-27/07/000042".
+SEQUENCE_NUMBER = "invoice_number LIKE '____-__/__/%'"
+
+
+def _rebuild_sequences(owner: sa.Column, unique_name: str, seed: str) -> None:
+    # One row per series, so the table is small; a plain copy will do.
+    op.create_table(
+        "_invoice_sequences_new",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("financial_year", sa.String(length=7), nullable=False),
+        owner,
+        sa.Column("current_value", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("financial_year", owner.name, name=unique_name),
+    )
+    op.execute(f"INSERT INTO _invoice_sequences_new (financial_year, {owner.name}, current_value) {seed}")
+    op.drop_index("ix_invoice_sequences_id", table_name="invoice_sequences")
+    op.drop_table("invoice_sequences")
+    op.rename_table("_invoice_sequences_new", "invoice_sequences")
+    op.create_index("ix_invoice_sequences_id", "invoice_sequences", ["id"], unique=False)
+
+
+def upgrade() -> None:
+    forget(op, f"{revision}_downgrade")
+    # Each seller's series continues after the highest number it already
+    # holds, so no new number can collide with an old one.
+    _rebuild_sequences(
+        sa.Column("seller_id", sa.Integer(), sa.ForeignKey("sellers.id"), nullable=False),
+        "uq_invoice_sequence_fy_seller",
+        "SELECT substr(invoice_number, 1, 7), seller_id, max(CAST(substr(invoice_number, 12) AS INTEGER)) "
+        f"FROM invoices WHERE {SEQUENCE_NUMBER} GROUP BY substr(invoice_number, 1, 7), seller_id",
+    )
+    # Finalized invoices were dated by creation until now; that is the best
+    # issue date there is for them.
+    if op.get_bind().dialect.name == "sqlite":
+        with online(op, "0017_per_seller_numbering") as migration:
+            migration.copy_and_swap(
+                "invoices",
+                columns=[sa.Column("issued_on", sa.Date(), nullable=True)],
+                values={"issued_on": "CASE WHEN status = 'finalized' THEN date(created_at, '+330 minutes') END"},
+                drop_unique=[["invoice_number"]],
+            )
+    else:
+        op.add_column("invoices", sa.Column("issued_on", sa.Date(), nullable=True))
+        op.execute("UPDATE invoices SET issued_on = CAST(created_at + INTERVAL '330 minutes' AS DATE) WHERE status = 'finalized'")
+        op.drop_constraint("uq_invoices_invoice_number", "invoices", type_="unique")
+    op.create_index("ux_invoices_seller_number", "invoices", ["seller_id", "invoice_number"], unique=True)
+
+
+def downgrade() -> None:
+    forget(op, revision)
+    duplicated = op.get_bind().scalar(
+        sa.text("SELECT count(*) FROM (SELECT 1 FROM invoices WHERE invoice_number IS NOT NULL GROUP BY invoice_number HAVING count(*) > 1)")
+    )
+    if duplicated:
+        raise RuntimeError(f"{duplicated} invoice numbers are used by more than one seller; they must be unique before downgrading")
+    op.drop_index("ux_invoices_seller_number", table_name="invoices")
+    if op.get_bind().dialect.name == "sqlite":
+        with online(op, "0017_per_seller_numbering_downgrade") as migration:
+            migration.copy_and_swap("invoices", drop=["issued_on"], constraints=[sa.UniqueConstraint("invoice_number")])
+    else:
+        op.create_unique_constraint("uq_invoices_invoice_number", "invoices", ["invoice_number"])
+        op.drop_column("invoices", "issued_on")
+    # A state's series continues after the highest value any of its sellers reached.
+    _rebuild_sequences(
+        sa.Column("state_code", sa.String(length=2), nullable=False),
+        "uq_invoice_sequence_fy_state",
+        "SELECT invoice_sequences.financial_year, sellers.state_code, max(invoice_sequences.current_value) "
+        "FROM invoice_sequences JOIN sellers ON sellers.id = invoice_sequences.seller_id "
+        "GROUP BY invoice_sequences.financial_year, sellers.state_code",
+    )
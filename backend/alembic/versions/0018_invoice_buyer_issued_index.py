@@ -0,0 +1,18 @@
+"""index invoices by buyer and issue date for GSTR-2B reconciliation"""
+
+from alembic import op
+
+revision = "0018_invoice_buyer_issued_index"
+down_revision = "0017_per_seller_numbering"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_invoices_buyer_issued", "invoices", ["buyer_id", "issued_on"], unique=False)
+    op.drop_index("ix_invoices_buyer_created", table_name="invoices")
+
+
+def downgrade() -> None:
+    op.create_index("ix_invoices_buyer_created", "invoices", ["buyer_id", "created_at"], unique=False)
+    op.drop_index("ix_invoices_buyer_issued", table_name="invoices")
@@ -0,0 +1,94 @@
+"""Admin endpoints: on-demand profiling of this worker, and re-pricing drafts after rate changes."""
+
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.api.deps import get_admin_user
+from app.core.config import settings
+from app.db.session import get_directory_db
+from app.db.sharding import shard_router
+from app.schemas.schemas import RepricingReportRead, RepricingRequest
+from app.services.profiling_service import (
+    ProfileBusy,
+    ProfileNotReady,
+    get_profile,
+    list_profiles,
+    start_cpu_profile,
+    start_memory_profile,
+    to_pstats,
+    to_speedscope,
+)
+from app.services.repricing_service import RateNotYetEffective, reprice_all
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+
+@router.post("/profiles/cpu", status_code=202)
+def start_cpu(
+    seconds: float = Query(default=10, gt=0, le=settings.profile_max_seconds),
+    interval_ms: float = Query(default=settings.profile_sample_interval_ms, ge=1, le=1000),
+) -> dict:
+    """Sample every thread's stack for `seconds`; download the result once `finished`."""
+    try:
+        return start_cpu_profile(seconds, interval_ms).summary()
+    except ProfileBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@router.post("/profiles/memory", status_code=202)
+def start_memory(
+    seconds: float = Query(default=10, gt=0, le=settings.profile_max_seconds),
+    top: int = Query(default=100, ge=1, le=1000),
+) -> dict:
+    """Record the `top` allocation sites that grew most over `seconds` (tracemalloc)."""
+    try:
+        return start_memory_profile(seconds, top).summary()
+    except ProfileBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
+@router.get("/profiles")
+def profiles() -> list[dict]:
+    """Recent profiles of this worker, newest first."""
+    return list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(profile_id: str, format: Literal["speedscope", "pstats"] = "speedscope") -> Response:
+    """Download a finished profile for speedscope.app, or as pstats for CPU samples."""
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        content = to_pstats(profile) if format == "pstats" else to_speedscope(profile)
+    except ProfileNotReady as exc:
+        raise HTTPException(status_code=409, detail=str(exc), headers={"Retry-After": "1"}) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    suffix = "prof" if format == "pstats" else "speedscope.json"
+    return Response(
+        content,
+        media_type="application/octet-stream" if format == "pstats" else "application/json",
+        headers={"Content-Disposition": f"attachment; filename={profile.kind}-{profile.id}.{suffix}"},
+    )
+
+
+@router.post("/repricing", response_model=RepricingReportRead)
+def reprice(payload: RepricingRequest, db: Session = Depends(get_directory_db)) -> RepricingReportRead:
+    """Move every open draft line of an HSN/SAC code from the old GST rate to the new one, in every database."""
+    # Without sharding, tenant data lives in the directory database.
+    factories = None if shard_router is not None else [sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())]
+    try:
+        report = reprice_all(payload.hsn_sac, payload.old_rate, payload.new_rate, payload.effective_on, factories)
+    except RateNotYetEffective as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return RepricingReportRead(
+        **payload.model_dump(),
+        lines=report.lines,
+        invoices=report.invoices,
+        batches=report.batches,
+        elapsed_ms=round(report.duration_s * 1000, 2),
+    )
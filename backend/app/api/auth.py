@@ -4,8 +4,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
+from app.api.deps import bulkhead
 from app.core.security import create_access_token, get_password_hash, verify_password
-from app.db.session import get_db
+from app.db.session import get_directory_db
 from app.models.models import User
 from app.schemas.schemas import Token, UserCreate, UserRead
 
@@ -13,7 +14,8 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserRead)
-def register(payload: UserCreate, db: Session = Depends(get_db)) -> User:
+@bulkhead("auth")
+def register(payload: UserCreate, db: Session = Depends(get_directory_db)) -> User:
     """Register a new user account."""
     existing = db.query(User).filter(User.email == payload.email).first()
     if existing:
@@ -26,7 +28,8 @@ def register(payload: UserCreate, db: Session = Depends(get_db)) -> User:
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> Token:
+@bulkhead("auth")
+def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_directory_db)) -> Token:
     """Issue JWT token for valid credentials."""
     user = db.query(User).filter(User.email == form_data.username).first()
     if not user or not verify_password(form_data.password, user.password_hash):
@@ -1,13 +1,18 @@
 """Buyer endpoints."""
 
-from fastapi import APIRouter, Depends, HTTPException
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
 from app.db.session import get_db
 from app.models.models import Buyer, User
-from app.schemas.schemas import BuyerCreate, BuyerRead
-from app.utils.gst import is_valid_gstin, state_code_from_gstin
+from app.schemas.schemas import BuyerCreate, BuyerImportReport, BuyerPage, BuyerRead
+from app.services.buyer_import_service import BuyerImportAborted, BuyerImportResult, import_buyers, read_buyer_rows
+from app.services.buyer_search_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, BuyerPageResult, search_buyers
+from app.services.party_cache import party_cache
+from app.utils.gst import check_gstin, state_code_from_gstin
 
 router = APIRouter(prefix="/buyers", tags=["buyers"])
 
@@ -16,22 +21,54 @@ router = APIRouter(prefix="/buyers", tags=["buyers"])
 def create_buyer(
     payload: BuyerCreate,
     db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user),
 ) -> Buyer:
     """Create buyer profile."""
     if payload.gstin:
-        if not is_valid_gstin(payload.gstin):
-            raise HTTPException(status_code=400, detail="Invalid GSTIN format")
+        check = check_gstin(payload.gstin)
+        if not check.valid:
+            raise HTTPException(status_code=400, detail=check.reason)
         if state_code_from_gstin(payload.gstin) != payload.state_code:
             raise HTTPException(status_code=400, detail="GSTIN state code mismatch")
-    buyer = Buyer(**payload.model_dump())
+    buyer = Buyer(**payload.model_dump(), user_id=current_user.id)
     db.add(buyer)
     db.commit()
+    party_cache.invalidate(current_user.id)
     db.refresh(buyer)
     return buyer
 
 
-@router.get("", response_model=list[BuyerRead])
-def list_buyers(db: Session = Depends(get_db), _: User = Depends(get_current_user)) -> list[Buyer]:
-    """List buyers."""
-    return db.query(Buyer).all()
+@router.get("", response_model=BuyerPage)
+def list_buyers(
+    q: str = Query(default="", max_length=100),
+    cursor: str | None = Query(default=None, max_length=512),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> BuyerPageResult:
+    """Search the current user's buyers by name, GSTIN or address, one page at a time."""
+    try:
+        return search_buyers(db, current_user.id, q=q, cursor=cursor, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post("/import", response_model=BuyerImportReport)
+def import_buyers_csv(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> BuyerImportResult:
+    """Bulk import buyers from CSV (name, gstin, address, state_code columns)."""
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_buyers(db, read_buyer_rows(stream), current_user.id)
+    except BuyerImportAborted as exc:
+        # Some buyers went in before the error; report them like a finished import.
+        report = BuyerImportReport.model_validate(exc.result).model_dump()
+        raise HTTPException(status_code=400, detail={"error": exc.reason, "report": report}) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    finally:
+        # Batches commit as they go, so some may be in even after an error.
+        party_cache.invalidate(current_user.id)
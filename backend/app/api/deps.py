@@ -1,17 +1,22 @@
 """Common API dependencies."""
 
+import functools
+from typing import Callable
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.db.session import get_db
+from app.db.session import get_directory_db
 from app.models.models import User
+from app.services.bulkhead import BulkheadFull, bulkheads
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+def get_current_user(db: Session = Depends(get_directory_db), token: str = Depends(oauth2_scheme)) -> User:
     """Return currently authenticated user."""
     email = decode_access_token(token)
     if not email:
@@ -20,3 +25,34 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
+
+
+def get_admin_user(user: User = Depends(get_current_user)) -> User:
+    """Return the current user if their email is in `ADMIN_EMAILS`."""
+    if user.email not in settings.admin_emails:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return user
+
+
+def bulkhead(name: str) -> Callable:
+    """Run a sync endpoint in the named bulkhead instead of the shared threadpool.
+
+    The wrapper keeps the endpoint's signature, so FastAPI still resolves its
+    parameters and dependencies; a full bulkhead answers 503 with Retry-After.
+    """
+
+    def decorate(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await bulkheads[name].run(functools.partial(endpoint, *args, **kwargs))
+            except BulkheadFull as exc:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Too many concurrent {exc.name} requests, retry shortly",
+                    headers={"Retry-After": str(exc.retry_after)},
+                ) from exc
+
+        return wrapper
+
+    return decorate
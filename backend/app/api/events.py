@@ -0,0 +1,66 @@
+"""Invoice change feed endpoints."""
+
+import anyio.to_thread
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.models import User
+from app.schemas.schemas import EVENTS_PAGE_MAX, InvoiceEventPage
+from app.services.event_service import EventRow, events_page_json, read_events, stream_events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("", response_model=InvoiceEventPage)
+def list_events(
+    after: int = Query(default=0, ge=0, description="Return events with a greater offset"),
+    limit: int = Query(default=100, ge=1, le=EVENTS_PAGE_MAX),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    """Page through the caller's invoice changes in commit order.
+
+    Poll with `after=next_after` to receive only what changed since the
+    previous call.
+    """
+    rows = read_events(db, current_user.id, after, limit)
+    return Response(events_page_json(rows, after), media_type="application/json")
+
+
+def _read_page(db: Session, user_id: int, after: int) -> list[EventRow]:
+    try:
+        return read_events(db, user_id, after, settings.event_page_size)
+    finally:
+        # Hand the connection back between pages so idle streams hold none;
+        # the closed session reconnects on the next read.
+        db.close()
+
+
+@router.get("/stream")
+async def stream_invoice_events(
+    after: int | None = Query(default=None, ge=0, description="Start after this offset (default: Last-Event-ID, else 0)"),
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Server-Sent Events stream of the caller's invoice changes.
+
+    Each event carries its offset as the SSE `id`, so a reconnecting
+    EventSource resumes where it stopped. Pages are read only after the
+    previous one was sent, so a slow consumer is never buffered for.
+    """
+    if after is None:
+        if last_event_id is not None and not last_event_id.isdigit():
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be an event offset")
+        after = int(last_event_id or 0)
+    user_id = current_user.id
+
+    async def fetch(cursor: int) -> list[EventRow]:
+        return await anyio.to_thread.run_sync(_read_page, db, user_id, cursor)
+
+    stream = stream_events(fetch, user_id, after, settings.event_stream_poll_seconds, settings.event_stream_heartbeat_seconds)
+    return StreamingResponse(stream, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
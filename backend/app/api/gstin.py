@@ -0,0 +1,27 @@
+"""GSTIN validation endpoints."""
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_user
+from app.models.models import User
+from app.schemas.schemas import GstinValidateRequest, GstinValidationRead
+from app.utils.gst import STATE_CODES, state_code_from_gstin, validate_gstins
+
+router = APIRouter(prefix="/gstin", tags=["gstin"])
+
+
+@router.post("/validate", response_model=list[GstinValidationRead])
+def validate_gstin_batch(payload: GstinValidateRequest, _: User = Depends(get_current_user)) -> list[GstinValidationRead]:
+    """Validate format, state code and check digit for a batch of GSTINs."""
+    results = []
+    for check in validate_gstins(payload.gstins):
+        state_code = state_code_from_gstin(check.gstin)
+        results.append(
+            GstinValidationRead(
+                gstin=check.gstin,
+                valid=check.valid,
+                state_code=state_code if state_code in STATE_CODES else None,
+                reason=check.reason,
+            )
+        )
+    return results
@@ -1,44 +1,105 @@
 """Invoice CRUD and export endpoints."""
 
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import HTMLResponse, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
-from app.api.deps import get_current_user
+from app.api.deps import bulkhead, get_current_user
+from app.core.config import settings
 from app.db.session import get_db
-from app.models.models import Buyer, Invoice, InvoiceItem, Seller, TaxSummary, User
-from app.schemas.schemas import InvoiceCreate, InvoiceRead
-from app.services.pdf_service import generate_invoice_pdf
+from app.models.models import Invoice, InvoiceItem, Seller, TaxSummary, User
+from app.schemas.schemas import (
+    FinalizedInvoiceRead,
+    FinalizeSkipRead,
+    InvoiceCreate,
+    InvoiceFinalizeBatch,
+    InvoiceFinalizeBatchResult,
+    InvoiceItemsPatch,
+    InvoiceRead,
+    InvoiceSearchPage,
+)
+from app.services.asset_service import AssetError, logo_images, store_logo
+from app.services.catalog_service import UnknownProduct, fill_lines
+from app.services.event_service import CREATED, UPDATED, record_invoice_event
+from app.services.finalize_service import finalize_invoices
+from app.services.idempotency_service import IdempotencyConflict, idempotency_store, request_fingerprint
+from app.services.invoice_items_service import LineChanges, LineItemError, apply_line_changes, diff_lines
+from app.services.invoice_read_service import list_invoice_dicts
+from app.services.invoice_search_service import (
+    DEFAULT_PAGE_SIZE,
+    MAX_OFFSET,
+    MAX_PAGE_SIZE,
+    InvoiceSearchResult,
+    search_invoices,
+)
+from app.services.party_cache import party_cache
 from app.services.tax_service import compute_line, compute_totals
 from app.utils.number_words import amount_to_words
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
 
-def next_invoice_number(db: Session) -> str:
-    """Generate deterministic auto-increment invoice number."""
-    year = datetime.utcnow().year
-    prefix = f"INV-{year}-"
-    latest = db.query(Invoice).filter(Invoice.invoice_number.like(f"{prefix}%")).order_by(Invoice.id.desc()).first()
-    sequence = 1
-    if latest:
-        sequence = int(latest.invoice_number.split("-")[-1]) + 1
-    return f"{prefix}{sequence:05d}"
-
-
 @router.post("", response_model=InvoiceRead)
 def create_invoice(
     payload: InvoiceCreate,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=128),
+) -> Invoice:
+    """Create draft invoice with tax calculations.
+
+    Requests carrying an `Idempotency-Key` are single-flighted per user and key; a retry
+    with the same payload replays the stored invoice without recomputation.
+    """
+    if not idempotency_key:
+        return _create_invoice(payload, db, current_user)
+
+    # Line ids only matter for updates; leave them out so fingerprints stay stable.
+    request_hash = request_fingerprint(
+        payload.model_dump(mode="json", exclude={"items": {"__all__": {"id"}}}, exclude_none=True)
+    )
+    with idempotency_store.single_flight(current_user.id, idempotency_key):
+        idempotency_store.maybe_sweep(db)
+        invoice_id = _lookup_idempotent(db, idempotency_key, current_user.id, request_hash)
+        if invoice_id is None:
+            try:
+                return _create_invoice(payload, db, current_user, idempotency_key, request_hash)
+            except IntegrityError:
+                # Another worker process committed the same key first.
+                db.rollback()
+                invoice_id = _lookup_idempotent(db, idempotency_key, current_user.id, request_hash)
+                if invoice_id is None:
+                    raise
+        response.headers["Idempotent-Replayed"] = "true"
+        return _load_invoice(db, invoice_id)
+
+
+def _load_invoice(db: Session, invoice_id: int) -> Invoice:
+    # One joined SELECT; reading attributes of the expired instance after
+    # commit would refresh it and then lazy-load the items separately.
+    return db.query(Invoice).options(joinedload(Invoice.items)).filter(Invoice.id == invoice_id).one()
+
+
+def _lookup_idempotent(db: Session, key: str, user_id: int, request_hash: str) -> int | None:
+    try:
+        return idempotency_store.lookup(db, key, user_id, request_hash)
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _create_invoice(
+    payload: InvoiceCreate,
+    db: Session,
+    current_user: User,
+    idempotency_key: str | None = None,
+    request_hash: str | None = None,
 ) -> Invoice:
-    """Create draft invoice with tax calculations."""
-    seller = db.query(Seller).filter(Seller.id == payload.seller_id, Seller.user_id == current_user.id).first()
+    seller = party_cache.seller(db, current_user.id, payload.seller_id)
     if not seller:
         raise HTTPException(status_code=404, detail="Seller not found")
-    buyer = db.query(Buyer).filter(Buyer.id == payload.buyer_id).first()
+    buyer = party_cache.buyer(db, current_user.id, payload.buyer_id)
     if not buyer:
         raise HTTPException(status_code=404, detail="Buyer not found")
 
@@ -46,17 +107,14 @@ def create_invoice(
     if payload.invoice_type == "B2B" and not buyer.gstin:
         raise HTTPException(status_code=400, detail="Buyer GSTIN required for B2B")
 
-    invoice_number = next_invoice_number(db)
-    if db.query(Invoice).filter(Invoice.invoice_number == invoice_number).first():
-        raise HTTPException(status_code=409, detail="Duplicate invoice number")
-
-    line_results = [compute_line(i.quantity, i.unit_price, i.discount, i.gst_rate) for i in payload.items]
+    lines = _fill_lines(db, current_user.id, [item.model_dump(exclude={"id"}) for item in payload.items])
+    line_results = [compute_line(line["quantity"], line["unit_price"], line["discount"], line["gst_rate"]) for line in lines]
     totals = compute_totals(line_results, intra_state=supply_type == "intra")
+    logo_asset_id = _store_logo(db, payload.logo_base64)
 
     invoice = Invoice(
         seller_id=payload.seller_id,
         buyer_id=payload.buyer_id,
-        invoice_number=invoice_number,
         invoice_type=payload.invoice_type,
         reverse_charge=payload.reverse_charge,
         supply_type=supply_type,
@@ -65,51 +123,59 @@ def create_invoice(
         total_sgst=totals.total_sgst,
         total_igst=totals.total_igst,
         grand_total=totals.grand_total,
-        grand_total_words=amount_to_words(totals.grand_total),
+        grand_total_words=amount_to_words(totals.grand_total, seller.words_language),
+        logo_asset_id=logo_asset_id,
     )
-    db.add(invoice)
-    db.flush()
-
-    for idx, item in enumerate(payload.items):
-        result = line_results[idx]
-        db.add(
+    for line, result in zip(lines, line_results):
+        invoice.items.append(
             InvoiceItem(
-                invoice_id=invoice.id,
-                name=item.name,
-                hsn_sac=item.hsn_sac,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                discount=item.discount,
-                gst_rate=item.gst_rate,
+                product_id=line["product_id"],
+                name=line["name"],
+                hsn_sac=line["hsn_sac"],
+                quantity=line["quantity"],
+                unit_price=line["unit_price"],
+                discount=line["discount"],
+                gst_rate=line["gst_rate"],
                 taxable_value=result.taxable_value,
                 tax_amount=result.tax_amount,
                 total_value=result.total_value,
             )
         )
-
-    db.add(
-        TaxSummary(
-            invoice_id=invoice.id,
-            total_taxable=totals.total_taxable,
-            total_cgst=totals.total_cgst,
-            total_sgst=totals.total_sgst,
-            total_igst=totals.total_igst,
-            total_tax=totals.total_tax,
-        )
+    invoice.tax_summary = TaxSummary(
+        total_taxable=totals.total_taxable,
+        total_cgst=totals.total_cgst,
+        total_sgst=totals.total_sgst,
+        total_igst=totals.total_igst,
+        total_tax=totals.total_tax,
     )
+    # A single flush writes the invoice, its lines and tax summary together.
+    db.add(invoice)
+    db.flush()
+    invoice_id, user_id = invoice.id, current_user.id
+    record_invoice_event(db, user_id, invoice, CREATED)
+    if idempotency_key:
+        idempotency_store.record(db, idempotency_key, user_id, request_hash, invoice_id)
     db.commit()
-    db.refresh(invoice)
-    return db.query(Invoice).options(joinedload(Invoice.items)).get(invoice.id)
+    if idempotency_key:
+        idempotency_store.remember(idempotency_key, user_id, request_hash, invoice_id)
+    return _load_invoice(db, invoice_id)
 
 
-@router.put("/{invoice_id}", response_model=InvoiceRead)
-def update_invoice(
-    invoice_id: int,
-    payload: InvoiceCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Invoice:
-    """Update draft invoice before finalization."""
+def _store_logo(db: Session, encoded: str | None) -> int | None:
+    try:
+        return store_logo(db, encoded)
+    except AssetError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _fill_lines(db: Session, user_id: int, lines: list[dict]) -> list[dict]:
+    try:
+        return fill_lines(db, user_id, lines)
+    except UnknownProduct as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def _owned_draft(db: Session, invoice_id: int, current_user: User) -> Invoice:
     invoice = (
         db.query(Invoice)
         .join(Seller, Seller.id == Invoice.seller_id)
@@ -121,64 +187,93 @@ def update_invoice(
         raise HTTPException(status_code=404, detail="Invoice not found")
     if invoice.status == "finalized":
         raise HTTPException(status_code=400, detail="Invoice is locked after finalization")
+    return invoice
+
+
+def _apply_line_changes(
+    db: Session, user_id: int, invoice: Invoice, changes: LineChanges, words_language: str, supply_type: str | None = None
+) -> Invoice:
+    try:
+        apply_line_changes(db, invoice, changes, words_language, supply_type)
+    except LineItemError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    record_invoice_event(db, user_id, invoice, UPDATED)
+    invoice_id = invoice.id
+    db.commit()
+    return _load_invoice(db, invoice_id)
+
+
+@router.put("/{invoice_id}", response_model=InvoiceRead)
+def update_invoice(
+    invoice_id: int,
+    payload: InvoiceCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Invoice:
+    """Update draft invoice before finalization.
 
-    seller = db.query(Seller).filter(Seller.id == payload.seller_id, Seller.user_id == current_user.id).first()
-    buyer = db.query(Buyer).filter(Buyer.id == payload.buyer_id).first()
+    Items carrying the `id` of an existing line update it in place; items
+    without one are added and stored lines left out are removed. Unchanged
+    lines are not rewritten and only lines whose amounts changed are re-taxed.
+    """
+    invoice = _owned_draft(db, invoice_id, current_user)
+    seller = party_cache.seller(db, current_user.id, payload.seller_id)
+    buyer = party_cache.buyer(db, current_user.id, payload.buyer_id)
     if not seller or not buyer:
         raise HTTPException(status_code=404, detail="Seller or buyer not found")
     supply_type = "intra" if seller.state_code == buyer.state_code else "inter"
 
-    line_results = [compute_line(i.quantity, i.unit_price, i.discount, i.gst_rate) for i in payload.items]
-    totals = compute_totals(line_results, intra_state=supply_type == "intra")
-
     invoice.seller_id = payload.seller_id
     invoice.buyer_id = payload.buyer_id
     invoice.invoice_type = payload.invoice_type
     invoice.reverse_charge = payload.reverse_charge
-    invoice.supply_type = supply_type
-    invoice.total_taxable = totals.total_taxable
-    invoice.total_cgst = totals.total_cgst
-    invoice.total_sgst = totals.total_sgst
-    invoice.total_igst = totals.total_igst
-    invoice.grand_total = totals.grand_total
-    invoice.grand_total_words = amount_to_words(totals.grand_total)
-
-    db.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice.id).delete()
-    for idx, item in enumerate(payload.items):
-        result = line_results[idx]
-        db.add(
-            InvoiceItem(
-                invoice_id=invoice.id,
-                name=item.name,
-                hsn_sac=item.hsn_sac,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                discount=item.discount,
-                gst_rate=item.gst_rate,
-                taxable_value=result.taxable_value,
-                tax_amount=result.tax_amount,
-                total_value=result.total_value,
-            )
-        )
+    invoice.logo_asset_id = _store_logo(db, payload.logo_base64)
+    try:
+        changes = diff_lines(invoice, _fill_lines(db, current_user.id, [item.model_dump() for item in payload.items]))
+    except LineItemError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return _apply_line_changes(db, current_user.id, invoice, changes, seller.words_language, supply_type)
 
-    tax = db.query(TaxSummary).filter(TaxSummary.invoice_id == invoice.id).first()
-    if tax:
-        tax.total_taxable = totals.total_taxable
-        tax.total_cgst = totals.total_cgst
-        tax.total_sgst = totals.total_sgst
-        tax.total_igst = totals.total_igst
-        tax.total_tax = totals.total_tax
-    db.commit()
-    db.refresh(invoice)
-    return db.query(Invoice).options(joinedload(Invoice.items)).get(invoice.id)
+
+@router.patch("/{invoice_id}/items", response_model=InvoiceRead)
+def patch_invoice_items(
+    invoice_id: int,
+    payload: InvoiceItemsPatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Invoice:
+    """Add, modify and remove individual lines of a draft invoice.
+
+    `modify` entries only need the id and the fields that changed. Totals are
+    adjusted by the difference of the touched lines.
+    """
+    invoice = _owned_draft(db, invoice_id, current_user)
+    modify: dict[int, dict] = {}
+    for item in payload.modify:
+        if item.id in modify:
+            raise HTTPException(status_code=422, detail=f"Line {item.id} appears more than once")
+        modify[item.id] = item.model_dump(exclude={"id"}, exclude_none=True)
+    add = [item.model_dump(exclude={"id"}) for item in payload.add]
+    # Products of added and modified lines are resolved in one lookup.
+    _fill_lines(db, current_user.id, add + list(modify.values()))
+    changes = LineChanges(add=add, modify=modify, remove=set(payload.remove))
+    words_language = party_cache.seller(db, current_user.id, invoice.seller_id).words_language
+    return _apply_line_changes(db, current_user.id, invoice, changes, words_language)
 
 
 @router.get("", response_model=list[InvoiceRead])
 def list_invoices(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> list[Invoice]:
-    """List user-owned invoices."""
+) -> list[Invoice] | ORJSONResponse:
+    """List user-owned invoices.
+
+    With `FAST_INVOICE_SERIALIZATION` enabled, rows are projected straight to
+    dicts and encoded with orjson, skipping ORM loading and response-model
+    validation; the payload is the same.
+    """
+    if settings.fast_invoice_serialization:
+        return ORJSONResponse(list_invoice_dicts(db, current_user.id))
     return (
         db.query(Invoice)
         .join(Seller, Seller.id == Invoice.seller_id)
@@ -188,38 +283,75 @@ def list_invoices(
     )
 
 
+@router.get("/search", response_model=InvoiceSearchPage)
+def search_invoices_endpoint(
+    q: str = Query(min_length=3, max_length=100),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0, le=MAX_OFFSET),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> InvoiceSearchResult:
+    """Search the current user's invoices by number, party, item name or HSN/SAC, best match first."""
+    try:
+        return search_invoices(db, current_user.id, q, limit=limit, offset=offset)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@router.post("/finalize", response_model=InvoiceFinalizeBatchResult)
+def finalize_invoices_batch(
+    payload: InvoiceFinalizeBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> InvoiceFinalizeBatchResult:
+    """Finalize many drafts in one transaction, numbering them consecutively.
+
+    Ids that are not the caller's drafts are reported under `skipped` and
+    do not consume numbers.
+    """
+    result = finalize_invoices(db, current_user.id, payload.invoice_ids)
+    db.commit()
+    return InvoiceFinalizeBatchResult(
+        finalized=[FinalizedInvoiceRead(id=invoice_id, invoice_number=number) for invoice_id, number in result.finalized.items()],
+        skipped=[FinalizeSkipRead(id=invoice_id, reason=reason) for invoice_id, reason in result.skipped.items()],
+    )
+
+
 @router.post("/{invoice_id}/finalize", response_model=InvoiceRead)
 def finalize_invoice(
     invoice_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> Invoice:
-    """Finalize invoice and lock it from edits."""
-    invoice = (
-        db.query(Invoice)
-        .join(Seller, Seller.id == Invoice.seller_id)
-        .filter(Invoice.id == invoice_id, Seller.user_id == current_user.id)
-        .options(joinedload(Invoice.items))
-        .first()
-    )
-    if not invoice:
+    """Finalize invoice, assign its number and lock it from edits."""
+    result = finalize_invoices(db, current_user.id, [invoice_id])
+    if result.skipped.get(invoice_id) == "not_found":
         raise HTTPException(status_code=404, detail="Invoice not found")
-    invoice.status = "finalized"
     db.commit()
-    db.refresh(invoice)
-    return invoice
+    return _load_invoice(db, invoice_id)
 
 
 @router.get("/{invoice_id}/json")
-def export_invoice_json(invoice_id: int, db: Session = Depends(get_db), _: User = Depends(get_current_user)) -> dict:
+def export_invoice_json(invoice_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
     """Export invoice as JSON."""
-    invoice = db.query(Invoice).options(joinedload(Invoice.items), joinedload(Invoice.seller), joinedload(Invoice.buyer)).get(invoice_id)
+    invoice = (
+        db.query(Invoice)
+        .join(Seller, Seller.id == Invoice.seller_id)
+        .filter(Invoice.id == invoice_id, Seller.user_id == user.id)
+        .options(joinedload(Invoice.items))
+        .first()
+    )
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    seller = party_cache.seller(db, user.id, invoice.seller_id)
+    buyer = party_cache.buyer(db, user.id, invoice.buyer_id)
+    if not buyer:
+        # Only invoices written before buyers were tenant-checked can point elsewhere.
+        raise HTTPException(status_code=404, detail="Buyer not found")
     return {
         "invoice_number": invoice.invoice_number,
-        "seller": {"name": invoice.seller.name, "gstin": invoice.seller.gstin},
-        "buyer": {"name": invoice.buyer.name, "gstin": invoice.buyer.gstin},
+        "seller": {"name": seller.name, "gstin": seller.gstin},
+        "buyer": {"name": buyer.name, "gstin": buyer.gstin},
         "items": [{"name": i.name, "hsn_sac": i.hsn_sac, "quantity": i.quantity, "total_value": i.total_value} for i in invoice.items],
         "total_taxable": invoice.total_taxable,
         "total_cgst": invoice.total_cgst,
@@ -231,17 +363,26 @@ def export_invoice_json(invoice_id: int, db: Session = Depends(get_db), _: User
 
 
 @router.get("/{invoice_id}/pdf")
+@bulkhead("pdf")
 def export_invoice_pdf(invoice_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> Response:
     """Export invoice as PDF download."""
+    # reportlab is loaded by the first PDF request rather than at import.
+    from app.services.pdf_service import generate_invoice_pdf
+
     data = export_invoice_json(invoice_id, db, user)
-    content = generate_invoice_pdf(data)
+    content = generate_invoice_pdf(data, logo=logo_images.for_invoice(db, invoice_id))
     return Response(
         content=content,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename={data['invoice_number']}.pdf"},
+        headers={"Content-Disposition": f"attachment; filename={_document_name(data, invoice_id)}.pdf"},
     )
 
 
+def _document_name(data: dict, invoice_id: int) -> str:
+    # Drafts have no number yet; issued numbers contain "/" (FY/STATE/SEQ).
+    return (data["invoice_number"] or f"draft-{invoice_id}").replace("/", "-")
+
+
 @router.get("/{invoice_id}/print", response_class=HTMLResponse)
 def print_invoice_html(invoice_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> str:
     """Generate print-friendly HTML."""
@@ -252,7 +393,7 @@ def print_invoice_html(invoice_id: int, db: Session = Depends(get_db), user: Use
     )
     return f"""
     <html><body>
-    <h1>GST Invoice {data['invoice_number']}</h1>
+    <h1>GST Invoice {data['invoice_number'] or 'DRAFT'}</h1>
     <p>Seller: {data['seller']['name']} ({data['seller']['gstin']})</p>
     <p>Buyer: {data['buyer']['name']} ({data['buyer'].get('gstin', 'N/A')})</p>
     <table border='1' cellpadding='6'><tr><th>Item</th><th>HSN/SAC</th><th>Qty</th><th>Total</th></tr>{rows}</table>
@@ -0,0 +1,52 @@
+"""Product catalog endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.db.session import get_db
+from app.models.models import Product, User
+from app.schemas.schemas import ProductCreate, ProductRead
+from app.services.catalog_service import catalog
+
+router = APIRouter(prefix="/products", tags=["products"])
+
+
+@router.post("", response_model=ProductRead)
+def create_product(
+    payload: ProductCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Product:
+    """Add a product that invoice lines can refer to by `product_id`."""
+    product = Product(**payload.model_dump(), user_id=current_user.id)
+    db.add(product)
+    db.commit()
+    catalog.invalidate(current_user.id)
+    db.refresh(product)
+    return product
+
+
+@router.get("", response_model=list[ProductRead])
+def list_products(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)) -> list[Product]:
+    """List the current user's products."""
+    return db.query(Product).filter(Product.user_id == current_user.id).order_by(Product.name, Product.id).all()
+
+
+@router.put("/{product_id}", response_model=ProductRead)
+def update_product(
+    product_id: int,
+    payload: ProductCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Product:
+    """Change a product; lines already filled from it keep their values."""
+    product = db.query(Product).filter(Product.id == product_id, Product.user_id == current_user.id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    for name, value in payload.model_dump().items():
+        setattr(product, name, value)
+    db.commit()
+    catalog.invalidate(current_user.id)
+    db.refresh(product)
+    return product
@@ -0,0 +1,74 @@
+"""GSTR-2B reconciliation endpoints."""
+
+import tempfile
+
+import ijson
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.models import User
+from app.services.reconciliation_service import ndjson_chunks, parse_period, reconcile_gstr2b
+from app.utils.gst import check_gstin
+
+router = APIRouter(prefix="/reconciliation", tags=["reconciliation"])
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+
+@router.post("/gstr2b")
+async def reconcile_gstr2b_upload(
+    request: Request,
+    period: str = Query(description="Return period, YYYY-MM (or GSTN MMYYYY)"),
+    recipient_gstin: str = Query(min_length=15, max_length=15, description="GSTIN of the customer whose 2B this is"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """Reconcile a raw GSTR-2B JSON body against invoices issued to `recipient_gstin`.
+
+    Streams NDJSON: one line per 2B record of the caller's sellers
+    (`matched`, `amount_mismatch`, `missing_in_books`), one per finalized
+    invoice of the period absent from the 2B (`missing_in_2b`), then a
+    `summary` line.
+    """
+    try:
+        period = parse_period(period)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    check = check_gstin(recipient_gstin.upper())
+    if not check.valid:
+        raise HTTPException(status_code=400, detail=check.reason)
+
+    # The body is spooled to disk as it arrives, so neither side of the
+    # request holds the whole file in memory.
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.max_gstr2b_bytes:
+            spool.close()
+            raise HTTPException(status_code=413, detail=f"GSTR-2B file must be at most {settings.max_gstr2b_bytes} bytes")
+        spool.write(chunk)
+    if not size:
+        spool.close()
+        raise HTTPException(status_code=400, detail="Request body must be the GSTR-2B JSON file")
+    spool.seek(0)
+    user_id = current_user.id
+
+    def body():
+        # get_db has already closed the session by the time the response
+        # streams; a closed Session reconnects on next use, so close it again here.
+        try:
+            yield from ndjson_chunks(reconcile_gstr2b(db, user_id, recipient_gstin.upper(), period, spool))
+        except (ijson.JSONError, ValueError) as exc:
+            # Headers are already sent, so a malformed file ends the stream
+            # with an error line instead of a 4xx.
+            yield orjson.dumps({"error": f"Invalid GSTR-2B JSON: {exc}"}) + b"\n"
+        finally:
+            spool.close()
+            db.close()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
@@ -0,0 +1,71 @@
+"""Recurring invoice template endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session, selectinload
+
+from app.api.deps import get_current_user
+from app.db.session import get_db
+from app.models.models import RecurringTemplate, RecurringTemplateItem, User
+from app.schemas.schemas import RecurringTemplateCreate, RecurringTemplateRead
+from app.services.catalog_service import UnknownProduct, fill_lines
+from app.services.party_cache import party_cache
+
+router = APIRouter(prefix="/recurring", tags=["recurring"])
+
+
+@router.post("", response_model=RecurringTemplateRead)
+def create_template(
+    payload: RecurringTemplateCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> RecurringTemplate:
+    """Create a recurring template; the scheduler issues its first invoice on `start_on`."""
+    if not party_cache.seller(db, current_user.id, payload.seller_id):
+        raise HTTPException(status_code=404, detail="Seller not found")
+    buyer = party_cache.buyer(db, current_user.id, payload.buyer_id)
+    if not buyer:
+        raise HTTPException(status_code=404, detail="Buyer not found")
+    if payload.invoice_type == "B2B" and not buyer.gstin:
+        raise HTTPException(status_code=400, detail="Buyer GSTIN required for B2B")
+
+    try:
+        # Templates keep the filled values, not the product reference.
+        lines = fill_lines(db, current_user.id, [item.model_dump(exclude={"id"}) for item in payload.items])
+    except UnknownProduct as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    template = RecurringTemplate(
+        user_id=current_user.id,
+        **payload.model_dump(exclude={"items"}),
+        next_run_on=payload.start_on,
+        items=[RecurringTemplateItem(**{name: value for name, value in line.items() if name != "product_id"}) for line in lines],
+    )
+    db.add(template)
+    db.commit()
+    return _load_template(db, template.id)
+
+
+@router.get("", response_model=list[RecurringTemplateRead])
+def list_templates(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)) -> list[RecurringTemplate]:
+    """List the current user's recurring templates, including stopped ones."""
+    return (
+        db.query(RecurringTemplate)
+        .filter(RecurringTemplate.user_id == current_user.id)
+        .options(selectinload(RecurringTemplate.items))
+        .order_by(RecurringTemplate.id)
+        .all()
+    )
+
+
+@router.delete("/{template_id}", response_model=RecurringTemplateRead)
+def stop_template(template_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)) -> RecurringTemplate:
+    """Stop issuing invoices from a template; invoices already issued are kept."""
+    template = db.query(RecurringTemplate).filter(RecurringTemplate.id == template_id, RecurringTemplate.user_id == current_user.id).first()
+    if not template:
+        raise HTTPException(status_code=404, detail="Template not found")
+    template.active = False
+    db.commit()
+    return _load_template(db, template_id)
+
+
+def _load_template(db: Session, template_id: int) -> RecurringTemplate:
+    return db.query(RecurringTemplate).options(selectinload(RecurringTemplate.items)).filter(RecurringTemplate.id == template_id).one()
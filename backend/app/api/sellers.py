@@ -7,7 +7,8 @@ from app.api.deps import get_current_user
 from app.db.session import get_db
 from app.models.models import Seller, User
 from app.schemas.schemas import SellerCreate, SellerRead
-from app.utils.gst import is_valid_gstin, state_code_from_gstin
+from app.services.party_cache import party_cache
+from app.utils.gst import check_gstin, state_code_from_gstin
 
 router = APIRouter(prefix="/sellers", tags=["sellers"])
 
@@ -19,13 +20,15 @@ def create_seller(
     current_user: User = Depends(get_current_user),
 ) -> Seller:
     """Create seller profile."""
-    if not is_valid_gstin(payload.gstin):
-        raise HTTPException(status_code=400, detail="Invalid GSTIN format")
+    check = check_gstin(payload.gstin)
+    if not check.valid:
+        raise HTTPException(status_code=400, detail=check.reason)
     if state_code_from_gstin(payload.gstin) != payload.state_code:
         raise HTTPException(status_code=400, detail="GSTIN state code mismatch")
     seller = Seller(**payload.model_dump(), user_id=current_user.id)
     db.add(seller)
     db.commit()
+    party_cache.invalidate(current_user.id)
     db.refresh(seller)
     return seller
 
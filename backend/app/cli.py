@@ -0,0 +1,183 @@
+"""Admin command line.
+
+Usage:
+    python -m app.cli shards migrate [--mode alembic|create_all]
+    python -m app.cli shards scan
+    python -m app.cli recurring run [--today YYYY-MM-DD]
+    python -m app.cli ingest FILE --user EMAIL [--batch-size N] [--workers N] [--restart]
+    python -m app.cli migrations status
+    python -m app.cli reprice HSN --old-rate R --new-rate R [--effective-on YYYY-MM-DD]
+"""
+
+import argparse
+import sys
+from datetime import date
+
+from pydantic import ValidationError
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.db.online_migration import checkpoints
+from app.db.session import SessionLocal, engine
+from app.db.sharding import migrate_shards, scan_shards, shard_router
+from app.models.models import Buyer, Invoice, Seller, User
+from app.schemas.schemas import RepricingRequest
+from app.services.ingest_service import DEFAULT_BATCH_SIZE, IngestReport, ingest
+from app.services.recurring_service import run_all
+from app.services.repricing_service import RateNotYetEffective, reprice_all
+
+
+def shard_summary(db: Session) -> dict[str, int]:
+    """Row counts for one shard, as shown by `shards scan`."""
+    invoices = dict(db.execute(select(Invoice.status, func.count()).group_by(Invoice.status)).all())
+    return {
+        "tenants": db.scalar(select(func.count(func.distinct(Seller.user_id)))),
+        "sellers": db.scalar(select(func.count()).select_from(Seller)),
+        "buyers": db.scalar(select(func.count()).select_from(Buyer)),
+        "drafts": invoices.get("draft", 0),
+        "finalized": invoices.get("finalized", 0),
+    }
+
+
+def shards_command(args: argparse.Namespace) -> int:
+    if shard_router is None:
+        print("Sharding is off (SHARD_MODE=off); nothing to do.", file=sys.stderr)
+        return 2
+    if args.action == "migrate":
+        # With SCHEMA_MANAGEMENT=none this command is the migration step.
+        mode = args.mode or ("alembic" if shard_router.schema_mode == "none" else None)
+        migrated = migrate_shards(shard_router, mode)
+        print(f"migrated {len(migrated)} shard(s) in {shard_router.directory}")
+        return 0
+
+    columns = ("tenants", "sellers", "buyers", "drafts", "finalized")
+    totals = dict.fromkeys(columns, 0)
+    failed = 0
+    print(f"{'shard':32s}" + "".join(f"{column:>11s}" for column in columns))
+    for result in scan_shards(shard_router, shard_summary):
+        if result.error:
+            failed += 1
+            print(f"{result.shard:32s} ERROR {result.error}")
+            continue
+        for column in columns:
+            totals[column] += result.value[column]
+        print(f"{result.shard:32s}" + "".join(f"{result.value[column]:>11,d}" for column in columns))
+    print(f"{'total':32s}" + "".join(f"{totals[column]:>11,d}" for column in columns))
+    return 1 if failed else 0
+
+
+def recurring_command(args: argparse.Namespace) -> int:
+    report = run_all(args.today)
+    print(
+        f"issued {report.invoices:,d} invoice(s) from {report.templates:,d} template(s) in {report.chunks} chunk(s), "
+        f"{report.duration_s * 1000:.1f} ms ({report.invoices_per_sec:,.0f}/s)"
+    )
+    if report.failed_chunks:
+        print(f"{report.failed_chunks} chunk(s) conflicted and were left for the next run", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _print_progress(report: IngestReport) -> None:
+    print(
+        f"{report.records:>12,d} records {report.invoices:>12,d} invoices {report.lines:>12,d} lines "
+        f"{report.invoices_per_sec:>9,.0f} invoices/s {report.lines_per_sec:>10,.0f} lines/s",
+        file=sys.stderr,
+    )
+
+
+def ingest_command(args: argparse.Namespace) -> int:
+    with SessionLocal() as db:
+        user_id = db.scalar(select(User.id).where(User.email == args.user))
+    if user_id is None:
+        print(f"No user with email {args.user}", file=sys.stderr)
+        return 2
+    # Tenant data lives in the user's shard when sharding is on.
+    bind = engine if shard_router is None else shard_router.engine(shard_router.shard_for(args.user))
+    with bind.connect() as connection:
+        try:
+            report = ingest(connection, args.file, user_id, args.batch_size, args.workers, args.restart, _print_progress)
+        except (OSError, ValueError) as exc:
+            print(f"ingest failed: {exc}", file=sys.stderr)
+            return 2
+    if report.skipped_records:
+        print(f"resumed after {report.skipped_records:,d} record(s) from the checkpoint")
+    print(
+        f"ingested {report.invoices:,d} invoice(s), {report.lines:,d} line(s) from {report.records:,d} record(s) "
+        f"in {report.duration_s:.1f} s ({report.invoices_per_sec:,.0f} invoices/s, {report.lines_per_sec:,.0f} lines/s)"
+    )
+    for error in report.errors:
+        print(f"record {error.record} {error.invoice_number or '-'}: {error.error}", file=sys.stderr)
+    if report.error_count > len(report.errors):
+        print(f"... {report.error_count - len(report.errors):,d} more error(s)", file=sys.stderr)
+    return 1 if report.error_count else 0
+
+
+def migrations_command(args: argparse.Namespace) -> int:
+    # Safe next to a running `alembic upgrade`: chunks commit as they go.
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(checkpoints.name):
+            print("No online migration has run on this database.")
+            return 0
+        rows = connection.execute(select(checkpoints).order_by(checkpoints.c.started_at, checkpoints.c.step)).all()
+    print(f"{'step':48s} {'rows':>12s} {'last key':>12s}  {'updated':19s}  state")
+    for row in rows:
+        state = "done" if row.finished_at else "running or interrupted"
+        last_key = "-" if row.last_key is None else f"{row.last_key:,d}"
+        print(f"{row.step:48s} {row.rows_done:>12,d} {last_key:>12s}  {row.updated_at:%Y-%m-%d %H:%M:%S}  {state}")
+    return 0
+
+
+def reprice_command(args: argparse.Namespace) -> int:
+    try:
+        change = RepricingRequest(hsn_sac=args.hsn_sac, old_rate=args.old_rate, new_rate=args.new_rate, effective_on=args.effective_on)
+        report = reprice_all(change.hsn_sac, change.old_rate, change.new_rate, change.effective_on)
+    except (ValidationError, RateNotYetEffective) as exc:
+        print(f"reprice failed: {exc}", file=sys.stderr)
+        return 2
+    print(
+        f"re-priced {report.lines:,d} line(s) on {report.invoices:,d} draft(s) in {report.batches} batch(es), "
+        f"{report.duration_s * 1000:.1f} ms ({report.lines_per_sec:,.0f} lines/s)"
+    )
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="GST invoice generator admin commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    shards = commands.add_parser("shards", help="manage per-tenant database shards")
+    shards.add_argument("action", choices=("migrate", "scan"))
+    shards.add_argument("--mode", choices=("alembic", "create_all"), help="schema mode for migrate (default: SCHEMA_MANAGEMENT, alembic if that is none)")
+    shards.set_defaults(handler=shards_command)
+
+    recurring = commands.add_parser("recurring", help="issue invoices from recurring templates")
+    recurring.add_argument("action", choices=("run",))
+    recurring.add_argument("--today", type=date.fromisoformat, help="issue periods due on or before this date (default: today)")
+    recurring.set_defaults(handler=recurring_command)
+
+    ingest_parser = commands.add_parser("ingest", help="bulk-load historical invoices from CSV or NDJSON")
+    ingest_parser.add_argument("file", help=".csv (one row per line item) or .ndjson/.jsonl (one invoice per line)")
+    ingest_parser.add_argument("--user", required=True, help="email of the user owning the sellers and buyers")
+    ingest_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="invoices per transaction")
+    ingest_parser.add_argument("--workers", type=int, default=None, help="tax computation processes (default: CPU count, 0: in process)")
+    ingest_parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first record")
+    ingest_parser.set_defaults(handler=ingest_command)
+
+    migrations = commands.add_parser("migrations", help="inspect chunked online schema migrations")
+    migrations.add_argument("action", choices=("status",))
+    migrations.set_defaults(handler=migrations_command)
+
+    reprice = commands.add_parser("reprice", help="move open drafts of an HSN/SAC code to a revised GST rate")
+    reprice.add_argument("hsn_sac")
+    reprice.add_argument("--old-rate", type=float, required=True)
+    reprice.add_argument("--new-rate", type=float, required=True)
+    reprice.add_argument("--effective-on", type=date.fromisoformat, default=date.today(), help="date the revised rate takes effect (default: today)")
+    reprice.set_defaults(handler=reprice_command)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 """Application configuration."""
 
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -13,6 +15,67 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
     database_url: str = "sqlite:///./gst_invoice.db"
+    # create_all for local SQLite, alembic to upgrade to head at startup,
+    # none when migrations run as a separate deploy step.
+    schema_management: Literal["create_all", "alembic", "none"] = "create_all"
+    # off keeps all tenants in database_url. per_user gives every user a
+    # SQLite file under shard_directory; hashed spreads users over
+    # shard_count files (do not change shard_count once data is written).
+    # Users and logins always stay in database_url.
+    shard_mode: Literal["off", "per_user", "hashed"] = "off"
+    shard_directory: str = "./shards"
+    shard_count: int = 16
+    shard_engine_cache_size: int = 32
+    idempotency_ttl_seconds: int = 24 * 60 * 60
+    idempotency_cache_size: int = 4096
+    idempotency_sweep_interval_seconds: int = 300
+    query_repeat_warning_threshold: int = 10
+    fast_invoice_serialization: bool = False
+    max_logo_bytes: int = 1024 * 1024
+    logo_image_cache_size: int = 64
+    # TrueType font for amounts in words that Helvetica cannot draw, such as
+    # Hindi; it must cover Devanagari.
+    pdf_unicode_font_path: str = "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf"
+    # Seller and buyer snapshots used by invoice writes and exports; expire
+    # like catalog products below.
+    party_cache_size: int = 4096
+    party_cache_ttl_seconds: float = 30.0
+    # Catalog products used to fill invoice lines, across all users. Writes
+    # in this process retire a user's entries at once; writes made by other
+    # processes or shards are seen once the entries expire.
+    product_cache_size: int = 50_000
+    product_cache_ttl_seconds: float = 30.0
+    # Worker threads per route class: crud is AnyIO's default limiter.
+    crud_concurrency: int = 40
+    pdf_concurrency: int = 4
+    auth_concurrency: int = 4
+    bulkhead_queue_timeout_seconds: float = 2.0
+    bulkhead_retry_after_seconds: int = 1
+    max_gstr2b_bytes: int = 2 * 1024 * 1024 * 1024
+    reconciliation_amount_tolerance: float = 1.0
+    reconciliation_period_cache_size: int = 12
+    event_page_size: int = 500
+    # Streams re-check the outbox this often for changes made by other
+    # processes; commits in this process wake them immediately.
+    event_stream_poll_seconds: float = 2.0
+    event_stream_heartbeat_seconds: float = 15.0
+    # Off for deployments that run `python -m app.cli recurring run` from cron.
+    recurring_scheduler_enabled: bool = True
+    recurring_scheduler_interval_seconds: float = 60.0
+    recurring_chunk_size: int = 500
+    # Draft invoices per transaction when a rate change is applied.
+    repricing_batch_size: int = 500
+    # Users allowed on /admin endpoints, by login email.
+    admin_emails: list[str] = []
+    profile_max_seconds: float = 300.0
+    profile_sample_interval_ms: float = 5.0
+    profile_result_cache_size: int = 16
+    profile_tracemalloc_frames: int = 25
+    # Online migrations: rows per chunk at most, pause between chunks, and
+    # the chunk duration above which chunks are made smaller.
+    online_migration_chunk_size: int = 5000
+    online_migration_pause_ms: float = 50.0
+    online_migration_chunk_budget_ms: float = 200.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
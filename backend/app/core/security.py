@@ -1,32 +1,37 @@
-"""Security utilities for password hashing and JWT."""
+"""Security utilities for password hashing and JWT.
 
-from datetime import datetime, timedelta, timezone
+jose and passlib are imported on first use; together they add ~100ms to
+process start, which every worker and test run would otherwise pay.
+"""
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
 from app.core.config import settings
 
-pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
-    deprecated="auto"
-)
 
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify plain password against hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     password = password.encode("utf-8")[:72].decode("utf-8", "ignore")
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 
 
 def create_access_token(subject: str) -> str:
     """Create JWT access token."""
+    from jose import jwt
+
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expire_minutes)
     payload = {"sub": subject, "exp": expire}
     return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
@@ -34,6 +39,8 @@ def create_access_token(subject: str) -> str:
 
 def decode_access_token(token: str) -> str | None:
     """Decode token and return subject."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         return payload.get("sub")
@@ -0,0 +1,133 @@
+"""SQLite FTS5 search indexes.
+
+`buyers_fts` mirrors one table and is maintained by triggers. `invoices_fts`
+aggregates invoices, lines and parties into one document per invoice and is
+rebuilt from an ORM flush hook; Core bulk writers call `reindex_invoices`.
+"""
+
+from typing import Iterable
+
+from sqlalchemy import DDL, Connection, Table, bindparam, event, inspect, text
+from sqlalchemy.orm import Session
+
+BUYERS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS buyers_fts USING fts5("
+    "name, gstin, address, content='buyers', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS buyers_fts_ai AFTER INSERT ON buyers BEGIN "
+    "INSERT INTO buyers_fts(rowid, name, gstin, address) VALUES (new.id, new.name, new.gstin, new.address); END",
+    "CREATE TRIGGER IF NOT EXISTS buyers_fts_ad AFTER DELETE ON buyers BEGIN "
+    "INSERT INTO buyers_fts(buyers_fts, rowid, name, gstin, address) "
+    "VALUES ('delete', old.id, old.name, old.gstin, old.address); END",
+    "CREATE TRIGGER IF NOT EXISTS buyers_fts_au AFTER UPDATE OF name, gstin, address ON buyers BEGIN "
+    "INSERT INTO buyers_fts(buyers_fts, rowid, name, gstin, address) "
+    "VALUES ('delete', old.id, old.name, old.gstin, old.address); "
+    "INSERT INTO buyers_fts(rowid, name, gstin, address) VALUES (new.id, new.name, new.gstin, new.address); END",
+]
+
+MIN_TRIGRAM_TERM = 3
+
+
+def fts_phrase(term: str) -> str:
+    """Quote a user term as an FTS5 string so operators in it are not interpreted."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def install_fts(table: Table, statements: list[str]) -> None:
+    """Create the FTS index and triggers whenever `table` is created on SQLite."""
+    for statement in statements:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+# Word-tokenized rather than trigram: invoice terms are searched as word
+# prefixes, and the indexed `owner` token ("u<user_id>") lets FTS5 intersect a
+# tenant's doclist with the term's instead of filtering every global hit.
+INVOICES_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS invoices_fts USING fts5("
+    "invoice_number, parties, items, hsn, owner, tokenize='unicode61')",
+]
+INVOICE_SEARCH_COLUMNS = "{invoice_number parties items hsn}"
+
+# One document per invoice. Aggregating lines in SQL keeps a 500-line update
+# to a single statement instead of one re-index per line.
+_INVOICE_DOCUMENT_SELECT = (
+    "INSERT INTO invoices_fts(rowid, invoice_number, parties, items, hsn, owner) "
+    "SELECT invoices.id, invoices.invoice_number, "
+    "sellers.name || ' ' || sellers.gstin || ' ' || buyers.name || ' ' || coalesce(buyers.gstin, ''), "
+    "coalesce(group_concat(invoice_items.name, ' '), ''), coalesce(group_concat(DISTINCT invoice_items.hsn_sac), ''), "
+    "'u' || sellers.user_id "
+    "FROM invoices JOIN sellers ON sellers.id = invoices.seller_id JOIN buyers ON buyers.id = invoices.buyer_id "
+    "LEFT JOIN invoice_items ON invoice_items.invoice_id = invoices.id "
+)
+_INVOICE_DOCUMENTS = text(_INVOICE_DOCUMENT_SELECT + "WHERE invoices.id IN :ids GROUP BY invoices.id").bindparams(
+    bindparam("ids", expanding=True)
+)
+_ALL_INVOICE_DOCUMENTS = text(_INVOICE_DOCUMENT_SELECT + "GROUP BY invoices.id")
+_DELETE_INVOICE_DOCUMENTS = text("DELETE FROM invoices_fts WHERE rowid IN :ids").bindparams(bindparam("ids", expanding=True))
+_INVOICES_FOR_PARTIES = text(
+    "SELECT invoices.id FROM invoices WHERE invoices.buyer_id IN :buyers OR invoices.seller_id IN :sellers"
+).bindparams(bindparam("buyers", expanding=True), bindparam("sellers", expanding=True))
+_REINDEX_CHUNK = 1000
+
+
+def owner_token(user_id: int) -> str:
+    """Return the `invoices_fts.owner` token for a user."""
+    return f"u{user_id}"
+
+
+def has_fts_table(connection: Connection, name: str) -> bool:
+    """Return whether an FTS table exists, cached on the DBAPI connection."""
+    key = f"fts:{name}"
+    if key not in connection.info:
+        found = connection.exec_driver_sql("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).first()
+        connection.info[key] = found is not None
+    return connection.info[key]
+
+
+def reindex_invoices(connection: Connection, invoice_ids: Iterable[int]) -> None:
+    """Rebuild search documents for the given invoices (missing ids are dropped)."""
+    ids = sorted(set(invoice_ids))
+    for start in range(0, len(ids), _REINDEX_CHUNK):
+        chunk = ids[start : start + _REINDEX_CHUNK]
+        connection.execute(_DELETE_INVOICE_DOCUMENTS, {"ids": chunk})
+        connection.execute(_INVOICE_DOCUMENTS, {"ids": chunk})
+
+
+def rebuild_invoice_index(connection: Connection) -> None:
+    """Re-create every invoice search document."""
+    connection.exec_driver_sql("DELETE FROM invoices_fts")
+    connection.execute(_ALL_INVOICE_DOCUMENTS)
+
+
+def _changed(obj: object, *names: str) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in names)
+
+
+def _sync_invoice_index(session: Session, flush_context: object) -> None:
+    connection = session.connection()
+    if connection.dialect.name != "sqlite" or not has_fts_table(connection, "invoices_fts"):
+        return
+    invoice_ids: set[int] = set()
+    buyer_ids: set[int] = set()
+    seller_ids: set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table == "invoices":
+            invoice_ids.add(obj.id)
+        elif table == "invoice_items" and obj.invoice_id is not None:
+            invoice_ids.add(obj.invoice_id)
+        elif table == "buyers" and obj in session.dirty and _changed(obj, "name", "gstin"):
+            buyer_ids.add(obj.id)
+        elif table == "sellers" and obj in session.dirty and _changed(obj, "name", "gstin", "user_id"):
+            seller_ids.add(obj.id)
+    if buyer_ids or seller_ids:
+        rows = connection.execute(_INVOICES_FOR_PARTIES, {"buyers": list(buyer_ids), "sellers": list(seller_ids)})
+        invoice_ids.update(row[0] for row in rows)
+    if invoice_ids:
+        reindex_invoices(connection, invoice_ids)
+
+
+def install_invoice_index_sync() -> None:
+    """Keep `invoices_fts` current for every ORM flush touching invoices or parties."""
+    if not event.contains(Session, "after_flush", _sync_invoice_index):
+        event.listen(Session, "after_flush", _sync_invoice_index)
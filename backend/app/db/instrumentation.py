@@ -0,0 +1,104 @@
+"""Per-request SQL statement counting and timing.
+
+`install_query_instrumentation()` hooks cursor execution on every engine.
+Statements are only counted while `track_queries()` is active, which the
+request middleware opens around each request and tests use to enforce
+query budgets. Outside of it the hooks return immediately.
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Mapper
+
+# Collapse expanded IN lists and literals so repeats of one statement with
+# different parameters share a shape.
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,?)+\)")
+_LITERAL = re.compile(r"'[^']*'|\b\d+\b")
+_START_KEY = "query_stats_start"
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_ms: float = 0.0
+    rows_affected: int = 0
+    rows_loaded: int = 0
+    shapes: Counter[str] = field(default_factory=Counter)
+    parent: "QueryStats | None" = field(default=None, repr=False)
+
+    @property
+    def rows(self) -> int:
+        return self.rows_affected + self.rows_loaded
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes run at least `threshold` times, most frequent first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    shape = _IN_LIST.sub("(?)", statement)
+    return " ".join(_LITERAL.sub("?", shape).split())
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements run by this context (and threads it hands work to).
+
+    Nested trackers also feed the enclosing one, so a test budget still sees
+    statements counted by the request middleware.
+    """
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is None or not conn.info.get(_START_KEY):
+        return
+    elapsed = (time.perf_counter() - conn.info[_START_KEY].pop()) * 1000
+    # Batched inserts run once per row on drivers without ordered multi-row
+    # RETURNING (SQLite); that is one flush, not an N+1.
+    shape = None if executemany else statement_shape(statement)
+    while stats is not None:
+        stats.db_ms += elapsed
+        stats.statements += 1
+        if shape:
+            stats.shapes[shape] += 1
+        if cursor.rowcount > 0:
+            stats.rows_affected += cursor.rowcount
+        stats = stats.parent
+
+
+def _on_load(target, context) -> None:
+    stats = _current.get()
+    while stats is not None:
+        stats.rows_loaded += 1
+        stats = stats.parent
+
+
+def install_query_instrumentation() -> None:
+    """Attach the counting hooks to all engines and ORM mappers (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Mapper, "load", _on_load)
@@ -0,0 +1,421 @@
+"""Chunked, resumable data migrations for large SQLite tables.
+
+A plain `UPDATE` or an alembic `batch_alter_table` rewrites a whole table in
+one transaction and holds the database write lock until it is done. Inside
+`online(op, name)` a revision instead works in short transactions over
+primary-key ranges, with a pause between them so the application's writes
+get the lock in between:
+
+- `backfill` updates rows in place, one key range per transaction.
+- `copy_and_swap` changes a table's shape: it creates a shadow table with
+  the new definition, keeps it in sync with triggers while copying key
+  ranges into it, moves the indexes over and then swaps the tables in one
+  short transaction.
+- `once` runs cheap DDL exactly once.
+
+Every step records its position in `online_migrations` in the same
+transaction as its chunk, so an interrupted `alembic upgrade` resumes where
+it stopped instead of starting over. Finished steps stay recorded, so each
+direction of a revision calls `forget(op, name)` on the other direction's
+migration; a downgrade and upgrade again then run the steps anew. Chunks
+shrink when they run over `online_migration_chunk_budget_ms` and grow back
+up to `online_migration_chunk_size` when they are fast.
+"""
+
+import logging
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Iterator
+
+import sqlalchemy as sa
+from sqlalchemy import Connection, select, text
+
+from app.core.config import settings
+
+logger = logging.getLogger("gst_invoice")
+
+MIN_CHUNK_SIZE = 100
+LOG_INTERVAL_SECONDS = 5.0
+
+# Not part of the models' metadata: revisions that use it run long before
+# head, so the table is created on demand.
+checkpoints = sa.Table(
+    "online_migrations",
+    sa.MetaData(),
+    sa.Column("step", sa.String(255), primary_key=True),
+    sa.Column("last_key", sa.Integer(), nullable=True),
+    sa.Column("rows_done", sa.Integer(), nullable=False),
+    sa.Column("started_at", sa.DateTime(), nullable=False),
+    sa.Column("updated_at", sa.DateTime(), nullable=False),
+    sa.Column("finished_at", sa.DateTime(), nullable=True),
+)
+
+
+@dataclass
+class Progress:
+    step: str
+    rows_done: int
+    total_rows: int
+    chunk_size: int
+    elapsed: float
+    finished: bool = False
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_done / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def eta_seconds(self) -> float | None:
+        rate = self.rows_per_sec
+        return max(self.total_rows - self.rows_done, 0) / rate if rate else None
+
+
+def log_progress() -> Callable[[Progress], None]:
+    """A progress callback that logs at most every few seconds and at the end."""
+    last = 0.0
+
+    def report(progress: Progress) -> None:
+        nonlocal last
+        now = time.monotonic()
+        if not progress.finished and now - last < LOG_INTERVAL_SECONDS:
+            return
+        last = now
+        eta = "" if progress.finished or progress.eta_seconds is None else f" eta={progress.eta_seconds:.0f}s"
+        logger.info(
+            "online migration step=%s rows=%d/%d chunk=%d rate=%.0f/s%s%s",
+            progress.step,
+            progress.rows_done,
+            progress.total_rows,
+            progress.chunk_size,
+            progress.rows_per_sec,
+            eta,
+            " done" if progress.finished else "",
+        )
+
+    return report
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class OnlineMigration:
+    """Runs the steps of one migration on an AUTOCOMMIT SQLite connection.
+
+    Steps are named `<name>:<step>`; a finished step is skipped when the
+    migration runs again.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        name: str,
+        chunk_size: int | None = None,
+        pause_ms: float | None = None,
+        chunk_budget_ms: float | None = None,
+        progress: Callable[[Progress], None] | None = None,
+    ) -> None:
+        if connection.get_execution_options().get("isolation_level") != "AUTOCOMMIT":
+            raise ValueError("online migrations need an AUTOCOMMIT connection; use online(op, name) in revisions")
+        self.connection = connection
+        self.name = name
+        self.chunk_size = chunk_size or settings.online_migration_chunk_size
+        self.pause = (settings.online_migration_pause_ms if pause_ms is None else pause_ms) / 1000
+        self.chunk_budget = (chunk_budget_ms or settings.online_migration_chunk_budget_ms) / 1000
+        self.progress = progress or log_progress()
+        checkpoints.create(connection, checkfirst=True)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # IMMEDIATE takes the write lock up front, so a chunk waits for the
+        # application's writers instead of failing halfway with SQLITE_BUSY.
+        self.connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.exec_driver_sql("ROLLBACK")
+            raise
+        self.connection.exec_driver_sql("COMMIT")
+
+    def _checkpoint(self, step: str):
+        return self.connection.execute(select(checkpoints).where(checkpoints.c.step == step)).one_or_none()
+
+    def _start(self, step: str) -> None:
+        now = datetime.utcnow()
+        self.connection.execute(checkpoints.delete().where(checkpoints.c.step == step))
+        self.connection.execute(checkpoints.insert().values(step=step, last_key=None, rows_done=0, started_at=now, updated_at=now))
+
+    def _advance(self, step: str, last_key: int | None, rows: int, finished: bool = False) -> None:
+        now = datetime.utcnow()
+        values = {"last_key": last_key, "rows_done": checkpoints.c.rows_done + rows, "updated_at": now}
+        if finished:
+            values["finished_at"] = now
+        self.connection.execute(checkpoints.update().where(checkpoints.c.step == step).values(**values))
+
+    def _key(self, table: str) -> str:
+        columns = sa.inspect(self.connection).get_pk_constraint(table)["constrained_columns"]
+        if len(columns) != 1:
+            raise ValueError(f"{table} needs a single-column integer primary key for online migration")
+        return columns[0]
+
+    def _walk(self, step: str, table: str, key: str, apply: Callable[[int, int], None]) -> int:
+        """Call `apply(low, high)` for consecutive key ranges of `table`, one transaction each."""
+        state = self._checkpoint(step)
+        if state is None:
+            with self._transaction():
+                self._start(step)
+            state = self._checkpoint(step)
+        last_key, rows_done = state.last_key, state.rows_done
+        remaining = f"SELECT count(*) FROM {_quote(table)}" + ("" if last_key is None else f" WHERE {_quote(key)} > :low")
+        total = rows_done + self.connection.execute(text(remaining), {"low": last_key}).scalar_one()
+        chunk = text(
+            f"SELECT max(k), count(*) FROM (SELECT {_quote(key)} AS k FROM {_quote(table)} "
+            f"WHERE {_quote(key)} > :low ORDER BY {_quote(key)} LIMIT :size)"
+        )
+        low = last_key if last_key is not None else -(2**63)
+        size = self.chunk_size
+        started = time.perf_counter()
+        while True:
+            chunk_started = time.perf_counter()
+            with self._transaction():
+                high, rows = self.connection.execute(chunk, {"low": low, "size": size}).one()
+                if high is None:
+                    self._advance(step, last_key, 0, finished=True)
+                    break
+                apply(low, high)
+                self._advance(step, high, rows)
+            rows_done += rows
+            low = last_key = high
+            took = time.perf_counter() - chunk_started
+            if took > self.chunk_budget:
+                size = max(MIN_CHUNK_SIZE, size // 2)
+            elif took < self.chunk_budget / 4:
+                size = min(self.chunk_size, size * 2)
+            self.progress(Progress(step, rows_done, total, size, time.perf_counter() - started))
+            if self.pause:
+                time.sleep(self.pause)
+        self.progress(Progress(step, rows_done, max(total, rows_done), size, time.perf_counter() - started, finished=True))
+        return rows_done
+
+    def _finished(self, step: str) -> bool:
+        state = self._checkpoint(step)
+        return state is not None and state.finished_at is not None
+
+    def once(self, step: str, fn: Callable[[], None]) -> bool:
+        """Run `fn` (typically cheap DDL through `op`) in one transaction, once."""
+        step = f"{self.name}:{step}"
+        if self._finished(step):
+            return False
+        with self._transaction():
+            fn()
+            self._start(step)
+            self._advance(step, None, 0, finished=True)
+        return True
+
+    def backfill(self, table: str, values: dict[str, str], where: str | None = None) -> int:
+        """Set columns of `table` to SQL expressions, one key range per transaction.
+
+        `where` limits the rows updated within each range. Returns the
+        number of rows scanned, counting interrupted earlier runs.
+        """
+        step = f"{self.name}:backfill:{table}:{','.join(values)}"
+        if self._finished(step):
+            return 0
+        key = self._key(table)
+        assignments = ", ".join(f"{_quote(column)} = {expression}" for column, expression in values.items())
+        statement = text(
+            f"UPDATE {_quote(table)} SET {assignments} WHERE {_quote(key)} > :low AND {_quote(key)} <= :high"
+            + (f" AND ({where})" if where else "")
+        )
+        return self._walk(step, table, key, lambda low, high: self.connection.execute(statement, {"low": low, "high": high}))
+
+    def copy_and_swap(
+        self,
+        table: str,
+        drop: Iterable[str] = (),
+        columns: Iterable[sa.Column] = (),
+        constraints: Iterable[sa.Constraint] = (),
+        values: dict[str, str] | None = None,
+        drop_unique: Iterable[Iterable[str]] = (),
+        drop_checks: Iterable[str] = (),
+    ) -> int:
+        """Rebuild `table` with a new definition through a shadow table.
+
+        The new definition is the current one without the `drop` columns,
+        with `columns` replacing same-named columns or appended, and with
+        extra `constraints`; unique constraints over exactly one of the
+        column sets in `drop_unique` and check constraints named in
+        `drop_checks` are left out. `values` gives SQL expressions over the old
+        columns for new or changed columns; other new columns take their
+        server default. Indexes and triggers of the table are kept, except
+        indexes on dropped columns. Returns the number of rows copied,
+        counting interrupted earlier runs.
+        """
+        step = f"{self.name}:copy:{table}"
+        if self._finished(step):
+            return 0
+        drop, columns, values = set(drop), list(columns), dict(values or {})
+        shadow = f"_{table}_shadow"
+        source = sa.Table(table, sa.MetaData(), autoload_with=self.connection, resolve_fks=False)
+        target = _shadow_table(
+            source, shadow, drop, columns, list(constraints), {frozenset(names) for names in drop_unique}, set(drop_checks)
+        )
+        key = self._key(table)
+        names = [column.name for column in target.columns if column.name in values or column.name in source.columns]
+        expressions = [values.get(name, _quote(name)) for name in names]
+        copy = (
+            f"INSERT OR REPLACE INTO {_quote(shadow)} ({', '.join(map(_quote, names))}) "
+            f"SELECT {', '.join(expressions)} FROM {_quote(table)} WHERE "
+        )
+
+        if self._checkpoint(step) is None or not sa.inspect(self.connection).has_table(shadow):
+            with self._transaction():
+                self.connection.exec_driver_sql(f"DROP TABLE IF EXISTS {_quote(shadow)}")
+                self.connection.execute(checkpoints.delete().where(checkpoints.c.step == f"{step}:rows"))
+                target.create(self.connection)
+                # Writes to rows the copy has already passed must reach the
+                # shadow too; rows it has not reached yet are copied again.
+                row = f"{copy}{_quote(key)} = NEW.{_quote(key)}"
+                for suffix, event, body in (
+                    ("ai", "INSERT", f"{row};"),
+                    ("au", "UPDATE", f"DELETE FROM {_quote(shadow)} WHERE {_quote(key)} = OLD.{_quote(key)}; {row};"),
+                    ("ad", "DELETE", f"DELETE FROM {_quote(shadow)} WHERE {_quote(key)} = OLD.{_quote(key)};"),
+                ):
+                    self.connection.exec_driver_sql(
+                        f"CREATE TRIGGER {_quote(f'{shadow}_{suffix}')} AFTER {event} ON {_quote(table)} BEGIN {body} END"
+                    )
+                self._start(step)
+
+        range_copy = text(f"{copy}{_quote(key)} > :low AND {_quote(key)} <= :high")
+        rows = self._walk(
+            f"{step}:rows", table, key, lambda low, high: self.connection.execute(range_copy, {"low": low, "high": high})
+        )
+        self._move_indexes(table, shadow, drop)
+        self._swap(step, table, shadow)
+        return rows
+
+    def _schema(self, kind: str, table: str) -> list[tuple[str, str]]:
+        return self.connection.execute(
+            text("SELECT name, sql FROM sqlite_master WHERE type = :kind AND tbl_name = :table AND sql IS NOT NULL ORDER BY name"),
+            {"kind": kind, "table": table},
+        ).all()
+
+    def _move_indexes(self, table: str, shadow: str, drop: set[str]) -> None:
+        # One index per transaction: the live table loses an index only for
+        # as long as it takes to build it on the shadow. Unique indexes stay
+        # until the swap so they keep guarding the live table.
+        for name, sql in self._schema("index", table):
+            if drop and re.search(r"\b(" + "|".join(map(re.escape, drop)) + r")\b", sql.split("(", 1)[1]):
+                with self._transaction():
+                    self.connection.exec_driver_sql(f"DROP INDEX {_quote(name)}")
+                continue
+            if re.match(r"\s*CREATE\s+UNIQUE\b", sql, re.I):
+                continue
+            with self._transaction():
+                self.connection.exec_driver_sql(f"DROP INDEX {_quote(name)}")
+                self.connection.exec_driver_sql(_retarget(sql, table, shadow))
+
+    def _swap(self, step: str, table: str, shadow: str) -> None:
+        foreign_keys = self.connection.exec_driver_sql("PRAGMA foreign_keys").scalar()
+        if foreign_keys:
+            # Dropping the old table would otherwise check or cascade every
+            # reference to it.
+            self.connection.exec_driver_sql("PRAGMA foreign_keys = OFF")
+        try:
+            with self._transaction():
+                indexes = self._schema("index", table)
+                triggers = [sql for name, sql in self._schema("trigger", table) if not name.startswith(f"{shadow}_")]
+                self.connection.exec_driver_sql(f"DROP TABLE {_quote(table)}")
+                # Legacy rename leaves other tables' triggers and views, which
+                # name the old table, untouched and unchecked.
+                self.connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+                self.connection.exec_driver_sql(f"ALTER TABLE {_quote(shadow)} RENAME TO {_quote(table)}")
+                self.connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+                for _, sql in indexes:
+                    self.connection.exec_driver_sql(sql)
+                for sql in triggers:
+                    self.connection.exec_driver_sql(sql)
+                self._advance(step, None, 0, finished=True)
+        finally:
+            if foreign_keys:
+                self.connection.exec_driver_sql("PRAGMA foreign_keys = ON")
+        logger.info("online migration step=%s swapped %s", step, table)
+
+
+def _retarget(sql: str, table: str, shadow: str) -> str:
+    return re.sub(rf"\bON\s+(\"{re.escape(table)}\"|{re.escape(table)})\s*\(", f"ON {_quote(shadow)} (", sql, count=1, flags=re.I)
+
+
+def _shadow_table(
+    source: sa.Table,
+    name: str,
+    drop: set[str],
+    columns: list[sa.Column],
+    constraints: list,
+    drop_unique: set[frozenset[str]],
+    drop_checks: set[str],
+) -> sa.Table:
+    # Copies, so the caller's columns can build the table again on a retry.
+    replaced = {column.name: column._copy() for column in columns}
+    items: list = []
+    for column in source.columns:
+        if column.name in drop:
+            continue
+        if column.name in replaced:
+            items.append(replaced.pop(column.name))
+            continue
+        default = column.server_default
+        items.append(
+            sa.Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                nullable=column.nullable,
+                server_default=sa.text(str(default.arg)) if default is not None else None,
+            )
+        )
+    items.extend(replaced.values())
+    changed = drop | {column.name for column in columns}
+    for constraint in source.constraints:
+        if isinstance(constraint, sa.ForeignKeyConstraint):
+            if changed.isdisjoint(constraint.column_keys):
+                targets = [element.target_fullname for element in constraint.elements]
+                items.append(sa.ForeignKeyConstraint(constraint.column_keys, targets, name=constraint.name))
+        elif isinstance(constraint, sa.UniqueConstraint):
+            if drop.isdisjoint(constraint.columns.keys()) and frozenset(constraint.columns.keys()) not in drop_unique:
+                items.append(sa.UniqueConstraint(*constraint.columns.keys(), name=constraint.name))
+        elif isinstance(constraint, sa.CheckConstraint) and constraint.name not in drop_checks:
+            items.append(sa.CheckConstraint(str(constraint.sqltext), name=constraint.name))
+    items.extend(constraints)
+    metadata = sa.MetaData()
+    table = sa.Table(name, metadata, *items)
+    # Referenced tables only need to be known by name to render REFERENCES.
+    for constraint in table.foreign_key_constraints:
+        for element in constraint.elements:
+            referred, column = element.target_fullname.rsplit(".", 1)
+            stub = metadata.tables[referred] if referred in metadata.tables else sa.Table(referred, metadata)
+            if column not in stub.columns:
+                stub.append_column(sa.Column(column, sa.Integer()))
+    return table
+
+
+@contextmanager
+def online(op, name: str, **options) -> Iterator[OnlineMigration]:
+    """Run part of a revision's `upgrade()` as an online migration.
+
+    Whatever the revision did before is committed first; `env.py` runs each
+    revision in its own transaction, so that is only the revision's own
+    earlier operations.
+    """
+    with op.get_context().autocommit_block():
+        yield OnlineMigration(op.get_bind(), name, **options)
+
+
+def forget(op, name: str) -> None:
+    """Clear the checkpoints of migration `name`, so its steps run again."""
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table(checkpoints.name):
+        bind.execute(checkpoints.delete().where(checkpoints.c.step.like(f"{name}:%")))
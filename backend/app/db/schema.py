@@ -0,0 +1,46 @@
+"""Schema preparation, run once from the application lifespan."""
+
+import logging
+from pathlib import Path
+
+from sqlalchemy.engine import Engine
+
+from app.db.session import Base, engine
+
+logger = logging.getLogger("gst_invoice")
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+def alembic_config(bind: Engine):
+    from alembic.config import Config
+
+    # No ini file: alembic's fileConfig would reset the app's loggers.
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", bind.url.render_as_string(hide_password=False).replace("%", "%%"))
+    return config
+
+
+def prepare_schema(mode: str, bind: Engine | None = None) -> None:
+    """Bring the database schema up to date according to `mode`.
+
+    `create_all` creates missing tables from the ORM models, `alembic` runs
+    `alembic upgrade head` against the database (`bind`, by default the
+    application engine), and `none` leaves the schema to an out-of-band
+    migration step.
+    """
+    bind = bind or engine
+    if mode == "none":
+        return
+    if mode == "alembic":
+        from alembic import command
+
+        command.upgrade(alembic_config(bind), "head")
+    elif mode == "create_all":
+        from app.models import models  # noqa: F401
+
+        Base.metadata.create_all(bind=bind)
+    else:
+        raise ValueError(f"Unknown schema management mode: {mode}")
+    logger.info("schema prepared mode=%s url=%s", mode, bind.url)
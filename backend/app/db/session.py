@@ -1,7 +1,9 @@
 """Database session and engine management."""
 
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security.utils import get_authorization_scheme_param
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.core.config import settings
 
@@ -10,10 +12,33 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
-def get_db():
-    """Yield a database session."""
+def get_directory_db():
+    """Yield a session on `database_url`, which always holds users."""
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_db(request: Request, directory: Session = Depends(get_directory_db)):
+    """Yield the session for the caller's tenant data.
+
+    Without sharding that is the directory session itself; with sharding it
+    is a session on the shard of the access token's principal.
+    """
+    if settings.shard_mode == "off":
+        yield directory
+        return
+    from app.core.security import decode_access_token
+    from app.db.sharding import shard_router
+
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    principal = decode_access_token(token) if scheme.lower() == "bearer" else None
+    if not principal:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    db = shard_router.session(principal)
+    try:
+        yield db
+    finally:
+        db.close()
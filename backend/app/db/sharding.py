@@ -0,0 +1,187 @@
+"""Per-tenant SQLite shards for tenant data.
+
+With `shard_mode` on, sellers, buyers, invoices and everything hanging off
+them live in SQLite files under `shard_directory`, chosen from the
+authenticated principal (the email in the access token), so one tenant's
+bulk write only locks its own file. Users stay in `database_url` (the
+directory), which keeps user ids global and logins independent of shards.
+
+Engines are opened lazily and kept in an LRU; evicted engines are disposed.
+A shard file is built from the ORM models and stamped at alembic head when
+first created; existing shards are brought up to date by `migrate_shards`
+at startup or from `python -m app.cli shards migrate`.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.db.schema import alembic_config, prepare_schema
+from app.db.session import Base
+from app.services.metrics_service import inc, metrics_counter
+from app.utils.lru import LRUCache
+
+logger = logging.getLogger("gst_invoice")
+
+T = TypeVar("T")
+SUFFIX = ".db"
+
+ShardSession = sessionmaker(autocommit=False, autoflush=False)
+
+
+def _sqlite_engine(path: Path, **kwargs) -> Engine:
+    return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, **kwargs)
+
+
+def _create_schema(bind: Engine) -> None:
+    from alembic import command
+
+    from app.models import models  # noqa: F401
+
+    # The models are the schema at head; stamping lets `alembic upgrade`
+    # take over later whatever SCHEMA_MANAGEMENT the shard was created under.
+    Base.metadata.create_all(bind=bind)
+    command.stamp(alembic_config(bind), "head")
+
+
+class ShardRouter:
+    """Maps principals to shard files and keeps an LRU of open shard engines."""
+
+    def __init__(self, directory: str | Path, mode: str, count: int, cache_size: int, schema_mode: str) -> None:
+        if mode not in ("per_user", "hashed"):
+            raise ValueError(f"Unknown shard mode: {mode}")
+        if count < 1:
+            raise ValueError("shard_count must be positive")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.count = count
+        self.schema_mode = schema_mode
+        self._engines = LRUCache(cache_size, on_evict=self._evict)
+        # Shards whose schema was checked by this process.
+        self.prepared: set[str] = set()
+        self._lock = threading.Lock()
+
+    def shard_for(self, principal: str) -> str:
+        """Return the shard name holding `principal`'s data."""
+        digest = hashlib.sha256(principal.encode("utf-8")).hexdigest()
+        if self.mode == "per_user":
+            return f"user-{digest[:24]}"
+        return f"shard-{int(digest[:16], 16) % self.count:03d}"
+
+    def path(self, name: str) -> Path:
+        return self.directory / f"{name}{SUFFIX}"
+
+    def shard_names(self) -> list[str]:
+        """Names of the shard files that exist on disk."""
+        return sorted(path.stem for path in self.directory.glob(f"*{SUFFIX}"))
+
+    def engine(self, name: str) -> Engine:
+        """Return the pooled engine for shard `name`, creating the shard on first use."""
+        engine = self._engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            engine = self._engines.get(name)
+            if engine is None:
+                path = self.path(name)
+                is_new = not path.exists()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                engine = _sqlite_engine(path)
+                if name not in self.prepared:
+                    if is_new:
+                        _create_schema(engine)
+                    else:
+                        prepare_schema(self.schema_mode, engine)
+                    self.prepared.add(name)
+                self._engines.set(name, engine)
+                inc("shard_engines_opened_total")
+                metrics_counter["shard_engines_open"] = len(self._engines)
+        return engine
+
+    def session(self, principal: str) -> Session:
+        return ShardSession(bind=self.engine(self.shard_for(principal)))
+
+    def _evict(self, name: str, engine: Engine) -> None:
+        # Connections still checked out by in-flight requests stay usable and
+        # are closed when returned; idle ones are closed now.
+        engine.dispose()
+        inc("shard_engine_evictions_total")
+        metrics_counter["shard_engines_open"] = len(self._engines)
+        logger.info("shard engine evicted shard=%s", name)
+
+    def dispose(self) -> None:
+        for _, engine in self._engines.items():
+            engine.dispose()
+        self._engines.clear()
+        metrics_counter["shard_engines_open"] = 0
+
+
+@dataclass
+class ShardResult:
+    shard: str
+    value: Any = None
+    error: str | None = None
+
+
+def migrate_shards(router: ShardRouter, mode: str | None = None) -> list[str]:
+    """Apply `prepare_schema(mode)` to every existing shard; return the shards migrated.
+
+    Each shard gets its own short-lived engine so a migration run does not
+    churn the request-path engine cache.
+    """
+    mode = mode or router.schema_mode
+    migrated = []
+    for name in router.shard_names():
+        engine = _sqlite_engine(router.path(name), poolclass=NullPool)
+        try:
+            if inspect(engine).get_table_names():
+                prepare_schema(mode, engine)
+            else:
+                _create_schema(engine)
+        finally:
+            engine.dispose()
+        router.prepared.add(name)
+        migrated.append(name)
+    logger.info("shards migrated count=%s mode=%s", len(migrated), mode)
+    return migrated
+
+
+def scan_shards(router: ShardRouter, fn: Callable[[Session], T]) -> Iterator[ShardResult]:
+    """Run `fn(session)` against each shard in turn, on a read-only connection.
+
+    For admin reports that need every tenant (counts, audits, exports). A
+    failing shard is reported with its error instead of ending the scan.
+    """
+    for name in router.shard_names():
+        engine = create_engine(f"sqlite:///file:{router.path(name)}?mode=ro&uri=true", poolclass=NullPool)
+        try:
+            with ShardSession(bind=engine) as db:
+                yield ShardResult(name, value=fn(db))
+        except Exception as exc:  # noqa: BLE001 - reported per shard
+            yield ShardResult(name, error=f"{type(exc).__name__}: {exc}")
+        finally:
+            engine.dispose()
+
+
+def build_router() -> ShardRouter | None:
+    if settings.shard_mode == "off":
+        return None
+    return ShardRouter(
+        settings.shard_directory,
+        settings.shard_mode,
+        settings.shard_count,
+        settings.shard_engine_cache_size,
+        settings.schema_management,
+    )
+
+
+shard_router = build_router()
@@ -1,28 +1,71 @@
 """FastAPI application entrypoint."""
 
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
+import anyio.to_thread
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-from app.api import auth, buyers, invoices, sellers
+from app.api import admin, auth, buyers, events, gstin, invoices, products, reconciliation, recurring, sellers
 from app.core.config import settings
-from app.db.session import Base, engine
+from app.db.instrumentation import install_query_instrumentation
+from app.db.schema import prepare_schema
+from app.db.sharding import migrate_shards, shard_router
 from app.middleware.logging import LoggingMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.services.metrics_service import render_prometheus
+from app.services.profiling_service import install_profiling_hooks
+from app.services.recurring_service import RecurringScheduler
 
 logging.basicConfig(level=logging.INFO)
+install_query_instrumentation()
+install_profiling_hooks()
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title=settings.app_name, openapi_url=f"{settings.api_v1_prefix}/openapi.json")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    prepare_schema(settings.schema_management)
+    if shard_router is not None and settings.schema_management != "none":
+        migrate_shards(shard_router)
+    # Routes without a bulkhead (CRUD) share AnyIO's default thread limiter.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.crud_concurrency
+    scheduler = None
+    if settings.recurring_scheduler_enabled:
+        scheduler = asyncio.create_task(RecurringScheduler(settings.recurring_scheduler_interval_seconds).run_forever())
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+    if shard_router is not None:
+        shard_router.dispose()
+
+
+app = FastAPI(title=settings.app_name, openapi_url=f"{settings.api_v1_prefix}/openapi.json", lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(QueryStatsMiddleware)
 app.add_middleware(LoggingMiddleware)
 
 app.include_router(auth.router, prefix=settings.api_v1_prefix)
 app.include_router(sellers.router, prefix=settings.api_v1_prefix)
 app.include_router(buyers.router, prefix=settings.api_v1_prefix)
+app.include_router(products.router, prefix=settings.api_v1_prefix)
+app.include_router(gstin.router, prefix=settings.api_v1_prefix)
 app.include_router(invoices.router, prefix=settings.api_v1_prefix)
+app.include_router(reconciliation.router, prefix=settings.api_v1_prefix)
+app.include_router(events.router, prefix=settings.api_v1_prefix)
+app.include_router(recurring.router, prefix=settings.api_v1_prefix)
+app.include_router(admin.router, prefix=settings.api_v1_prefix)
 
 
 @app.get("/health")
 def health() -> dict:
     """Health check."""
     return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus text exposition of in-process counters."""
+    return render_prometheus()
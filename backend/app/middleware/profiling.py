@@ -0,0 +1,30 @@
+"""Per-request profiling middleware."""
+
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.services.profiling_service import profile_request
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """Profile a request sent with `X-Profile: 1` by an admin.
+
+    The response carries `X-Profile-Id`; download the profile from
+    `GET /admin/profiles/{id}`. Other requests pass straight through, and the
+    header is ignored for non-admins.
+    """
+
+    async def dispatch(self, request, call_next):
+        if request.headers.get("X-Profile") != "1" or not self._is_admin(request):
+            return await call_next(request)
+        with profile_request() as profile:
+            response = await call_next(request)
+        response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    @staticmethod
+    def _is_admin(request) -> bool:
+        scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+        return scheme.lower() == "bearer" and decode_access_token(token) in settings.admin_emails
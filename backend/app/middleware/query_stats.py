@@ -0,0 +1,37 @@
+"""Per-request database statistics middleware."""
+
+import logging
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.config import settings
+from app.db.instrumentation import track_queries
+from app.services.metrics_service import inc
+
+logger = logging.getLogger("gst_invoice")
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Report statement count, DB time and rows per request.
+
+    Adds a `Server-Timing: db;dur=...` header, feeds per-route counters to
+    the metrics endpoint and logs statement shapes repeated often enough
+    within one request to look like an N+1 query.
+    """
+
+    async def dispatch(self, request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        labels = f'method="{request.method}",route="{route}"'
+        inc(f"http_requests_total{{{labels}}}")
+        inc(f"db_statements_total{{{labels}}}", stats.statements)
+        inc(f"db_time_ms_total{{{labels}}}", round(stats.db_ms, 3))
+        inc(f"db_rows_total{{{labels}}}", stats.rows)
+        response.headers.append(
+            "Server-Timing", f'db;dur={stats.db_ms:.2f};desc="{stats.statements} queries, {stats.rows} rows"'
+        )
+        for shape, count in stats.repeated(settings.query_repeat_warning_threshold):
+            inc(f"db_repeated_statements_total{{{labels}}}")
+            logger.warning("Possible N+1: %d x %s in %s %s", count, shape[:200], request.method, route)
+        return response
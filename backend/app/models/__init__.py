@@ -1,3 +1,3 @@
-from .models import Buyer, Invoice, InvoiceItem, Seller, TaxSummary, User
+from .models import Buyer, IdempotencyKey, Invoice, InvoiceItem, Seller, TaxSummary, User
 
-__all__ = ["User", "Seller", "Buyer", "Invoice", "InvoiceItem", "TaxSummary"]
+__all__ = ["User", "Seller", "Buyer", "Invoice", "InvoiceItem", "TaxSummary", "IdempotencyKey"]
@@ -2,9 +2,24 @@
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import relationship
 
+from app.db.fts import BUYERS_FTS_DDL, INVOICES_FTS_DDL, install_fts, install_invoice_index_sync
 from app.db.session import Base
 
 
@@ -29,6 +44,7 @@ class Seller(Base):
     gstin = Column(String(15), unique=True, nullable=False)
     address = Column(Text, nullable=False)
     state_code = Column(String(2), nullable=False)
+    words_language = Column(String(8), default="en", nullable=False)
 
     owner = relationship("User", back_populates="sellers")
     invoices = relationship("Invoice", back_populates="seller")
@@ -38,21 +54,51 @@ class Buyer(Base):
     __tablename__ = "buyers"
 
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     name = Column(String(255), nullable=False)
-    gstin = Column(String(15), nullable=True)
+    gstin = Column(String(15), index=True, nullable=True)
     address = Column(Text, nullable=False)
     state_code = Column(String(2), nullable=False)
 
     invoices = relationship("Invoice", back_populates="buyer")
 
 
+Index("ix_buyers_user_name", Buyer.user_id, func.lower(Buyer.name), Buyer.id)
+install_fts(Buyer.__table__, BUYERS_FTS_DDL)
+
+
+class Product(Base):
+    __tablename__ = "products"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    hsn_sac = Column(String(12), nullable=False)
+    unit_price = Column(Float, nullable=False)
+    gst_rate = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class Asset(Base):
+    __tablename__ = "assets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, nullable=False)
+    content_type = Column(String(100), nullable=False)
+    size = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class Invoice(Base):
     __tablename__ = "invoices"
 
     id = Column(Integer, primary_key=True, index=True)
     seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
     buyer_id = Column(Integer, ForeignKey("buyers.id"), nullable=False)
-    invoice_number = Column(String(50), unique=True, nullable=False)
+    # Assigned from the seller's sequence when the invoice is finalized;
+    # unique per seller (see ux_invoices_seller_number).
+    invoice_number = Column(String(50), nullable=True)
     invoice_type = Column(String(3), nullable=False)
     reverse_charge = Column(Boolean, default=False, nullable=False)
     supply_type = Column(String(10), nullable=False)
@@ -63,7 +109,13 @@ class Invoice(Base):
     total_igst = Column(Float, default=0.0, nullable=False)
     grand_total = Column(Float, default=0.0, nullable=False)
     grand_total_words = Column(String(255), default="", nullable=False)
+    logo_asset_id = Column(Integer, ForeignKey("assets.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Invoice date (IST), set when the invoice is finalized; drafts have none.
+    issued_on = Column(Date, nullable=True)
+    # Set on invoices generated from a recurring template: which one, for which period.
+    recurring_template_id = Column(Integer, ForeignKey("recurring_templates.id"), nullable=True)
+    recurring_period = Column(Date, nullable=True)
 
     seller = relationship("Seller", back_populates="invoices")
     buyer = relationship("Buyer", back_populates="invoices")
@@ -71,11 +123,23 @@ class Invoice(Base):
     tax_summary = relationship("TaxSummary", back_populates="invoice", uselist=False, cascade="all, delete-orphan")
 
 
+# GSTR-2B reconciliation loads a recipient's invoices one issue month at a time.
+Index("ix_invoices_buyer_issued", Invoice.buyer_id, Invoice.issued_on)
+Index("ux_invoices_seller_number", Invoice.seller_id, Invoice.invoice_number, unique=True)
+# A template period is invoiced at most once, whatever runs the scheduler.
+Index("ux_invoices_recurring_period", Invoice.recurring_template_id, Invoice.recurring_period, unique=True)
+install_fts(Invoice.__table__, INVOICES_FTS_DDL)
+install_invoice_index_sync()
+
+
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False, index=True)
+    # Catalog product the line was filled from; the line keeps its own copy
+    # of name, HSN/SAC, price and rate, so catalog edits never change it.
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=True)
     name = Column(String(255), nullable=False)
     hsn_sac = Column(String(12), nullable=False)
     quantity = Column(Float, nullable=False)
@@ -89,6 +153,10 @@ class InvoiceItem(Base):
     invoice = relationship("Invoice", back_populates="items")
 
 
+# Finds the lines a GST rate change applies to, in invoice order.
+Index("ix_invoice_items_hsn_rate", InvoiceItem.hsn_sac, InvoiceItem.gst_rate, InvoiceItem.invoice_id)
+
+
 class TaxSummary(Base):
     __tablename__ = "tax_summary"
 
@@ -101,3 +169,94 @@ class TaxSummary(Base):
     total_tax = Column(Float, nullable=False)
 
     invoice = relationship("Invoice", back_populates="tax_summary")
+
+
+class InvoiceSequence(Base):
+    __tablename__ = "invoice_sequences"
+    # One gap-free series per seller and financial year.
+    __table_args__ = (UniqueConstraint("financial_year", "seller_id", name="uq_invoice_sequence_fy_seller"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    financial_year = Column(String(7), nullable=False)
+    seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
+    current_value = Column(Integer, default=0, server_default="0", nullable=False)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Keys are chosen by clients, so each user has their own key space.
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String(128), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class InvoiceEvent(Base):
+    """Append-only change feed of invoices; `id` is the consumer offset."""
+
+    __tablename__ = "invoice_events"
+    # AUTOINCREMENT: SQLite never hands out an offset twice, even after pruning.
+    __table_args__ = (Index("ix_invoice_events_user_offset", "user_id", "id"), {"sqlite_autoincrement": True})
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
+    type = Column(String(32), nullable=False)
+    # JSON object with the fields the change set; served verbatim.
+    payload = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class RecurringTemplate(Base):
+    __tablename__ = "recurring_templates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=False)
+    buyer_id = Column(Integer, ForeignKey("buyers.id"), nullable=False)
+    invoice_type = Column(String(3), nullable=False)
+    reverse_charge = Column(Boolean, default=False, nullable=False)
+    cadence = Column(String(16), nullable=False)
+    start_on = Column(Date, nullable=False)
+    # Periods are counted from start_on, so month-end anchors do not drift.
+    periods_generated = Column(Integer, default=0, server_default="0", nullable=False)
+    next_run_on = Column(Date, nullable=False)
+    active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    items = relationship("RecurringTemplateItem", back_populates="template", cascade="all, delete-orphan")
+
+
+Index("ix_recurring_templates_due", RecurringTemplate.active, RecurringTemplate.next_run_on)
+
+
+class RecurringTemplateItem(Base):
+    __tablename__ = "recurring_template_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    template_id = Column(Integer, ForeignKey("recurring_templates.id"), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    hsn_sac = Column(String(12), nullable=False)
+    quantity = Column(Float, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    discount = Column(Float, default=0.0, nullable=False)
+    gst_rate = Column(Float, nullable=False)
+
+    template = relationship("RecurringTemplate", back_populates="items")
+
+
+class IngestCheckpoint(Base):
+    """Progress of a `python -m app.cli ingest` run, committed with each batch."""
+
+    __tablename__ = "ingest_checkpoints"
+
+    source = Column(String(1024), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    source_size = Column(Integer, nullable=False)
+    # Records of the source consumed so far, imported or rejected.
+    records_done = Column(Integer, default=0, nullable=False)
+    invoices = Column(Integer, default=0, nullable=False)
+    lines = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,13 +1,27 @@
 """Pydantic schemas for API input and output."""
 
-from datetime import datetime
+import math
+from datetime import date, datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+
+from app.core.config import settings
+from app.utils.number_words import DEFAULT_LANGUAGE, available_languages
 
 ALLOWED_GST_RATES = {0, 5, 12, 18, 28, 40}
 
 
+def _base64_length(size: int) -> int:
+    # Base64 of `size` bytes, wrapped at 76 columns with CRLF, behind a
+    # data: URL prefix. decode_image checks the decoded size exactly.
+    encoded = 4 * math.ceil(size / 3)
+    return encoded + 2 * math.ceil(encoded / 76) + 64
+
+
+MAX_LOGO_BASE64_LENGTH = _base64_length(settings.max_logo_bytes)
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -33,6 +47,14 @@ class SellerBase(BaseModel):
     gstin: str = Field(min_length=15, max_length=15)
     address: str
     state_code: str = Field(min_length=2, max_length=2)
+    words_language: str = DEFAULT_LANGUAGE
+
+    @field_validator("words_language")
+    @classmethod
+    def validate_words_language(cls, value: str) -> str:
+        if value not in available_languages():
+            raise ValueError(f"words_language must be one of {', '.join(available_languages())}")
+        return value
 
 
 class SellerCreate(SellerBase):
@@ -64,12 +86,38 @@ class BuyerRead(BuyerBase):
         from_attributes = True
 
 
-class InvoiceItemCreate(BaseModel):
-    name: str
-    hsn_sac: str
-    quantity: float = Field(gt=0)
+class BuyerPage(BaseModel):
+    items: list[BuyerRead]
+    next_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BuyerImportErrorRead(BaseModel):
+    row: int
+    gstin: Optional[str] = None
+    error: str
+
+    class Config:
+        from_attributes = True
+
+
+class BuyerImportReport(BaseModel):
+    total_rows: int
+    inserted: int
+    duplicates: int
+    error_count: int
+    errors: list[BuyerImportErrorRead]
+
+    class Config:
+        from_attributes = True
+
+
+class ProductCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=255)
+    hsn_sac: str = Field(min_length=2, max_length=12)
     unit_price: float = Field(ge=0)
-    discount: float = Field(default=0, ge=0)
     gst_rate: float
 
     @field_validator("gst_rate")
@@ -80,8 +128,40 @@ class InvoiceItemCreate(BaseModel):
         return value
 
 
+class ProductRead(ProductCreate):
+    id: int
+
+    class Config:
+        from_attributes = True
+
+
+class InvoiceItemCreate(BaseModel):
+    id: Optional[int] = Field(default=None, description="Existing line id; lines without one are added")
+    product_id: Optional[int] = Field(default=None, description="Catalog product; fills name, hsn_sac, unit_price and gst_rate left out")
+    name: Optional[str] = None
+    hsn_sac: Optional[str] = None
+    quantity: float = Field(gt=0)
+    unit_price: Optional[float] = Field(default=None, ge=0)
+    discount: float = Field(default=0, ge=0)
+    gst_rate: Optional[float] = None
+
+    @field_validator("gst_rate")
+    @classmethod
+    def validate_rate(cls, value: Optional[float]) -> Optional[float]:
+        if value is not None and value not in ALLOWED_GST_RATES:
+            raise ValueError("GST rate must be one of 0, 5, 12, 18, 28, 40")
+        return value
+
+    @model_validator(mode="after")
+    def require_product_or_details(self) -> "InvoiceItemCreate":
+        if self.product_id is None and None in (self.name, self.hsn_sac, self.unit_price, self.gst_rate):
+            raise ValueError("name, hsn_sac, unit_price and gst_rate are required for lines without a product_id")
+        return self
+
+
 class InvoiceItemRead(BaseModel):
     id: int
+    product_id: Optional[int] = None
     name: str
     hsn_sac: str
     quantity: float
@@ -96,14 +176,65 @@ class InvoiceItemRead(BaseModel):
         from_attributes = True
 
 
+class InvoiceItemUpdate(BaseModel):
+    id: int
+    product_id: Optional[int] = None
+    name: Optional[str] = None
+    hsn_sac: Optional[str] = None
+    quantity: Optional[float] = Field(default=None, gt=0)
+    unit_price: Optional[float] = Field(default=None, ge=0)
+    discount: Optional[float] = Field(default=None, ge=0)
+    gst_rate: Optional[float] = None
+
+    @field_validator("gst_rate")
+    @classmethod
+    def validate_rate(cls, value: Optional[float]) -> Optional[float]:
+        if value is not None and value not in ALLOWED_GST_RATES:
+            raise ValueError("GST rate must be one of 0, 5, 12, 18, 28, 40")
+        return value
+
+
+class InvoiceItemsPatch(BaseModel):
+    add: list[InvoiceItemCreate] = Field(default_factory=list)
+    modify: list[InvoiceItemUpdate] = Field(default_factory=list)
+    remove: list[int] = Field(default_factory=list)
+
+
 class InvoiceCreate(BaseModel):
     seller_id: int
     buyer_id: int
     invoice_type: str = Field(pattern="^(B2B|B2C)$")
     reverse_charge: bool = False
+    logo_base64: Optional[str] = Field(
+        default=None,
+        max_length=MAX_LOGO_BASE64_LENGTH,
+        description="PNG/JPEG/GIF as base64 or a data: URL; stored once per distinct image",
+    )
     items: list[InvoiceItemCreate]
 
 
+FINALIZE_BATCH_MAX = 5000
+
+
+class InvoiceFinalizeBatch(BaseModel):
+    invoice_ids: list[int] = Field(min_length=1, max_length=FINALIZE_BATCH_MAX)
+
+
+class FinalizedInvoiceRead(BaseModel):
+    id: int
+    invoice_number: str
+
+
+class FinalizeSkipRead(BaseModel):
+    id: int
+    reason: str
+
+
+class InvoiceFinalizeBatchResult(BaseModel):
+    finalized: list[FinalizedInvoiceRead]
+    skipped: list[FinalizeSkipRead]
+
+
 class TaxSummaryRead(BaseModel):
     total_taxable: float
     total_cgst: float
@@ -116,7 +247,7 @@ class InvoiceRead(BaseModel):
     id: int
     seller_id: int
     buyer_id: int
-    invoice_number: str
+    invoice_number: Optional[str] = None
     invoice_type: str
     reverse_charge: bool
     supply_type: str
@@ -127,8 +258,131 @@ class InvoiceRead(BaseModel):
     total_igst: float
     grand_total: float
     grand_total_words: str
+    logo_asset_id: Optional[int] = None
     created_at: datetime
+    issued_on: Optional[date] = None
     items: list[InvoiceItemRead]
 
     class Config:
         from_attributes = True
+
+
+class InvoiceSearchHitRead(BaseModel):
+    id: int
+    invoice_number: Optional[str] = None
+    status: str
+    grand_total: float
+    created_at: datetime
+    seller_name: str
+    buyer_name: str
+    score: float
+
+    class Config:
+        from_attributes = True
+
+
+class InvoiceSearchPage(BaseModel):
+    items: list[InvoiceSearchHitRead]
+    next_offset: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+
+EVENTS_PAGE_MAX = 1000
+
+
+class InvoiceEventRead(BaseModel):
+    id: int = Field(description="Offset; pass the last one seen as `after` to resume")
+    invoice_id: int
+    type: str = Field(description="invoice.created, invoice.updated or invoice.finalized")
+    created_at: datetime
+    data: dict = Field(description="Invoice fields as of this change")
+
+
+class InvoiceEventPage(BaseModel):
+    events: list[InvoiceEventRead]
+    next_after: int
+
+
+class RecurringTemplateCreate(BaseModel):
+    seller_id: int
+    buyer_id: int
+    invoice_type: str = Field(pattern="^(B2B|B2C)$")
+    reverse_charge: bool = False
+    cadence: str = Field(pattern="^(weekly|monthly|quarterly|yearly)$")
+    start_on: date = Field(default_factory=date.today, description="Date of the first invoice; later ones fall on the same day of the period")
+    items: list[InvoiceItemCreate] = Field(min_length=1)
+
+
+class RecurringTemplateItemRead(BaseModel):
+    id: int
+    name: str
+    hsn_sac: str
+    quantity: float
+    unit_price: float
+    discount: float
+    gst_rate: float
+
+    class Config:
+        from_attributes = True
+
+
+class RecurringTemplateRead(BaseModel):
+    id: int
+    seller_id: int
+    buyer_id: int
+    invoice_type: str
+    reverse_charge: bool
+    cadence: str
+    start_on: date
+    periods_generated: int
+    next_run_on: date
+    active: bool
+    created_at: datetime
+    items: list[RecurringTemplateItemRead]
+
+    class Config:
+        from_attributes = True
+
+
+class GstinValidateRequest(BaseModel):
+    gstins: list[str] = Field(min_length=1, max_length=10000)
+
+
+class GstinValidationRead(BaseModel):
+    gstin: str
+    valid: bool
+    state_code: Optional[str] = None
+    reason: Optional[str] = None
+
+
+class RepricingRequest(BaseModel):
+    hsn_sac: str = Field(min_length=2, max_length=12)
+    old_rate: float = Field(ge=0)
+    new_rate: float
+    effective_on: date = Field(description="Date the revised rate takes effect; drafts are re-priced only from then on")
+
+    @field_validator("new_rate")
+    @classmethod
+    def validate_rate(cls, value: float) -> float:
+        if value not in ALLOWED_GST_RATES:
+            raise ValueError("GST rate must be one of 0, 5, 12, 18, 28, 40")
+        return value
+
+    @model_validator(mode="after")
+    def rates_differ(self) -> "RepricingRequest":
+        if self.old_rate == self.new_rate:
+            raise ValueError("old_rate and new_rate are the same")
+        return self
+
+
+class RepricingReportRead(BaseModel):
+    hsn_sac: str
+    old_rate: float
+    new_rate: float
+    effective_on: date
+    lines: int
+    invoices: int
+    batches: int
+    elapsed_ms: float
@@ -0,0 +1,124 @@
+"""Content-addressed storage for logos and the decoded images used in PDFs."""
+
+import base64
+import binascii
+import hashlib
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Asset, Invoice
+from app.utils.lru import LRUCache
+
+if TYPE_CHECKING:
+    from reportlab.lib.utils import ImageReader
+
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+# Logos are drawn in a 120x50pt box; keep ~4x that in pixels for print.
+LOGO_MAX_PIXELS = (480, 200)
+
+
+class AssetError(ValueError):
+    """Raised for uploads that are not a supported image or are too large."""
+
+
+def decode_image(encoded: str) -> tuple[bytes, str]:
+    """Decode a base64 image (optionally a `data:` URL) and sniff its type from the bytes."""
+    _, marker, payload = encoded.partition("base64,")
+    try:
+        data = base64.b64decode("".join((payload if marker else encoded).split()), validate=True)
+    except (binascii.Error, ValueError) as exc:
+        raise AssetError("Logo is not valid base64") from exc
+    if len(data) > settings.max_logo_bytes:
+        raise AssetError(f"Logo must be at most {settings.max_logo_bytes} bytes")
+    for signature, content_type in IMAGE_SIGNATURES.items():
+        if data.startswith(signature):
+            return data, content_type
+    raise AssetError("Logo must be a PNG, JPEG or GIF image")
+
+
+def store_asset(db: Session, data: bytes, content_type: str) -> int:
+    """Return the id of the asset holding `data`, inserting it on first sight."""
+    digest = hashlib.sha256(data).hexdigest()
+    asset_id = db.execute(select(Asset.id).where(Asset.sha256 == digest)).scalar()
+    if asset_id is not None:
+        return asset_id
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(db.get_bind().dialect.name)
+    values = {"sha256": digest, "content_type": content_type, "size": len(data), "data": data}
+    if dialect is None:
+        db.add(Asset(**values))
+        db.flush()
+    else:
+        # A concurrent upload of the same bytes may win the race; keep theirs.
+        db.execute(dialect.insert(Asset).values(**values).on_conflict_do_nothing(index_elements=["sha256"]))
+    return db.execute(select(Asset.id).where(Asset.sha256 == digest)).scalar_one()
+
+
+def store_logo(db: Session, encoded: str | None) -> int | None:
+    """Store a base64 logo from a request payload and return its asset id."""
+    if not encoded:
+        return None
+    return store_asset(db, *decode_image(encoded))
+
+
+class LogoImageCache:
+    """LRU of print-sized `ImageReader`s keyed by asset SHA-256.
+
+    Assets never change once written, so entries need no invalidation; a hit
+    costs one indexed lookup of the digest and skips loading, decoding and
+    downscaling the stored bytes.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._cache = LRUCache(maxsize)
+
+    def for_invoice(self, db: Session, invoice_id: int) -> "ImageReader | None":
+        row = db.execute(
+            select(Asset.id, Asset.sha256).join(Invoice, Invoice.logo_asset_id == Asset.id).where(Invoice.id == invoice_id)
+        ).first()
+        if row is None:
+            return None
+        reader = self._cache.get(row.sha256)
+        if reader is None:
+            data = db.execute(select(Asset.data).where(Asset.id == row.id)).scalar_one()
+            reader = _print_image(data)
+            self._cache.set(row.sha256, reader)
+        return reader
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+def _print_image(data: bytes) -> "ImageReader":
+    # Pillow and reportlab are only needed once a logo is rendered.
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+
+    image = Image.open(BytesIO(data))
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA")
+    image.thumbnail(LOGO_MAX_PIXELS)
+    reader = ImageReader(image)
+    # Materialize pixel data now so threads sharing the cached reader only read it.
+    reader.getRGBData()
+    return reader
+
+
+logo_images = LogoImageCache(settings.logo_image_cache_size)
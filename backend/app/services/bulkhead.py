@@ -0,0 +1,90 @@
+"""Per-route-class thread pools (bulkheads) for blocking endpoint work.
+
+Sync FastAPI endpoints all share AnyIO's default thread limiter, so a burst
+of slow PDF renders or password hashes can hold every token while cheap CRUD
+requests queue behind them. A bulkhead gives a class of routes its own
+concurrency limit; callers wait at most `queue_timeout` seconds for a slot
+and are then rejected so the client can back off.
+"""
+
+import functools
+import time
+from typing import Callable, TypeVar
+
+import anyio
+from anyio.lowlevel import RunVar
+
+from app.core.config import settings
+from app.services.metrics_service import inc, metrics_counter
+
+T = TypeVar("T")
+
+
+class BulkheadFull(RuntimeError):
+    """Raised when no slot frees up within the bulkhead's queue timeout."""
+
+    def __init__(self, name: str, retry_after: int) -> None:
+        super().__init__(f"{name} bulkhead is full")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded wait for one class of blocking work.
+
+    AnyIO primitives belong to an event loop, so the gate and thread limiter
+    are created per loop (`RunVar`), just like AnyIO's own default limiter.
+    """
+
+    def __init__(self, name: str, limit: int, queue_timeout: float, retry_after: int) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._primitives: RunVar[tuple[anyio.Semaphore, anyio.CapacityLimiter]] = RunVar(f"bulkhead_{name}")
+        self._labels = f'bulkhead="{name}"'
+        metrics_counter[f"bulkhead_limit{{{self._labels}}}"] = limit
+        for gauge in ("active", "waiting"):
+            metrics_counter[f"bulkhead_{gauge}{{{self._labels}}}"] = 0
+
+    def _loop_primitives(self) -> tuple[anyio.Semaphore, anyio.CapacityLimiter]:
+        try:
+            return self._primitives.get()
+        except LookupError:
+            primitives = (anyio.Semaphore(self.limit), anyio.CapacityLimiter(self.limit))
+            self._primitives.set(primitives)
+            return primitives
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run `fn(*args)` in a worker thread once a slot is free."""
+        gate, threads = self._loop_primitives()
+        inc(f"bulkhead_waiting{{{self._labels}}}")
+        start = time.perf_counter()
+        try:
+            with anyio.fail_after(self.queue_timeout):
+                await gate.acquire()
+        except TimeoutError:
+            inc(f"bulkhead_rejected_total{{{self._labels}}}")
+            raise BulkheadFull(self.name, self.retry_after) from None
+        finally:
+            inc(f"bulkhead_waiting{{{self._labels}}}", -1)
+        inc(f"bulkhead_wait_ms_total{{{self._labels}}}", round((time.perf_counter() - start) * 1000, 3))
+        inc(f"bulkhead_active{{{self._labels}}}")
+        try:
+            # The gate already bounds concurrency; `threads` only keeps this
+            # work off the default limiter that the other routes share.
+            return await anyio.to_thread.run_sync(functools.partial(fn, *args), limiter=threads)
+        finally:
+            inc(f"bulkhead_active{{{self._labels}}}", -1)
+            inc(f"bulkhead_calls_total{{{self._labels}}}")
+            gate.release()
+
+
+def _bulkhead(name: str, limit: int) -> Bulkhead:
+    return Bulkhead(name, limit, settings.bulkhead_queue_timeout_seconds, settings.bulkhead_retry_after_seconds)
+
+
+bulkheads: dict[str, Bulkhead] = {
+    "pdf": _bulkhead("pdf", settings.pdf_concurrency),
+    "auth": _bulkhead("auth", settings.auth_concurrency),
+}
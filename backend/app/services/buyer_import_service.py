@@ -0,0 +1,157 @@
+"""Streaming bulk import of buyers from CSV."""
+
+import csv
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, TextIO
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Buyer
+from app.utils.gst import STATE_CODES, check_gstin, state_code_from_gstin
+
+REQUIRED_COLUMNS = {"name", "address"}
+DEFAULT_BATCH_SIZE = 1000
+MAX_ERRORS = 1000
+
+
+@dataclass
+class BuyerImportError:
+    row: int
+    gstin: str | None
+    error: str
+
+
+@dataclass
+class BuyerImportResult:
+    total_rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    # All rejected rows are counted; only the first MAX_ERRORS are listed.
+    error_count: int = 0
+    errors: list[BuyerImportError] = field(default_factory=list)
+
+    def error(self, row: int, gstin: str | None, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(BuyerImportError(row, gstin, message))
+
+
+class BuyerImportAborted(ValueError):
+    """Raised when the file turns unreadable after some buyers were committed."""
+
+    def __init__(self, reason: str, result: BuyerImportResult) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.result = result
+
+
+def read_buyer_rows(stream: TextIO) -> Iterator[tuple[int, dict[str, str]]]:
+    """Yield (line number, row) pairs from a CSV stream with normalized headers.
+
+    Handles spreadsheet exports: header names are case/whitespace-insensitive
+    and a UTF-8 BOM should be stripped by opening the stream as `utf-8-sig`.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("CSV file is empty")
+    columns = [name.strip().lower().replace(" ", "_") for name in header]
+    missing = REQUIRED_COLUMNS - set(columns)
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, dict(zip(columns, values))
+
+
+def _normalize_row(raw: dict[str, str]) -> tuple[dict | None, str | None]:
+    name = (raw.get("name") or "").strip()
+    address = (raw.get("address") or "").strip()
+    gstin = (raw.get("gstin") or "").strip().upper() or None
+    state_code = (raw.get("state_code") or "").strip()
+    if state_code:
+        # Spreadsheets tend to drop the leading zero of codes like "07".
+        state_code = state_code.zfill(2)
+    if not name:
+        return None, "Name is required"
+    if not address:
+        return None, "Address is required"
+    if gstin:
+        check = check_gstin(gstin)
+        if not check.valid:
+            return None, check.reason
+        if not state_code:
+            state_code = state_code_from_gstin(gstin)
+        elif state_code_from_gstin(gstin) != state_code:
+            return None, "GSTIN state code mismatch"
+    elif state_code not in STATE_CODES:
+        return None, "Invalid state code"
+    return {"name": name, "gstin": gstin, "address": address, "state_code": state_code}, None
+
+
+def _flush(db: Session, user_id: int, batch: list[tuple[int, dict]], result: BuyerImportResult) -> None:
+    gstins = [buyer["gstin"] for _, buyer in batch if buyer["gstin"]]
+    existing = set()
+    if gstins:
+        existing = set(db.scalars(select(Buyer.gstin).where(Buyer.gstin.in_(gstins), Buyer.user_id == user_id)))
+    rows = []
+    for row_number, buyer in batch:
+        if buyer["gstin"] in existing:
+            result.duplicates += 1
+            result.error(row_number, buyer["gstin"], "Buyer with this GSTIN already exists")
+            continue
+        rows.append({**buyer, "user_id": user_id})
+    if rows:
+        db.execute(insert(Buyer), rows)
+    db.commit()
+    result.inserted += len(rows)
+
+
+def import_buyers(
+    db: Session,
+    rows: Iterable[tuple[int, dict[str, str]]],
+    user_id: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> BuyerImportResult:
+    """Validate, dedupe by GSTIN within the user's buyers and insert in batched transactions.
+
+    If reading `rows` fails part-way (bad CSV or encoding), the valid rows
+    read so far are still imported and `BuyerImportAborted` carries the
+    result for them. If nothing was imported, the error is raised as a
+    `ValueError`.
+    """
+    result = BuyerImportResult()
+    first_seen: dict[str, int] = {}
+    batch: list[tuple[int, dict]] = []
+    try:
+        for row_number, raw in rows:
+            result.total_rows += 1
+            buyer, error = _normalize_row(raw)
+            if error:
+                result.error(row_number, (raw.get("gstin") or "").strip() or None, error)
+                continue
+            gstin = buyer["gstin"]
+            if gstin:
+                if gstin in first_seen:
+                    result.duplicates += 1
+                    result.error(row_number, gstin, f"Duplicate GSTIN in file (first seen on row {first_seen[gstin]})")
+                    continue
+                first_seen[gstin] = row_number
+            batch.append((row_number, buyer))
+            if len(batch) >= batch_size:
+                _flush(db, user_id, batch, result)
+                batch = []
+    except (ValueError, csv.Error) as exc:
+        # ValueError includes UnicodeDecodeError; csv.Error covers malformed
+        # files such as oversized fields. Earlier batches are committed already;
+        # commit the rest too, so the report covers every row before the error.
+        if batch:
+            _flush(db, user_id, batch, result)
+        if not result.inserted:
+            raise ValueError(str(exc)) from exc
+        raise BuyerImportAborted(str(exc), result) from exc
+    if batch:
+        _flush(db, user_id, batch, result)
+    return result
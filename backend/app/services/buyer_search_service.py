@@ -0,0 +1,127 @@
+"""Tenant-scoped, keyset-paginated buyer search."""
+
+import base64
+import json
+import string
+from dataclasses import dataclass
+
+from sqlalchemy import column, func, or_, select, table, text
+from sqlalchemy.orm import Session
+
+from app.db.fts import MIN_TRIGRAM_TERM, fts_phrase
+from app.models.models import Buyer
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Tenants up to this size are searched by scanning their own rows, which is
+# cheaper than walking global FTS posting lists for common words.
+SMALL_TENANT_SCAN_LIMIT = 5000
+# Matches beyond this many mean the terms are common enough that scanning the
+# tenant's name index finds a page sooner than sorting every FTS hit.
+FTS_CANDIDATE_LIMIT = 5000
+
+sort_name = func.lower(Buyer.name)
+buyers_fts = table("buyers_fts", column("rowid"))
+# SQLite's lower() only folds ASCII, so keys computed in Python must match.
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+@dataclass
+class BuyerPageResult:
+    items: list[Buyer]
+    next_cursor: str | None
+
+
+def encode_cursor(name: str, buyer_id: int) -> str:
+    raw = json.dumps([name.translate(_ASCII_LOWER), buyer_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        name, buyer_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(name), int(buyer_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _is_small_tenant(db: Session, user_id: int) -> bool:
+    sample = select(Buyer.id).where(Buyer.user_id == user_id).limit(SMALL_TENANT_SCAN_LIMIT + 1).subquery()
+    return db.scalar(select(func.count()).select_from(sample)) <= SMALL_TENANT_SCAN_LIMIT
+
+
+def _fts_candidates(db: Session, terms: list[str]) -> list[int] | None:
+    """Return ids matching all terms, or None when the terms are too common to be worth it."""
+    match = " AND ".join(fts_phrase(term) for term in terms)
+    matches = select(buyers_fts.c.rowid).where(text("buyers_fts MATCH :match")).limit(FTS_CANDIDATE_LIMIT + 1)
+    ids = db.scalars(matches, {"match": match}).all()
+    return None if len(ids) > FTS_CANDIDATE_LIMIT else ids
+
+
+def _substring_filter(term: str):
+    pattern = f"%{_escape_like(term)}%"
+    return or_(
+        Buyer.name.ilike(pattern, escape="\\"),
+        Buyer.gstin.ilike(pattern, escape="\\"),
+        Buyer.address.ilike(pattern, escape="\\"),
+    )
+
+
+def _page(rows: list[Buyer], limit: int) -> BuyerPageResult:
+    next_cursor = encode_cursor(rows[limit - 1].name, rows[limit - 1].id) if len(rows) > limit else None
+    return BuyerPageResult(items=rows[:limit], next_cursor=next_cursor)
+
+
+def search_buyers(
+    db: Session,
+    user_id: int,
+    q: str = "",
+    cursor: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> BuyerPageResult:
+    """Return one page of the user's buyers ordered case-insensitively by name.
+
+    Terms of three or more characters match anywhere in name, GSTIN or
+    address. On large tenants selective terms are resolved through the
+    trigram FTS index; small tenants and very common terms fall back to
+    scanning the tenant's name index, which then finds a page quickly. A
+    shorter leading term matches as a name prefix via an index range.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    filters = []
+
+    terms = q.translate(_ASCII_LOWER).split()
+    long_terms = [term for term in terms if len(term) >= MIN_TRIGRAM_TERM]
+    short_terms = [term for term in terms if len(term) < MIN_TRIGRAM_TERM]
+    if short_terms:
+        prefix = short_terms[0]
+        filters += [sort_name >= prefix, sort_name < prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        for term in short_terms[1:]:
+            filters.append(sort_name.like(f"% {_escape_like(term)}%", escape="\\"))
+    if cursor:
+        after_name, after_id = decode_cursor(cursor)
+        # Spelled out rather than as a row-value comparison so SQLite can
+        # range-scan the (user_id, lower(name), id) index.
+        filters += [sort_name >= after_name, or_(sort_name > after_name, Buyer.id > after_id)]
+
+    if long_terms:
+        candidates = None
+        if db.get_bind().dialect.name == "sqlite" and not _is_small_tenant(db, user_id):
+            candidates = _fts_candidates(db, long_terms)
+        if candidates is not None:
+            # Fetch hits by primary key and rank them here: a user_id
+            # predicate or ORDER BY in SQL would steer SQLite into walking the
+            # whole name index instead.
+            found = db.execute(select(Buyer.id, Buyer.user_id, Buyer.name).where(Buyer.id.in_(candidates), *filters))
+            ranked = sorted((name.translate(_ASCII_LOWER), buyer_id) for buyer_id, owner, name in found if owner == user_id)
+            page_ids = [buyer_id for _, buyer_id in ranked[: limit + 1]]
+            rows = db.query(Buyer).filter(Buyer.id.in_(page_ids)).order_by(sort_name, Buyer.id).all()
+            return _page(rows, limit)
+        filters += [_substring_filter(term) for term in long_terms]
+
+    rows = db.query(Buyer).filter(Buyer.user_id == user_id, *filters).order_by(sort_name, Buyer.id).limit(limit + 1).all()
+    return _page(rows, limit)
@@ -0,0 +1,110 @@
+"""Product catalog lookups for invoice lines.
+
+Lines may name a `product_id` instead of repeating name, HSN/SAC, price and
+rate. `fill_lines` resolves all products of one invoice at once: cached
+products come from an LRU keyed by (user, product id), and the rest are read
+with a single `IN` query. Writes to a user's products bump that user's
+catalog version, which retires all of their cached products. Versions only
+exist in this process, so entries also expire `product_cache_ttl_seconds`
+after they were loaded: a write made by another worker is picked up within
+that time.
+
+Lines keep their own copy of the filled fields; the product reference only
+records where they came from.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Product
+from app.services.metrics_service import inc
+from app.utils.lru import LRUCache
+
+# Line fields a product supplies when the line leaves them out.
+PRODUCT_FIELDS = ("name", "hsn_sac", "unit_price", "gst_rate")
+
+
+class UnknownProduct(ValueError):
+    """Raised when lines refer to products the user does not have."""
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    id: int
+    name: str
+    hsn_sac: str
+    unit_price: float
+    gst_rate: float
+
+
+class CatalogCache:
+    """Size-bounded LRU of the users' products, invalidated per user by version and by age."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUCache(maxsize)
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, db: Session, user_id: int, product_ids: Iterable[int]) -> dict[int, ProductSnapshot]:
+        """Return the user's products among `product_ids`; unknown ids are left out."""
+        version = self._versions.get(user_id, 0)
+        now = time.monotonic()
+        found: dict[int, ProductSnapshot] = {}
+        missing = []
+        for product_id in set(product_ids):
+            entry = self._cache.get((user_id, product_id))
+            if entry is not None and entry[0] == version and entry[1] > now:
+                found[product_id] = entry[2]
+            else:
+                missing.append(product_id)
+        inc("catalog_cache_hits_total", len(found))
+        if missing:
+            inc("catalog_cache_misses_total", len(missing))
+            rows = db.execute(
+                select(Product.id, *(Product.__table__.c[name] for name in PRODUCT_FIELDS)).where(
+                    Product.user_id == user_id, Product.id.in_(missing)
+                )
+            )
+            expires = now + self.ttl_seconds
+            for row in rows:
+                found[row.id] = snapshot = ProductSnapshot(*row)
+                self._cache.set((user_id, row.id), (version, expires, snapshot))
+        return found
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._versions.clear()
+
+
+def fill_lines(db: Session, user_id: int, lines: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fill product fields the lines leave out (or set to None) from their products, in place."""
+    wanted = {line["product_id"] for line in lines if line.get("product_id") is not None}
+    if not wanted:
+        return lines
+    products = catalog.resolve(db, user_id, wanted)
+    unknown = wanted - products.keys()
+    if unknown:
+        raise UnknownProduct(f"Products {sorted(unknown)} not found")
+    for line in lines:
+        product = products.get(line.get("product_id"))
+        if product is None:
+            continue
+        for name in PRODUCT_FIELDS:
+            if line.get(name) is None:
+                line[name] = getattr(product, name)
+    return lines
+
+
+catalog = CatalogCache(settings.product_cache_size, settings.product_cache_ttl_seconds)
@@ -0,0 +1,209 @@
+"""Invoice change feed: an outbox table written with each invoice change.
+
+Events are added to the same transaction as the change they describe, so a
+committed change always has its event and a rolled-back one never does.
+Offsets are the table's autoincrement ids; SQLite commits one writer at a
+time, so offsets become visible in order and a consumer that resumes after
+its last offset misses nothing.
+
+Consumers page with `read_events` or tail with `stream_events`, which only
+reads the next page once the previous one was sent (the ASGI `send` waits on
+slow clients), so a lagging consumer holds one page, not the backlog.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+import orjson
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Invoice, InvoiceEvent
+from app.services.metrics_service import inc
+
+CREATED = "invoice.created"
+UPDATED = "invoice.updated"
+FINALIZED = "invoice.finalized"
+_PENDING = "invoice_events_pending"
+
+
+@dataclass(slots=True)
+class EventRow:
+    id: int
+    invoice_id: int
+    type: str
+    payload: str
+    created_at: datetime
+
+
+# Invoice columns carried by created/updated events, plus `line_count`.
+SNAPSHOT_FIELDS = (
+    "invoice_number",
+    "status",
+    "seller_id",
+    "buyer_id",
+    "invoice_type",
+    "supply_type",
+    "total_taxable",
+    "total_cgst",
+    "total_sgst",
+    "total_igst",
+    "grand_total",
+)
+
+
+def invoice_snapshot(invoice: Invoice) -> dict:
+    """Header fields of an invoice as carried by created/updated events."""
+    return {**{name: getattr(invoice, name) for name in SNAPSHOT_FIELDS}, "line_count": len(invoice.items)}
+
+
+def record_invoice_event(db: Session, user_id: int, invoice: Invoice, event_type: str) -> None:
+    """Add an event for `invoice` (already flushed) to the caller's transaction."""
+    db.add(InvoiceEvent(user_id=user_id, invoice_id=invoice.id, type=event_type, payload=orjson.dumps(invoice_snapshot(invoice)).decode()))
+    db.info.setdefault(_PENDING, Counter())[user_id] += 1
+
+
+def record_events(db: Session, user_id: int, event_type: str, payloads: dict[int, dict]) -> None:
+    """Insert one event per invoice id in a single statement, within the caller's transaction."""
+    if not payloads:
+        return
+    db.execute(
+        insert(InvoiceEvent),
+        [
+            {"user_id": user_id, "invoice_id": invoice_id, "type": event_type, "payload": orjson.dumps(payload).decode(), "created_at": datetime.utcnow()}
+            for invoice_id, payload in payloads.items()
+        ],
+    )
+    db.info.setdefault(_PENDING, Counter())[user_id] += len(payloads)
+
+
+def read_events(db: Session, user_id: int, after: int, limit: int) -> list[EventRow]:
+    """The user's events with offsets greater than `after`, oldest first."""
+    rows = db.execute(
+        select(InvoiceEvent.id, InvoiceEvent.invoice_id, InvoiceEvent.type, InvoiceEvent.payload, InvoiceEvent.created_at)
+        .where(InvoiceEvent.user_id == user_id, InvoiceEvent.id > after)
+        .order_by(InvoiceEvent.id)
+        .limit(limit)
+    )
+    return [EventRow(*row) for row in rows]
+
+
+def event_json(row: EventRow) -> bytes:
+    # The stored payload is already JSON; splice it in rather than re-parse it.
+    head = orjson.dumps({"id": row.id, "invoice_id": row.invoice_id, "type": row.type, "created_at": row.created_at})
+    return head[:-1] + b',"data":' + row.payload.encode() + b"}"
+
+
+def events_page_json(rows: list[EventRow], after: int) -> bytes:
+    next_after = rows[-1].id if rows else after
+    return b'{"events":[' + b",".join(event_json(row) for row in rows) + b'],"next_after":' + str(next_after).encode() + b"}"
+
+
+def sse_chunk(rows: list[EventRow]) -> bytes:
+    return b"".join(b"id: %d\nevent: %s\ndata: %s\n\n" % (row.id, row.type.encode(), event_json(row)) for row in rows)
+
+
+class EventNotifier:
+    """Wakes a user's event streams in this process when their events commit.
+
+    Commits happen in worker threads and streams wait on the event loop, so
+    waiters are woken with `call_soon_threadsafe`. Each user has a commit
+    generation; a stream reads it before fetching, so a commit that lands
+    between an empty fetch and `wait` is not missed. Changes committed by
+    other processes are picked up by the streams' poll interval.
+    """
+
+    def __init__(self) -> None:
+        self._generations: Counter[int] = Counter()
+        self._waiters: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, user_id: int) -> int:
+        with self._lock:
+            return self._generations[user_id]
+
+    async def wait(self, user_id: int, seen: int, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a commit after generation `seen`; True if one came."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._generations[user_id] != seen:
+                return True
+            self._waiters.setdefault(user_id, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(user_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[user_id]
+
+    def notify(self, user_ids: Iterable[int]) -> None:
+        woken = []
+        with self._lock:
+            for user_id in user_ids:
+                self._generations[user_id] += 1
+                woken.extend(self._waiters.get(user_id, ()))
+        for loop, waiter in woken:
+            loop.call_soon_threadsafe(waiter.set)
+
+
+notifier = EventNotifier()
+
+
+async def stream_events(
+    fetch: Callable[[int], Awaitable[list[EventRow]]],
+    user_id: int,
+    after: int,
+    poll_seconds: float,
+    heartbeat_seconds: float,
+) -> AsyncIterator[bytes]:
+    """Yield SSE chunks of the events after `after`, then follow new ones forever.
+
+    `fetch(after)` returns the next page. A comment line is sent after
+    `heartbeat_seconds` without events so proxies keep the connection open.
+    """
+    idle = 0.0
+    while True:
+        seen = notifier.generation(user_id)
+        rows = await fetch(after)
+        if rows:
+            after = rows[-1].id
+            idle = 0.0
+            inc("invoice_events_streamed_total", len(rows))
+            yield sse_chunk(rows)
+            continue
+        if not await notifier.wait(user_id, seen, poll_seconds):
+            idle += poll_seconds
+            if idle >= heartbeat_seconds:
+                idle = 0.0
+                yield b": keepalive\n\n"
+
+
+def _after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        inc("invoice_events_recorded_total", sum(pending.values()))
+        notifier.notify(pending)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+def install_commit_notifications() -> None:
+    """Wake `notifier` whenever a session commits recorded events."""
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+
+
+install_commit_notifications()
@@ -0,0 +1,83 @@
+"""Finalize draft invoices in batches, numbering them as they are issued.
+
+Drafts carry no invoice number or date; both are set at finalization, from
+the seller's sequence and today's IST date, so abandoned drafts never leave
+gaps in a seller's issued series and dates follow number order.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db.fts import has_fts_table, reindex_invoices
+from app.models.models import Invoice, Seller
+from app.services.event_service import FINALIZED, record_events
+from app.services.sequence_service import allocate_invoice_numbers, get_financial_year, issue_date
+
+
+@dataclass
+class FinalizeResult:
+    finalized: dict[int, str] = field(default_factory=dict)
+    # invoice id -> "not_found" or "already_finalized"
+    skipped: dict[int, str] = field(default_factory=dict)
+
+
+def finalize_invoices(db: Session, user_id: int, invoice_ids: list[int]) -> FinalizeResult:
+    """Finalize the user's drafts among `invoice_ids`; the caller commits.
+
+    Each finalized invoice gets an `invoice.finalized` event in the same
+    transaction.
+
+    The drafts are claimed first with a single conditional UPDATE, which
+    takes the write locks, so a concurrent batch cannot claim (and number)
+    the same invoice, and dates them. Numbers are then allocated in id
+    order, one sequence increment per seller.
+
+    Batches are capped by the API (`FINALIZE_BATCH_MAX`), well within the
+    bound-parameter limits of SQLite and PostgreSQL, so each step is one
+    statement.
+    """
+    ids = sorted(set(invoice_ids))
+    owned_sellers = select(Seller.id).where(Seller.user_id == user_id)
+    issued_on = issue_date()
+    claim = (
+        update(Invoice)
+        .where(Invoice.id.in_(ids), Invoice.status == "draft", Invoice.seller_id.in_(owned_sellers))
+        .values(status="finalized", issued_on=issued_on)
+        .returning(Invoice.id, Invoice.seller_id)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = db.execute(claim).all()
+
+    result = FinalizeResult()
+    if claimed:
+        by_seller: dict[int, list[int]] = defaultdict(list)
+        for invoice_id, seller_id in sorted(claimed):
+            by_seller[seller_id].append(invoice_id)
+        states = dict(db.execute(select(Seller.id, Seller.state_code).where(Seller.id.in_(by_seller))).all())
+        fy = get_financial_year(issued_on)
+        for seller_id, seller_invoice_ids in sorted(by_seller.items()):
+            numbers = allocate_invoice_numbers(db, seller_id, states[seller_id], len(seller_invoice_ids), fy)
+            result.finalized.update(zip(seller_invoice_ids, numbers))
+        db.execute(
+            update(Invoice),
+            [{"id": invoice_id, "invoice_number": number} for invoice_id, number in result.finalized.items()],
+        )
+        connection = db.connection()
+        if connection.dialect.name == "sqlite" and has_fts_table(connection, "invoices_fts"):
+            reindex_invoices(connection, result.finalized)
+        result.finalized = dict(sorted(result.finalized.items()))
+        record_events(
+            db,
+            user_id,
+            FINALIZED,
+            {invoice_id: {"invoice_number": number, "status": "finalized", "issued_on": issued_on.isoformat()} for invoice_id, number in result.finalized.items()},
+        )
+
+    unclaimed = [invoice_id for invoice_id in ids if invoice_id not in result.finalized]
+    if unclaimed:
+        owned = set(db.execute(select(Invoice.id).where(Invoice.id.in_(unclaimed), Invoice.seller_id.in_(owned_sellers))).scalars())
+        result.skipped = {invoice_id: "already_finalized" if invoice_id in owned else "not_found" for invoice_id in unclaimed}
+    return result
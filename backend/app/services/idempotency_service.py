@@ -0,0 +1,123 @@
+"""Idempotency-Key bookkeeping for invoice creation."""
+
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+from app.core.config import settings
+from app.models.models import IdempotencyKey
+from app.utils.lru import LRUCache
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when a user replays a key with a different payload."""
+
+
+@dataclass(frozen=True)
+class IdempotencyRecord:
+    user_id: int
+    request_hash: str
+    invoice_id: int
+    created_at: datetime
+
+
+def request_fingerprint(payload: dict) -> str:
+    """Return SHA-256 of the canonical JSON form of a request payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """LRU-fronted view of the `idempotency_keys` table with per-key single-flight.
+
+    Keys are scoped to their user: two users sending the same key neither
+    conflict nor wait for each other.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: int, sweep_interval_seconds: int) -> None:
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._cache = LRUCache(maxsize)
+        self._guard = threading.Lock()
+        self._inflight: dict[tuple[int, str], list[Any]] = {}
+        # Per database, so every shard gets swept, not just the first one seen.
+        self._last_sweep: dict[str, float] = {}
+
+    @contextmanager
+    def single_flight(self, user_id: int, key: str) -> Iterator[None]:
+        """Serialize concurrent requests of one user carrying the same key."""
+        scope = (user_id, key)
+        with self._guard:
+            entry = self._inflight.setdefault(scope, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._inflight.pop(scope, None)
+
+    def lookup(self, db: Any, key: str, user_id: int, request_hash: str, now: datetime | None = None) -> int | None:
+        """Return the stored invoice id for a replayed key, or None when unseen.
+
+        An expired key that was not swept yet is deleted in the caller's
+        transaction, so the new request can record the key again.
+        """
+        record = self._cache.get((user_id, key))
+        if record is None:
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key).first()
+            if row is None:
+                return None
+            record = IdempotencyRecord(row.user_id, row.request_hash, row.invoice_id, row.created_at)
+            self._cache.set((user_id, key), record)
+        cutoff = (now or datetime.utcnow()) - self.ttl
+        if record.created_at < cutoff:
+            self._cache.pop((user_id, key))
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.created_at < cutoff
+            ).delete(synchronize_session=False)
+            return None
+        if record.request_hash != request_hash:
+            raise IdempotencyConflict("Idempotency-Key was already used with a different request")
+        return record.invoice_id
+
+    def record(self, db: Any, key: str, user_id: int, request_hash: str, invoice_id: int) -> None:
+        """Add the key row to the caller's transaction."""
+        db.add(IdempotencyKey(key=key, user_id=user_id, request_hash=request_hash, invoice_id=invoice_id))
+
+    def remember(self, key: str, user_id: int, request_hash: str, invoice_id: int) -> None:
+        """Populate the LRU once the owning transaction has committed."""
+        self._cache.set((user_id, key), IdempotencyRecord(user_id, request_hash, invoice_id, datetime.utcnow()))
+
+    def sweep(self, db: Any, now: datetime | None = None) -> int:
+        """Delete keys older than the TTL from `db`'s database and return how many were removed."""
+        cutoff = (now or datetime.utcnow()) - self.ttl
+        removed = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+        db.commit()
+        self._last_sweep[str(db.get_bind().url)] = time.monotonic()
+        return removed
+
+    def maybe_sweep(self, db: Any) -> int:
+        """Run `sweep` on `db`'s database at most once per configured interval."""
+        last = self._last_sweep.get(str(db.get_bind().url))
+        if last is not None and time.monotonic() - last < self.sweep_interval_seconds:
+            return 0
+        return self.sweep(db)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._last_sweep.clear()
+
+
+idempotency_store = IdempotencyStore(
+    maxsize=settings.idempotency_cache_size,
+    ttl_seconds=settings.idempotency_ttl_seconds,
+    sweep_interval_seconds=settings.idempotency_sweep_interval_seconds,
+)
@@ -0,0 +1,486 @@
+"""Offline bulk ingest of historical invoices.
+
+Invoices from another system keep their numbers and dates and are stored as
+finalized. The source is streamed (CSV with one row per line item, or NDJSON
+with one invoice per line) and written in batches:
+
+- parties are resolved in this process from maps loaded once;
+- tax, totals and amount-in-words run in a process pool, several batches
+  in flight, results written back in source order;
+- each batch is Core `executemany` inserts plus the checkpoint row in one
+  transaction, so an interrupted run resumes after the last committed batch;
+- secondary indexes on the invoice tables are dropped for the run and
+  rebuilt at the end, with SQLite bulk-load pragmas on the connection;
+- at the end the sellers' sequences are moved past the ingested numbers.
+
+Ingested invoices do not go through the change feed; they are history, not
+changes.
+"""
+
+import csv
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+import orjson
+from sqlalchemy import Integer, cast, delete, func, insert, select, tuple_, update
+from sqlalchemy.engine import Connection
+
+from app.db.fts import has_fts_table, rebuild_invoice_index
+from app.models.models import Buyer, IngestCheckpoint, Invoice, InvoiceItem, InvoiceSequence, Seller, TaxSummary
+from app.schemas.schemas import ALLOWED_GST_RATES
+from app.services.tax_service import compute_line, compute_totals
+from app.utils.number_words import amount_to_words
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_ERRORS = 1000
+HEADER_FIELDS = ("invoice_number", "date", "seller_gstin", "buyer_gstin", "buyer_name", "invoice_type", "reverse_charge")
+LINE_FIELDS = ("name", "hsn_sac", "quantity", "unit_price", "discount", "gst_rate")
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%dT%H:%M:%S")
+# Secondary indexes are dropped while these tables are loaded.
+DEFERRED_TABLES = (Invoice.__table__, InvoiceItem.__table__, TaxSummary.__table__)
+BULK_PRAGMAS = ("PRAGMA synchronous = OFF", "PRAGMA temp_store = MEMORY", "PRAGMA cache_size = -262144")
+
+# (record ordinal, record, seller id, buyer id, intra-state, words language)
+Job = tuple[int, dict, int, int, bool, str]
+
+
+@dataclass
+class IngestError:
+    record: int
+    invoice_number: str | None
+    error: str
+
+
+@dataclass
+class IngestReport:
+    records: int = 0
+    invoices: int = 0
+    lines: int = 0
+    skipped_records: int = 0
+    error_count: int = 0
+    errors: list[IngestError] = field(default_factory=list)
+    duration_s: float = 0.0
+
+    @property
+    def invoices_per_sec(self) -> float:
+        return self.invoices / self.duration_s if self.duration_s else 0.0
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.lines / self.duration_s if self.duration_s else 0.0
+
+    def error(self, record: int, invoice_number: str | None, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(IngestError(record, invoice_number, message))
+
+
+def _columns(header: list[str]) -> list[str]:
+    return [name.strip().lower().replace(" ", "_") for name in header]
+
+
+def read_csv(stream: io.TextIOBase) -> Iterator[dict]:
+    """Yield invoices from CSV rows of one line item each.
+
+    Header columns repeat on every row; consecutive rows with the same
+    `invoice_number` make up one invoice.
+    """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("CSV file is empty")
+    columns = _columns(header)
+    missing = {"invoice_number", "date", "seller_gstin", *LINE_FIELDS} - {"discount"} - set(columns)
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(sorted(missing))}")
+    current: dict | None = None
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        row = dict(zip(columns, values))
+        if current is None or row["invoice_number"] != current["invoice_number"]:
+            if current is not None:
+                yield current
+            current = {name: row.get(name, "") for name in HEADER_FIELDS}
+            current["items"] = []
+        current["items"].append({name: row.get(name, "") for name in LINE_FIELDS})
+    if current is not None:
+        yield current
+
+
+def read_ndjson(stream: io.BufferedIOBase) -> Iterator[dict]:
+    """Yield invoices from NDJSON, one object with an `items` list per line."""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
+            yield {"_error": f"Invalid JSON on line {number}: {exc}"}
+
+
+def read_records(path: Path) -> Iterator[dict]:
+    if path.suffix.lower() == ".csv":
+        with path.open(encoding="utf-8-sig", newline="") as stream:
+            yield from read_csv(stream)
+    elif path.suffix.lower() in (".ndjson", ".jsonl"):
+        with path.open("rb") as stream:
+            yield from read_ndjson(stream)
+    else:
+        raise ValueError("Source must be .csv, .ndjson or .jsonl")
+
+
+def _parse_date(value: str) -> datetime:
+    for pattern in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), pattern)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date {value!r}")
+
+
+def _truthy(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+def compute_invoices(jobs: list[Job]) -> list[tuple]:
+    """Tax a batch of resolved records; runs in the worker processes.
+
+    Returns `("ok", ordinal, invoice, lines, summary)` or
+    `("error", ordinal, invoice_number, message)` per record.
+    """
+    out = []
+    for ordinal, record, seller_id, buyer_id, intra_state, words_language in jobs:
+        number = str(record.get("invoice_number") or "").strip()
+        try:
+            created_at = _parse_date(str(record.get("date") or ""))
+            invoice_type = str(record.get("invoice_type") or "B2B").strip().upper()
+            if invoice_type not in ("B2B", "B2C"):
+                raise ValueError("Invoice type must be B2B or B2C")
+            items = record.get("items") or []
+            if not items:
+                raise ValueError("Invoice has no lines")
+            lines, results = [], []
+            for item in items:
+                quantity, unit_price = float(item["quantity"]), float(item["unit_price"])
+                discount, gst_rate = float(item.get("discount") or 0), float(item["gst_rate"])
+                if quantity <= 0 or unit_price < 0 or discount < 0:
+                    raise ValueError("Quantity must be positive and price and discount not negative")
+                if gst_rate not in ALLOWED_GST_RATES:
+                    raise ValueError("GST rate must be one of 0, 5, 12, 18, 28, 40")
+                result = compute_line(quantity, unit_price, discount, gst_rate)
+                results.append(result)
+                lines.append(
+                    {
+                        "name": str(item.get("name") or "").strip() or "Item",
+                        "hsn_sac": str(item.get("hsn_sac") or "").strip(),
+                        "quantity": quantity,
+                        "unit_price": unit_price,
+                        "discount": discount,
+                        "gst_rate": gst_rate,
+                        "taxable_value": result.taxable_value,
+                        "tax_amount": result.tax_amount,
+                        "total_value": result.total_value,
+                    }
+                )
+        except (KeyError, TypeError, ValueError) as exc:
+            message = f"Missing field {exc}" if isinstance(exc, KeyError) else str(exc)
+            out.append(("error", ordinal, number or None, message))
+            continue
+        totals = compute_totals(results, intra_state=intra_state)
+        invoice = {
+            "seller_id": seller_id,
+            "buyer_id": buyer_id,
+            "invoice_number": number,
+            "invoice_type": invoice_type,
+            "reverse_charge": _truthy(record.get("reverse_charge") or False),
+            "supply_type": "intra" if intra_state else "inter",
+            "status": "finalized",
+            "total_taxable": totals.total_taxable,
+            "total_cgst": totals.total_cgst,
+            "total_sgst": totals.total_sgst,
+            "total_igst": totals.total_igst,
+            "grand_total": totals.grand_total,
+            "grand_total_words": amount_to_words(totals.grand_total, words_language),
+            "created_at": created_at,
+            "issued_on": created_at.date(),
+        }
+        summary = {
+            "total_taxable": totals.total_taxable,
+            "total_cgst": totals.total_cgst,
+            "total_sgst": totals.total_sgst,
+            "total_igst": totals.total_igst,
+            "total_tax": totals.total_tax,
+        }
+        out.append(("ok", ordinal, invoice, lines, summary))
+    return out
+
+
+class _Parties:
+    """The user's sellers and buyers, looked up by GSTIN (buyers also by name)."""
+
+    def __init__(self, connection: Connection, user_id: int) -> None:
+        self.sellers = {
+            gstin: (seller_id, state_code, language)
+            for seller_id, gstin, state_code, language in connection.execute(
+                select(Seller.id, Seller.gstin, Seller.state_code, Seller.words_language).where(Seller.user_id == user_id)
+            )
+        }
+        self.buyers: dict[str, tuple[int, str]] = {}
+        self.buyer_names: dict[str, tuple[int, str]] = {}
+        for buyer_id, gstin, name, state_code in connection.execute(
+            select(Buyer.id, Buyer.gstin, Buyer.name, Buyer.state_code).where(Buyer.user_id == user_id).order_by(Buyer.id)
+        ):
+            if gstin:
+                self.buyers.setdefault(gstin, (buyer_id, state_code))
+            else:
+                self.buyer_names.setdefault(name.strip().lower(), (buyer_id, state_code))
+
+    def resolve(self, ordinal: int, record: dict) -> Job:
+        seller = self.sellers.get(str(record.get("seller_gstin") or "").strip().upper())
+        if seller is None:
+            raise ValueError("Seller GSTIN is not one of the user's sellers")
+        gstin = str(record.get("buyer_gstin") or "").strip().upper()
+        if gstin:
+            buyer = self.buyers.get(gstin)
+        else:
+            buyer = self.buyer_names.get(str(record.get("buyer_name") or "").strip().lower())
+        if buyer is None:
+            raise ValueError("Buyer not found; import buyers first")
+        return ordinal, record, seller[0], buyer[0], seller[1] == buyer[1], seller[2]
+
+
+@dataclass
+class _Batch:
+    jobs: list[Job]
+    # Records consumed up to and including this batch.
+    records_done: int
+    errors: list[tuple[int, str | None, str]]
+
+
+def _batches(records: Iterator[dict], parties: _Parties, start: int, batch_size: int) -> Iterator[_Batch]:
+    jobs: list[Job] = []
+    errors: list[tuple[int, str | None, str]] = []
+    ordinal = start
+    for ordinal, record in enumerate(records, start=start + 1):
+        number = str(record.get("invoice_number") or "").strip() or None
+        if "_error" in record:
+            errors.append((ordinal, None, record["_error"]))
+        elif not number:
+            errors.append((ordinal, None, "Invoice number is required"))
+        else:
+            try:
+                jobs.append(parties.resolve(ordinal, record))
+            except ValueError as exc:
+                errors.append((ordinal, number, str(exc)))
+        if len(jobs) >= batch_size:
+            yield _Batch(jobs, ordinal, errors)
+            jobs, errors = [], []
+    if jobs or errors:
+        yield _Batch(jobs, ordinal, errors)
+
+
+def _number_key(invoice: dict) -> tuple[int, str]:
+    return invoice["seller_id"], invoice["invoice_number"]
+
+
+def _write(connection: Connection, results: list[tuple], report: IngestReport) -> None:
+    rows = []
+    seen: set[tuple[int, str]] = set()
+    for result in results:
+        if result[0] == "error":
+            report.error(*result[1:])
+            continue
+        _, ordinal, invoice, lines, summary = result
+        if _number_key(invoice) in seen:
+            report.error(ordinal, invoice["invoice_number"], "Duplicate invoice number in source")
+            continue
+        seen.add(_number_key(invoice))
+        rows.append(result)
+    if seen:
+        existing = set(
+            connection.execute(
+                select(Invoice.seller_id, Invoice.invoice_number).where(tuple_(Invoice.seller_id, Invoice.invoice_number).in_(seen))
+            ).tuples()
+        )
+        if existing:
+            kept = []
+            for result in rows:
+                if _number_key(result[2]) in existing:
+                    report.error(result[1], result[2]["invoice_number"], "Invoice number already exists")
+                else:
+                    kept.append(result)
+            rows = kept
+    if not rows:
+        return
+    # Numbers are unique per seller, so ids come back keyed by both; see recurring_service.
+    ids = {
+        (seller_id, number): invoice_id
+        for seller_id, number, invoice_id in connection.execute(
+            insert(Invoice.__table__).returning(Invoice.seller_id, Invoice.invoice_number, Invoice.id), [row[2] for row in rows]
+        )
+    }
+    items, summaries = [], []
+    for _, _, invoice, lines, summary in rows:
+        invoice_id = ids[_number_key(invoice)]
+        items.extend({**line, "invoice_id": invoice_id} for line in lines)
+        summaries.append({**summary, "invoice_id": invoice_id})
+    connection.execute(insert(InvoiceItem.__table__), items)
+    connection.execute(insert(TaxSummary.__table__), summaries)
+    report.invoices += len(rows)
+    report.lines += len(items)
+
+
+def advance_sequences(connection: Connection, user_id: int) -> None:
+    """Move the user's sellers' sequences past the FY/STATE/SEQ numbers they hold.
+
+    Ingested invoices keep their numbers; without this, finalizing a draft
+    would hand out one of them again. Sequences only ever move forward.
+    """
+    fy = func.substr(Invoice.invoice_number, 1, 7)
+    highest = connection.execute(
+        select(fy, Invoice.seller_id, func.max(cast(func.substr(Invoice.invoice_number, 12), Integer)))
+        .join(Seller, Seller.id == Invoice.seller_id)
+        .where(Seller.user_id == user_id, Invoice.invoice_number.like("____-__/__/%"))
+        .group_by(fy, Invoice.seller_id)
+    ).all()
+    current = {
+        (row.financial_year, row.seller_id): row.current_value
+        for row in connection.execute(
+            select(InvoiceSequence.financial_year, InvoiceSequence.seller_id, InvoiceSequence.current_value)
+            .join(Seller, Seller.id == InvoiceSequence.seller_id)
+            .where(Seller.user_id == user_id)
+        )
+    }
+    for financial_year, seller_id, value in highest:
+        if (financial_year, seller_id) not in current:
+            connection.execute(insert(InvoiceSequence).values(financial_year=financial_year, seller_id=seller_id, current_value=value))
+        elif current[financial_year, seller_id] < value:
+            connection.execute(
+                update(InvoiceSequence)
+                .where(
+                    InvoiceSequence.financial_year == financial_year,
+                    InvoiceSequence.seller_id == seller_id,
+                    InvoiceSequence.current_value < value,
+                )
+                .values(current_value=value)
+            )
+
+
+def deferred_indexes() -> list:
+    # Unique indexes stay: they keep guarding concurrent writes and back the
+    # duplicate-number check.
+    return [index for table in DEFERRED_TABLES for index in sorted(table.indexes, key=lambda index: index.name) if not index.unique]
+
+
+class _InlineExecutor(Executor):
+    """Runs submitted work immediately; used when `workers` is 0."""
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def ingest(
+    connection: Connection,
+    path: str | Path,
+    user_id: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int | None = None,
+    restart: bool = False,
+    progress: Callable[[IngestReport], None] | None = None,
+) -> IngestReport:
+    """Import the invoices in `path` for `user_id`, resuming from its checkpoint.
+
+    `connection` must not be in a transaction; each batch commits on its
+    own. `workers=0` computes taxes in this process.
+    """
+    path = Path(path)
+    source, size = str(path.resolve()), path.stat().st_size
+    report = IngestReport()
+    start_time = time.perf_counter()
+
+    with connection.begin():
+        checkpoint = connection.execute(select(IngestCheckpoint).where(IngestCheckpoint.source == source)).first()
+        if checkpoint is not None and (restart or checkpoint.user_id != user_id):
+            if not restart:
+                raise ValueError("Source was ingested for another user; pass restart to start over")
+            connection.execute(delete(IngestCheckpoint).where(IngestCheckpoint.source == source))
+            checkpoint = None
+        if checkpoint is not None and checkpoint.source_size != size:
+            raise ValueError("Source changed since the last run; pass restart to start over")
+        if checkpoint is None:
+            connection.execute(insert(IngestCheckpoint).values(source=source, user_id=user_id, source_size=size, records_done=0, invoices=0, lines=0))
+            start = 0
+        else:
+            start = checkpoint.records_done
+        parties = _Parties(connection, user_id)
+    report.skipped_records = start
+
+    is_sqlite = connection.dialect.name == "sqlite"
+    if is_sqlite:
+        for pragma in BULK_PRAGMAS:
+            connection.exec_driver_sql(pragma)
+        connection.commit()
+    with connection.begin():
+        for index in deferred_indexes():
+            index.drop(connection, checkfirst=True)
+
+    records = read_records(path)
+    for _ in range(start):
+        next(records, None)
+
+    executor: Executor = _InlineExecutor() if workers == 0 else ProcessPoolExecutor(max_workers=workers)
+    in_flight: deque[tuple[_Batch, Future]] = deque()
+    window = max(2, 2 * (workers or os.cpu_count() or 1))
+    try:
+        batches = _batches(records, parties, start, batch_size)
+        while True:
+            for batch in batches:
+                in_flight.append((batch, executor.submit(compute_invoices, batch.jobs)))
+                if len(in_flight) >= window:
+                    break
+            if not in_flight:
+                break
+            batch, future = in_flight.popleft()
+            results = future.result()
+            invoices, lines = report.invoices, report.lines
+            with connection.begin():
+                for error in batch.errors:
+                    report.error(*error)
+                _write(connection, results, report)
+                connection.execute(
+                    update(IngestCheckpoint)
+                    .where(IngestCheckpoint.source == source)
+                    .values(
+                        records_done=batch.records_done,
+                        invoices=IngestCheckpoint.invoices + (report.invoices - invoices),
+                        lines=IngestCheckpoint.lines + (report.lines - lines),
+                        updated_at=datetime.utcnow(),
+                    )
+                )
+            report.records = batch.records_done - start
+            if progress is not None:
+                report.duration_s = time.perf_counter() - start_time
+                progress(report)
+    finally:
+        executor.shutdown(cancel_futures=True)
+        # Rebuild even after a failure so the database is left usable; a
+        # resumed run drops them again.
+        with connection.begin():
+            advance_sequences(connection, user_id)
+            for index in deferred_indexes():
+                index.create(connection, checkfirst=True)
+            if is_sqlite and has_fts_table(connection, "invoices_fts"):
+                rebuild_invoice_index(connection)
+    report.duration_s = time.perf_counter() - start_time
+    return report
+
@@ -0,0 +1,159 @@
+"""Apply line-item changes to a draft invoice without rewriting untouched lines."""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Invoice, InvoiceItem, TaxSummary
+from app.services.tax_service import TaxLineResult, TaxTotals, adjust_totals, compute_line
+from app.utils.number_words import amount_to_words
+
+# Fields that change a line's tax; edits to anything else skip recomputation.
+TAX_FIELDS = ("quantity", "unit_price", "discount", "gst_rate")
+LINE_FIELDS = ("product_id", "name", "hsn_sac") + TAX_FIELDS
+
+
+class LineItemError(ValueError):
+    """Raised when a change refers to lines the invoice does not have."""
+
+
+@dataclass
+class LineChanges:
+    """Add new lines, update existing lines by id, remove lines by id."""
+
+    add: list[dict[str, Any]] = field(default_factory=list)
+    modify: dict[int, dict[str, Any]] = field(default_factory=dict)
+    remove: set[int] = field(default_factory=set)
+
+
+@dataclass
+class LineChangeResult:
+    added: int = 0
+    modified: int = 0
+    removed: int = 0
+    recomputed: int = 0
+
+
+def diff_lines(invoice: Invoice, lines: list[dict[str, Any]]) -> LineChanges:
+    """Turn a full replacement line list into changes against the stored lines.
+
+    Lines carrying the id of an existing line update it, lines without an id
+    are added, and stored lines missing from the list are removed.
+    """
+    existing = {item.id: item for item in invoice.items}
+    changes = LineChanges()
+    for line in lines:
+        line_id = line.get("id")
+        values = {name: line[name] for name in LINE_FIELDS if name in line}
+        if line_id is None:
+            changes.add.append(values)
+        elif line_id not in existing:
+            raise LineItemError(f"Line {line_id} does not belong to this invoice")
+        elif line_id in changes.modify:
+            raise LineItemError(f"Line {line_id} appears more than once")
+        else:
+            changes.modify[line_id] = values
+    changes.remove = set(existing) - set(changes.modify)
+    return changes
+
+
+def _line_result(item: InvoiceItem) -> TaxLineResult:
+    return TaxLineResult(item.taxable_value, item.tax_amount, item.total_value)
+
+
+def _invoice_totals(invoice: Invoice) -> TaxTotals:
+    return TaxTotals(
+        total_taxable=invoice.total_taxable,
+        total_cgst=invoice.total_cgst,
+        total_sgst=invoice.total_sgst,
+        total_igst=invoice.total_igst,
+        total_tax=invoice.total_cgst + invoice.total_sgst + invoice.total_igst,
+        grand_total=invoice.grand_total,
+    )
+
+
+def apply_line_changes(
+    db: Session, invoice: Invoice, changes: LineChanges, words_language: str, supply_type: str | None = None
+) -> LineChangeResult:
+    """Apply `changes` to `invoice` and adjust its totals incrementally.
+
+    Only added lines and lines whose tax fields changed are recomputed;
+    unchanged lines are neither rewritten nor re-taxed. Passing a new
+    `supply_type` re-splits the existing tax between CGST/SGST and IGST.
+    """
+    existing = {item.id: item for item in invoice.items}
+    unknown = (set(changes.modify) | changes.remove) - set(existing)
+    if unknown:
+        raise LineItemError(f"Lines {sorted(unknown)} do not belong to this invoice")
+    conflicting = set(changes.modify) & changes.remove
+    if conflicting:
+        raise LineItemError(f"Lines {sorted(conflicting)} cannot be both modified and removed")
+
+    result = LineChangeResult()
+    removed: list[TaxLineResult] = []
+    added: list[TaxLineResult] = []
+
+    for line_id in changes.remove:
+        item = existing[line_id]
+        removed.append(_line_result(item))
+        invoice.items.remove(item)
+        result.removed += 1
+
+    for line_id, values in changes.modify.items():
+        item = existing[line_id]
+        updates = {name: value for name, value in values.items() if getattr(item, name) != value}
+        if not updates:
+            continue
+        for name, value in updates.items():
+            setattr(item, name, value)
+        result.modified += 1
+        if updates.keys() & set(TAX_FIELDS):
+            removed.append(_line_result(item))
+            line = compute_line(item.quantity, item.unit_price, item.discount, item.gst_rate)
+            item.taxable_value, item.tax_amount, item.total_value = line.taxable_value, line.tax_amount, line.total_value
+            added.append(line)
+            result.recomputed += 1
+
+    for values in changes.add:
+        line = compute_line(values["quantity"], values["unit_price"], values.get("discount", 0.0), values["gst_rate"])
+        invoice.items.append(
+            InvoiceItem(
+                product_id=values.get("product_id"),
+                name=values["name"],
+                hsn_sac=values["hsn_sac"],
+                quantity=values["quantity"],
+                unit_price=values["unit_price"],
+                discount=values.get("discount", 0.0),
+                gst_rate=values["gst_rate"],
+                taxable_value=line.taxable_value,
+                tax_amount=line.tax_amount,
+                total_value=line.total_value,
+            )
+        )
+        added.append(line)
+        result.added += 1
+        result.recomputed += 1
+
+    if supply_type is not None:
+        invoice.supply_type = supply_type
+    if not removed and not added and supply_type is None:
+        return result
+
+    totals = adjust_totals(_invoice_totals(invoice), removed, added, intra_state=invoice.supply_type == "intra")
+    invoice.total_taxable = totals.total_taxable
+    invoice.total_cgst = totals.total_cgst
+    invoice.total_sgst = totals.total_sgst
+    invoice.total_igst = totals.total_igst
+    if totals.grand_total != invoice.grand_total or supply_type is not None:
+        invoice.grand_total = totals.grand_total
+        invoice.grand_total_words = amount_to_words(totals.grand_total, words_language)
+
+    tax = db.query(TaxSummary).filter(TaxSummary.invoice_id == invoice.id).first()
+    if tax:
+        tax.total_taxable = totals.total_taxable
+        tax.total_cgst = totals.total_cgst
+        tax.total_sgst = totals.total_sgst
+        tax.total_igst = totals.total_igst
+        tax.total_tax = totals.total_tax
+    return result
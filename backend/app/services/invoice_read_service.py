@@ -0,0 +1,38 @@
+"""Row-to-dict projection of invoices for the fast list path.
+
+Columns are taken from the `InvoiceRead`/`InvoiceItemRead` field names, so the
+projected dicts carry exactly the documented response shape without loading
+ORM objects or running response-model validation.
+"""
+
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Invoice, InvoiceItem, Seller
+from app.schemas.schemas import InvoiceItemRead, InvoiceRead
+
+INVOICE_COLUMNS = [Invoice.__table__.c[name] for name in InvoiceRead.model_fields if name != "items"]
+ITEM_FIELDS = tuple(InvoiceItemRead.model_fields)
+ITEM_COLUMNS = [InvoiceItem.__table__.c[name] for name in ITEM_FIELDS]
+
+
+def list_invoice_dicts(db: Session, user_id: int) -> list[dict[str, Any]]:
+    """Return the user's invoices (oldest first) as `InvoiceRead`-shaped dicts."""
+    # Core execution on the connection skips ORM result processing.
+    connection = db.connection()
+    owned = select(Invoice.id).join(Seller, Seller.id == Invoice.seller_id).where(Seller.user_id == user_id)
+    invoices = [
+        {**row, "items": []}
+        for row in connection.execute(select(*INVOICE_COLUMNS).where(Invoice.id.in_(owned)).order_by(Invoice.id)).mappings()
+    ]
+    by_id = {invoice["id"]: invoice["items"] for invoice in invoices}
+    item_rows = connection.execute(
+        select(InvoiceItem.invoice_id.label("_invoice_id"), *ITEM_COLUMNS)
+        .where(InvoiceItem.invoice_id.in_(owned))
+        .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+    )
+    for invoice_id, *values in item_rows:
+        by_id[invoice_id].append(dict(zip(ITEM_FIELDS, values)))
+    return invoices
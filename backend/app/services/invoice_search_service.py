@@ -0,0 +1,150 @@
+"""Ranked full-text search over invoices, their lines and parties."""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import exists, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.db.fts import INVOICE_SEARCH_COLUMNS, fts_phrase, owner_token
+from app.models.models import Buyer, Invoice, InvoiceItem, Seller
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_OFFSET = 1000
+MIN_TERM_LENGTH = 2
+# Hits are ranked among this many most recent matching invoices. FTS5 streams
+# matches newest-first and stops here, so a term found on most of a large
+# tenant's invoices costs a bounded amount instead of scoring every hit.
+RANK_WINDOW = 1000
+
+# bm25 column weights: invoice_number, parties, items, hsn, owner. A hit on
+# the invoice number or a party outranks one buried in a long list of lines.
+_RANKED_MATCHES = text(
+    "SELECT rowid, score FROM ("
+    "SELECT rowid, bm25(invoices_fts, 10.0, 4.0, 1.0, 2.0, 0.0) AS score "
+    "FROM invoices_fts WHERE invoices_fts MATCH :match ORDER BY rowid DESC LIMIT :window"
+    ") ORDER BY score, rowid DESC LIMIT :limit OFFSET :offset"
+)
+
+
+@dataclass
+class InvoiceSearchHit:
+    id: int
+    invoice_number: str | None
+    status: str
+    grand_total: float
+    created_at: datetime
+    seller_name: str
+    buyer_name: str
+    score: float
+
+
+@dataclass
+class InvoiceSearchResult:
+    items: list[InvoiceSearchHit]
+    next_offset: int | None
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_terms(q: str) -> list[str]:
+    terms = [term for term in q.split() if len(term) >= MIN_TERM_LENGTH]
+    if not terms:
+        raise ValueError(f"Search terms must be at least {MIN_TERM_LENGTH} characters")
+    return terms
+
+
+def _ranked_ids(db: Session, user_id: int, terms: list[str], limit: int, offset: int) -> list[tuple[int, float]]:
+    # Terms are phrases restricted to the searchable columns, so "INV-2026"
+    # matches the tokens of "INV-2026-0042" and no term can hit an owner
+    # token. Only the last term, the one still being typed, is a prefix:
+    # prefix queries cannot stream and cost several times an exact term.
+    phrases = [fts_phrase(term) for term in terms]
+    phrases[-1] += "*"
+    terms_match = " AND ".join(phrases)
+    match = f"owner:{owner_token(user_id)} AND {INVOICE_SEARCH_COLUMNS}: ({terms_match})"
+    params = {"match": match, "window": RANK_WINDOW, "limit": limit, "offset": offset}
+    return [tuple(row) for row in db.execute(_RANKED_MATCHES, params)]
+
+
+def _substring_ids(db: Session, user_id: int, terms: list[str], limit: int, offset: int) -> list[tuple[int, float]]:
+    """Unranked fallback for databases without FTS5."""
+    filters = []
+    for term in terms:
+        pattern = f"%{_escape_like(term)}%"
+        filters.append(
+            or_(
+                Invoice.invoice_number.ilike(pattern, escape="\\"),
+                Seller.name.ilike(pattern, escape="\\"),
+                Buyer.name.ilike(pattern, escape="\\"),
+                Buyer.gstin.ilike(pattern, escape="\\"),
+                exists().where(
+                    InvoiceItem.invoice_id == Invoice.id,
+                    or_(InvoiceItem.name.ilike(pattern, escape="\\"), InvoiceItem.hsn_sac.ilike(pattern, escape="\\")),
+                ),
+            )
+        )
+    query = (
+        select(Invoice.id)
+        .join(Seller, Seller.id == Invoice.seller_id)
+        .join(Buyer, Buyer.id == Invoice.buyer_id)
+        .where(Seller.user_id == user_id, *filters)
+        .order_by(Invoice.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [(invoice_id, 0.0) for invoice_id in db.scalars(query)]
+
+
+def search_invoices(
+    db: Session,
+    user_id: int,
+    q: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+) -> InvoiceSearchResult:
+    """Return one page of the user's invoices matching every term, best first.
+
+    Each term of two or more characters matches whole words (the last term
+    also word prefixes) in the invoice number, seller/buyer name or GSTIN,
+    line item names or HSN/SAC codes. Results are ordered by bm25 score
+    (lower is better) among the `RANK_WINDOW` most recent matches, newest
+    first on ties.
+    """
+    terms = _search_terms(q)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if offset < 0 or offset > MAX_OFFSET:
+        raise ValueError(f"Offset must be between 0 and {MAX_OFFSET}")
+
+    if db.get_bind().dialect.name == "sqlite":
+        ranked = _ranked_ids(db, user_id, terms, limit + 1, offset)
+    else:
+        ranked = _substring_ids(db, user_id, terms, limit + 1, offset)
+    page = ranked[:limit]
+
+    headers = {
+        row.id: row
+        for row in db.execute(
+            select(
+                Invoice.id,
+                Invoice.invoice_number,
+                Invoice.status,
+                Invoice.grand_total,
+                Invoice.created_at,
+                Seller.name.label("seller_name"),
+                Buyer.name.label("buyer_name"),
+            )
+            .join(Seller, Seller.id == Invoice.seller_id)
+            .join(Buyer, Buyer.id == Invoice.buyer_id)
+            .where(Invoice.id.in_([invoice_id for invoice_id, _ in page]))
+        )
+    }
+    hits = [
+        InvoiceSearchHit(score=score, **headers[invoice_id]._asdict())
+        for invoice_id, score in page
+        if invoice_id in headers
+    ]
+    return InvoiceSearchResult(items=hits, next_offset=offset + limit if len(ranked) > limit else None)
@@ -5,8 +5,8 @@ from collections import Counter
 metrics_counter: Counter[str] = Counter()
 
 
-def inc(metric: str) -> None:
-    metrics_counter[metric] += 1
+def inc(metric: str, value: float = 1) -> None:
+    metrics_counter[metric] += value
 
 
 def render_prometheus() -> str:
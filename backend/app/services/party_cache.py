@@ -0,0 +1,124 @@
+"""Read-through cache of seller and buyer snapshots.
+
+Invoice writes and exports need a handful of fields of their seller and
+buyer, which almost never change. Snapshots are kept in one LRU keyed by
+tenant (the requesting user), kind and id. Every tenant has a version
+number; writes to a tenant's sellers or buyers bump it, which makes all of
+that tenant's entries stale at once without scanning the LRU. Stale entries
+are reloaded on their next lookup. Versions only exist in this process, so
+entries also expire `party_cache_ttl_seconds` after they were loaded: a
+write made by another worker is picked up within that time.
+
+A lookup reads the version before loading, so a snapshot loaded while a
+write commits is stored under the old version and reloaded next time.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Buyer, Seller
+from app.services.metrics_service import inc, metrics_counter
+from app.utils.lru import LRUCache
+
+
+@dataclass(frozen=True)
+class SellerSnapshot:
+    id: int
+    user_id: int
+    name: str
+    gstin: str
+    state_code: str
+    words_language: str
+
+
+@dataclass(frozen=True)
+class BuyerSnapshot:
+    id: int
+    user_id: int
+    name: str
+    gstin: str | None
+    state_code: str
+
+
+def _load_seller(db: Session, tenant: int, seller_id: int) -> SellerSnapshot | None:
+    row = db.execute(
+        select(Seller.id, Seller.user_id, Seller.name, Seller.gstin, Seller.state_code, Seller.words_language).where(
+            Seller.id == seller_id, Seller.user_id == tenant
+        )
+    ).first()
+    return SellerSnapshot(*row) if row else None
+
+
+def _load_buyer(db: Session, tenant: int, buyer_id: int) -> BuyerSnapshot | None:
+    row = db.execute(
+        select(Buyer.id, Buyer.user_id, Buyer.name, Buyer.gstin, Buyer.state_code).where(
+            Buyer.id == buyer_id, Buyer.user_id == tenant
+        )
+    ).first()
+    return BuyerSnapshot(*row) if row else None
+
+
+class PartyCache:
+    """Tenant-scoped, size-bounded LRU of seller and buyer snapshots."""
+
+    def __init__(self, maxsize: int, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._cache = LRUCache(maxsize)
+        self._versions: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def seller(self, db: Session, tenant: int, seller_id: int) -> SellerSnapshot | None:
+        """The tenant's seller `seller_id`, or None if the tenant has no such seller."""
+        return self._get(db, tenant, "seller", seller_id, _load_seller)
+
+    def buyer(self, db: Session, tenant: int, buyer_id: int) -> BuyerSnapshot | None:
+        """The tenant's buyer `buyer_id`, or None if the tenant has no such buyer."""
+        return self._get(db, tenant, "buyer", buyer_id, _load_buyer)
+
+    def invalidate(self, tenant: int) -> None:
+        """Mark every cached snapshot of `tenant` stale; call after writing its parties."""
+        with self._lock:
+            self._versions[tenant] = self._versions.get(tenant, 0) + 1
+        inc("party_cache_invalidations_total")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._versions.clear()
+            self.hits = self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _get(self, db: Session, tenant: int, kind: str, party_id: int, load: Callable) -> object | None:
+        version = self._versions.get(tenant, 0)
+        now = time.monotonic()
+        key = (tenant, kind, party_id)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version and entry[1] > now:
+            self.hits += 1
+            inc(f'party_cache_hits_total{{kind="{kind}"}}')
+            snapshot = entry[2]
+        else:
+            self.misses += 1
+            inc(f'party_cache_misses_total{{kind="{kind}"}}')
+            # Misses are not cached: a party created later is found at once.
+            snapshot = load(db, tenant, party_id)
+            if snapshot is not None:
+                self._cache.set(key, (version, now + self.ttl_seconds, snapshot))
+        metrics_counter["party_cache_hit_ratio"] = self.hit_ratio
+        metrics_counter["party_cache_entries"] = len(self._cache)
+        return snapshot
+
+
+party_cache = PartyCache(settings.party_cache_size, settings.party_cache_ttl_seconds)
@@ -1,18 +1,70 @@
 """PDF generation using reportlab."""
 
+import logging
+import os
+import threading
 from io import BytesIO
 
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfgen import canvas
 
+from app.core.config import settings
+from app.services.profiling_service import profiled
 
-def generate_invoice_pdf(invoice: dict) -> bytes:
-    """Create a simple GST invoice PDF."""
+logger = logging.getLogger("gst_invoice")
+
+# Write image streams as binary. ASCII85 only keeps PDFs 7-bit clean and,
+# without reportlab's optional C accelerator, costs ~70ms per embedded logo.
+rl_config.useA85 = 0
+
+UNICODE_FONT = "InvoiceUnicode"
+_font_lock = threading.Lock()
+_font_registered: bool | None = None
+
+
+def _unicode_font() -> str | None:
+    """Register `pdf_unicode_font_path` on first use; None if it is missing or unusable."""
+    global _font_registered
+    with _font_lock:
+        if _font_registered is None:
+            path = settings.pdf_unicode_font_path
+            if not (path and os.path.isfile(path)):
+                logger.warning("pdf unicode font %r not found; non-Latin amounts in words will not render", path)
+                _font_registered = False
+            else:
+                try:
+                    pdfmetrics.registerFont(TTFont(UNICODE_FONT, path))
+                except Exception:  # noqa: BLE001 - reportlab raises several types for bad fonts
+                    logger.exception("pdf unicode font %r could not be loaded; non-Latin amounts in words will not render", path)
+                    _font_registered = False
+                else:
+                    _font_registered = True
+    return UNICODE_FONT if _font_registered else None
+
+
+def words_font(text: str) -> str:
+    """Font for the amount in words: Helvetica covers WinAnsi text only (e.g. not Hindi)."""
+    try:
+        text.encode("cp1252")
+    except UnicodeEncodeError:
+        return _unicode_font() or "Helvetica"
+    return "Helvetica"
+
+
+@profiled("generate_invoice_pdf")
+def generate_invoice_pdf(invoice: dict, logo: ImageReader | None = None) -> bytes:
+    """Create a simple GST invoice PDF, with the seller logo top right if given."""
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=A4)
+    if logo is not None:
+        c.drawImage(logo, 425, 770, width=120, height=50, preserveAspectRatio=True, anchor="ne", mask="auto")
     y = 800
     c.setFont("Helvetica-Bold", 14)
-    c.drawString(50, y, f"GST Invoice #{invoice['invoice_number']}")
+    c.drawString(50, y, f"GST Invoice #{invoice['invoice_number'] or 'DRAFT'}")
     y -= 25
     c.setFont("Helvetica", 10)
     c.drawString(50, y, f"Seller: {invoice['seller']['name']} ({invoice['seller']['gstin']})")
@@ -35,6 +87,7 @@ def generate_invoice_pdf(invoice: dict) -> bytes:
     y -= 15
     c.drawString(50, y, f"Grand Total: ₹{invoice['grand_total']:.2f}")
     y -= 15
+    c.setFont(words_font(invoice["grand_total_words"]), 10)
     c.drawString(50, y, invoice["grand_total_words"])
     c.showPage()
     c.save()
@@ -0,0 +1,360 @@
+"""On-demand CPU and memory profiling of a running worker.
+
+Nothing here runs until an admin asks for it:
+
+- a CPU session samples every thread's stack (`sys._current_frames`) from a
+  background thread for N seconds;
+- a memory session diffs two `tracemalloc` snapshots taken N seconds apart;
+- a request profile samples only while one request runs, keeping the
+  threads that worked on it.
+
+Finished profiles are kept in a small LRU and downloaded as speedscope JSON
+(https://www.speedscope.app) or, for CPU samples, a pstats file readable by
+`python -m pstats`/snakeviz. The `profiled` hooks on hot functions and the
+DB cursor hooks add span timings to active profiles and cost one check when
+none is active.
+"""
+
+import functools
+import marshal
+import os
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, TypeVar
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.services.metrics_service import inc
+from app.utils.lru import LRUCache
+
+T = TypeVar("T")
+CPU = "cpu"
+MEMORY = "memory"
+REQUEST = "request"
+
+# (function, file, first line)
+Frame = tuple[str, str, int]
+Stack = tuple[Frame, ...]
+
+# Leaf frames of a thread that is parked rather than running: pool workers
+# waiting for work, the event loop waiting on sockets.
+_IDLE_LEAVES = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select"), ("threading.py", "_wait_for_tstate_lock")}
+_DB_START = "profiling_db_start"
+
+
+class ProfileBusy(ValueError):
+    """A profile of this kind is already running."""
+
+
+class ProfileNotReady(ValueError):
+    """The profile is still being captured."""
+
+
+@dataclass
+class Span:
+    calls: int = 0
+    total_ms: float = 0.0
+
+
+@dataclass
+class Profile:
+    id: str
+    kind: str
+    started_at: float
+    seconds: float
+    interval_s: float = 0.0
+    finished: bool = False
+    # CPU and request profiles: thread id -> stack -> sample count.
+    samples: dict[int, Counter[Stack]] = field(default_factory=lambda: defaultdict(Counter))
+    # Memory profiles: (traceback, size diff in bytes, count diff), largest growth first.
+    allocations: list[tuple[Stack, int, int]] = field(default_factory=list)
+    spans: dict[str, Span] = field(default_factory=lambda: defaultdict(Span))
+    # Request profiles keep only the threads that ran the request's code.
+    threads: set[int] | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_span(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            span = self.spans[name]
+            span.calls += 1
+            span.total_ms += elapsed_ms
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "seconds": round(self.seconds, 3),
+            "finished": self.finished,
+            # The sampler thread is still writing to a running profile.
+            "samples": sum(sum(stacks.values()) for stacks in self.samples.values()) if self.finished else None,
+            "spans": {name: {"calls": span.calls, "total_ms": round(span.total_ms, 3)} for name, span in sorted(self.spans.items())},
+        }
+
+
+# Global (CPU/memory) sessions in progress; request profiles live in the context.
+_sessions: list[Profile] = []
+_request_profile: ContextVar[Profile | None] = ContextVar("request_profile", default=None)
+_lock = threading.Lock()
+results = LRUCache(settings.profile_result_cache_size)
+
+
+def _new_profile(kind: str, seconds: float, interval_s: float = 0.0) -> Profile:
+    return Profile(id=secrets.token_hex(6), kind=kind, started_at=time.time(), seconds=seconds, interval_s=interval_s)
+
+
+def _record_span(name: str, elapsed_ms: float) -> None:
+    for profile in _sessions:
+        profile.add_span(name, elapsed_ms)
+    profile = _request_profile.get()
+    if profile is not None:
+        profile.add_span(name, elapsed_ms)
+        profile.threads.add(threading.get_ident())
+
+
+def _active() -> bool:
+    return bool(_sessions) or _request_profile.get() is not None
+
+
+def profiled(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Time calls of the decorated function into active profiles as span `name`."""
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _sessions and _request_profile.get() is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record_span(name, (time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    return decorate
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _active():
+        conn.info.setdefault(_DB_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _active() and conn.info.get(_DB_START):
+        _record_span("db", (time.perf_counter() - conn.info[_DB_START].pop()) * 1000)
+
+
+def install_profiling_hooks() -> None:
+    """Time DB statements into active profiles (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _stack(frame) -> Stack:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def _is_idle(stack: Stack) -> bool:
+    name, filename, _ = stack[-1]
+    return (os.path.basename(filename), name) in _IDLE_LEAVES
+
+
+class _Sampler(threading.Thread):
+    """Adds every other thread's current stack to `profile` each `interval_s`."""
+
+    def __init__(self, profile: Profile, deadline: float, on_done: Callable[[Profile], None]) -> None:
+        super().__init__(name=f"profiler-{profile.id}", daemon=True)
+        self.profile = profile
+        self.deadline = deadline
+        self.on_done = on_done
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        profile = self.profile
+        own = threading.get_ident()
+        try:
+            while not self.stopped.wait(profile.interval_s) and time.monotonic() < self.deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own:
+                        continue
+                    stack = _stack(frame)
+                    if stack and not _is_idle(stack):
+                        profile.samples[thread_id][stack] += 1
+        finally:
+            self.on_done(profile)
+
+
+def _finish(profile: Profile) -> None:
+    with _lock:
+        if profile in _sessions:
+            _sessions.remove(profile)
+    if profile.threads is not None:
+        profile.samples = {thread_id: stacks for thread_id, stacks in profile.samples.items() if thread_id in profile.threads}
+    profile.finished = True
+    inc(f'profiles_captured_total{{kind="{profile.kind}"}}')
+
+
+def _claim(kind: str, seconds: float, interval_s: float = 0.0) -> Profile:
+    with _lock:
+        if any(session.kind == kind for session in _sessions):
+            raise ProfileBusy(f"A {kind} profile is already running")
+        profile = _new_profile(kind, seconds, interval_s)
+        _sessions.append(profile)
+    results.set(profile.id, profile)
+    return profile
+
+
+def start_cpu_profile(seconds: float, interval_ms: float | None = None) -> Profile:
+    """Sample all threads for `seconds` in the background; one CPU session at a time."""
+    profile = _claim(CPU, seconds, (interval_ms or settings.profile_sample_interval_ms) / 1000)
+    _Sampler(profile, time.monotonic() + seconds, _finish).start()
+    return profile
+
+
+def start_memory_profile(seconds: float, top: int = 100) -> Profile:
+    """Diff tracemalloc snapshots `seconds` apart; tracing is stopped again unless it was already on."""
+    profile = _claim(MEMORY, seconds)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(settings.profile_tracemalloc_frames)
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+    before = tracemalloc.take_snapshot().filter_traces(filters)
+
+    def finish() -> None:
+        try:
+            after = tracemalloc.take_snapshot().filter_traces(filters)
+            for stat in after.compare_to(before, "traceback")[:top]:
+                if stat.size_diff <= 0:
+                    continue
+                # tracemalloc frames carry a line, not a function name.
+                stack = tuple((f"{os.path.basename(frame.filename)}:{frame.lineno}", frame.filename, frame.lineno) for frame in reversed(stat.traceback))
+                profile.allocations.append((stack, stat.size_diff, stat.count_diff))
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+            _finish(profile)
+
+    timer = threading.Timer(seconds, finish)
+    timer.daemon = True
+    timer.start()
+    return profile
+
+
+@contextmanager
+def profile_request(interval_ms: float | None = None) -> Iterator[Profile]:
+    """Sample while the block runs, keeping the threads that ran this context's hooks.
+
+    The calling thread (the event loop) always counts; worker threads are
+    attributed when the request's DB statements or profiled functions run
+    on them, which every authenticated endpoint does.
+    """
+    profile = _new_profile(REQUEST, 0.0, (interval_ms or settings.profile_sample_interval_ms) / 1000)
+    profile.threads = {threading.get_ident()}
+    token = _request_profile.set(profile)
+    sampler = _Sampler(profile, float("inf"), lambda _: None)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        yield profile
+    finally:
+        sampler.stopped.set()
+        sampler.join()
+        _request_profile.reset(token)
+        profile.seconds = time.perf_counter() - start
+        _finish(profile)
+        results.set(profile.id, profile)
+
+
+def get_profile(profile_id: str) -> Profile | None:
+    return results.get(profile_id)
+
+
+def list_profiles() -> list[dict]:
+    return [profile.summary() for _, profile in reversed(results.items())]
+
+
+def _weighted_stacks(profile: Profile) -> Iterator[tuple[str, Stack, float]]:
+    """(thread label, stack, weight) triples; weights are seconds or bytes."""
+    if profile.kind == MEMORY:
+        for stack, size, _ in profile.allocations:
+            yield "allocations", stack, size
+        return
+    for thread_id, stacks in profile.samples.items():
+        for stack, count in stacks.items():
+            yield f"thread {thread_id}", stack, count * profile.interval_s
+
+
+def to_speedscope(profile: Profile) -> bytes:
+    """Speedscope file with one sampled profile per thread (or one of allocated bytes)."""
+    if not profile.finished:
+        raise ProfileNotReady("Profile is still running")
+    frames: dict[Frame, int] = {}
+    by_thread: dict[str, tuple[list[list[int]], list[float]]] = {}
+    for label, stack, weight in _weighted_stacks(profile):
+        samples, weights = by_thread.setdefault(label, ([], []))
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(weight)
+    unit = "bytes" if profile.kind == MEMORY else "seconds"
+    return orjson.dumps(
+        {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{profile.kind} profile {profile.id}",
+            "exporter": "gst-invoice-generator",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": name, "file": filename, "line": line} for name, filename, line in frames]},
+            "profiles": [
+                {"type": "sampled", "name": label, "unit": unit, "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights}
+                for label, (samples, weights) in by_thread.items()
+            ],
+        }
+    )
+
+
+def to_pstats(profile: Profile) -> bytes:
+    """CPU samples in the marshalled format `pstats.Stats` loads.
+
+    Sample counts stand in for call counts and sampled time for measured
+    time, so cumulative and own time rank functions as cProfile would.
+    """
+    if not profile.finished:
+        raise ProfileNotReady("Profile is still running")
+    if profile.kind == MEMORY:
+        raise ValueError("pstats output is only available for CPU and request profiles")
+    # pstats keys are (file, line, function).
+    stats: dict[tuple, list] = {}
+    for _, stack, weight in _weighted_stacks(profile):
+        count = round(weight / profile.interval_s)
+        keys = [(filename, line, name) for name, filename, line in stack]
+        # A function counts once per sample however deep it recurses.
+        for key in dict.fromkeys(keys):
+            entry = stats.setdefault(key, [0, 0, 0.0, 0.0, {}])
+            entry[0] += count
+            entry[1] += count
+            entry[3] += weight
+        leaf = stats[keys[-1]]
+        leaf[2] += weight
+        for caller, callee in zip(keys, keys[1:]):
+            edge = stats[callee][4].setdefault(caller, [0, 0, 0.0, 0.0])
+            edge[0] += count
+            edge[1] += count
+            edge[3] += weight
+    return marshal.dumps(
+        {key: (cc, nc, tt, ct, {caller: tuple(edge) for caller, edge in callers.items()}) for key, (cc, nc, tt, ct, callers) in stats.items()}
+    )
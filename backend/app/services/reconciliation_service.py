@@ -0,0 +1,229 @@
+"""Streaming reconciliation of a customer's GSTR-2B against issued invoices.
+
+GSTR-2B lists the invoices suppliers reported against a recipient GSTIN. For
+a seller on this platform, the recipient's 2B should contain every finalized
+invoice issued to that GSTIN, at the value in our books. The 2B JSON (often
+hundreds of MB) is parsed incrementally; only the books side is held in
+memory, as a hash index per calendar month loaded with one indexed query.
+Books invoices are dated by their issue date (IST), the date printed on the
+invoice and reported to GSTN.
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from typing import BinaryIO, Iterator
+
+import ijson
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Buyer, Invoice, Seller
+from app.utils.lru import LRUCache
+
+B2B_INVOICES = "data.docdata.b2b.item.inv.item"
+STATUSES = ("matched", "amount_mismatch", "missing_in_books", "missing_in_2b")
+_TOKEN = re.compile(r"[0-9A-Za-z]+")
+_CTIN_KEY = b'"ctin"'
+_CTIN_VALUE = re.compile(rb'"ctin"\s*:\s*"([^"]*)"')
+_READ_SIZE = 64 * 1024
+_MONTH = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+# (supplier GSTIN, normalized invoice number, ISO date)
+MatchKey = tuple[str, str, str]
+
+
+@dataclass(slots=True)
+class BookInvoice:
+    id: int
+    invoice_number: str
+    value: float
+    taxable: float
+
+
+def normalize_invoice_number(number: str) -> str:
+    """Canonical form for matching: alphanumeric runs, upper-cased, leading zeros dropped.
+
+    "INV/2026/0042", "inv-2026-42" and "INV 2026 042" all become "INV202642".
+    """
+    return "".join(token.lstrip("0") or "0" for token in _TOKEN.findall(number.upper()))
+
+
+class _SupplierTrackingReader:
+    """File wrapper that ends every read just before a `"ctin"` key.
+
+    ijson's C backend parses one read at a time and yields every invoice it
+    completed before asking for more, so when a read starts with a supplier's
+    `ctin`, all invoices yielded after it belong to that supplier. This keeps
+    parsing at C speed without holding a whole supplier section in memory.
+    The GSTN format always writes `ctin` before the supplier's `inv` list.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self._buffer = b""
+        self._eof = False
+        self.ctin: str | None = None
+
+    def _fill(self, size: int) -> None:
+        while len(self._buffer) < size and not self._eof:
+            chunk = self._stream.read(_READ_SIZE)
+            self._eof = not chunk
+            self._buffer += chunk
+
+    def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""
+        self._fill(_READ_SIZE)
+        if self._buffer.startswith(_CTIN_KEY):
+            self._fill(256)
+            match = _CTIN_VALUE.match(self._buffer)
+            self.ctin = match.group(1).decode().upper() if match else None
+        cut = self._buffer.find(_CTIN_KEY, 1)
+        if cut == -1:
+            # Hold back a possible partial key at the end of the buffer.
+            cut = len(self._buffer) if self._eof else max(len(self._buffer) - len(_CTIN_KEY) + 1, 1)
+        part, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        return part
+
+
+def iter_gstr2b_invoices(stream: BinaryIO) -> Iterator[tuple[str | None, dict]]:
+    """Yield (supplier GSTIN, invoice) pairs from the B2B section of a GSTR-2B file."""
+    reader = _SupplierTrackingReader(stream)
+    for invoice in ijson.items(reader, B2B_INVOICES, use_float=True):
+        yield reader.ctin, invoice
+
+
+def _iso_date(value: str) -> str:
+    # GSTN dates are DD-MM-YYYY.
+    return f"{value[6:10]}-{value[3:5]}-{value[0:2]}"
+
+
+def _month_bounds(month: str) -> tuple[date, date]:
+    year, number = int(month[:4]), int(month[5:7])
+    return date(year, number, 1), date(year + number // 12, number % 12 + 1, 1)
+
+
+class _BooksIndex:
+    """Issued invoices to one recipient, hashed by `MatchKey`, one month at a time."""
+
+    def __init__(self, db: Session, user_id: int, recipient_gstin: str, period: str) -> None:
+        self._db = db
+        self._user_id = user_id
+        self._recipient_gstin = recipient_gstin
+        self.period_month = period
+        self.period = self._load(period)
+        # Invoices dated outside the return period (late filings) are looked
+        # up in their own month; only the return period is pinned.
+        self._other = LRUCache(settings.reconciliation_period_cache_size)
+        self.queries = 1
+
+    def _load(self, month: str) -> dict[MatchKey, BookInvoice]:
+        start, end = _month_bounds(month)
+        rows = self._db.connection().execute(
+            select(Invoice.id, Invoice.invoice_number, Invoice.issued_on, Invoice.grand_total, Invoice.total_taxable, Seller.gstin)
+            .join(Seller, Seller.id == Invoice.seller_id)
+            .join(Buyer, Buyer.id == Invoice.buyer_id)
+            .where(
+                Seller.user_id == self._user_id,
+                Buyer.gstin == self._recipient_gstin,
+                Invoice.status == "finalized",
+                Invoice.issued_on >= start,
+                Invoice.issued_on < end,
+            )
+        )
+        return {
+            (gstin, normalize_invoice_number(number), issued_on.isoformat()): BookInvoice(invoice_id, number, value, taxable)
+            for invoice_id, number, issued_on, value, taxable, gstin in rows
+        }
+
+    def month(self, month: str) -> dict[MatchKey, BookInvoice]:
+        if month == self.period_month:
+            return self.period
+        if not _MONTH.fullmatch(month):
+            return {}
+        index = self._other.get(month)
+        if index is None:
+            index = self._load(month)
+            self.queries += 1
+            self._other.set(month, index)
+        return index
+
+
+def reconcile_gstr2b(db: Session, user_id: int, recipient_gstin: str, period: str, stream: BinaryIO) -> Iterator[dict]:
+    """Classify each 2B record for the user's sellers, then the books invoices the 2B lacks.
+
+    `period` is the return period as YYYY-MM. Yields one dict per result and
+    a final `{"summary": {...}}`; records from suppliers that are not the
+    user's sellers are only counted.
+    """
+    sellers = set(db.execute(select(Seller.gstin).where(Seller.user_id == user_id)).scalars())
+    books = _BooksIndex(db, user_id, recipient_gstin, period)
+    tolerance = settings.reconciliation_amount_tolerance
+    counts: Counter[str] = Counter()
+    for supplier_gstin, record in iter_gstr2b_invoices(stream):
+        counts["records"] += 1
+        if supplier_gstin not in sellers:
+            counts["other_suppliers"] += 1
+            continue
+        number = str(record.get("inum", ""))
+        invoice_date = _iso_date(str(record.get("dt", "")))
+        value = float(record.get("val") or 0)
+        taxable = sum(float(item.get("txval") or 0) for item in record.get("items") or ()) or float(record.get("txval") or 0)
+        row = {"supplier_gstin": supplier_gstin, "invoice_number": number, "date": invoice_date, "value_2b": value, "taxable_2b": taxable}
+        book = books.month(invoice_date[:7]).pop((supplier_gstin, normalize_invoice_number(number), invoice_date), None)
+        if book is None:
+            status = "missing_in_books"
+        else:
+            status = "matched"
+            if abs(book.value - value) > tolerance or abs(book.taxable - taxable) > tolerance:
+                status = "amount_mismatch"
+            row.update(
+                invoice_id=book.id,
+                books_invoice_number=book.invoice_number,
+                value_books=book.value,
+                taxable_books=book.taxable,
+                difference=round(value - book.value, 2),
+            )
+        counts[status] += 1
+        yield {"status": status, **row}
+    for (supplier_gstin, _, invoice_date), book in books.period.items():
+        counts["missing_in_2b"] += 1
+        yield {
+            "status": "missing_in_2b",
+            "supplier_gstin": supplier_gstin,
+            "invoice_id": book.id,
+            "books_invoice_number": book.invoice_number,
+            "date": invoice_date,
+            "value_books": book.value,
+            "taxable_books": book.taxable,
+        }
+    summary = {"records": counts["records"], **{status: counts[status] for status in STATUSES}}
+    yield {"summary": {**summary, "other_suppliers": counts["other_suppliers"], "books_queries": books.queries}}
+
+
+def ndjson_chunks(rows: Iterator[dict], chunk_size: int = _READ_SIZE) -> Iterator[bytes]:
+    """Encode rows as NDJSON, grouped into chunks of about `chunk_size` bytes."""
+    lines: list[bytes] = []
+    size = 0
+    for row in rows:
+        line = orjson.dumps(row) + b"\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b"".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield b"".join(lines)
+
+
+def parse_period(period: str) -> str:
+    """Validate a YYYY-MM return period (GSTN's MMYYYY is accepted too)."""
+    if re.fullmatch(r"\d{6}", period):
+        period = f"{period[2:]}-{period[:2]}"
+    if not _MONTH.fullmatch(period):
+        raise ValueError("Period must be YYYY-MM")
+    return period
@@ -0,0 +1,308 @@
+"""Recurring invoice templates and the scheduler that issues them.
+
+A template holds a seller, buyer, lines and a cadence; each due period
+becomes one finalized invoice. Due templates are processed in chunks of
+`recurring_chunk_size`, each chunk one transaction: the chunk's invoices,
+lines, tax summaries, events and template advances commit together or not
+at all, so a crash mid-run loses at most the chunk in flight and the next
+run picks it up where the committed ones left off. The unique index on
+(recurring_template_id, recurring_period) backs that up when two processes
+run the scheduler at once: the second writer of a period fails its chunk
+instead of issuing it twice.
+"""
+
+import asyncio
+import calendar
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable
+
+import anyio.to_thread
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.db.fts import has_fts_table, reindex_invoices
+from app.models.models import Buyer, Invoice, InvoiceItem, RecurringTemplate, RecurringTemplateItem, Seller, TaxSummary
+from app.services.event_service import CREATED, SNAPSHOT_FIELDS, record_events
+from app.services.metrics_service import inc, metrics_counter
+from app.services.sequence_service import allocate_invoice_numbers, get_financial_year, issue_date
+from app.services.tax_service import compute_line, compute_totals
+from app.utils.number_words import amount_to_words
+
+logger = logging.getLogger("gst_invoice")
+
+CADENCE_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+CADENCES = ("weekly", *CADENCE_MONTHS)
+# Periods issued per template per run; a template further behind catches up
+# over the following runs instead of producing one oversized chunk.
+MAX_CATCH_UP = 12
+
+
+def period_date(start_on: date, cadence: str, index: int) -> date:
+    """Date of period `index` (0-based) of a template starting on `start_on`.
+
+    Periods are counted from the start date rather than from the previous
+    period, so a template starting on the 31st is issued on the last day of
+    shorter months and returns to the 31st after them.
+    """
+    if cadence == "weekly":
+        return start_on + timedelta(weeks=index)
+    year, month = divmod(start_on.month - 1 + CADENCE_MONTHS[cadence] * index, 12)
+    year += start_on.year
+    return date(year, month + 1, min(start_on.day, calendar.monthrange(year, month + 1)[1]))
+
+
+@dataclass
+class RunReport:
+    templates: int = 0
+    invoices: int = 0
+    chunks: int = 0
+    failed_chunks: int = 0
+    duration_s: float = 0.0
+
+    @property
+    def invoices_per_sec(self) -> float:
+        return self.invoices / self.duration_s if self.duration_s else 0.0
+
+
+def _due_templates(db: Session, today: date, after_id: int, limit: int) -> list:
+    buyer = aliased(Buyer)
+    return db.execute(
+        select(
+            RecurringTemplate.id,
+            RecurringTemplate.user_id,
+            RecurringTemplate.seller_id,
+            RecurringTemplate.buyer_id,
+            RecurringTemplate.invoice_type,
+            RecurringTemplate.reverse_charge,
+            RecurringTemplate.cadence,
+            RecurringTemplate.start_on,
+            RecurringTemplate.periods_generated,
+            Seller.state_code.label("seller_state"),
+            Seller.words_language,
+            buyer.state_code.label("buyer_state"),
+        )
+        .join(Seller, Seller.id == RecurringTemplate.seller_id)
+        .join(buyer, buyer.id == RecurringTemplate.buyer_id)
+        .where(RecurringTemplate.active.is_(True), RecurringTemplate.next_run_on <= today, RecurringTemplate.id > after_id)
+        .order_by(RecurringTemplate.id)
+        .limit(limit)
+    ).all()
+
+
+def _generate_chunk(db: Session, templates: list, today: date) -> int:
+    """Issue the due periods of `templates`; the caller commits. Returns the invoice count."""
+    lines: dict[int, list] = defaultdict(list)
+    connection = db.connection()
+    for item in connection.execute(
+        select(
+            RecurringTemplateItem.template_id,
+            RecurringTemplateItem.name,
+            RecurringTemplateItem.hsn_sac,
+            RecurringTemplateItem.quantity,
+            RecurringTemplateItem.unit_price,
+            RecurringTemplateItem.discount,
+            RecurringTemplateItem.gst_rate,
+        )
+        .where(RecurringTemplateItem.template_id.in_([t.id for t in templates]))
+        .order_by(RecurringTemplateItem.id)
+    ):
+        lines[item.template_id].append(item)
+
+    invoices: list[dict] = []
+    invoice_lines: list[list[tuple]] = []
+    advances: list[dict] = []
+    owners: list[int] = []
+    for template in templates:
+        items = lines[template.id]
+        supply_type = "intra" if template.seller_state == template.buyer_state else "inter"
+        # Every period of a template has the same lines, so tax is computed once.
+        results = [compute_line(item.quantity, item.unit_price, item.discount, item.gst_rate) for item in items]
+        totals = compute_totals(results, intra_state=supply_type == "intra")
+        words = amount_to_words(totals.grand_total, template.words_language)
+        index = template.periods_generated
+        while index - template.periods_generated < MAX_CATCH_UP and (period := period_date(template.start_on, template.cadence, index)) <= today:
+            invoices.append(
+                {
+                    "seller_id": template.seller_id,
+                    "buyer_id": template.buyer_id,
+                    "invoice_type": template.invoice_type,
+                    "reverse_charge": template.reverse_charge,
+                    "supply_type": supply_type,
+                    "status": "finalized",
+                    "issued_on": today,
+                    "total_taxable": totals.total_taxable,
+                    "total_cgst": totals.total_cgst,
+                    "total_sgst": totals.total_sgst,
+                    "total_igst": totals.total_igst,
+                    "grand_total": totals.grand_total,
+                    "grand_total_words": words,
+                    "recurring_template_id": template.id,
+                    "recurring_period": period,
+                    "_seller": (template.seller_id, template.seller_state),
+                    "_total_tax": totals.total_tax,
+                }
+            )
+            invoice_lines.append(list(zip(items, results)))
+            owners.append(template.user_id)
+            index += 1
+        advances.append({"id": template.id, "periods_generated": index, "next_run_on": period_date(template.start_on, template.cadence, index)})
+    if not invoices:
+        return 0
+
+    # One number block per seller for the whole chunk.
+    by_seller: dict[tuple[int, str], list[dict]] = defaultdict(list)
+    for row in invoices:
+        by_seller[row.pop("_seller")].append(row)
+    fy = get_financial_year(today)
+    for (seller_id, state_code), rows in sorted(by_seller.items()):
+        for row, number in zip(rows, allocate_invoice_numbers(db, seller_id, state_code, len(rows), fy)):
+            row["invoice_number"] = number
+
+    total_tax = [row.pop("_total_tax") for row in invoices]
+    # Core inserts on the tables: plain executemany, no ORM bulk bookkeeping.
+    # Ids are matched back through the (per seller unique) numbers; asking for
+    # RETURNING in parameter order makes SQLite insert one row per statement.
+    inserted = {
+        (seller_id, number): invoice_id
+        for seller_id, number, invoice_id in connection.execute(
+            insert(Invoice.__table__).returning(Invoice.seller_id, Invoice.invoice_number, Invoice.id), invoices
+        )
+    }
+    ids = [inserted[row["seller_id"], row["invoice_number"]] for row in invoices]
+    connection.execute(
+        insert(InvoiceItem.__table__),
+        [
+            {
+                "invoice_id": invoice_id,
+                "name": item.name,
+                "hsn_sac": item.hsn_sac,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "discount": item.discount,
+                "gst_rate": item.gst_rate,
+                "taxable_value": result.taxable_value,
+                "tax_amount": result.tax_amount,
+                "total_value": result.total_value,
+            }
+            for invoice_id, pairs in zip(ids, invoice_lines)
+            for item, result in pairs
+        ],
+    )
+    connection.execute(
+        insert(TaxSummary.__table__),
+        [
+            {
+                "invoice_id": invoice_id,
+                "total_taxable": row["total_taxable"],
+                "total_cgst": row["total_cgst"],
+                "total_sgst": row["total_sgst"],
+                "total_igst": row["total_igst"],
+                "total_tax": tax,
+            }
+            for invoice_id, row, tax in zip(ids, invoices, total_tax)
+        ],
+    )
+    db.execute(update(RecurringTemplate), advances)
+
+    if connection.dialect.name == "sqlite" and has_fts_table(connection, "invoices_fts"):
+        reindex_invoices(connection, ids)
+    payloads: dict[int, dict[int, dict]] = defaultdict(dict)
+    for invoice_id, row, pairs, user_id in zip(ids, invoices, invoice_lines, owners):
+        payloads[user_id][invoice_id] = {**{name: row[name] for name in SNAPSHOT_FIELDS}, "line_count": len(pairs)}
+    for user_id, user_payloads in payloads.items():
+        record_events(db, user_id, CREATED, user_payloads)
+    return len(ids)
+
+
+def generate_due(session_factory: Callable[[], Session], today: date | None = None, chunk_size: int | None = None) -> RunReport:
+    """Issue every due period of the active templates reachable through `session_factory`.
+
+    Templates are walked in id order, `chunk_size` per transaction. A chunk
+    that hits a conflict (another process issued the same period) is rolled
+    back and skipped; its templates are retried on the next run. Any other
+    error propagates after rolling back only the chunk in flight.
+    """
+    today = today or issue_date()
+    chunk_size = chunk_size or settings.recurring_chunk_size
+    report = RunReport()
+    start = time.perf_counter()
+    after_id = 0
+    while True:
+        with session_factory() as db:
+            templates = _due_templates(db, today, after_id, chunk_size)
+            if not templates:
+                break
+            after_id = templates[-1].id
+            try:
+                generated = _generate_chunk(db, templates, today)
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                report.failed_chunks += 1
+                inc("recurring_chunk_failures_total")
+                logger.warning("recurring chunk conflicted templates=%s..%s", templates[0].id, after_id)
+                continue
+        report.templates += len(templates)
+        report.invoices += generated
+        report.chunks += 1
+        inc("recurring_chunks_total")
+        inc("recurring_invoices_generated_total", generated)
+    report.duration_s = time.perf_counter() - start
+    inc("recurring_runs_total")
+    metrics_counter["recurring_last_run_ms"] = report.duration_s * 1000
+    metrics_counter["recurring_last_run_invoices_per_sec"] = report.invoices_per_sec
+    if report.invoices or report.failed_chunks:
+        logger.info(
+            "recurring run invoices=%s templates=%s chunks=%s failed=%s duration=%.2fms",
+            report.invoices,
+            report.templates,
+            report.chunks,
+            report.failed_chunks,
+            report.duration_s * 1000,
+        )
+    return report
+
+
+def session_factories() -> list[Callable[[], Session]]:
+    """One session factory per database holding templates: the directory or each shard."""
+    from app.db.session import SessionLocal
+    from app.db.sharding import ShardSession, shard_router
+
+    if shard_router is None:
+        return [SessionLocal]
+    return [lambda name=name: ShardSession(bind=shard_router.engine(name)) for name in shard_router.shard_names()]
+
+
+def run_all(today: date | None = None) -> RunReport:
+    """Run `generate_due` against every database and add up the reports."""
+    total = RunReport()
+    start = time.perf_counter()
+    for factory in session_factories():
+        report = generate_due(factory, today)
+        total.templates += report.templates
+        total.invoices += report.invoices
+        total.chunks += report.chunks
+        total.failed_chunks += report.failed_chunks
+    total.duration_s = time.perf_counter() - start
+    return total
+
+
+class RecurringScheduler:
+    """Runs `run_all` every `interval` seconds in a worker thread."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+
+    async def run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await anyio.to_thread.run_sync(run_all)
+            except Exception:  # noqa: BLE001 - the next tick retries
+                logger.exception("recurring run failed")
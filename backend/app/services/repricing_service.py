@@ -0,0 +1,206 @@
+"""Re-price open drafts after the GST rate of an HSN/SAC code changes.
+
+Drafts are numbered and dated when they are finalized, so every open draft
+is issued under the rate in force at that time: once a revision takes
+effect, all draft lines with the code at the old rate move to the new one.
+Finalized invoices are never touched.
+
+Affected drafts are found through the (hsn_sac, gst_rate, invoice_id) index
+on invoice lines and walked in id order, `repricing_batch_size` invoices per
+transaction. Each batch claims its lines with one conditional UPDATE (which
+takes the write lock, so a draft finalized in the meantime is skipped),
+recomputes them with the tax engine, and writes lines, invoice totals and
+tax summaries with one executemany each. Invoice totals are adjusted by the
+changed lines only, like line patches. Each re-priced invoice gets an
+`invoice.updated` event in its batch's transaction.
+"""
+
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Invoice, InvoiceItem, Seller, TaxSummary
+from app.services.event_service import SNAPSHOT_FIELDS, UPDATED, record_events
+from app.services.metrics_service import inc, metrics_counter
+from app.services.recurring_service import session_factories
+from app.services.tax_service import TaxLineResult, TaxTotals, adjust_totals, compute_line
+from app.utils.number_words import amount_to_words
+
+logger = logging.getLogger("gst_invoice")
+
+_items = InvoiceItem.__table__
+_summaries = TaxSummary.__table__
+
+
+class RateNotYetEffective(ValueError):
+    """Raised for a rate change whose effective date is still ahead."""
+
+
+@dataclass
+class RepriceReport:
+    lines: int = 0
+    invoices: int = 0
+    batches: int = 0
+    duration_s: float = 0.0
+
+    @property
+    def lines_per_sec(self) -> float:
+        return self.lines / self.duration_s if self.duration_s else 0.0
+
+
+def check_effective(effective_on: date, today: date | None = None) -> None:
+    if effective_on > (today or date.today()):
+        raise RateNotYetEffective(f"The rate change takes effect on {effective_on.isoformat()}; re-price drafts on or after that date")
+
+
+def _affected_drafts(db: Session, hsn_sac: str, old_rate: float, after_id: int, limit: int) -> list[int]:
+    return list(
+        db.execute(
+            select(InvoiceItem.invoice_id)
+            .join(Invoice, Invoice.id == InvoiceItem.invoice_id)
+            .where(InvoiceItem.hsn_sac == hsn_sac, InvoiceItem.gst_rate == old_rate, InvoiceItem.invoice_id > after_id, Invoice.status == "draft")
+            .group_by(InvoiceItem.invoice_id)
+            .order_by(InvoiceItem.invoice_id)
+            .limit(limit)
+        ).scalars()
+    )
+
+
+def _reprice_batch(db: Session, invoice_ids: list[int], hsn_sac: str, old_rate: float, new_rate: float) -> tuple[int, int]:
+    """Move the batch's matching draft lines to `new_rate`; the caller commits. Returns (lines, invoices)."""
+    connection = db.connection()
+    drafts = select(Invoice.id).where(Invoice.id.in_(invoice_ids), Invoice.status == "draft")
+    claimed = connection.execute(
+        update(_items)
+        .where(_items.c.invoice_id.in_(drafts), _items.c.hsn_sac == hsn_sac, _items.c.gst_rate == old_rate)
+        .values(gst_rate=new_rate)
+        .returning(_items.c.id, _items.c.invoice_id, _items.c.quantity, _items.c.unit_price, _items.c.discount, _items.c.taxable_value, _items.c.tax_amount, _items.c.total_value)
+    ).all()
+    if not claimed:
+        return 0, 0
+
+    removed: dict[int, list[TaxLineResult]] = defaultdict(list)
+    added: dict[int, list[TaxLineResult]] = defaultdict(list)
+    line_rows = []
+    for row in claimed:
+        line = compute_line(row.quantity, row.unit_price, row.discount, new_rate)
+        removed[row.invoice_id].append(TaxLineResult(row.taxable_value, row.tax_amount, row.total_value))
+        added[row.invoice_id].append(line)
+        line_rows.append({"b_id": row.id, "taxable_value": line.taxable_value, "tax_amount": line.tax_amount, "total_value": line.total_value})
+    connection.execute(
+        update(_items).where(_items.c.id == bindparam("b_id")).values(
+            taxable_value=bindparam("taxable_value"), tax_amount=bindparam("tax_amount"), total_value=bindparam("total_value")
+        ),
+        line_rows,
+    )
+
+    line_counts = select(InvoiceItem.invoice_id, func.count().label("line_count")).where(InvoiceItem.invoice_id.in_(added)).group_by(InvoiceItem.invoice_id).subquery()
+    invoices = connection.execute(
+        select(Invoice.id, *(Invoice.__table__.c[name] for name in SNAPSHOT_FIELDS), Seller.user_id, Seller.words_language, line_counts.c.line_count)
+        .join(Seller, Seller.id == Invoice.seller_id)
+        .join(line_counts, line_counts.c.invoice_id == Invoice.id)
+        .order_by(Invoice.id)
+    ).all()
+
+    invoice_rows, summary_rows = [], []
+    payloads: dict[int, dict[int, dict]] = defaultdict(dict)
+    for invoice in invoices:
+        current = TaxTotals(
+            total_taxable=invoice.total_taxable,
+            total_cgst=invoice.total_cgst,
+            total_sgst=invoice.total_sgst,
+            total_igst=invoice.total_igst,
+            total_tax=invoice.total_cgst + invoice.total_sgst + invoice.total_igst,
+            grand_total=invoice.grand_total,
+        )
+        totals = adjust_totals(current, removed[invoice.id], added[invoice.id], intra_state=invoice.supply_type == "intra")
+        amounts = {
+            "total_taxable": totals.total_taxable,
+            "total_cgst": totals.total_cgst,
+            "total_sgst": totals.total_sgst,
+            "total_igst": totals.total_igst,
+        }
+        invoice_rows.append({"id": invoice.id, **amounts, "grand_total": totals.grand_total, "grand_total_words": amount_to_words(totals.grand_total, invoice.words_language)})
+        summary_rows.append({"b_invoice_id": invoice.id, **amounts, "total_tax": totals.total_tax})
+        snapshot = {name: getattr(invoice, name) for name in SNAPSHOT_FIELDS}
+        payloads[invoice.user_id][invoice.id] = {**snapshot, **amounts, "grand_total": totals.grand_total, "line_count": invoice.line_count}
+    db.execute(update(Invoice), invoice_rows)
+    connection.execute(
+        update(_summaries).where(_summaries.c.invoice_id == bindparam("b_invoice_id")).values(
+            **{name: bindparam(name) for name in ("total_taxable", "total_cgst", "total_sgst", "total_igst", "total_tax")}
+        ),
+        summary_rows,
+    )
+    for user_id, user_payloads in payloads.items():
+        record_events(db, user_id, UPDATED, user_payloads)
+    return len(claimed), len(invoices)
+
+
+def reprice_drafts(
+    session_factory: Callable[[], Session],
+    hsn_sac: str,
+    old_rate: float,
+    new_rate: float,
+    effective_on: date,
+    batch_size: int | None = None,
+    today: date | None = None,
+) -> RepriceReport:
+    """Move the draft lines of `hsn_sac` at `old_rate` to `new_rate` in the database behind `session_factory`.
+
+    Committed batches stay committed if a later one fails; running the same
+    change again picks up whatever is still at the old rate.
+    """
+    check_effective(effective_on, today)
+    batch_size = batch_size or settings.repricing_batch_size
+    report = RepriceReport()
+    start = time.perf_counter()
+    after_id = 0
+    while True:
+        with session_factory() as db:
+            invoice_ids = _affected_drafts(db, hsn_sac, old_rate, after_id, batch_size)
+            if not invoice_ids:
+                break
+            after_id = invoice_ids[-1]
+            lines, invoices = _reprice_batch(db, invoice_ids, hsn_sac, old_rate, new_rate)
+            db.commit()
+        report.lines += lines
+        report.invoices += invoices
+        report.batches += 1
+        inc("repricing_lines_total", lines)
+    report.duration_s = time.perf_counter() - start
+    metrics_counter["repricing_last_run_ms"] = report.duration_s * 1000
+    logger.info(
+        "repriced drafts hsn=%s rate=%s->%s effective=%s lines=%s invoices=%s batches=%s duration=%.2fms",
+        hsn_sac,
+        old_rate,
+        new_rate,
+        effective_on.isoformat(),
+        report.lines,
+        report.invoices,
+        report.batches,
+        report.duration_s * 1000,
+    )
+    return report
+
+
+def reprice_all(
+    hsn_sac: str, old_rate: float, new_rate: float, effective_on: date, factories: list[Callable[[], Session]] | None = None
+) -> RepriceReport:
+    """Run `reprice_drafts` against every database (default: `session_factories()`) and add up the reports."""
+    check_effective(effective_on)
+    total = RepriceReport()
+    start = time.perf_counter()
+    for factory in factories or session_factories():
+        report = reprice_drafts(factory, hsn_sac, old_rate, new_rate, effective_on)
+        total.lines += report.lines
+        total.invoices += report.invoices
+        total.batches += report.batches
+    total.duration_s = time.perf_counter() - start
+    return total
@@ -1,32 +1,72 @@
-"""Invoice number sequence service."""
+"""Invoice number sequence service.
 
-from datetime import datetime
+Every seller has its own sequence per financial year, so a seller's issued
+series has no gaps whatever other sellers and tenants issue, and stays
+unique when tenants live in separate shards. Invoices are dated in IST,
+and the financial year comes from that issue date.
+"""
+
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
 
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def issue_date(now: datetime | None = None) -> date:
+    """Return the IST calendar date of `now` (an aware datetime, default: the current time)."""
+    return (now or datetime.now(timezone.utc)).astimezone(IST).date()
+
 
-def get_financial_year(now: datetime | None = None) -> str:
-    """Return financial year as YYYY-YY."""
-    today = now or datetime.utcnow()
+def get_financial_year(now: date | None = None) -> str:
+    """Return the financial year of a date (default: today's issue date) as YYYY-YY."""
+    today = now or issue_date()
     start_year = today.year if today.month >= 4 else today.year - 1
     end_short = str((start_year + 1) % 100).zfill(2)
     return f"{start_year}-{end_short}"
 
 
-def next_invoice_number(db: Any, state_code: str) -> str:
-    """Atomically increment sequence and return invoice number FY/STATE/SEQ."""
+def format_invoice_number(fy: str, state_code: str, value: int) -> str:
+    """Return invoice number FY/STATE/SEQ."""
+    return f"{fy}/{state_code}/{value:06d}"
+
+
+def allocate_invoice_numbers(db: Any, seller_id: int, state_code: str, count: int, fy: str | None = None) -> list[str]:
+    """Reserve `count` consecutive numbers of the seller with a single sequence increment.
+
+    The increment is one `UPDATE ... RETURNING`, so concurrent allocations
+    serialize on the sequence row and never hand out the same or skipped values.
+    `state_code` (the seller's) only goes into the formatted number.
+    """
     from app.models.models import InvoiceSequence
 
-    fy = get_financial_year()
-    seq = (
-        db.query(InvoiceSequence)
-        .filter(InvoiceSequence.financial_year == fy, InvoiceSequence.state_code == state_code)
-        .with_for_update()
-        .first()
+    fy = fy or get_financial_year()
+    increment = (
+        update(InvoiceSequence)
+        .where(InvoiceSequence.financial_year == fy, InvoiceSequence.seller_id == seller_id)
+        .values(current_value=InvoiceSequence.current_value + count)
+        .returning(InvoiceSequence.current_value)
+        .execution_options(synchronize_session=False)
     )
-    if not seq:
-        seq = InvoiceSequence(financial_year=fy, state_code=state_code, current_value=0)
-        db.add(seq)
-        db.flush()
-    seq.current_value += 1
-    db.flush()
-    return f"{fy}/{state_code}/{seq.current_value:06d}"
+    end = db.execute(increment).scalar()
+    if end is None:
+        values = {"financial_year": fy, "seller_id": seller_id, "current_value": 0}
+        dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(db.get_bind().dialect.name)
+        if dialect is None:
+            db.add(InvoiceSequence(**values))
+            db.flush()
+        else:
+            # First invoice of the year for this seller; another writer may create it first.
+            db.execute(
+                dialect.insert(InvoiceSequence).values(**values).on_conflict_do_nothing(index_elements=["financial_year", "seller_id"])
+            )
+        end = db.execute(increment).scalar_one()
+    return [format_invoice_number(fy, state_code, value) for value in range(end - count + 1, end + 1)]
+
+
+def next_invoice_number(db: Any, seller_id: int, state_code: str) -> str:
+    """Atomically increment the seller's sequence and return invoice number FY/STATE/SEQ."""
+    return allocate_invoice_numbers(db, seller_id, state_code, 1)[0]
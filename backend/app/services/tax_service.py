@@ -3,6 +3,8 @@
 from dataclasses import dataclass
 from decimal import Decimal, ROUND_HALF_UP
 
+from app.services.profiling_service import profiled
+
 
 @dataclass
 class TaxLineResult:
@@ -44,6 +46,7 @@ def split_tax(total_tax: float, intra_state: bool) -> tuple[float, float, float]
     return 0.0, 0.0, float(q(total_tax))
 
 
+@profiled("compute_totals")
 def compute_totals(lines: list[TaxLineResult], intra_state: bool) -> TaxTotals:
     """Compute invoice totals from lines."""
     taxable = q(sum(line.taxable_value for line in lines))
@@ -58,3 +61,25 @@ def compute_totals(lines: list[TaxLineResult], intra_state: bool) -> TaxTotals:
         total_tax=float(tax),
         grand_total=float(grand),
     )
+
+
+def adjust_totals(
+    totals: TaxTotals, removed: list[TaxLineResult], added: list[TaxLineResult], intra_state: bool
+) -> TaxTotals:
+    """Apply line changes to existing totals without revisiting unchanged lines.
+
+    Line values are already rounded to paise, so swapping their contribution in
+    and out gives exactly what `compute_totals` would over the full line list.
+    """
+    taxable = q(totals.total_taxable) - sum(q(line.taxable_value) for line in removed) + sum(q(line.taxable_value) for line in added)
+    tax = q(totals.total_tax) - sum(q(line.tax_amount) for line in removed) + sum(q(line.tax_amount) for line in added)
+    cgst, sgst, igst = split_tax(float(tax), intra_state)
+    grand = q(float(taxable) + float(tax))
+    return TaxTotals(
+        total_taxable=float(taxable),
+        total_cgst=float(q(cgst)),
+        total_sgst=float(q(sgst)),
+        total_igst=float(q(igst)),
+        total_tax=float(tax),
+        grand_total=float(grand),
+    )
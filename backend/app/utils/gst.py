@@ -1,13 +1,98 @@
 """GST related validation helpers."""
 
 import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator
 
 GSTIN_REGEX = re.compile(r"^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[A-Z0-9]{1}Z[A-Z0-9]{1}$")
+GSTIN_CHARSET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+STATE_CODES = {
+    "01": "Jammu and Kashmir",
+    "02": "Himachal Pradesh",
+    "03": "Punjab",
+    "04": "Chandigarh",
+    "05": "Uttarakhand",
+    "06": "Haryana",
+    "07": "Delhi",
+    "08": "Rajasthan",
+    "09": "Uttar Pradesh",
+    "10": "Bihar",
+    "11": "Sikkim",
+    "12": "Arunachal Pradesh",
+    "13": "Nagaland",
+    "14": "Manipur",
+    "15": "Mizoram",
+    "16": "Tripura",
+    "17": "Meghalaya",
+    "18": "Assam",
+    "19": "West Bengal",
+    "20": "Jharkhand",
+    "21": "Odisha",
+    "22": "Chhattisgarh",
+    "23": "Madhya Pradesh",
+    "24": "Gujarat",
+    "25": "Daman and Diu",
+    "26": "Dadra and Nagar Haveli and Daman and Diu",
+    "27": "Maharashtra",
+    "28": "Andhra Pradesh (Old)",
+    "29": "Karnataka",
+    "30": "Goa",
+    "31": "Lakshadweep",
+    "32": "Kerala",
+    "33": "Tamil Nadu",
+    "34": "Puducherry",
+    "35": "Andaman and Nicobar Islands",
+    "36": "Telangana",
+    "37": "Andhra Pradesh",
+    "38": "Ladakh",
+    "97": "Other Territory",
+    "99": "Centre Jurisdiction",
+}
+
+# Per-character contributions to the mod-36 checksum: characters in odd
+# positions (1-based) are weighted 1, even positions 2, and each product is
+# folded as quotient + remainder of 36.
+_ODD_WEIGHT = {char: value for value, char in enumerate(GSTIN_CHARSET)}
+_EVEN_WEIGHT = {char: (value * 2) // 36 + (value * 2) % 36 for value, char in enumerate(GSTIN_CHARSET)}
+
+
+@dataclass(frozen=True)
+class GstinCheck:
+    gstin: str
+    valid: bool
+    reason: str | None = None
+
+
+def gstin_check_digit(gstin: str) -> str:
+    """Compute the 15th (check) character for the first 14 GSTIN characters."""
+    total = 0
+    for position in range(0, 14, 2):
+        total += _ODD_WEIGHT[gstin[position]] + _EVEN_WEIGHT[gstin[position + 1]]
+    return GSTIN_CHARSET[-total % 36]
+
+
+@lru_cache(maxsize=65536)
+def check_gstin(gstin: str) -> GstinCheck:
+    """Validate format, state code and check digit, reporting the first failure."""
+    if not GSTIN_REGEX.match(gstin):
+        return GstinCheck(gstin, False, "Invalid GSTIN format")
+    if gstin[:2] not in STATE_CODES:
+        return GstinCheck(gstin, False, "Unknown GSTIN state code")
+    if gstin_check_digit(gstin) != gstin[14]:
+        return GstinCheck(gstin, False, "Invalid GSTIN checksum")
+    return GstinCheck(gstin, True)
 
 
 def is_valid_gstin(gstin: str) -> bool:
-    """Return True if GSTIN follows standard format."""
-    return bool(GSTIN_REGEX.match(gstin))
+    """Return True if GSTIN has a valid format, state code and check digit."""
+    return check_gstin(gstin).valid
+
+
+def validate_gstins(gstins: Iterable[str]) -> Iterator[GstinCheck]:
+    """Lazily validate many GSTINs; repeated values are served from the memo cache."""
+    return map(check_gstin, gstins)
 
 
 def state_code_from_gstin(gstin: str) -> str:
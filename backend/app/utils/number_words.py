@@ -1,6 +1,15 @@
-"""Convert number into words for invoice totals."""
+"""Convert number into words for invoice totals.
 
-from decimal import Decimal
+Each language is compiled once into a 0-999 word table; larger numbers are
+split into crore/lakh/thousand chunks with `divmod`, so a conversion is a
+handful of table lookups and a join.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+DEFAULT_LANGUAGE = "en"
+CRORE = 10_000_000
 
 ONES = [
     "Zero",
@@ -26,31 +35,153 @@ ONES = [
 ]
 TENS = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
 
+HINDI_BELOW_HUNDRED = (
+    "शून्य एक दो तीन चार पाँच छह सात आठ नौ "
+    "दस ग्यारह बारह तेरह चौदह पंद्रह सोलह सत्रह अठारह उन्नीस "
+    "बीस इक्कीस बाईस तेईस चौबीस पच्चीस छब्बीस सत्ताईस अट्ठाईस उनतीस "
+    "तीस इकतीस बत्तीस तैंतीस चौंतीस पैंतीस छत्तीस सैंतीस अड़तीस उनतालीस "
+    "चालीस इकतालीस बयालीस तैंतालीस चवालीस पैंतालीस छियालीस सैंतालीस अड़तालीस उनचास "
+    "पचास इक्यावन बावन तिरपन चौवन पचपन छप्पन सत्तावन अट्ठावन उनसठ "
+    "साठ इकसठ बासठ तिरसठ चौंसठ पैंसठ छियासठ सड़सठ अड़सठ उनहत्तर "
+    "सत्तर इकहत्तर बहत्तर तिहत्तर चौहत्तर पचहत्तर छिहत्तर सतहत्तर अठहत्तर उन्यासी "
+    "अस्सी इक्यासी बयासी तिरासी चौरासी पचासी छियासी सत्तासी अट्ठासी नवासी "
+    "नब्बे इक्यानबे बानबे तिरानबे चौरानबे पंचानबे छियानबे सत्तानबे अट्ठानबे निन्यानबे"
+).split()
+
+
+@dataclass(frozen=True)
+class WordsLanguage:
+    """Vocabulary needed to spell an amount in one language.
+
+    `below_hundred` holds the 100 words for 0-99. Languages whose hundreds are
+    not simply "<digit> <hundred>" can pass the nine forms for 100-900 in
+    `hundreds`.
+    """
+
+    code: str
+    below_hundred: tuple[str, ...]
+    hundred: str
+    thousand: str
+    lakh: str
+    crore: str
+    currency: str
+    subunit: str
+    conjunction: str
+    suffix: str
+    hundreds: tuple[str, ...] | None = None
+
+
+ENGLISH = WordsLanguage(
+    code="en",
+    below_hundred=tuple(ONES + [f"{TENS[n // 10]} {ONES[n % 10]}" if n % 10 else TENS[n // 10] for n in range(20, 100)]),
+    hundred="Hundred",
+    thousand="Thousand",
+    lakh="Lakh",
+    crore="Crore",
+    currency="Rupees",
+    subunit="Paise",
+    conjunction="and",
+    suffix="Only",
+)
+
+HINDI = WordsLanguage(
+    code="hi",
+    below_hundred=tuple(HINDI_BELOW_HUNDRED),
+    hundred="सौ",
+    thousand="हज़ार",
+    lakh="लाख",
+    crore="करोड़",
+    currency="रुपये",
+    subunit="पैसे",
+    conjunction="और",
+    suffix="मात्र",
+)
+
+_LANGUAGES: dict[str, WordsLanguage] = {}
+_TABLES: dict[str, tuple[str, ...]] = {}
+
+
+def _build_table(language: WordsLanguage) -> tuple[str, ...]:
+    words = language.below_hundred
+    table = list(words)
+    for digit in range(1, 10):
+        head = language.hundreds[digit - 1] if language.hundreds else f"{words[digit]} {language.hundred}"
+        table.append(head)
+        table.extend(f"{head} {words[rest]}" for rest in range(1, 100))
+    return tuple(table)
 
-def two_digits(n: int) -> str:
-    if n < 20:
-        return ONES[n]
-    return f"{TENS[n // 10]} {ONES[n % 10]}".strip()
 
+def register_language(language: WordsLanguage) -> None:
+    """Register (or replace) a language and precompute its 0-999 table."""
+    if len(language.below_hundred) != 100:
+        raise ValueError(f"{language.code}: below_hundred must contain 100 words")
+    if language.hundreds is not None and len(language.hundreds) != 9:
+        raise ValueError(f"{language.code}: hundreds must contain 9 words")
+    _TABLES[language.code] = _build_table(language)
+    _LANGUAGES[language.code] = language
+    amount_to_words.cache_clear()
 
-def integer_to_words(n: int) -> str:
-    if n < 100:
-        return two_digits(n)
+
+def available_languages() -> list[str]:
+    """Return registered language codes."""
+    return sorted(_LANGUAGES)
+
+
+def _language(code: str) -> WordsLanguage:
+    try:
+        return _LANGUAGES[code]
+    except KeyError:
+        raise ValueError(f"Unsupported words language: {code}") from None
+
+
+def _below_crore(n: int, language: WordsLanguage, table: tuple[str, ...]) -> list[str]:
+    lakhs, n = divmod(n, 100_000)
+    thousands, n = divmod(n, 1000)
+    words = []
+    if lakhs:
+        words += (table[lakhs], language.lakh)
+    if thousands:
+        words += (table[thousands], language.thousand)
+    if n:
+        words.append(table[n])
+    return words
+
+
+def _spell(n: int, language: WordsLanguage, table: tuple[str, ...]) -> str:
     if n < 1000:
-        return f"{ONES[n // 100]} Hundred {integer_to_words(n % 100)}".strip()
-    if n < 100000:
-        return f"{integer_to_words(n // 1000)} Thousand {integer_to_words(n % 1000)}".strip()
-    if n < 10000000:
-        return f"{integer_to_words(n // 100000)} Lakh {integer_to_words(n % 100000)}".strip()
-    return f"{integer_to_words(n // 10000000)} Crore {integer_to_words(n % 10000000)}".strip()
+        return table[n]
+    if n < CRORE:
+        return " ".join(_below_crore(n, language, table))
+    levels = []
+    while n:
+        n, level = divmod(n, CRORE)
+        levels.append(level)
+    words: list[str] = []
+    for position in range(len(levels) - 1, -1, -1):
+        words += _below_crore(levels[position], language, table)
+        if position:
+            words.append(language.crore)
+    return " ".join(words)
+
+
+def integer_to_words(n: int, language: str = DEFAULT_LANGUAGE) -> str:
+    """Spell a non-negative integer using the Indian numbering system."""
+    return _spell(n, _language(language), _TABLES[language])
 
 
-def amount_to_words(amount: float) -> str:
+@lru_cache(maxsize=4096)
+def amount_to_words(amount: float, language: str = DEFAULT_LANGUAGE) -> str:
     """Convert amount to Indian currency words."""
-    value = Decimal(str(round(amount, 2)))
-    rupees = int(value)
-    paise = int((value - rupees) * 100)
-    text = f"{integer_to_words(rupees)} Rupees"
+    lang = _language(language)
+    table = _TABLES[language]
+    rupees, paise = divmod(round(round(amount, 2) * 100), 100)
     if paise:
-        text += f" and {integer_to_words(paise)} Paise"
-    return text + " Only"
+        return (
+            f"{_spell(rupees, lang, table)} {lang.currency} {lang.conjunction} "
+            f"{table[paise]} {lang.subunit} {lang.suffix}"
+        )
+    return f"{_spell(rupees, lang, table)} {lang.currency} {lang.suffix}"
+
+
+register_language(ENGLISH)
+register_language(HINDI)
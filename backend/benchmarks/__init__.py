@@ -0,0 +1,7 @@
+"""Performance benchmarks (run from the backend directory)."""
+
+import os
+
+# Benchmarks build their own databases; keep importing the app from creating
+# a stray database file in the working directory.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,115 @@
+"""Run the benchmark suite or compare two result files.
+
+Usage:
+    python -m benchmarks run [--suite NAME ...] [--quick] [--output FILE] [--baseline FILE] [--threshold R]
+    python -m benchmarks compare BASELINE CURRENT [--threshold R]
+
+`compare` (and `run --baseline`) exits with status 1 when any metric got
+worse than the baseline by more than the threshold (default 10%).
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable
+
+from benchmarks import (
+    bench_api,
+    bench_buyer_import,
+    bench_buyer_search,
+    bench_catalog,
+    bench_finalize,
+    bench_gstin,
+    bench_ingest,
+    bench_invoice_search,
+    bench_micro,
+    bench_number_words,
+    bench_reconciliation,
+    bench_recurring,
+    bench_repricing,
+    bench_startup,
+)
+from benchmarks.harness import DEFAULT_THRESHOLD, compare, direction, load_results, write_results
+
+# name -> (run function, full-size arguments, --quick arguments)
+SUITES: dict[str, tuple[Callable[..., dict[str, float]], dict, dict]] = {
+    "micro": (bench_micro.run, {"count": 100_000, "repeat": 20}, {"count": 20_000, "repeat": 5}),
+    "api": (bench_api.run, {"sizes": (100, 1000, 5000), "lines": 10, "repeat": 5}, {"sizes": (100, 1000), "lines": 10, "repeat": 3}),
+    "number_words": (bench_number_words.run, {"count": 200_000}, {"count": 20_000}),
+    "gstin": (bench_gstin.run, {"count": 1_000_000, "unique": 50_000}, {"count": 50_000, "unique": 5000}),
+    "buyer_import": (bench_buyer_import.run, {"rows": 50_000, "batch_size": 1000}, {"rows": 5000, "batch_size": 1000}),
+    "buyer_search": (bench_buyer_search.run, {"buyers": 500_000, "repeat": 20}, {"buyers": 20_000, "repeat": 5}),
+    "invoice_search": (bench_invoice_search.run, {"invoices": 100_000, "lines": 20, "repeat": 10}, {"invoices": 5000, "lines": 10, "repeat": 5}),
+    "finalize": (bench_finalize.run, {"invoices": 20_000, "batch_size": 5000}, {"invoices": 2000, "batch_size": 500}),
+    "reconciliation": (bench_reconciliation.run, {"records": 1_000_000}, {"records": 50_000}),
+    "recurring": (bench_recurring.run, {"templates": 20_000, "lines": 5, "chunk_size": 500}, {"templates": 2000, "lines": 5, "chunk_size": 500}),
+    "repricing": (bench_repricing.run, {"invoices": 100_000, "lines": 10, "batch_size": 500}, {"invoices": 5000, "lines": 10, "batch_size": 500}),
+    "ingest": (bench_ingest.run, {"invoices": 200_000, "lines": 5}, {"invoices": 10_000, "lines": 5}),
+    "catalog": (bench_catalog.run, {"lines": 500, "repeat": 10}, {"lines": 500, "repeat": 3}),
+    "startup": (bench_startup.run, {"repeat": 10}, {"repeat": 3}),
+}
+
+
+def print_comparison(baseline: dict[str, float], current: dict[str, float], threshold: float) -> int:
+    regressions = {regression.metric: regression for regression in compare(baseline, current, threshold)}
+    for metric in sorted(baseline.keys() & current.keys()):
+        if not direction(metric):
+            continue
+        before, after = baseline[metric], current[metric]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = "REGRESSED" if metric in regressions else ""
+        print(f"{metric:48s} {before:>14,.2f} {after:>14,.2f} {change:>+8.1f}% {flag}")
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {threshold:.0%}")
+        return 1
+    return 0
+
+
+def run_suites(args: argparse.Namespace) -> int:
+    names = args.suite or list(SUITES)
+    unknown = set(names) - set(SUITES)
+    if unknown:
+        print(f"Unknown suite(s): {', '.join(sorted(unknown))}. Available: {', '.join(SUITES)}", file=sys.stderr)
+        return 2
+    results, options = {}, {}
+    for name in names:
+        run, full, quick = SUITES[name]
+        kwargs = quick if args.quick else full
+        options[name] = kwargs
+        start = time.perf_counter()
+        results[name] = run(**kwargs)
+        print(f"[{name}] {time.perf_counter() - start:.1f}s")
+        for metric, value in results[name].items():
+            print(f"  {metric:40s} {value:>16,.2f}")
+    write_results(args.output, results, options)
+    print(f"wrote {args.output}")
+    if args.baseline:
+        print()
+        return print_comparison(load_results(args.baseline), load_results(args.output), args.threshold)
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="GST invoice generator benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run suites and write a JSON results file")
+    run_parser.add_argument("--suite", action="append", help=f"suite to run (repeatable): {', '.join(SUITES)}")
+    run_parser.add_argument("--quick", action="store_true", help="smaller data sizes for a fast smoke run")
+    run_parser.add_argument("--output", default="benchmark-results.json")
+    run_parser.add_argument("--baseline", help="results file to compare against after the run")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        sys.exit(run_suites(args))
+    sys.exit(print_comparison(load_results(args.baseline), load_results(args.current), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
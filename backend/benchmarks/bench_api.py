@@ -0,0 +1,112 @@
+"""Macrobenchmarks of the invoice endpoints through the ASGI app.
+
+Each data size gets a freshly seeded database; requests go through the full
+FastAPI stack (routing, auth, validation, serialization) in-process.
+
+Usage: python -m benchmarks.bench_api [--sizes N,N,...] [--lines N] [--repeat N]
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import Base, get_directory_db
+from app.main import app
+from benchmarks.harness import timed
+from benchmarks.seed import PRODUCTS, SeedSpec, seed_database
+
+DEFAULT_SIZES = (100, 1000, 5000)
+
+
+def invoice_payload(seller_id: int, buyer_id: int, lines: int, rng: random.Random) -> dict:
+    items = []
+    for _ in range(lines):
+        name, hsn, price, gst_rate = rng.choice(PRODUCTS)
+        items.append({"name": name, "hsn_sac": hsn, "quantity": rng.randint(1, 20), "unit_price": price, "gst_rate": gst_rate})
+    return {"seller_id": seller_id, "buyer_id": buyer_id, "invoice_type": "B2B", "items": items}
+
+
+def timed_fast(fn, repeat: int) -> float:
+    """Time `fn` with the orjson/row-projection invoice list path enabled."""
+    settings.fast_invoice_serialization = True
+    try:
+        return timed(fn, repeat)
+    finally:
+        settings.fast_invoice_serialization = False
+
+
+def run_size(invoices: int, lines: int, repeat: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with SessionLocal() as db:
+            seeded = seed_database(db, SeedSpec(invoices=invoices, lines=lines))
+
+        def override_get_directory_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_directory_db] = override_get_directory_db
+        try:
+            client = TestClient(app)
+            headers = {"Authorization": f"Bearer {create_access_token(seeded.emails[0])}"}
+            rng = random.Random(invoices)
+            seller_id, buyer_id = seeded.seller_ids[1][0], seeded.buyer_ids[1][0]
+            target = invoices // 2
+
+            def request(method: str, url: str, **kwargs) -> None:
+                response = client.request(method, url, headers=headers, **kwargs)
+                response.raise_for_status()
+
+            results = {
+                "create_invoice_ms": timed(
+                    lambda: request("POST", "/api/v1/invoices", json=invoice_payload(seller_id, buyer_id, lines, rng)), repeat
+                ),
+                "list_invoices_ms": timed(lambda: request("GET", "/api/v1/invoices"), repeat),
+                "list_invoices_fast_ms": timed_fast(lambda: request("GET", "/api/v1/invoices"), repeat),
+                "export_json_ms": timed(lambda: request("GET", f"/api/v1/invoices/{target}/json"), repeat),
+                "export_pdf_ms": timed(lambda: request("GET", f"/api/v1/invoices/{target}/pdf"), repeat),
+                "print_html_ms": timed(lambda: request("GET", f"/api/v1/invoices/{target}/print"), repeat),
+            }
+        finally:
+            app.dependency_overrides.pop(get_directory_db, None)
+            engine.dispose()
+    return results
+
+
+def run(sizes: tuple[int, ...], lines: int, repeat: int) -> dict[str, float]:
+    # Per-request access logs would dominate the output.
+    for logger in ("gst_invoice", "httpx"):
+        logging.getLogger(logger).setLevel(logging.WARNING)
+    results = {}
+    for size in sizes:
+        for name, value in run_size(size, lines, repeat).items():
+            results[f"n{size}_{name}"] = value
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--lines", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sizes = tuple(int(size) for size in args.sizes.split(","))
+    for name, value in run(sizes, args.lines, args.repeat).items():
+        print(f"{name:32s} {value:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark streaming buyer import throughput (rows per second).
+
+Usage: python -m benchmarks.bench_buyer_import [--rows N] [--batch-size N]
+"""
+
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.services.buyer_import_service import import_buyers, read_buyer_rows
+from benchmarks.seed import make_gstins
+
+
+def make_csv(rows: int, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    gstins = make_gstins(int(rows * 0.9), seed=seed)
+    lines = ["name,gstin,address,state_code"]
+    for index in range(rows):
+        gstin = rng.choice(gstins) if rng.random() < 0.8 else ""
+        state_code = gstin[:2] if gstin else "29"
+        lines.append(f"Customer {index},{gstin},\"{index} MG Road, Bengaluru\",{state_code}")
+    return "\n".join(lines) + "\n"
+
+
+def run(rows: int, batch_size: int) -> dict[str, float]:
+    text = make_csv(rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        start = time.perf_counter()
+        result = import_buyers(db, read_buyer_rows(io.StringIO(text)), user_id=1, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        db.close()
+        engine.dispose()
+    return {
+        "rows": result.total_rows,
+        "inserted": result.inserted,
+        "rejected": len(result.errors),
+        "seconds": elapsed,
+        "rows_per_sec": result.total_rows / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    for name, value in run(args.rows, args.batch_size).items():
+        print(f"{name:14s} {value:>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark buyer search page latency on a large buyer master.
+
+Usage: python -m benchmarks.bench_buyer_search [--buyers N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.models import Buyer
+from app.services.buyer_search_service import search_buyers
+from benchmarks.harness import timed
+from benchmarks.seed import CITIES, SUFFIXES, brand, make_gstins
+
+
+def seed(db, buyers: int, tenants: int) -> None:
+    rng = random.Random(17)
+    gstins = make_gstins(buyers, seed=17)
+    batch = []
+    for index in range(buyers):
+        batch.append(
+            {
+                # Half of all buyers belong to one large distributor tenant.
+                "user_id": 1 if index % 2 == 0 else rng.randint(2, tenants),
+                "name": f"{brand(rng)} {rng.choice(SUFFIXES)}",
+                "gstin": gstins[index] if rng.random() < 0.7 else None,
+                "address": f"{rng.randint(1, 999)} Main Road, {rng.choice(CITIES)}",
+                "state_code": gstins[index][:2],
+            }
+        )
+        if len(batch) == 10_000:
+            db.execute(insert(Buyer), batch)
+            batch = []
+    if batch:
+        db.execute(insert(Buyer), batch)
+    db.commit()
+
+
+def run(buyers: int, repeat: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, buyers, tenants=max(2, buyers // 1000))
+        deep_cursor = None
+        for _ in range(50):
+            deep_cursor = search_buyers(db, 1, cursor=deep_cursor).next_cursor
+        gstin = db.query(Buyer.gstin).filter(Buyer.user_id == 1, Buyer.gstin.isnot(None)).first()[0]
+        big_name = db.query(Buyer.name).filter(Buyer.user_id == 1).first()[0]
+        cases = {
+            "browse_first_page_ms": lambda: search_buyers(db, 1),
+            "browse_page_50_ms": lambda: search_buyers(db, 1, cursor=deep_cursor),
+            "short_prefix_ms": lambda: search_buyers(db, 1, q="sh"),
+            "brand_term_ms": lambda: search_buyers(db, 1, q=big_name.split()[0]),
+            "gstin_fragment_ms": lambda: search_buyers(db, 1, q=gstin[2:10]),
+            "small_tenant_term_ms": lambda: search_buyers(db, 3, q="traders"),
+            # Harder cases on the largest tenant: a syllable found in ~0.5% of
+            # names, and a suffix shared by ~10% of all buyers.
+            "mid_frequency_term_ms": lambda: search_buyers(db, 1, q="kara"),
+            "common_word_ms": lambda: search_buyers(db, 1, q="traders"),
+        }
+        results = {name: timed(case, repeat) for name, case in cases.items()}
+        db.close()
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--buyers", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for name, value in run(args.buyers, args.repeat).items():
+        print(f"{name:24s} {value:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
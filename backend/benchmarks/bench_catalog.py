@@ -0,0 +1,96 @@
+"""Create latency of large invoices written with and without the product catalog.
+
+Full lines repeat name, HSN/SAC, price and rate; catalog lines send only a
+`product_id` and a quantity, and are filled from the catalog cache in one
+lookup per invoice. `cold` clears the cache before every request, so the
+products are read with one `IN` query each time.
+
+Usage: python -m benchmarks.bench_catalog [--lines N] [--repeat N]
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.db.session import Base, get_directory_db
+from app.main import app
+from app.models.models import Product
+from app.services.catalog_service import catalog
+from benchmarks.harness import timed
+from benchmarks.seed import PRODUCTS, SeedSpec, seed_database
+
+
+def run(lines: int, repeat: int) -> dict[str, float]:
+    for logger in ("gst_invoice", "httpx"):
+        logging.getLogger(logger).setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with SessionLocal() as db:
+            seeded = seed_database(db, SeedSpec(invoices=100, lines=5))
+            products = [Product(user_id=1, name=name, hsn_sac=hsn, unit_price=price, gst_rate=rate) for name, hsn, price, rate in PRODUCTS]
+            db.add_all(products)
+            db.commit()
+            product_ids = [product.id for product in products]
+
+        def override_get_directory_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_directory_db] = override_get_directory_db
+        try:
+            client = TestClient(app)
+            headers = {"Authorization": f"Bearer {create_access_token(seeded.emails[0])}"}
+            rng = random.Random(lines)
+            seller_id, buyer_id = seeded.seller_ids[1][0], seeded.buyer_ids[1][0]
+
+            def full_items() -> list[dict]:
+                items = []
+                for _ in range(lines):
+                    name, hsn, price, rate = rng.choice(PRODUCTS)
+                    items.append({"name": name, "hsn_sac": hsn, "quantity": rng.randint(1, 20), "unit_price": price, "gst_rate": rate})
+                return items
+
+            def catalog_items() -> list[dict]:
+                return [{"product_id": rng.choice(product_ids), "quantity": rng.randint(1, 20)} for _ in range(lines)]
+
+            def create(items: list[dict], cold: bool = False) -> None:
+                if cold:
+                    catalog.clear()
+                payload = {"seller_id": seller_id, "buyer_id": buyer_id, "invoice_type": "B2B", "items": items}
+                client.post("/api/v1/invoices", json=payload, headers=headers).raise_for_status()
+
+            results = {
+                f"create_invoice_{lines}_full_lines_ms": timed(lambda: create(full_items()), repeat),
+                f"create_invoice_{lines}_catalog_lines_ms": timed(lambda: create(catalog_items()), repeat),
+                f"create_invoice_{lines}_catalog_lines_cold_ms": timed(lambda: create(catalog_items(), cold=True), repeat),
+            }
+        finally:
+            app.dependency_overrides.pop(get_directory_db, None)
+            catalog.clear()
+            engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    for name, value in run(args.lines, args.repeat).items():
+        print(f"{name:44s} {value:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
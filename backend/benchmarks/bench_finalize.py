@@ -0,0 +1,81 @@
+"""Benchmark batch finalization against one finalize call per invoice.
+
+Both paths go through the ASGI app on the same seeded drafts: the first half
+is finalized with `POST /invoices/{id}/finalize` per invoice, the second half
+with `POST /invoices/finalize` in batches.
+
+Usage: python -m benchmarks.bench_finalize [--invoices N] [--batch-size N]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.db.session import Base, get_directory_db
+from app.main import app
+from app.schemas.schemas import FINALIZE_BATCH_MAX
+from benchmarks.seed import SeedSpec, seed_database
+
+
+def run(invoices: int, batch_size: int) -> dict[str, float]:
+    for logger in ("gst_invoice", "httpx"):
+        logging.getLogger(logger).setLevel(logging.WARNING)
+    batch_size = min(batch_size, FINALIZE_BATCH_MAX)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with SessionLocal() as db:
+            seeded = seed_database(db, SeedSpec(invoices=invoices, lines=5))
+
+        def override_get_directory_db():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_directory_db] = override_get_directory_db
+        try:
+            client = TestClient(app, headers={"Authorization": f"Bearer {create_access_token(seeded.emails[0])}"})
+            half = invoices // 2
+            start = time.perf_counter()
+            for invoice_id in range(1, half + 1):
+                client.post(f"/api/v1/invoices/{invoice_id}/finalize").raise_for_status()
+            single_s = time.perf_counter() - start
+
+            remaining = list(range(half + 1, invoices + 1))
+            start = time.perf_counter()
+            for offset in range(0, len(remaining), batch_size):
+                response = client.post("/api/v1/invoices/finalize", json={"invoice_ids": remaining[offset : offset + batch_size]})
+                response.raise_for_status()
+                assert not response.json()["skipped"]
+            batch_s = time.perf_counter() - start
+        finally:
+            app.dependency_overrides.pop(get_directory_db, None)
+            engine.dispose()
+    return {
+        "single_finalized_per_sec": half / single_s,
+        "batch_finalized_per_sec": len(remaining) / batch_s,
+        "batch_request_ms": batch_s * 1000 / -(-len(remaining) // batch_size),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=FINALIZE_BATCH_MAX)
+    args = parser.parse_args()
+    for name, value in run(args.invoices, args.batch_size).items():
+        print(f"{name:28s} {value:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
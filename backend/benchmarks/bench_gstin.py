@@ -0,0 +1,41 @@
+"""Benchmark GSTIN validations per second over a large buyer master.
+
+Usage: python -m benchmarks.bench_gstin [--count N] [--unique N]
+"""
+
+import argparse
+import random
+import time
+
+from app.utils.gst import check_gstin, validate_gstins
+from benchmarks.seed import make_gstins
+
+
+def run(count: int, unique: int) -> dict[str, float]:
+    pool = make_gstins(unique)
+    rng = random.Random(5)
+    gstins = [rng.choice(pool) for _ in range(count)]
+    uncached = check_gstin.__wrapped__
+
+    start = time.perf_counter()
+    valid = sum(1 for gstin in gstins if uncached(gstin).valid)
+    uncached_rate = count / (time.perf_counter() - start)
+
+    check_gstin.cache_clear()
+    start = time.perf_counter()
+    assert sum(1 for result in validate_gstins(gstins) if result.valid) == valid
+    batch_rate = count / (time.perf_counter() - start)
+    return {"entries": count, "unique": unique, "valid": valid, "uncached_per_sec": uncached_rate, "batch_memo_per_sec": batch_rate}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=int, default=50_000)
+    args = parser.parse_args()
+    for name, value in run(args.count, args.unique).items():
+        print(f"{name:20s} {value:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
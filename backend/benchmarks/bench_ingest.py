@@ -0,0 +1,85 @@
+"""Benchmark the offline invoice ingest on a generated NDJSON history.
+
+Seeds one user's sellers and buyers, writes `invoices` historical invoices
+of `lines` lines each, and ingests them twice into fresh databases: with
+the process pool and with taxes computed in process (`workers=0`).
+
+Usage: python -m benchmarks.bench_ingest [--invoices N] [--lines N] [--workers N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+import orjson
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db.session import Base
+from app.models.models import Buyer, Seller
+from app.services.ingest_service import ingest
+from benchmarks.seed import PRODUCTS, SeedSpec, seed_database
+
+
+def _write_source(path: str, engine, invoices: int, lines: int) -> None:
+    rng = random.Random(5)
+    with engine.connect() as connection:
+        sellers = connection.execute(select(Seller.gstin)).scalars().all()
+        buyers = connection.execute(select(Buyer.gstin)).scalars().all()
+    start = date(2021, 4, 1)
+    with open(path, "wb") as out:
+        for n in range(1, invoices + 1):
+            items = [
+                {"name": name, "hsn_sac": hsn_sac, "quantity": rng.randint(1, 20), "unit_price": price, "gst_rate": rate}
+                for name, hsn_sac, price, rate in rng.choices(PRODUCTS, k=lines)
+            ]
+            record = {
+                "invoice_number": f"LEGACY/{n:08d}",
+                "date": (start + timedelta(days=n * 1826 // invoices)).isoformat(),
+                "seller_gstin": rng.choice(sellers),
+                "buyer_gstin": rng.choice(buyers),
+                "items": items,
+            }
+            out.write(orjson.dumps(record) + b"\n")
+
+
+def _ingest_once(tmp: str, name: str, source: str, invoices: int, lines: int, workers: int | None) -> float:
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, name)}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        seed_database(db, SeedSpec(sellers_per_user=4, buyers_per_user=500, invoices=0))
+    if not os.path.exists(source):
+        _write_source(source, engine, invoices, lines)
+    with engine.connect() as connection:
+        report = ingest(connection, source, user_id=1, workers=workers)
+    engine.dispose()
+    assert report.invoices == invoices and not report.error_count
+    return report.lines_per_sec
+
+
+def run(invoices: int, lines: int, workers: int | None = None) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "history.ndjson")
+        pooled = _ingest_once(tmp, "pooled.db", source, invoices, lines, workers)
+        inline = _ingest_once(tmp, "inline.db", source, invoices, lines, 0)
+    return {
+        "ingest_lines_per_sec": pooled,
+        "ingest_invoices_per_sec": pooled / lines,
+        "ingest_inline_lines_per_sec": inline,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=200_000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    for name, value in run(args.invoices, args.lines, args.workers).items():
+        print(f"{name:28s} {value:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark invoice full-text search with millions of line items.
+
+Usage: python -m benchmarks.bench_invoice_search [--invoices N] [--lines N] [--repeat N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.fts import rebuild_invoice_index, reindex_invoices
+from app.db.session import Base
+from app.models.models import Buyer, Invoice, InvoiceItem
+from app.services.invoice_search_service import search_invoices
+from benchmarks.harness import timed
+from benchmarks.seed import SeedSpec, seed_database
+
+
+def run(invoices: int, lines: int, repeat: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        # Two thirds of the invoices belong to tenant 1, the rest are spread out.
+        tenants = max(2, invoices // 2000)
+        spec = SeedSpec(users=tenants, buyers_per_user=max(1, invoices // 20 // tenants), invoices=invoices, lines=lines, hot_user_share=2 / 3)
+        seed_database(db, spec)
+        start = time.perf_counter()
+        rebuild_invoice_index(db.connection())
+        db.commit()
+        results = {"rebuild_index_s": time.perf_counter() - start}
+
+        buyer_name = db.query(Buyer.name).filter(Buyer.user_id == 1).first()[0]
+        item_brand = db.query(InvoiceItem.name).first()[0].split()[0]
+        number = db.query(Invoice.invoice_number).filter(Invoice.id == invoices // 2).scalar()
+        cases = {
+            "partial_number_ms": lambda: search_invoices(db, 1, number[-6:]),
+            "buyer_name_ms": lambda: search_invoices(db, 1, buyer_name),
+            "item_brand_ms": lambda: search_invoices(db, 1, item_brand),
+            # Each product appears on roughly 70% of invoices, the worst case
+            # for ranking.
+            "hsn_code_ms": lambda: search_invoices(db, 1, "998311"),
+            "common_item_ms": lambda: search_invoices(db, 1, "rice"),
+            "two_common_terms_ms": lambda: search_invoices(db, 1, "paracetamol 250g"),
+            "small_tenant_ms": lambda: search_invoices(db, 2, "rice"),
+        }
+        results.update({name: timed(case, repeat) for name, case in cases.items()})
+        results["reindex_100_invoices_ms"] = timed(lambda: reindex_invoices(db.connection(), range(1, 101)), repeat)
+        db.rollback()
+        db.close()
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=100_000)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(f"line items: {args.invoices * args.lines}")
+    for name, value in run(args.invoices, args.lines, args.repeat).items():
+        print(f"{name:24s} {value:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Microbenchmarks for the tax engine, amount-in-words and PDF rendering.
+
+Usage: python -m benchmarks.bench_micro [--count N] [--repeat N]
+"""
+
+import argparse
+import random
+
+from app.services.pdf_service import generate_invoice_pdf
+from app.services.tax_service import compute_line, compute_totals
+from app.utils.number_words import amount_to_words
+from benchmarks.harness import rate, timed
+from benchmarks.seed import PRODUCTS, SIZES
+
+
+def make_invoice_dict(lines: int, seed: int = 9) -> dict:
+    """Build the export payload `generate_invoice_pdf` renders."""
+    rng = random.Random(seed)
+    items, results = [], []
+    for _ in range(lines):
+        name, hsn, price, gst_rate = rng.choice(PRODUCTS)
+        quantity = rng.randint(1, 20)
+        line = compute_line(quantity, price, 0.0, gst_rate)
+        results.append(line)
+        items.append({"name": f"{name} {rng.choice(SIZES)}", "hsn_sac": hsn, "quantity": quantity, "total_value": line.total_value})
+    totals = compute_totals(results, intra_state=True)
+    return {
+        "invoice_number": "INV-2026-00001",
+        "seller": {"name": "Delhi Grains", "gstin": "07ABCDE1234F1Z2"},
+        "buyer": {"name": "Acme Foods", "gstin": "29ABCDE1234F1ZW"},
+        "items": items,
+        "total_taxable": totals.total_taxable,
+        "total_cgst": totals.total_cgst,
+        "total_sgst": totals.total_sgst,
+        "total_igst": totals.total_igst,
+        "grand_total": totals.grand_total,
+        "grand_total_words": amount_to_words(totals.grand_total),
+    }
+
+
+def run(count: int, repeat: int) -> dict[str, float]:
+    rng = random.Random(1)
+    args = [(rng.randint(1, 50), round(rng.uniform(1, 5000), 2), round(rng.uniform(0, 50), 2), rng.choice([0, 5, 12, 18, 28])) for _ in range(count)]
+    lines = iter(args)
+    line_results = [compute_line(*a) for a in args[:50]]
+    amounts = iter([round(rng.uniform(0, 5_00_00_000), 2) for _ in range(count)])
+    words = amount_to_words.__wrapped__
+    small, large = make_invoice_dict(10), make_invoice_dict(100)
+    return {
+        "compute_line_per_sec": rate(lambda: compute_line(*next(lines)), count),
+        "compute_totals_50_lines_per_sec": rate(lambda: compute_totals(line_results, intra_state=True), max(1, count // 10)),
+        "amount_to_words_per_sec": rate(lambda: words(next(amounts)), count),
+        "pdf_10_lines_ms": timed(lambda: generate_invoice_pdf(small), repeat),
+        "pdf_100_lines_ms": timed(lambda: generate_invoice_pdf(large), repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    for name, value in run(args.count, args.repeat).items():
+        print(f"{name:32s} {value:>14,.2f}")
+
+
+if __name__ == "__main__":
+    main()
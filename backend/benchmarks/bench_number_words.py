@@ -0,0 +1,42 @@
+"""Benchmark amount-in-words conversions per second.
+
+Usage: python -m benchmarks.bench_number_words [--count N]
+"""
+
+import argparse
+import random
+import time
+
+from app.utils.number_words import amount_to_words, available_languages
+
+
+def run(count: int) -> dict[str, float]:
+    rng = random.Random(7)
+    unique = [round(rng.uniform(0, 5_00_00_000), 2) for _ in range(count)]
+    repeated = [rng.choice(unique[:500]) for _ in range(count)]
+    results = {}
+    for language in available_languages():
+        convert = amount_to_words.__wrapped__
+        start = time.perf_counter()
+        for amount in unique:
+            convert(amount, language)
+        results[f"{language}_uncached_per_sec"] = count / (time.perf_counter() - start)
+
+        amount_to_words.cache_clear()
+        start = time.perf_counter()
+        for amount in repeated:
+            amount_to_words(amount, language)
+        results[f"{language}_cached_per_sec"] = count / (time.perf_counter() - start)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+    for name, value in run(args.count).items():
+        print(f"{name:28s} {value:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
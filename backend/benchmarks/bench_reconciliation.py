@@ -0,0 +1,145 @@
+"""Benchmark streaming GSTR-2B reconciliation on a large 2B file.
+
+Seeds one seller's finalized invoices to one recipient for May 2026, then
+writes a 2B file where most records belong to other suppliers' sections and
+the seller's section holds matched (numbers reformatted), mismatched and
+unknown invoices. The file is reconciled through the same generator and
+NDJSON encoder the endpoint streams.
+
+`peak_rss_growth_mb` is informational: how far the run pushed the process's
+peak RSS, which stays flat as the file grows.
+
+Usage: python -m benchmarks.bench_reconciliation [--records N]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.models import Buyer, Invoice, Seller
+from app.services.reconciliation_service import ndjson_chunks, reconcile_gstr2b
+from benchmarks.seed import SeedSpec, make_gstins, seed_database
+
+PERIOD = "2026-05"
+MONTH_START = datetime(2026, 5, 1)
+SUPPLIER_SIZE = 50
+_BATCH = 20_000
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _invoice(n: int) -> tuple[str, datetime, float, float]:
+    taxable = float(100 + n % 900)
+    return f"INV/2026/{n:06d}", MONTH_START + timedelta(minutes=n % 40_000), round(taxable * 1.18, 2), taxable
+
+
+def _write_gstr2b(path: str, seller_gstin: str, recipient_gstin: str, records: int, books: int) -> None:
+    """Stream-write the 2B file; about 30% of the records are the seller's own."""
+    own = min(records * 3 // 10, books)
+    unknown = own // 10
+    others = records - own - unknown
+    sections = make_gstins(-(-others // SUPPLIER_SIZE), seed=7, invalid_rate=0)
+
+    def record(number: str, created: datetime, value: float, taxable: float) -> bytes:
+        items = [{"num": 1, "rt": 18, "txval": taxable, "igst": round(taxable * 0.18, 2), "cess": 0}]
+        return orjson.dumps({"inum": number, "typ": "R", "dt": created.strftime("%d-%m-%Y"), "val": value, "pos": "29", "rev": "N", "items": items})
+
+    def own_rows():
+        for n in range(1, own + 1):
+            number, created, value, taxable = _invoice(n)
+            # Every tenth invoice was reported with a different value.
+            yield record(number.replace("/", "-").replace("-0", "-"), created, value + (25.0 if n % 10 == 0 else 0.0), taxable)
+        for n in range(unknown):
+            yield record(f"X-{n}", MONTH_START, 100.0, 84.75)
+
+    with open(path, "wb") as out:
+        out.write(b'{"chksum":"x","data":{"gstin":' + orjson.dumps(recipient_gstin) + b',"rtnprd":"052026","docdata":{"b2b":[')
+        supplier_sections = [(ctin, min(SUPPLIER_SIZE, others - index * SUPPLIER_SIZE)) for index, ctin in enumerate(sections)]
+        supplier_sections.insert(len(supplier_sections) // 2, (seller_gstin, None))
+        for index, (ctin, count) in enumerate(supplier_sections):
+            if index:
+                out.write(b",")
+            out.write(b'{"trdnm":"Supplier","ctin":' + orjson.dumps(ctin) + b',"supfildt":"11-06-2026","inv":[')
+            rows = own_rows() if count is None else (record(f"S{index}/{n}", MONTH_START, 500.0, 423.73) for n in range(count))
+            first = True
+            for row in rows:
+                out.write(row if first else b"," + row)
+                first = False
+            out.write(b"]}")
+        out.write(b"]}}}")
+
+
+def run(records: int) -> dict[str, float]:
+    books = records * 3 // 10 + records // 100
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with SessionLocal() as db:
+            seeded = seed_database(db, SeedSpec(buyers_per_user=1, invoices=0))
+            seller = db.get(Seller, seeded.seller_ids[1][0])
+            buyer = db.get(Buyer, seeded.buyer_ids[1][0])
+            rows = []
+            for n in range(1, books + 1):
+                number, created, value, taxable = _invoice(n)
+                rows.append(
+                    {
+                        "seller_id": seller.id, "buyer_id": buyer.id, "invoice_number": number, "invoice_type": "B2B",
+                        "reverse_charge": False, "supply_type": "inter", "status": "finalized", "total_taxable": taxable,
+                        "total_cgst": 0.0, "total_sgst": 0.0, "total_igst": round(value - taxable, 2), "grand_total": value,
+                        "grand_total_words": "", "created_at": created, "issued_on": created.date(),
+                    }
+                )
+                if len(rows) >= _BATCH:
+                    db.execute(insert(Invoice), rows)
+                    rows = []
+            if rows:
+                db.execute(insert(Invoice), rows)
+            db.commit()
+
+            path = os.path.join(tmp, "gstr2b.json")
+            _write_gstr2b(path, seller.gstin, buyer.gstin, records, books)
+            file_mb = os.path.getsize(path) / (1024 * 1024)
+
+            rss_before = _peak_rss_mb()
+            start = time.perf_counter()
+            last = b""
+            with open(path, "rb") as stream:
+                for chunk in ndjson_chunks(reconcile_gstr2b(db, 1, buyer.gstin, PERIOD, stream)):
+                    last = chunk
+            reconcile_s = time.perf_counter() - start
+            rss_growth = max(_peak_rss_mb() - rss_before, 0.0)
+        engine.dispose()
+    summary = orjson.loads(last.rstrip(b"\n").rsplit(b"\n", 1)[-1])["summary"]
+    assert summary["records"] == records and summary["missing_in_2b"] == books - records * 3 // 10, summary
+    return {
+        "records_per_sec": records / reconcile_s,
+        "reconcile_s": reconcile_s,
+        "file_mb": file_mb,
+        "peak_rss_growth_mb": rss_growth,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+    for name, value in run(args.records).items():
+        print(f"{name:28s} {value:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark a recurring-invoice run over many due templates.
+
+Seeds `templates` monthly templates (with `lines` lines each) spread over
+the seeded sellers and buyers, all due for one period, then times one
+`generate_due` run that issues them in chunks.
+
+Usage: python -m benchmarks.bench_recurring [--templates N] [--lines N] [--chunk-size N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.models.models import RecurringTemplate, RecurringTemplateItem, User
+from app.services.recurring_service import generate_due
+from benchmarks.seed import PRODUCTS, SeedSpec, seed_database
+
+START_ON = date(2026, 5, 1)
+
+
+def run(templates: int, lines: int, chunk_size: int) -> dict[str, float]:
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with SessionLocal() as db:
+            seeded = seed_database(db, SeedSpec(users=10, sellers_per_user=2, buyers_per_user=100, invoices=0))
+            user_ids = [user_id for (user_id,) in db.query(User.id).order_by(User.id)]
+            rows = []
+            for index in range(templates):
+                user_id = user_ids[index % len(user_ids)]
+                rows.append(
+                    {
+                        "user_id": user_id,
+                        "seller_id": rng.choice(seeded.seller_ids[user_id]),
+                        "buyer_id": rng.choice(seeded.buyer_ids[user_id]),
+                        "invoice_type": "B2B",
+                        "reverse_charge": False,
+                        "cadence": "monthly",
+                        "start_on": START_ON,
+                        "next_run_on": START_ON,
+                        "periods_generated": 0,
+                        "active": True,
+                    }
+                )
+            ids = db.execute(insert(RecurringTemplate).returning(RecurringTemplate.id, sort_by_parameter_order=True), rows).scalars().all()
+            items = []
+            for template_id in ids:
+                for name, hsn_sac, price, rate in rng.sample(PRODUCTS, lines):
+                    items.append(
+                        {"template_id": template_id, "name": name, "hsn_sac": hsn_sac, "quantity": rng.randint(1, 20), "unit_price": price, "discount": 0.0, "gst_rate": rate}
+                    )
+            db.execute(insert(RecurringTemplateItem), items)
+            db.commit()
+
+        report = generate_due(SessionLocal, today=START_ON, chunk_size=chunk_size)
+        assert report.invoices == templates and not report.failed_chunks
+        engine.dispose()
+    return {
+        "recurring_invoices_per_sec": report.invoices_per_sec,
+        "recurring_run_s": report.duration_s,
+        "recurring_chunk_ms": report.duration_s * 1000 / report.chunks,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--templates", type=int, default=20_000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+    for name, value in run(args.templates, args.lines, args.chunk_size).items():
+        print(f"{name:28s} {value:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
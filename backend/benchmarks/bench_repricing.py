@@ -0,0 +1,52 @@
+"""Benchmark re-pricing seeded drafts after a GST rate change.
+
+Seeds `invoices` draft invoices of `lines` lines each, drawn from the seed
+products, then times one `reprice_drafts` run moving every Ceiling Fan line
+(HSN 8414) from 18% to 40%.
+
+Usage: python -m benchmarks.bench_repricing [--invoices N] [--lines N] [--batch-size N]
+"""
+
+import argparse
+import os
+import tempfile
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import Base
+from app.services.repricing_service import reprice_drafts
+from benchmarks.seed import SeedSpec, seed_database
+
+
+def run(invoices: int, lines: int, batch_size: int) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with SessionLocal() as db:
+            seed_database(db, SeedSpec(invoices=invoices, lines=lines))
+
+        report = reprice_drafts(SessionLocal, "8414", 18, 40, date.today(), batch_size=batch_size)
+        assert report.lines and reprice_drafts(SessionLocal, "8414", 18, 40, date.today()).lines == 0
+        engine.dispose()
+    return {
+        "repricing_lines_per_sec": report.lines_per_sec,
+        "repricing_run_s": report.duration_s,
+        "repricing_batch_ms": report.duration_s * 1000 / report.batches,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=100_000)
+    parser.add_argument("--lines", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    for name, value in run(args.invoices, args.lines, args.batch_size).items():
+        print(f"{name:28s} {value:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cold-start benchmark: fresh interpreter to first answered request.
+
+Each sample is a new `python -X importtime` process on an empty SQLite file
+that imports `app.main`, runs the lifespan (schema preparation) and serves
+`GET /health` in-process. Import time is also attributed to top-level
+packages from the `-X importtime` report.
+
+Usage: python -m benchmarks.bench_startup [--repeat N] [--schema-management MODE]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Packages whose import cost is reported; the lazy ones should stay at zero.
+WATCHED = ("fastapi", "pydantic", "sqlalchemy", "starlette", "app", "reportlab", "PIL", "jose", "passlib")
+
+PROBE = """
+import json, time
+from fastapi.testclient import TestClient
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    client.get("/health").raise_for_status()
+    answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "lifespan_ms": (started - imported) * 1000,
+    "first_request_ms": (answered - started) * 1000,
+}))
+"""
+
+
+def import_costs(report: str) -> Counter:
+    """Sum `-X importtime` self times (ms) per top-level package."""
+    costs: Counter = Counter()
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        costs[name.strip().split(".")[0]] += int(self_us) / 1000
+    return costs
+
+
+def sample(schema_management: str) -> tuple[dict[str, float], Counter]:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            "SCHEMA_MANAGEMENT": schema_management,
+        }
+        # TestClient (httpx) is imported before the clock starts; only the app counts.
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+    timings = json.loads(process.stdout.strip().splitlines()[-1])
+    timings["process_ms"] = wall_ms
+    return timings, import_costs(process.stderr)
+
+
+def run(repeat: int, schema_management: str = "create_all") -> dict[str, float]:
+    samples, costs = [], []
+    for _ in range(repeat):
+        timings, packages = sample(schema_management)
+        samples.append(timings)
+        costs.append(packages)
+    results = {name: statistics.median(timing[name] for timing in samples) for name in samples[0]}
+    results["cold_start_ms"] = results["import_ms"] + results["lifespan_ms"] + results["first_request_ms"]
+    for package in WATCHED:
+        results[f"import_{package}_ms"] = statistics.median(cost[package] for cost in costs)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--schema-management", default="create_all", choices=("create_all", "alembic", "none"))
+    args = parser.parse_args()
+    results = run(args.repeat, args.schema_management)
+    for name in ("cold_start_ms", "import_ms", "lifespan_ms", "first_request_ms", "process_ms"):
+        print(f"{name:28s} {results[name]:>10.1f}")
+    print("\nimport cost by package (median ms):")
+    for package in WATCHED:
+        print(f"  {package:24s} {results[f'import_{package}_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
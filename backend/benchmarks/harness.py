@@ -0,0 +1,102 @@
+"""Timing helpers, result files and regression checks for the benchmark suite.
+
+Metric names carry their direction: `*_per_sec` is better when higher,
+`*_ms`, `*_s` and `seconds` are better when lower, anything else (row
+counts and the like) is informational and never compared.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+HIGHER_IS_BETTER = ("_per_sec",)
+LOWER_IS_BETTER = ("_ms", "_s", "seconds")
+DEFAULT_THRESHOLD = 0.10
+
+
+@dataclass
+class Regression:
+    metric: str
+    baseline: float
+    current: float
+    change: float
+
+
+def timed(fn: Callable[[], object], repeat: int, warmup: int = 1) -> float:
+    """Return the median wall time of `fn` in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def rate(fn: Callable[[], object], count: int) -> float:
+    """Return how many times per second `fn` ran over `count` calls."""
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return count / (time.perf_counter() - start)
+
+
+def direction(metric: str) -> int:
+    """Return 1 if higher is better, -1 if lower is better, 0 if not comparable."""
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str, results: dict[str, dict[str, float]], options: dict) -> None:
+    """Write suite results with enough context to tell runs apart."""
+    document = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": options,
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(document, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def load_results(path: str) -> dict[str, float]:
+    """Load a results file as a flat {"suite.metric": value} mapping."""
+    with open(path, encoding="utf-8") as handle:
+        results = json.load(handle)["results"]
+    return {f"{suite}.{metric}": value for suite, metrics in results.items() for metric, value in metrics.items()}
+
+
+def compare(baseline: dict[str, float], current: dict[str, float], threshold: float = DEFAULT_THRESHOLD) -> list[Regression]:
+    """Return metrics present in both runs that got worse by more than `threshold`."""
+    regressions = []
+    for metric in sorted(baseline.keys() & current.keys()):
+        sign = direction(metric)
+        before, after = baseline[metric], current[metric]
+        if not sign or not before:
+            continue
+        # Positive change always means "worse", whichever way the metric points.
+        change = (before - after) / before if sign > 0 else (after - before) / before
+        if change > threshold:
+            regressions.append(Regression(metric, before, after, change))
+    return regressions
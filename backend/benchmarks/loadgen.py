@@ -0,0 +1,396 @@
+"""Mixed-traffic load generator for a running (or locally started) uvicorn.
+
+Usage:
+    python -m benchmarks.loadgen run --scenario benchmarks/scenarios/mixed.json --start-server \
+        [--mode closed --concurrency 16 | --mode open --rate 50] [--duration 30] [--output-dir DIR]
+    python -m benchmarks.loadgen compare BASELINE_DIR CURRENT_DIR
+
+A scenario file names weighted request kinds (see `ACTIONS`) and how much data
+to create before the run. Closed-loop mode keeps `--concurrency` users each
+sending the next request as soon as the previous one answers. Open-loop mode
+starts requests at a constant `--rate` whether or not earlier ones finished,
+and measures latency from each request's scheduled start, so a stalled server
+shows up as queueing delay instead of silently lowering the offered load.
+
+Results go to `--output-dir`: `summary.json` (per-route counts, errors,
+throughput, percentiles and raw histograms), one HdrHistogram-style
+`<route>.hgrm` file per route, which diff cleanly between runs, and the
+server's output in `server.log` when `--start-server` is used.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.histogram import Histogram
+from benchmarks.seed import PRODUCTS, make_gstins
+
+API = "/api/v1"
+PASSWORD = "loadtest-password"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+REPORTED_PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class RouteStats:
+    histogram: Histogram = field(default_factory=Histogram)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def requests(self) -> int:
+        return self.histogram.total + sum(self.errors.values())
+
+
+@dataclass
+class Account:
+    email: str
+    token: str
+    seller_id: int
+    buyer_ids: list[int]
+    invoice_ids: list[int]
+
+
+@dataclass
+class LoadState:
+    scenario: dict
+    accounts: list[Account]
+    rng: random.Random
+    stats: dict[str, RouteStats] = field(default_factory=dict)
+    dropped: int = 0
+
+    def route(self, name: str) -> RouteStats:
+        return self.stats.setdefault(name, RouteStats())
+
+
+class RequestFailed(Exception):
+    def __init__(self, kind: str) -> None:
+        super().__init__(kind)
+        self.kind = kind
+
+
+def _auth(account: Account) -> dict[str, str]:
+    return {"Authorization": f"Bearer {account.token}"}
+
+
+def _check(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise RequestFailed(f"http_{response.status_code}")
+    return response
+
+
+def _invoice_payload(account: Account, lines: int, rng: random.Random) -> dict:
+    items = []
+    for _ in range(lines):
+        name, hsn, price, gst_rate = rng.choice(PRODUCTS)
+        items.append({"name": name, "hsn_sac": hsn, "quantity": rng.randint(1, 20), "unit_price": price, "gst_rate": gst_rate})
+    return {"seller_id": account.seller_id, "buyer_id": rng.choice(account.buyer_ids), "invoice_type": "B2B", "items": items}
+
+
+def _weighted(options: dict[str, float], rng: random.Random) -> str:
+    names = list(options)
+    return rng.choices(names, weights=[options[name] for name in names])[0]
+
+
+async def login(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    _check(await client.post(f"{API}/auth/login", data={"username": account.email, "password": PASSWORD}))
+
+
+async def create_invoice(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    lines = int(_weighted(params.get("lines", {"5": 1}), state.rng))
+    response = _check(await client.post(f"{API}/invoices", json=_invoice_payload(account, lines, state.rng), headers=_auth(account)))
+    account.invoice_ids.append(response.json()["id"])
+
+
+async def list_invoices(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    _check(await client.get(f"{API}/invoices", headers=_auth(account)))
+
+
+async def search_invoices(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    term = state.rng.choice(params.get("terms", ["rice"]))
+    _check(await client.get(f"{API}/invoices/search", params={"q": term}, headers=_auth(account)))
+
+
+async def list_buyers(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    _check(await client.get(f"{API}/buyers", headers=_auth(account)))
+
+
+async def export_json(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    invoice_id = state.rng.choice(account.invoice_ids)
+    _check(await client.get(f"{API}/invoices/{invoice_id}/json", headers=_auth(account)))
+
+
+async def export_pdf(client: httpx.AsyncClient, state: LoadState, account: Account, params: dict) -> None:
+    invoice_id = state.rng.choice(account.invoice_ids)
+    _check(await client.get(f"{API}/invoices/{invoice_id}/pdf", headers=_auth(account)))
+
+
+Action = Callable[[httpx.AsyncClient, LoadState, Account, dict], Awaitable[None]]
+# action name -> (route label used in reports, coroutine)
+ACTIONS: dict[str, tuple[str, Action]] = {
+    "login": ("POST /auth/login", login),
+    "create_invoice": ("POST /invoices", create_invoice),
+    "list_invoices": ("GET /invoices", list_invoices),
+    "search_invoices": ("GET /invoices/search", search_invoices),
+    "list_buyers": ("GET /buyers", list_buyers),
+    "export_json": ("GET /invoices/{id}/json", export_json),
+    "export_pdf": ("GET /invoices/{id}/pdf", export_pdf),
+}
+# Actions that pick one of the account's invoices.
+NEEDS_INVOICES = {"export_json", "export_pdf"}
+
+
+def load_scenario(path: str) -> dict:
+    """Read and validate a scenario file."""
+    with open(path, encoding="utf-8") as handle:
+        scenario = json.load(handle)
+    requests = scenario.get("requests")
+    if not requests:
+        raise ValueError("Scenario must define at least one request")
+    for request in requests:
+        if request.get("action") not in ACTIONS:
+            raise ValueError(f"Unknown action {request.get('action')!r}; expected one of {', '.join(ACTIONS)}")
+        if request.get("weight", 0) <= 0:
+            raise ValueError(f"Request {request['action']!r} needs a positive weight")
+        if request["action"] in NEEDS_INVOICES and scenario.get("setup", {}).get("invoices_per_user", 20) < 1:
+            raise ValueError(f"Request {request['action']!r} needs setup.invoices_per_user of at least 1")
+    return scenario
+
+
+async def setup_accounts(client: httpx.AsyncClient, scenario: dict, rng: random.Random) -> list[Account]:
+    """Register users and create the sellers, buyers and invoices the traffic mix needs."""
+    setup = scenario.get("setup", {})
+    users, buyers, invoices = setup.get("users", 4), setup.get("buyers_per_user", 20), setup.get("invoices_per_user", 20)
+    run_id = f"{int(time.time())}{rng.randrange(1000):03d}"
+    gstins = iter(dict.fromkeys(make_gstins(users * (buyers + 1) * 2, seed=rng.randrange(1 << 30), invalid_rate=0)))
+    accounts = []
+    for n in range(users):
+        email = f"load{run_id}-{n}@example.com"
+        _check(await client.post(f"{API}/auth/register", json={"email": email, "full_name": f"Load User {n}", "password": PASSWORD}))
+        token = _check(await client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        gstin = next(gstins)
+        seller = {"name": f"Load Seller {n}", "gstin": gstin, "address": "Industrial Area", "state_code": gstin[:2]}
+        seller_id = _check(await client.post(f"{API}/sellers", json=seller, headers=headers)).json()["id"]
+        buyer_ids = []
+        for b in range(buyers):
+            gstin = next(gstins)
+            buyer = {"name": f"Load Buyer {n}-{b}", "gstin": gstin, "address": "Main Road", "state_code": gstin[:2]}
+            buyer_ids.append(_check(await client.post(f"{API}/buyers", json=buyer, headers=headers)).json()["id"])
+        account = Account(email, token, seller_id, buyer_ids, [])
+        for _ in range(invoices):
+            payload = _invoice_payload(account, rng.randint(1, 10), rng)
+            account.invoice_ids.append(_check(await client.post(f"{API}/invoices", json=payload, headers=headers)).json()["id"])
+        accounts.append(account)
+    return accounts
+
+
+async def _fire(client: httpx.AsyncClient, state: LoadState, started: float) -> None:
+    request = state.rng.choices(state.scenario["requests"], weights=[r["weight"] for r in state.scenario["requests"]])[0]
+    account = state.rng.choice(state.accounts)
+    route, action = ACTIONS[request["action"]]
+    stats = state.route(route)
+    try:
+        await action(client, state, account, request)
+    except RequestFailed as exc:
+        kind = exc.kind
+    except httpx.TimeoutException:
+        kind = "timeout"
+    except httpx.TransportError as exc:
+        kind = type(exc).__name__
+    else:
+        stats.histogram.record(int((time.perf_counter() - started) * 1_000_000))
+        return
+    stats.errors[kind] = stats.errors.get(kind, 0) + 1
+
+
+async def closed_loop(client: httpx.AsyncClient, state: LoadState, concurrency: int, duration: float) -> None:
+    deadline = time.perf_counter() + duration
+
+    async def user() -> None:
+        while time.perf_counter() < deadline:
+            await _fire(client, state, time.perf_counter())
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+async def open_loop(client: httpx.AsyncClient, state: LoadState, rate: float, duration: float, max_in_flight: int) -> None:
+    start = time.perf_counter()
+    in_flight: set[asyncio.Task] = set()
+    for n in range(int(rate * duration)):
+        scheduled = start + n / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            state.dropped += 1
+            continue
+        task = asyncio.create_task(_fire(client, state, scheduled))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    await asyncio.gather(*in_flight)
+
+
+def _route_file(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_").lower() + ".hgrm"
+
+
+def summarize(state: LoadState, elapsed: float) -> dict:
+    routes = {}
+    for route, stats in sorted(state.stats.items()):
+        errors = sum(stats.errors.values())
+        routes[route] = {
+            "requests": stats.requests,
+            "errors": stats.errors,
+            "error_rate": errors / stats.requests if stats.requests else 0.0,
+            "throughput_per_sec": stats.histogram.total / elapsed,
+            **{f"p{p}_ms": stats.histogram.value_at(p) / 1000 for p in REPORTED_PERCENTILES},
+            "max_ms": stats.histogram.max / 1000,
+            "histogram": stats.histogram.to_dict(),
+        }
+    return {"elapsed_s": elapsed, "dropped": state.dropped, "routes": routes}
+
+
+def write_report(summary: dict, state: LoadState, output_dir: str, options: dict) -> None:
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as handle:
+        json.dump({"options": options, **summary}, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+    for route, stats in state.stats.items():
+        with open(os.path.join(output_dir, _route_file(route)), "w", encoding="utf-8") as handle:
+            handle.write(f"# {route}\n")
+            stats.histogram.write_hgrm(handle)
+
+
+def print_summary(summary: dict) -> None:
+    print(f"{'route':28s} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for route, row in summary["routes"].items():
+        print(
+            f"{route:28s} {row['requests']:>7d} {row['error_rate'] * 100:>6.2f} {row['throughput_per_sec']:>8.1f} "
+            f"{row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['max_ms']:>9.2f}"
+        )
+    if summary["dropped"]:
+        print(f"dropped {summary['dropped']} scheduled requests (max in-flight reached)")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(database_dir: str, workers: int, log) -> tuple[subprocess.Popen, str]:
+    """Start uvicorn on a fresh SQLite database and wait until it answers."""
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{os.path.join(database_dir, 'load.db')}"}
+    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", "--workers", str(workers)]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited during startup, see {log.name}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+
+async def run_load(args: argparse.Namespace, url: str) -> tuple[dict, LoadState]:
+    scenario = load_scenario(args.scenario)
+    rng = random.Random(args.seed)
+    connections = args.concurrency if args.mode == "closed" else args.max_in_flight
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        accounts = await setup_accounts(client, scenario, rng)
+        state = LoadState(scenario, accounts, rng)
+        start = time.perf_counter()
+        if args.mode == "closed":
+            await closed_loop(client, state, args.concurrency, args.duration)
+        else:
+            await open_loop(client, state, args.rate, args.duration, args.max_in_flight)
+        elapsed = time.perf_counter() - start
+    return summarize(state, elapsed), state
+
+
+def run_command(args: argparse.Namespace) -> int:
+    options = {key: value for key, value in vars(args).items() if key != "func"}
+    os.makedirs(args.output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(args.output_dir, "server.log"), "w") as log:
+        process = None
+        url = args.url
+        if args.start_server:
+            process, url = start_server(tmp, args.workers, log)
+        try:
+            summary, state = asyncio.run(run_load(args, url))
+        finally:
+            if process:
+                process.terminate()
+                process.wait(timeout=10)
+    print_summary(summary)
+    write_report(summary, state, args.output_dir, options)
+    print(f"wrote {args.output_dir}")
+    return 0
+
+
+def compare_command(args: argparse.Namespace) -> int:
+    summaries = []
+    for directory in (args.baseline, args.current):
+        with open(os.path.join(directory, "summary.json"), encoding="utf-8") as handle:
+            summaries.append(json.load(handle)["routes"])
+    baseline, current = summaries
+    print(f"{'route':28s} {'metric':>18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for route in sorted(baseline.keys() & current.keys()):
+        for metric in [f"p{p}_ms" for p in REPORTED_PERCENTILES] + ["throughput_per_sec", "error_rate"]:
+            before, after = baseline[route][metric], current[route][metric]
+            change = f"{(after - before) / before * 100:+7.1f}%" if before else ""
+            print(f"{route:28s} {metric:>18} {before:>10.2f} {after:>10.2f} {change:>8}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadgen", description="Mixed-traffic load generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="drive load against the app and write a report")
+    run_parser.add_argument("--scenario", default=str(Path(__file__).parent / "scenarios" / "mixed.json"))
+    target = run_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of an already running server")
+    target.add_argument("--start-server", action="store_true", help="start uvicorn on a throwaway database")
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --start-server")
+    run_parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="closed loop: simultaneous users")
+    run_parser.add_argument("--rate", type=float, default=50.0, help="open loop: requests started per second")
+    run_parser.add_argument("--max-in-flight", type=int, default=256, help="open loop: cap before requests are dropped")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--output-dir", default="loadgen-results")
+    run_parser.set_defaults(func=run_command)
+
+    compare_parser = commands.add_parser("compare", help="compare two report directories")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.set_defaults(func=compare_command)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Deterministic data seeding shared by the benchmarks.
+
+The same `SeedSpec` always produces the same rows, so timings from different
+runs (or branches) are measured against identical data.
+"""
+
+import random
+import string
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.db.fts import has_fts_table, rebuild_invoice_index
+from app.models.models import Buyer, Invoice, InvoiceItem, Seller, TaxSummary, User
+from app.services.tax_service import compute_line, compute_totals
+from app.utils.gst import GSTIN_CHARSET, STATE_CODES, gstin_check_digit
+from app.utils.number_words import amount_to_words
+
+PASSWORD = "benchmark-password"
+SYLLABLES = ["ka", "ra", "ma", "shi", "vi", "na", "la", "de", "su", "ja", "ya", "pa", "ta", "go", "bha", "sha", "ni", "ru", "ke", "dha"]
+SUFFIXES = ["Traders", "Enterprises", "Agencies", "Stores", "Textiles", "Foods", "Steel", "Pharma", "Motors", "Electricals"]
+CITIES = ["Delhi", "Mumbai", "Bengaluru", "Chennai", "Kolkata", "Pune", "Jaipur", "Surat", "Indore", "Kochi"]
+# (name, HSN/SAC, unit price, GST rate)
+PRODUCTS = [
+    ("Basmati Rice", "100630", 95.0, 5), ("Toor Dal", "0713", 140.0, 5), ("Wheat Flour", "1101", 42.5, 5),
+    ("Sugar", "1701", 44.0, 5), ("Sunflower Oil", "1512", 165.0, 5), ("Green Tea", "0902", 320.0, 5),
+    ("Cotton Shirt", "6205", 899.0, 12), ("Steel Rod", "7214", 61.75, 18), ("LED Bulb", "8539", 129.0, 12),
+    ("Paracetamol Tablet", "3004", 24.3, 12), ("Notebook", "4820", 55.0, 12), ("Ceiling Fan", "8414", 2450.0, 18),
+    ("Copper Wire", "7408", 812.4, 18), ("Cement Bag", "2523", 390.0, 28), ("Ball Bearing", "8482", 215.9, 18),
+    ("Consulting Service", "998311", 4500.0, 18),
+]
+SIZES = ["250g", "500g", "1kg", "5kg", "10kg", "Small", "Medium", "Large", "Pack of 10", "Box"]
+EPOCH = datetime(2026, 4, 1)
+_BATCH = 20_000
+
+
+@dataclass(frozen=True)
+class SeedSpec:
+    users: int = 1
+    sellers_per_user: int = 1
+    buyers_per_user: int = 50
+    invoices: int = 1000
+    lines: int = 10
+    # Share of invoices owned by user 1; the rest are spread evenly, which
+    # models one large tenant among many small ones.
+    hot_user_share: float = 0.0
+    seed: int = 42
+
+
+@dataclass
+class SeedResult:
+    emails: list[str]
+    seller_ids: dict[int, list[int]]
+    buyer_ids: dict[int, list[int]]
+    invoice_count: int
+    line_count: int
+
+
+def brand(rng: random.Random) -> str:
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+
+
+def make_gstins(unique: int, seed: int = 11, invalid_rate: float = 0.05) -> list[str]:
+    """Return GSTINs with valid check digits, except roughly `invalid_rate` of them."""
+    rng = random.Random(seed)
+    states = sorted(STATE_CODES)
+    pool = []
+    for _ in range(unique):
+        body = (
+            rng.choice(states)
+            + "".join(rng.choices(string.ascii_uppercase, k=5))
+            + "".join(rng.choices(string.digits, k=4))
+            + rng.choice(string.ascii_uppercase)
+            + rng.choice(GSTIN_CHARSET[1:])
+            + "Z"
+        )
+        gstin = body + gstin_check_digit(body)
+        if rng.random() < invalid_rate:
+            gstin = gstin[:-1] + rng.choice(GSTIN_CHARSET)
+        pool.append(gstin)
+    return pool
+
+
+@lru_cache(maxsize=None)
+def _line(quantity: int, unit_price: float, gst_rate: float):
+    return compute_line(quantity, unit_price, 0.0, gst_rate)
+
+
+def _flush(db: Session, rows: dict[type, list[dict]]) -> None:
+    for model in (Invoice, InvoiceItem, TaxSummary):
+        if rows[model]:
+            db.execute(insert(model), rows[model])
+            rows[model] = []
+
+
+def seed_database(db: Session, spec: SeedSpec) -> SeedResult:
+    """Insert users, sellers, buyers and invoices with correctly computed taxes.
+
+    Rows go in through Core bulk inserts, so the invoice search index is
+    rebuilt once at the end rather than per flush.
+    """
+    rng = random.Random(spec.seed)
+    parties = spec.users * (spec.sellers_per_user + spec.buyers_per_user)
+    gstins = list(dict.fromkeys(make_gstins(parties * 2, seed=spec.seed, invalid_rate=0)))[:parties]
+    password_hash = get_password_hash(PASSWORD)
+    year = EPOCH.year
+
+    emails = [f"user{n}@bench.example" for n in range(1, spec.users + 1)]
+    db.execute(
+        insert(User),
+        [
+            {"id": n, "email": email, "full_name": f"Bench User {n}", "password_hash": password_hash, "created_at": EPOCH}
+            for n, email in enumerate(emails, start=1)
+        ],
+    )
+    seller_rows, buyer_rows = [], []
+    seller_ids: dict[int, list[int]] = {}
+    buyer_ids: dict[int, list[int]] = {}
+    states: dict[tuple[str, int], str] = {}
+    for user_id in range(1, spec.users + 1):
+        for _ in range(spec.sellers_per_user):
+            gstin = gstins.pop()
+            seller_id = len(seller_rows) + 1
+            seller_rows.append(
+                {
+                    "id": seller_id, "user_id": user_id, "name": f"{brand(rng)} {rng.choice(SUFFIXES)}", "gstin": gstin,
+                    "address": f"{rng.randint(1, 999)} Industrial Area, {rng.choice(CITIES)}", "state_code": gstin[:2],
+                }
+            )
+            seller_ids.setdefault(user_id, []).append(seller_id)
+            states[("seller", seller_id)] = gstin[:2]
+        for _ in range(spec.buyers_per_user):
+            gstin = gstins.pop()
+            buyer_id = len(buyer_rows) + 1
+            buyer_rows.append(
+                {
+                    "id": buyer_id, "user_id": user_id, "name": f"{brand(rng)} {rng.choice(SUFFIXES)}", "gstin": gstin,
+                    "address": f"{rng.randint(1, 999)} Main Road, {rng.choice(CITIES)}", "state_code": gstin[:2],
+                }
+            )
+            buyer_ids.setdefault(user_id, []).append(buyer_id)
+            states[("buyer", buyer_id)] = gstin[:2]
+    db.execute(insert(Seller), seller_rows)
+    db.execute(insert(Buyer), buyer_rows)
+
+    brands = [brand(rng) for _ in range(2000)]
+    rows: dict[type, list[dict]] = {Invoice: [], InvoiceItem: [], TaxSummary: []}
+    line_count = 0
+    for n in range(1, spec.invoices + 1):
+        if spec.users == 1 or rng.random() < spec.hot_user_share:
+            user_id = 1
+        else:
+            user_id = rng.randint(1, spec.users)
+        seller_id = rng.choice(seller_ids[user_id])
+        buyer_id = rng.choice(buyer_ids[user_id])
+        intra_state = states[("seller", seller_id)] == states[("buyer", buyer_id)]
+        lines = []
+        for _ in range(spec.lines):
+            name, hsn, price, rate = rng.choice(PRODUCTS)
+            quantity = rng.randint(1, 20)
+            line = _line(quantity, price, rate)
+            lines.append(line)
+            rows[InvoiceItem].append(
+                {
+                    "invoice_id": n, "name": f"{rng.choice(brands)} {name} {rng.choice(SIZES)}", "hsn_sac": hsn,
+                    "quantity": quantity, "unit_price": price, "discount": 0.0, "gst_rate": rate,
+                    "taxable_value": line.taxable_value, "tax_amount": line.tax_amount, "total_value": line.total_value,
+                }
+            )
+        line_count += len(lines)
+        totals = compute_totals(lines, intra_state)
+        rows[Invoice].append(
+            {
+                "id": n, "seller_id": seller_id, "buyer_id": buyer_id, "invoice_number": f"INV-{year}-{n:05d}",
+                "invoice_type": "B2B", "reverse_charge": False, "supply_type": "intra" if intra_state else "inter",
+                "status": "draft", "total_taxable": totals.total_taxable, "total_cgst": totals.total_cgst,
+                "total_sgst": totals.total_sgst, "total_igst": totals.total_igst, "grand_total": totals.grand_total,
+                "grand_total_words": amount_to_words(totals.grand_total), "created_at": EPOCH + timedelta(minutes=n),
+            }
+        )
+        rows[TaxSummary].append(
+            {
+                "invoice_id": n, "total_taxable": totals.total_taxable, "total_cgst": totals.total_cgst,
+                "total_sgst": totals.total_sgst, "total_igst": totals.total_igst, "total_tax": totals.total_tax,
+            }
+        )
+        if len(rows[InvoiceItem]) >= _BATCH:
+            _flush(db, rows)
+    _flush(db, rows)
+
+    connection = db.connection()
+    if connection.dialect.name == "sqlite" and has_fts_table(connection, "invoices_fts"):
+        rebuild_invoice_index(connection)
+    db.commit()
+    return SeedResult(emails, seller_ids, buyer_ids, spec.invoices, line_count)
@@ -1,4 +1,80 @@
 import os
+from contextlib import contextmanager
+
+import pytest
 
 os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
-os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+@pytest.fixture
+def db_session():
+    """In-memory database session with the full ORM schema."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.db.session import Base
+    from app.models import models  # noqa: F401
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def max_queries():
+    """Fail when the wrapped block runs more SQL statements than allowed.
+
+    Usage: `with max_queries(6): client.post(...)`.
+    """
+    from app.db.instrumentation import install_query_instrumentation, track_queries
+
+    install_query_instrumentation()
+
+    @contextmanager
+    def budget(limit: int):
+        with track_queries() as stats:
+            yield stats
+        shapes = "\n".join(f"  {count} x {shape}" for shape, count in stats.shapes.most_common())
+        assert stats.statements <= limit, f"{stats.statements} statements, budget {limit}:\n{shapes}"
+
+    return budget
+
+
+@pytest.fixture
+def client(db_session):
+    """TestClient authenticated as a user owning one seller and one buyer."""
+    from fastapi.testclient import TestClient
+
+    from app.core.security import create_access_token
+    from app.db.session import get_directory_db
+    from app.main import app
+    from app.models.models import Buyer, Seller, User
+    from app.services.catalog_service import catalog
+    from app.services.party_cache import party_cache
+
+    user = User(email="owner@example.com", full_name="Owner", password_hash="x")
+    db_session.add(user)
+    db_session.flush()
+    db_session.add_all(
+        [
+            Seller(user_id=user.id, name="Delhi Grains", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07"),
+            Buyer(user_id=user.id, name="Acme Foods", gstin="29ABCDE1234F1ZW", address="Bengaluru", state_code="29"),
+        ]
+    )
+    db_session.commit()
+    app.dependency_overrides[get_directory_db] = lambda: db_session
+    # Ids restart in every test database; cached parties and products must not carry over.
+    party_cache.clear()
+    catalog.clear()
+    try:
+        with TestClient(app, headers={"Authorization": f"Bearer {create_access_token(user.email)}"}) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.pop(get_directory_db, None)
@@ -0,0 +1,67 @@
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.models.models import Asset
+from app.schemas.schemas import MAX_LOGO_BASE64_LENGTH, InvoiceCreate
+from app.services.asset_service import AssetError, decode_image, logo_images, store_logo
+
+
+def png_base64(color="red"):
+    buffer = BytesIO()
+    Image.new("RGB", (800, 300), color).save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def payload(logo):
+    item = {"name": "Rice", "hsn_sac": "1006", "quantity": 1, "unit_price": 100, "gst_rate": 5}
+    return {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": [item], "logo_base64": logo}
+
+
+def test_decode_image_accepts_data_urls_and_sniffs_type():
+    encoded = png_base64()
+    data, content_type = decode_image(f"data:image/jpeg;base64,{encoded[:40]}\n{encoded[40:]}")
+    assert content_type == "image/png"
+    assert data == base64.b64decode(encoded)
+
+
+@pytest.mark.parametrize("encoded", ["not base64!", base64.b64encode(b"plain text").decode()])
+def test_decode_image_rejects_non_images(encoded):
+    with pytest.raises(AssetError):
+        decode_image(encoded)
+
+
+def test_identical_logos_share_one_asset(db_session):
+    first = store_logo(db_session, png_base64())
+    second = store_logo(db_session, "data:image/png;base64," + png_base64())
+    other = store_logo(db_session, png_base64("blue"))
+    assert first == second != other
+    assert db_session.query(Asset).count() == 2
+
+
+def test_pdf_reuses_cached_logo_image(client):
+    logo_images.clear()
+    invoice_ids = [client.post("/api/v1/invoices", json=payload(png_base64())).json()["id"] for _ in range(2)]
+    for invoice_id in invoice_ids:
+        response = client.get(f"/api/v1/invoices/{invoice_id}/pdf")
+        assert response.status_code == 200
+        assert b"/Subtype /Image" in response.content
+    assert (logo_images.misses, logo_images.hits) == (1, 1)
+
+
+def test_invalid_logo_is_rejected(client):
+    response = client.post("/api/v1/invoices", json=payload("bm90IGFuIGltYWdl"))
+    assert response.status_code == 422
+
+
+def test_logo_payload_length_is_capped(client):
+    largest = b"\x89PNG\r\n\x1a\n" + bytes(settings.max_logo_bytes - 8)
+    encoded = base64.encodebytes(largest).decode("ascii").replace("\n", "\r\n")
+    assert InvoiceCreate(**payload(f"data:image/png;base64,{encoded}")).logo_base64
+
+    response = client.post("/api/v1/invoices", json=payload("A" * (MAX_LOGO_BASE64_LENGTH + 1)))
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "string_too_long"
@@ -0,0 +1,26 @@
+import json
+
+from benchmarks.harness import compare, direction, load_results, write_results
+
+
+def test_metric_direction_from_suffix():
+    assert direction("compute_line_per_sec") == 1
+    assert direction("n1000_list_invoices_ms") == -1
+    assert direction("rebuild_index_s") == -1
+    assert direction("seconds") == -1
+    assert direction("rows") == 0
+
+
+def test_compare_flags_only_regressions_past_threshold():
+    baseline = {"a.x_per_sec": 1000.0, "a.y_ms": 10.0, "a.z_ms": 10.0, "a.rows": 5.0, "a.gone_ms": 1.0}
+    current = {"a.x_per_sec": 850.0, "a.y_ms": 10.5, "a.z_ms": 8.0, "a.rows": 50.0, "a.new_ms": 1.0}
+    regressions = compare(baseline, current, threshold=0.10)
+    assert [(r.metric, round(r.change, 2)) for r in regressions] == [("a.x_per_sec", 0.15)]
+    assert compare(baseline, current, threshold=0.20) == []
+
+
+def test_results_round_trip(tmp_path):
+    path = tmp_path / "results.json"
+    write_results(str(path), {"micro": {"pdf_10_lines_ms": 2.5}}, {"micro": {"repeat": 3}})
+    assert json.loads(path.read_text())["meta"]["options"] == {"micro": {"repeat": 3}}
+    assert load_results(str(path)) == {"micro.pdf_10_lines_ms": 2.5}
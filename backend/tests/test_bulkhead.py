@@ -0,0 +1,71 @@
+import time
+
+import anyio
+import httpx
+from fastapi import FastAPI
+
+from app.api.deps import bulkhead
+from app.services import bulkhead as bulkhead_module
+from app.services.bulkhead import Bulkhead
+from app.services.metrics_service import metrics_counter
+
+RENDER_SECONDS = 0.2
+STORM = 12
+
+
+def storm_app(isolated: bool) -> FastAPI:
+    app = FastAPI()
+
+    def render() -> dict:
+        time.sleep(RENDER_SECONDS)
+        return {"ok": True}
+
+    app.get("/pdf")(bulkhead("pdf")(render) if isolated else render)
+    app.get("/crud")(lambda: {"ok": True})
+    return app
+
+
+async def crud_latency_during_pdf_storm(app: FastAPI) -> tuple[float, list[httpx.Response]]:
+    # A small shared pool keeps the storm short; the PDF bulkhead allows 2.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 4
+    responses = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+
+        async def render():
+            responses.append(await client.get("/pdf"))
+
+        async with anyio.create_task_group() as tasks:
+            for _ in range(STORM):
+                tasks.start_soon(render)
+            await anyio.sleep(0.05)
+            start = time.perf_counter()
+            assert (await client.get("/crud")).status_code == 200
+            latency = time.perf_counter() - start
+    return latency, responses
+
+
+def test_crud_is_isolated_from_pdf_storm(monkeypatch):
+    monkeypatch.setitem(bulkhead_module.bulkheads, "pdf", Bulkhead("pdf", limit=2, queue_timeout=0.3, retry_after=3))
+
+    shared_latency, _ = anyio.run(crud_latency_during_pdf_storm, storm_app(isolated=False))
+    isolated_latency, responses = anyio.run(crud_latency_during_pdf_storm, storm_app(isolated=True))
+
+    assert shared_latency >= RENDER_SECONDS * 0.9
+    assert isolated_latency < RENDER_SECONDS / 2
+    rejected = [response for response in responses if response.status_code == 503]
+    assert rejected and all(response.headers["Retry-After"] == "3" for response in rejected)
+    assert {response.status_code for response in responses} == {200, 503}
+    assert metrics_counter['bulkhead_active{bulkhead="pdf"}'] == 0
+    assert metrics_counter['bulkhead_waiting{bulkhead="pdf"}'] == 0
+
+
+def test_login_runs_in_auth_bulkhead(client, db_session):
+    from app.core.security import get_password_hash
+    from app.models.models import User
+
+    db_session.query(User).one().password_hash = get_password_hash("secret")
+    db_session.commit()
+    calls = metrics_counter['bulkhead_calls_total{bulkhead="auth"}']
+    response = client.post("/api/v1/auth/login", data={"username": "owner@example.com", "password": "secret"})
+    assert response.status_code == 200 and response.json()["access_token"]
+    assert metrics_counter['bulkhead_calls_total{bulkhead="auth"}'] == calls + 1
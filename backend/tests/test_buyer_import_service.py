@@ -0,0 +1,72 @@
+import csv
+import io
+
+import pytest
+
+from app.models.models import Buyer
+from app.services import buyer_import_service
+from app.services.buyer_import_service import import_buyers, read_buyer_rows
+
+CSV = (
+    "\ufeffName,GSTIN,Address,State Code\n"
+    "Acme,07ABCDE1234F1Z2,Delhi,07\n"
+    "Typo,07ABCDE1234F1Z5,Delhi,07\n"
+    "Walk-in,,Bengaluru,29\n"
+    "Acme again,07ABCDE1234F1Z2,Delhi,7\n"
+    "Karnataka Co,29ABCDE1234F1ZW,Bengaluru,\n"
+    "Mismatch,29PQRSX5678K1ZU,Delhi,07\n"
+    ",,,\n"
+    "Existing,27AAPFU0939F1ZV,Mumbai,27\n"
+)
+
+
+def rows(text):
+    return read_buyer_rows(io.StringIO(text.encode("utf-8").decode("utf-8-sig")))
+
+
+def test_import_validates_dedupes_and_reports_rows(db_session):
+    db_session.add(Buyer(user_id=1, name="Old", gstin="27AAPFU0939F1ZV", address="Mumbai", state_code="27"))
+    db_session.add(Buyer(user_id=2, name="Other tenant", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07"))
+    db_session.commit()
+
+    result = import_buyers(db_session, rows(CSV), user_id=1, batch_size=2)
+
+    assert result.total_rows == 7
+    assert result.inserted == 3
+    assert result.duplicates == 2
+    assert [(e.row, e.error) for e in result.errors] == [
+        (3, "Invalid GSTIN checksum"),
+        (5, "Duplicate GSTIN in file (first seen on row 2)"),
+        (7, "GSTIN state code mismatch"),
+        (9, "Buyer with this GSTIN already exists"),
+    ]
+    imported = {b.name: b.state_code for b in db_session.query(Buyer).filter(Buyer.user_id == 1)}
+    assert imported == {"Old": "27", "Acme": "07", "Walk-in": "29", "Karnataka Co": "29"}
+
+
+def test_missing_columns_rejected():
+    with pytest.raises(ValueError):
+        list(rows("gstin,state_code\n07ABCDE1234F1Z2,07\n"))
+
+
+def test_error_list_is_capped(db_session, monkeypatch):
+    monkeypatch.setattr(buyer_import_service, "MAX_ERRORS", 2)
+    result = import_buyers(db_session, rows("name,address,state_code\n" + "Nameless,,07\n" * 5), user_id=1)
+    assert (result.total_rows, result.error_count, len(result.errors)) == (5, 5, 2)
+
+
+def test_unreadable_file_reports_what_was_imported(client, db_session):
+    body = "name,address,state_code\n".encode() + b"".join(f"Walk-in {n},Delhi,07\n".encode() for n in range(3000)) + b"Caf\xe9,Delhi,07\n"
+    response = client.post("/api/v1/buyers/import", files={"file": ("buyers.csv", body, "text/csv")})
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert detail["error"].startswith("'utf-8' codec can't decode")
+    imported = detail["report"]["inserted"]
+    assert imported > 1000 and db_session.query(Buyer).filter(Buyer.user_id == 1).count() == imported + 1
+
+
+def test_malformed_csv_is_a_bad_request(client):
+    body = b"name,address,state_code\nWalk-in,Delhi,07\nWalk-in," + b"x" * (csv.field_size_limit() + 1) + b",07\n"
+    response = client.post("/api/v1/buyers/import", files={"file": ("buyers.csv", body, "text/csv")})
+    assert response.status_code == 400
+    assert response.json()["detail"]["report"]["inserted"] == 1
@@ -0,0 +1,72 @@
+import pytest
+
+from app.models.models import Buyer
+from app.services import buyer_search_service
+from app.services.buyer_search_service import search_buyers
+
+
+@pytest.fixture
+def buyers(db_session):
+    db_session.add_all(
+        [
+            Buyer(user_id=1, name="Acme Traders", gstin="07ABCDE1234F1Z2", address="Karol Bagh, Delhi", state_code="07"),
+            Buyer(user_id=1, name="Bharat Steel", gstin="27AAPFU0939F1ZV", address="Andheri, Mumbai", state_code="27"),
+            Buyer(user_id=1, name="Acme Foods", gstin=None, address="Indiranagar, Bengaluru", state_code="29"),
+            Buyer(user_id=1, name="Zenith Retail", gstin="29ABCDE1234F1ZW", address="MG Road, Bengaluru", state_code="29"),
+            Buyer(user_id=2, name="Acme Other Tenant", gstin=None, address="Delhi", state_code="07"),
+        ]
+    )
+    db_session.commit()
+    return db_session
+
+
+@pytest.fixture(params=["scan", "fts"])
+def search_path(request, monkeypatch):
+    if request.param == "fts":
+        monkeypatch.setattr(buyer_search_service, "SMALL_TENANT_SCAN_LIMIT", 0)
+    return request.param
+
+
+def names(page):
+    return [buyer.name for buyer in page.items]
+
+
+def test_lists_only_own_buyers_in_name_order(buyers):
+    page = search_buyers(buyers, user_id=1)
+    assert names(page) == ["Acme Foods", "Acme Traders", "Bharat Steel", "Zenith Retail"]
+    assert page.next_cursor is None
+
+
+def test_keyset_pagination(buyers):
+    first = search_buyers(buyers, user_id=1, limit=3)
+    assert names(first) == ["Acme Foods", "Acme Traders", "Bharat Steel"]
+    second = search_buyers(buyers, user_id=1, cursor=first.next_cursor, limit=3)
+    assert names(second) == ["Zenith Retail"]
+    assert second.next_cursor is None
+
+
+def test_substring_match_on_name_gstin_and_address(buyers, search_path):
+    assert names(search_buyers(buyers, user_id=1, q="acme")) == ["Acme Foods", "Acme Traders"]
+    assert names(search_buyers(buyers, user_id=1, q="aapfu")) == ["Bharat Steel"]
+    assert names(search_buyers(buyers, user_id=1, q="bengaluru ret")) == ["Zenith Retail"]
+
+
+def test_short_terms_match_name_prefix(buyers):
+    assert names(search_buyers(buyers, user_id=1, q="ZE")) == ["Zenith Retail"]
+    assert names(search_buyers(buyers, user_id=1, q="ac fo")) == ["Acme Foods"]
+    assert names(search_buyers(buyers, user_id=1, q="ac delhi")) == ["Acme Traders"]
+
+
+def test_index_follows_updates_and_deletes(buyers, search_path):
+    buyer = buyers.query(Buyer).filter(Buyer.name == "Bharat Steel").one()
+    buyer.name = "Bharat Metals"
+    buyers.delete(buyers.query(Buyer).filter(Buyer.name == "Zenith Retail").one())
+    buyers.commit()
+    assert names(search_buyers(buyers, user_id=1, q="steel")) == []
+    assert names(search_buyers(buyers, user_id=1, q="metal")) == ["Bharat Metals"]
+    assert names(search_buyers(buyers, user_id=1, q="retail")) == []
+
+
+def test_bad_cursor_rejected(buyers):
+    with pytest.raises(ValueError):
+        search_buyers(buyers, user_id=1, cursor="not-a-cursor")
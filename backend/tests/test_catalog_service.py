@@ -0,0 +1,58 @@
+from app.models.models import Product
+from app.services.catalog_service import catalog
+
+RICE = {"name": "Basmati Rice", "hsn_sac": "1006", "unit_price": 99.5, "gst_rate": 5}
+FAN = {"name": "Ceiling Fan", "hsn_sac": "8414", "unit_price": 2450, "gst_rate": 18}
+
+
+def create(client, items):
+    return client.post("/api/v1/invoices", json={"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": items})
+
+
+def test_lines_are_filled_from_the_catalog_in_one_lookup(client, max_queries):
+    rice = client.post("/api/v1/products", json=RICE).json()
+    fan = client.post("/api/v1/products", json=FAN).json()
+    items = [{"product_id": rice["id"], "quantity": 2}, {"product_id": fan["id"], "quantity": 1, "unit_price": 2400}, {**RICE, "name": "Loose rice", "quantity": 1}]
+    invoice = create(client, items).json()
+    lines = [(line["product_id"], line["name"], line["hsn_sac"], line["unit_price"], line["gst_rate"]) for line in invoice["items"]]
+    assert lines == [(rice["id"], "Basmati Rice", "1006", 99.5, 5), (fan["id"], "Ceiling Fan", "8414", 2400, 18), (None, "Loose rice", "1006", 99.5, 5)]
+    assert invoice["total_taxable"] == 2 * 99.5 + 2400 + 99.5
+
+    many = [{"product_id": rice["id"] if n % 2 else fan["id"], "quantity": 1} for n in range(50)]
+    with max_queries(10 + 50) as stats:
+        assert create(client, many).status_code == 200
+    assert not any("FROM products" in shape for shape in stats.shapes)
+
+    edit = {"add": [{"product_id": rice["id"], "quantity": 3}], "modify": [{"id": invoice["items"][2]["id"], "product_id": fan["id"]}]}
+    patched = client.patch(f"/api/v1/invoices/{invoice['id']}/items", json=edit).json()
+    assert [(line["product_id"], line["name"], line["unit_price"]) for line in patched["items"]][2:] == [(fan["id"], "Ceiling Fan", 2450), (rice["id"], "Basmati Rice", 99.5)]
+
+
+def test_product_changes_reach_new_lines_only(client):
+    rice = client.post("/api/v1/products", json=RICE).json()
+    first = create(client, [{"product_id": rice["id"], "quantity": 1}]).json()
+    assert client.put(f"/api/v1/products/{rice['id']}", json={**RICE, "unit_price": 120}).status_code == 200
+    second = create(client, [{"product_id": rice["id"], "quantity": 1}]).json()
+    assert second["items"][0]["unit_price"] == 120
+    assert client.get(f"/api/v1/invoices/{first['id']}/json").json()["grand_total"] == first["grand_total"]
+    assert [product["unit_price"] for product in client.get("/api/v1/products").json()] == [120]
+
+
+def test_unknown_products_and_incomplete_lines_are_rejected(client, db_session):
+    db_session.add(Product(user_id=2, **RICE))
+    db_session.commit()
+    response = create(client, [{"product_id": 1, "quantity": 1}, {"product_id": 99, "quantity": 1}])
+    assert response.status_code == 422 and response.json()["detail"] == "Products [1, 99] not found"
+    assert create(client, [{"name": "Rice", "quantity": 1}]).status_code == 422
+    assert catalog.resolve(db_session, 2, [1])[1].name == "Basmati Rice"
+    assert client.put("/api/v1/products/1", json=RICE).status_code == 404
+
+
+def test_writes_from_other_workers_are_seen_once_entries_expire(client, db_session, monkeypatch):
+    monkeypatch.setattr(catalog, "ttl_seconds", 0)
+    rice = client.post("/api/v1/products", json=RICE).json()
+    assert create(client, [{"product_id": rice["id"], "quantity": 1}]).json()["items"][0]["unit_price"] == 99.5
+    # Another worker edits the product; this process's versions never hear of it.
+    db_session.query(Product).filter(Product.id == rice["id"]).update({"unit_price": 120})
+    db_session.commit()
+    assert create(client, [{"product_id": rice["id"], "quantity": 1}]).json()["items"][0]["unit_price"] == 120
@@ -0,0 +1,86 @@
+import threading
+from datetime import datetime
+
+import anyio
+import orjson
+
+from app.models.models import InvoiceEvent
+from app.services.event_service import EventRow, notifier, record_events, stream_events
+from app.services.sequence_service import issue_date
+
+
+def payload():
+    item = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 2, "unit_price": 99.5, "gst_rate": 5}
+    return {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": [item]}
+
+
+def test_invoice_changes_are_appended_in_order(client, db_session):
+    invoice = client.post("/api/v1/invoices", json=payload()).json()
+    edit = {"modify": [{"id": invoice["items"][0]["id"], "quantity": 4}]}
+    assert client.patch(f"/api/v1/invoices/{invoice['id']}/items", json=edit).status_code == 200
+    number = client.post("/api/v1/invoices/finalize", json={"invoice_ids": [invoice["id"]]}).json()["finalized"][0]["invoice_number"]
+    # Another tenant's events are never visible.
+    db_session.add(InvoiceEvent(user_id=99, invoice_id=invoice["id"], type="invoice.updated", payload="{}"))
+    db_session.commit()
+
+    page = client.get("/api/v1/events").json()
+    assert [(event["type"], event["invoice_id"]) for event in page["events"]] == [
+        ("invoice.created", invoice["id"]),
+        ("invoice.updated", invoice["id"]),
+        ("invoice.finalized", invoice["id"]),
+    ]
+    created, updated, finalized = (event["data"] for event in page["events"])
+    assert created["status"] == "draft" and created["invoice_number"] is None and created["line_count"] == 1
+    assert updated["grand_total"] == 2 * created["grand_total"]
+    assert finalized == {"invoice_number": number, "status": "finalized", "issued_on": issue_date().isoformat()}
+    assert page["next_after"] == page["events"][-1]["id"]
+
+    offsets = [event["id"] for event in page["events"]]
+    resumed = client.get(f"/api/v1/events?after={offsets[0]}&limit=1").json()
+    assert [event["id"] for event in resumed["events"]] == offsets[1:2]
+    assert client.get(f"/api/v1/events?after={page['next_after']}").json() == {"events": [], "next_after": page["next_after"]}
+    assert client.get("/api/v1/events/stream", headers={"Last-Event-ID": "abc"}).status_code == 400
+
+
+def test_events_wake_streams_only_when_committed(db_session):
+    seen = notifier.generation(7)
+    record_events(db_session, 7, "invoice.finalized", {1: {"status": "finalized"}})
+    db_session.rollback()
+    assert notifier.generation(7) == seen and db_session.query(InvoiceEvent).count() == 0
+    record_events(db_session, 7, "invoice.finalized", {1: {"status": "finalized"}})
+    db_session.commit()
+    assert notifier.generation(7) == seen + 1
+
+
+def test_stream_pages_wakes_on_commit_and_sends_heartbeats():
+    created_at = datetime(2026, 5, 1)
+    pages = [
+        [EventRow(1, 10, "invoice.created", '{"status":"draft"}', created_at), EventRow(2, 10, "invoice.updated", "{}", created_at)],
+        [],
+        [EventRow(3, 10, "invoice.finalized", '{"status":"finalized"}', created_at)],
+        [],
+    ]
+    cursors = []
+
+    async def fetch(after):
+        cursors.append(after)
+        return pages.pop(0) if pages else []
+
+    async def consume():
+        chunks = []
+        # The poll interval is long; only the commit notification can wake it in time.
+        stream = stream_events(fetch, 42, 0, poll_seconds=0.5, heartbeat_seconds=0.5)
+        chunks.append(await stream.__anext__())
+        threading.Timer(0.05, notifier.notify, args=([42],)).start()
+        with anyio.fail_after(0.4):
+            chunks.append(await stream.__anext__())
+        chunks.append(await stream.__anext__())
+        await stream.aclose()
+        return chunks
+
+    first, second, heartbeat = anyio.run(consume)
+    assert first.count(b"\n\n") == 2 and first.startswith(b"id: 1\nevent: invoice.created\ndata: ")
+    event = orjson.loads(second.split(b"data: ")[1])
+    assert event["id"] == 3 and event["data"] == {"status": "finalized"}
+    assert heartbeat == b": keepalive\n\n"
+    assert cursors == [0, 2, 2, 3]
@@ -0,0 +1,64 @@
+from app.models.models import Invoice, InvoiceSequence, Seller
+from app.services.invoice_search_service import search_invoices
+from app.services.sequence_service import get_financial_year, issue_date
+
+
+def payload():
+    item = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 2, "unit_price": 99.5, "gst_rate": 5}
+    return {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": [item]}
+
+
+def create_drafts(client, count):
+    drafts = [client.post("/api/v1/invoices", json=payload()).json() for _ in range(count)]
+    assert all(draft["invoice_number"] is None and draft["status"] == "draft" for draft in drafts)
+    return [draft["id"] for draft in drafts]
+
+
+def test_batch_finalize_numbers_drafts_without_gaps(client, max_queries):
+    fy = get_financial_year()
+    ids = create_drafts(client, 5)
+    # Abandoned drafts (ids[1]) no longer consume numbers.
+    first = client.post("/api/v1/invoices/finalize", json={"invoice_ids": [ids[2], ids[0], 999]}).json()
+    assert first["finalized"] == [
+        {"id": ids[0], "invoice_number": f"{fy}/07/000001"},
+        {"id": ids[2], "invoice_number": f"{fy}/07/000002"},
+    ]
+    assert first["skipped"] == [{"id": 999, "reason": "not_found"}]
+
+    with max_queries(9):
+        second = client.post("/api/v1/invoices/finalize", json={"invoice_ids": [ids[0], ids[3], ids[4]]}).json()
+    assert [row["invoice_number"] for row in second["finalized"]] == [f"{fy}/07/000003", f"{fy}/07/000004"]
+    assert second["skipped"] == [{"id": ids[0], "reason": "already_finalized"}]
+
+
+def test_batch_finalize_updates_rows_sequence_and_search(client, db_session):
+    ids = create_drafts(client, 3)
+    assert client.post("/api/v1/invoices/finalize", json={"invoice_ids": ids}).status_code == 200
+    db_session.expire_all()
+    invoices = db_session.query(Invoice).order_by(Invoice.id).all()
+    assert {(invoice.status, invoice.issued_on) for invoice in invoices} == {("finalized", issue_date())}
+    assert db_session.query(InvoiceSequence.seller_id, InvoiceSequence.current_value).all() == [(1, 3)]
+    hits = search_invoices(db_session, 1, invoices[1].invoice_number.split("/")[-1]).items
+    assert [hit.id for hit in hits] == [ids[1]]
+
+
+def test_single_finalize_assigns_number_and_locks(client):
+    [invoice_id] = create_drafts(client, 1)
+    finalized = client.post(f"/api/v1/invoices/{invoice_id}/finalize").json()
+    assert finalized["status"] == "finalized" and finalized["invoice_number"].endswith("/07/000001")
+    again = client.post(f"/api/v1/invoices/{invoice_id}/finalize").json()
+    assert again["invoice_number"] == finalized["invoice_number"]
+    assert client.put(f"/api/v1/invoices/{invoice_id}", json=payload()).status_code == 400
+    assert client.post("/api/v1/invoices/12345/finalize").status_code == 404
+    assert client.post("/api/v1/invoices/finalize", json={"invoice_ids": []}).status_code == 422
+
+
+def test_each_seller_numbers_its_own_invoices(client, db_session):
+    other = Seller(user_id=1, name="Delhi Mills", gstin="07AAPFU0939F1ZV", address="Delhi", state_code="07")
+    db_session.add(other)
+    db_session.commit()
+    ids = create_drafts(client, 2)
+    other_id = client.post("/api/v1/invoices", json={**payload(), "seller_id": other.id}).json()["id"]
+    finalized = client.post("/api/v1/invoices/finalize", json={"invoice_ids": [*ids, other_id]}).json()["finalized"]
+    numbers = {row["id"]: row["invoice_number"].split("/", 1)[1] for row in finalized}
+    assert numbers == {ids[0]: "07/000001", ids[1]: "07/000002", other_id: "07/000001"}
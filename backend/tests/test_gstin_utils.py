@@ -1,8 +1,9 @@
-from app.utils.gst import is_valid_gstin
+from app.utils.gst import check_gstin, gstin_check_digit, is_valid_gstin, validate_gstins
 
 
 def test_valid_gstin():
-    assert is_valid_gstin("07ABCDE1234F1Z5") is True
+    assert is_valid_gstin("07ABCDE1234F1Z2") is True
+    assert is_valid_gstin("27AAPFU0939F1ZV") is True
 
 
 def test_invalid_pan_segment():
@@ -11,3 +12,23 @@ def test_invalid_pan_segment():
 
 def test_invalid_pattern():
     assert is_valid_gstin("07ABCDE1234F115") is False
+
+
+def test_check_digit():
+    assert gstin_check_digit("29AAGCB7383J1Z") == "4"
+
+
+def test_checksum_typo_rejected():
+    result = check_gstin("07ABCDE1234F1Z5")
+    assert result.valid is False
+    assert result.reason == "Invalid GSTIN checksum"
+
+
+def test_unknown_state_code_rejected():
+    assert check_gstin("00ABCDE1234F1Z2").reason == "Unknown GSTIN state code"
+
+
+def test_validate_gstins_batch():
+    results = list(validate_gstins(["07ABCDE1234F1Z2", "bad", "07ABCDE1234F1Z2"]))
+    assert [r.valid for r in results] == [True, False, True]
+    assert results[1].reason == "Invalid GSTIN format"
@@ -0,0 +1,104 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.models import IdempotencyKey
+from app.services.idempotency_service import IdempotencyConflict, IdempotencyStore, idempotency_store, request_fingerprint
+
+
+def make_store(**overrides):
+    options = {"maxsize": 8, "ttl_seconds": 3600, "sweep_interval_seconds": 300}
+    options.update(overrides)
+    return IdempotencyStore(**options)
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint({"a": 1, "b": [1, 2]}) == request_fingerprint({"b": [1, 2], "a": 1})
+    assert request_fingerprint({"a": 1}) != request_fingerprint({"a": 2})
+
+
+def test_unknown_key_returns_none(db_session):
+    assert make_store().lookup(db_session, "k1", 1, "h") is None
+
+
+def test_replay_served_from_table_then_cache(db_session):
+    store = make_store()
+    store.record(db_session, "k1", 1, "h", 42)
+    db_session.commit()
+    assert store.lookup(db_session, "k1", 1, "h") == 42
+
+    db_session.query(IdempotencyKey).delete()
+    db_session.commit()
+    assert store.lookup(db_session, "k1", 1, "h") == 42
+
+
+def test_payload_mismatch_conflicts_and_keys_are_per_user(db_session):
+    store = make_store()
+    store.remember("k1", 1, "h", 42)
+    with pytest.raises(IdempotencyConflict):
+        store.lookup(db_session, "k1", 1, "other")
+    store.record(db_session, "k1", 1, "h", 42)
+    db_session.commit()
+    assert store.lookup(db_session, "k1", 2, "other") is None
+    store.record(db_session, "k1", 2, "other", 43)
+    db_session.commit()
+    assert store.lookup(db_session, "k1", 2, "other") == 43
+
+
+def test_expired_keys_are_ignored_and_swept(db_session):
+    store = make_store(ttl_seconds=60)
+    stale = datetime.utcnow() - timedelta(minutes=5)
+    db_session.add(IdempotencyKey(key="old", user_id=1, request_hash="h", invoice_id=1, created_at=stale))
+    db_session.add(IdempotencyKey(key="older", user_id=1, request_hash="h", invoice_id=1, created_at=stale))
+    db_session.add(IdempotencyKey(key="new", user_id=1, request_hash="h", invoice_id=2))
+    db_session.commit()
+
+    # An expired key can be recorded again before any sweep has run.
+    assert store.lookup(db_session, "old", 1, "other") is None
+    store.record(db_session, "old", 1, "other", 3)
+    db_session.commit()
+    assert store.lookup(db_session, "old", 1, "other") == 3
+    db_session.query(IdempotencyKey).filter(IdempotencyKey.key == "old").delete()
+    assert store.sweep(db_session) == 1
+    assert [row.key for row in db_session.query(IdempotencyKey).all()] == ["new"]
+    assert store.maybe_sweep(db_session) == 0
+
+
+def test_single_flight_serializes_same_key():
+    store = make_store()
+    active = []
+    overlaps = []
+
+    def worker():
+        with store.single_flight(1, "k1"):
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.01)
+            active.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert overlaps == [1] * 5
+    assert store._inflight == {}
+
+
+def test_reusing_an_expired_key_creates_a_new_invoice(client, db_session):
+    payload = {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": [{"name": "Rice", "hsn_sac": "1006", "quantity": 1, "unit_price": 100, "gst_rate": 5}]}
+    headers = {"Idempotency-Key": "order-7"}
+    first = client.post("/api/v1/invoices", json=payload, headers=headers).json()
+    db_session.query(IdempotencyKey).update({"created_at": datetime.utcnow() - timedelta(days=2)})
+    db_session.commit()
+    idempotency_store.clear()
+    # Swept a moment ago, so the stale row is still there.
+    idempotency_store._last_sweep[str(db_session.get_bind().url)] = time.monotonic()
+
+    retry = client.post("/api/v1/invoices", json=payload, headers=headers)
+    assert retry.status_code == 200 and retry.json()["id"] != first["id"]
+    assert "Idempotent-Replayed" not in retry.headers
+    replay = client.post("/api/v1/invoices", json=payload, headers=headers)
+    assert replay.json()["id"] == retry.json()["id"] and replay.headers["Idempotent-Replayed"] == "true"
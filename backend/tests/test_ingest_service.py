@@ -0,0 +1,111 @@
+from datetime import date, datetime
+
+import orjson
+import pytest
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.db.session import Base
+from app.models.models import Buyer, IngestCheckpoint, Invoice, InvoiceItem, InvoiceSequence, Seller, TaxSummary, User
+from app.services import ingest_service
+from app.services.ingest_service import deferred_indexes, ingest
+from app.services.sequence_service import allocate_invoice_numbers
+
+CSV_HEADER = "Invoice Number,Date,Seller GSTIN,Buyer GSTIN,Buyer Name,Invoice Type,Name,HSN SAC,Quantity,Unit Price,Discount,GST Rate\n"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(User.__table__.insert().values(id=1, email="owner@example.com", full_name="Owner", password_hash="x", created_at=datetime(2026, 1, 1)))
+        connection.execute(Seller.__table__.insert().values(id=1, user_id=1, name="Delhi Grains", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07", words_language="en"))
+        connection.execute(
+            Buyer.__table__.insert(),
+            [
+                {"id": 1, "user_id": 1, "name": "Acme Foods", "gstin": "29ABCDE1234F1ZW", "address": "Bengaluru", "state_code": "29"},
+                {"id": 2, "user_id": 1, "name": "Walk-in Customer", "gstin": None, "address": "Delhi", "state_code": "07"},
+            ],
+        )
+    yield engine
+    engine.dispose()
+
+
+def invoice(number, buyer_gstin="29ABCDE1234F1ZW"):
+    item = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 2, "unit_price": 99.5, "gst_rate": 5}
+    return {"invoice_number": number, "date": "2021-04-15", "seller_gstin": "07ABCDE1234F1Z2", "buyer_gstin": buyer_gstin, "items": [item]}
+
+
+def test_csv_groups_lines_and_reports_bad_records(engine, tmp_path):
+    source = tmp_path / "history.csv"
+    source.write_text(
+        CSV_HEADER
+        + "OLD/21/001,15-04-2021,07ABCDE1234F1Z2,29ABCDE1234F1ZW,,B2B,Rice,1006,2,99.5,0,5\n"
+        + "OLD/21/001,15-04-2021,07ABCDE1234F1Z2,29ABCDE1234F1ZW,,B2B,Fan,8414,1,2450,50,18\n"
+        + "OLD/21/002,16-04-2021,07ABCDE1234F1Z2,,walk-in customer,B2C,Rice,1006,1,100,0,5\n"
+        + "OLD/21/003,16-04-2021,07ABCDE1234F1Z2,29ABCDE1234F1ZW,,B2B,Rice,1006,1,100,0,7\n"
+        + "OLD/21/004,16-04-2021,27ABCDE1234F1Z0,29ABCDE1234F1ZW,,B2B,Rice,1006,1,100,0,5\n"
+    )
+    with engine.connect() as connection:
+        report = ingest(connection, source, user_id=1, workers=0)
+    assert (report.records, report.invoices, report.lines, report.error_count) == (4, 2, 3, 2)
+    assert [(error.record, error.invoice_number) for error in report.errors] == [(4, "OLD/21/004"), (3, "OLD/21/003")]
+
+    with engine.connect() as connection:
+        rows = connection.execute(select(Invoice.invoice_number, Invoice.status, Invoice.supply_type, Invoice.grand_total, Invoice.created_at, Invoice.issued_on).order_by(Invoice.id)).all()
+        assert rows == [
+            ("OLD/21/001", "finalized", "inter", 3040.95, datetime(2021, 4, 15), date(2021, 4, 15)),
+            ("OLD/21/002", "finalized", "intra", 105.0, datetime(2021, 4, 16), date(2021, 4, 16)),
+        ]
+        assert connection.scalar(select(func.sum(TaxSummary.total_cgst))) == 2.5
+        indexes = {index["name"] for table in ("invoices", "invoice_items", "tax_summary") for index in inspect(connection).get_indexes(table)}
+        assert {index.name for index in deferred_indexes()} <= indexes
+
+
+def test_interrupted_run_resumes_from_checkpoint(engine, tmp_path, monkeypatch):
+    source = tmp_path / "history.ndjson"
+    source.write_bytes(b"".join(orjson.dumps(invoice(f"OLD/{n:03d}")) + b"\n" for n in range(1, 8)) + b"{not json\n")
+    write = ingest_service._write
+    calls = []
+
+    def crash_on_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("killed")
+        write(*args)
+
+    monkeypatch.setattr(ingest_service, "_write", crash_on_second_batch)
+    with engine.connect() as connection, pytest.raises(RuntimeError):
+        ingest(connection, source, user_id=1, batch_size=3, workers=2)
+    with engine.connect() as connection:
+        assert connection.scalar(select(IngestCheckpoint.records_done)) == 3
+        assert connection.scalar(select(func.count()).select_from(Invoice)) == 3
+        assert "ix_invoice_items_invoice_id" in {index["name"] for index in inspect(connection).get_indexes("invoice_items")}
+
+    monkeypatch.setattr(ingest_service, "_write", write)
+    with engine.connect() as connection:
+        report = ingest(connection, source, user_id=1, batch_size=3, workers=2)
+    assert (report.skipped_records, report.records, report.invoices, report.error_count) == (3, 5, 4, 1)
+    with engine.connect() as connection:
+        numbers = connection.execute(select(Invoice.invoice_number).order_by(Invoice.invoice_number)).scalars().all()
+        assert numbers == [f"OLD/{n:03d}" for n in range(1, 8)]
+        assert connection.scalar(select(func.count()).select_from(InvoiceItem)) == 7
+        assert connection.execute(select(IngestCheckpoint.records_done, IngestCheckpoint.invoices)).one() == (8, 7)
+    with engine.connect() as connection:
+        # A finished source is not imported again.
+        assert ingest(connection, source, user_id=1, workers=0).invoices == 0
+
+
+def test_ingested_numbers_advance_the_seller_sequences(engine, tmp_path):
+    source = tmp_path / "history.ndjson"
+    numbers = ["2021-22/07/000005", "2021-22/07/000009", "2022-23/07/000002", "OLD/21/001"]
+    source.write_bytes(b"".join(orjson.dumps(invoice(number)) + b"\n" for number in numbers))
+    with engine.begin() as connection:
+        connection.execute(InvoiceSequence.__table__.insert().values(financial_year="2021-22", seller_id=1, current_value=3))
+    with engine.connect() as connection:
+        ingest(connection, source, user_id=1, workers=0)
+
+    with Session(engine) as db:
+        assert allocate_invoice_numbers(db, 1, "07", 1, fy="2021-22") == ["2021-22/07/000010"]
+        assert allocate_invoice_numbers(db, 1, "07", 1, fy="2022-23") == ["2022-23/07/000003"]
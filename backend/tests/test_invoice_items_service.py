@@ -0,0 +1,109 @@
+import random
+
+import pytest
+from sqlalchemy import event
+
+from app.models.models import Buyer, Invoice, InvoiceItem, Seller, TaxSummary
+from app.services.invoice_items_service import LineChanges, LineItemError, apply_line_changes, diff_lines
+from app.services.tax_service import compute_line, compute_totals
+
+
+def line(name, quantity, unit_price, gst_rate, discount=0.0):
+    result = compute_line(quantity, unit_price, discount, gst_rate)
+    return InvoiceItem(
+        name=name,
+        hsn_sac="1006",
+        quantity=quantity,
+        unit_price=unit_price,
+        discount=discount,
+        gst_rate=gst_rate,
+        taxable_value=result.taxable_value,
+        tax_amount=result.tax_amount,
+        total_value=result.total_value,
+    )
+
+
+@pytest.fixture
+def draft(db_session):
+    seller = Seller(user_id=1, name="Delhi Grains", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07")
+    buyer = Buyer(user_id=1, name="Acme Foods", gstin="07AAPFU0939F1ZV", address="Delhi", state_code="07")
+    items = [line(f"Item {n}", n + 1, 99.99 + n, (5, 12, 18)[n % 3]) for n in range(6)]
+    totals = compute_totals([compute_line(i.quantity, i.unit_price, i.discount, i.gst_rate) for i in items], intra_state=True)
+    invoice = Invoice(
+        invoice_number="INV-2026-00001",
+        seller=seller,
+        buyer=buyer,
+        invoice_type="B2B",
+        supply_type="intra",
+        items=items,
+        total_taxable=totals.total_taxable,
+        total_cgst=totals.total_cgst,
+        total_sgst=totals.total_sgst,
+        total_igst=totals.total_igst,
+        grand_total=totals.grand_total,
+    )
+    db_session.add(invoice)
+    db_session.flush()
+    db_session.add(TaxSummary(invoice_id=invoice.id, total_taxable=0, total_cgst=0, total_sgst=0, total_igst=0, total_tax=0))
+    db_session.commit()
+    return invoice
+
+
+def recomputed_totals(invoice):
+    lines = [compute_line(i.quantity, i.unit_price, i.discount, i.gst_rate) for i in invoice.items]
+    return compute_totals(lines, intra_state=invoice.supply_type == "intra")
+
+
+def test_incremental_totals_match_full_recompute(db_session, draft):
+    rng = random.Random(4)
+    for _ in range(30):
+        ids = [item.id for item in draft.items]
+        changes = LineChanges(
+            add=[{"name": "New", "hsn_sac": "1006", "quantity": rng.randint(1, 9), "unit_price": round(rng.uniform(1, 999), 2), "gst_rate": 18}],
+            modify={rng.choice(ids): {"quantity": rng.randint(1, 50), "discount": round(rng.uniform(0, 20), 2)}},
+            remove={rng.choice(ids)} if len(ids) > 3 else set(),
+        )
+        changes.remove -= set(changes.modify)
+        apply_line_changes(db_session, draft, changes, "en", supply_type=rng.choice(["intra", "inter"]))
+        db_session.commit()
+        expected = recomputed_totals(draft)
+        assert (draft.total_taxable, draft.total_cgst, draft.total_sgst, draft.total_igst, draft.grand_total) == (
+            expected.total_taxable,
+            expected.total_cgst,
+            expected.total_sgst,
+            expected.total_igst,
+            expected.grand_total,
+        )
+    tax = db_session.query(TaxSummary).filter(TaxSummary.invoice_id == draft.id).one()
+    assert tax.total_tax == recomputed_totals(draft).total_tax
+
+
+def test_only_touched_lines_are_written(db_session, draft):
+    statements = []
+    event.listen(db_session.bind, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    first, second = draft.items[0], draft.items[1]
+    result = apply_line_changes(
+        db_session, draft, LineChanges(modify={first.id: {"name": "Renamed"}, second.id: {"quantity": second.quantity}}), "en"
+    )
+    db_session.commit()
+    assert (result.modified, result.recomputed) == (1, 0)
+    writes = [s for s in statements if s.startswith(("UPDATE invoice_items", "DELETE FROM invoice_items", "INSERT INTO invoice_items"))]
+    assert writes == ["UPDATE invoice_items SET name=? WHERE invoice_items.id = ?"]
+
+
+def test_diff_lines_keeps_ids_adds_new_and_removes_missing(draft):
+    kept = draft.items[2]
+    changes = diff_lines(draft, [{"id": kept.id, "name": kept.name, "quantity": 9}, {"name": "Fresh", "quantity": 1}])
+    assert changes.modify == {kept.id: {"name": kept.name, "quantity": 9}}
+    assert changes.add == [{"name": "Fresh", "quantity": 1}]
+    assert changes.remove == {item.id for item in draft.items} - {kept.id}
+
+
+def test_unknown_or_conflicting_lines_are_rejected(db_session, draft):
+    with pytest.raises(LineItemError):
+        diff_lines(draft, [{"id": 999, "name": "Ghost"}])
+    with pytest.raises(LineItemError):
+        apply_line_changes(db_session, draft, LineChanges(remove={999}), "en")
+    line_id = draft.items[0].id
+    with pytest.raises(LineItemError):
+        apply_line_changes(db_session, draft, LineChanges(modify={line_id: {"quantity": 2}}, remove={line_id}), "en")
@@ -0,0 +1,20 @@
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.schemas.schemas import InvoiceRead
+
+
+def payload(lines):
+    items = [{"name": f"Rice {n}", "hsn_sac": "1006", "quantity": n + 1, "unit_price": 99.5, "gst_rate": 5} for n in range(lines)]
+    return {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": items}
+
+
+def test_fast_invoice_list_matches_validated_response(client, monkeypatch):
+    for lines in (3, 1, 5):
+        assert client.post("/api/v1/invoices", json=payload(lines)).status_code == 200
+    standard = client.get("/api/v1/invoices")
+    monkeypatch.setattr(settings, "fast_invoice_serialization", True)
+    fast = client.get("/api/v1/invoices")
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == standard.json()
+    TypeAdapter(list[InvoiceRead]).validate_python(fast.json())
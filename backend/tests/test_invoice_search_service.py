@@ -0,0 +1,95 @@
+import pytest
+
+from app.db.fts import rebuild_invoice_index
+from app.models.models import Buyer, Invoice, InvoiceItem, Seller
+from app.services.invoice_search_service import search_invoices
+
+
+def item(name, hsn_sac="1006"):
+    return InvoiceItem(
+        name=name, hsn_sac=hsn_sac, quantity=1, unit_price=100, gst_rate=5, taxable_value=100, tax_amount=5, total_value=105
+    )
+
+
+def invoice(number, seller, buyer, *items):
+    return Invoice(
+        invoice_number=number, seller=seller, buyer=buyer, invoice_type="B2B", supply_type="INTER", items=list(items)
+    )
+
+
+@pytest.fixture
+def invoices(db_session):
+    seller = Seller(user_id=1, name="Delhi Grains", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07")
+    other = Seller(user_id=2, name="Other Tenant", gstin="27AAPFU0939F1ZV", address="Mumbai", state_code="27")
+    acme = Buyer(user_id=1, name="Acme Foods", gstin="29ABCDE1234F1ZW", address="Bengaluru", state_code="29")
+    zenith = Buyer(user_id=1, name="Zenith Retail", gstin=None, address="Bengaluru", state_code="29")
+    db_session.add_all(
+        [
+            invoice("INV-2026-00001", seller, acme, item("Basmati Rice 5kg", "100630"), item("Toor Dal")),
+            invoice("INV-2026-00002", seller, zenith, item("Wheat Flour", "1101")),
+            invoice("INV-2026-00003", seller, acme, *[item(f"Sugar {n}", "1701") for n in range(20)], item("Basmati Rice 1kg")),
+            invoice("INV-2026-00004", other, acme, item("Basmati Rice 5kg", "100630")),
+        ]
+    )
+    db_session.commit()
+    return db_session
+
+
+def numbers(page):
+    return [hit.invoice_number for hit in page.items]
+
+
+def test_matches_items_hsn_parties_and_partial_number(invoices):
+    assert numbers(search_invoices(invoices, 1, "toor")) == ["INV-2026-00001"]
+    assert numbers(search_invoices(invoices, 1, "100630")) == ["INV-2026-00001"]
+    assert numbers(search_invoices(invoices, 1, "zenith")) == ["INV-2026-00002"]
+    assert numbers(search_invoices(invoices, 1, "2026-00003")) == ["INV-2026-00003"]
+    assert numbers(search_invoices(invoices, 1, "5kg bas")) == ["INV-2026-00001"]
+    assert numbers(search_invoices(invoices, 1, "bas 5kg")) == []
+    assert sorted(numbers(search_invoices(invoices, 1, "delhi grains"))) == ["INV-2026-00001", "INV-2026-00002", "INV-2026-00003"]
+
+
+def test_ranks_concentrated_matches_first_and_scopes_to_user(invoices):
+    page = search_invoices(invoices, 1, "basmati rice")
+    assert numbers(page) == ["INV-2026-00001", "INV-2026-00003"]
+    assert page.items[0].score <= page.items[1].score
+
+
+def test_owner_token_is_not_searchable(invoices):
+    assert numbers(search_invoices(invoices, 1, "u1")) == []
+
+
+def test_offset_pagination(invoices):
+    first = search_invoices(invoices, 1, "inv-2026", limit=2)
+    assert len(first.items) == 2 and first.next_offset == 2
+    second = search_invoices(invoices, 1, "inv-2026", limit=2, offset=first.next_offset)
+    assert len(second.items) == 1 and second.next_offset is None
+    assert not set(numbers(first)) & set(numbers(second))
+
+
+def test_index_follows_item_and_party_changes(invoices):
+    first = invoices.query(Invoice).filter_by(invoice_number="INV-2026-00001").one()
+    first.items = [item("Chana Dal")]
+    invoices.commit()
+    assert numbers(search_invoices(invoices, 1, "toor")) == []
+    assert numbers(search_invoices(invoices, 1, "chana")) == ["INV-2026-00001"]
+
+    invoices.query(Buyer).filter_by(name="Zenith Retail").one().name = "Nadir Stores"
+    invoices.commit()
+    assert numbers(search_invoices(invoices, 1, "nadir")) == ["INV-2026-00002"]
+
+    invoices.delete(invoices.query(Invoice).filter_by(invoice_number="INV-2026-00002").one())
+    invoices.commit()
+    assert numbers(search_invoices(invoices, 1, "nadir")) == []
+
+
+def test_rebuild_restores_index(invoices):
+    invoices.execute(Invoice.__table__.delete().where(Invoice.invoice_number == "INV-2026-00002"))
+    rebuild_invoice_index(invoices.connection())
+    assert numbers(search_invoices(invoices, 1, "zenith")) == []
+    assert len(search_invoices(invoices, 1, "basmati").items) == 2
+
+
+def test_rejects_short_terms(invoices):
+    with pytest.raises(ValueError):
+        search_invoices(invoices, 1, "a b")
@@ -0,0 +1,55 @@
+import io
+import json
+import random
+
+import pytest
+
+from benchmarks.histogram import Histogram
+from benchmarks.loadgen import load_scenario
+
+
+def test_percentiles_stay_within_bucket_precision():
+    rng = random.Random(3)
+    values = sorted(int(rng.lognormvariate(9, 1)) for _ in range(20_000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    for percentile in (50, 95, 99, 99.9):
+        exact = values[int(len(values) * percentile / 100) - 1]
+        assert abs(histogram.value_at(percentile) - exact) <= exact / 64
+    assert histogram.value_at(100) == histogram.max == values[-1]
+
+
+def test_merge_and_dict_round_trip_match_single_histogram():
+    combined, left, right = Histogram(), Histogram(), Histogram()
+    for value in range(1, 5000, 7):
+        combined.record(value)
+        (left if value % 2 else right).record(value)
+    left.merge(right)
+    restored = Histogram.from_dict(json.loads(json.dumps(left.to_dict())))
+    assert restored.to_dict() == combined.to_dict()
+    assert restored.total == combined.total and restored.value_at(99) == combined.value_at(99)
+
+
+def test_hgrm_output_has_fixed_rows():
+    first, second = io.StringIO(), io.StringIO()
+    Histogram().write_hgrm(first)
+    histogram = Histogram()
+    histogram.record(1500, count=10)
+    histogram.write_hgrm(second)
+    assert len(first.getvalue().splitlines()) == len(second.getvalue().splitlines())
+    assert "#[Max     =        1.500, Total count    =           10]" in second.getvalue()
+
+
+def test_scenario_rejects_unknown_actions(tmp_path):
+    path = tmp_path / "scenario.json"
+    path.write_text(json.dumps({"requests": [{"action": "delete_everything", "weight": 1}]}))
+    with pytest.raises(ValueError, match="Unknown action"):
+        load_scenario(str(path))
+
+
+def test_scenario_rejects_exports_without_seeded_invoices(tmp_path):
+    path = tmp_path / "scenario.json"
+    path.write_text(json.dumps({"setup": {"invoices_per_user": 0}, "requests": [{"action": "export_pdf", "weight": 1}]}))
+    with pytest.raises(ValueError, match="invoices_per_user of at least 1"):
+        load_scenario(str(path))
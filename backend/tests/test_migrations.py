@@ -0,0 +1,225 @@
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect
+
+from app.db.schema import alembic_config
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_initial_revision_runs_on_sqlite(engine):
+    command.upgrade(alembic_config(engine), "0001_init")
+    constraints = inspect(engine).get_unique_constraints("invoices")
+    assert [(constraint["name"], constraint["column_names"]) for constraint in constraints] == [("uq_invoices_invoice_number", ["invoice_number"])]
+
+
+def test_line_hsn_column_is_restored_before_it_is_indexed(engine):
+    command.upgrade(alembic_config(engine), "0014_products")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO invoice_items (id, invoice_id, name, hsn_code, quantity, unit_price, discount, gst_rate, taxable_value, tax_amount, total_value) "
+            "VALUES (1, 1, 'Ceiling Fan', '8414', 1, 2450, 0, 18, 2450, 441, 2891)"
+        )
+    command.upgrade(alembic_config(engine), "0015_invoice_items_hsn_rate_index")
+    schema = inspect(engine)
+    assert "hsn_code" not in {column["name"] for column in schema.get_columns("invoice_items")}
+    assert {index["name"]: index["column_names"] for index in schema.get_indexes("invoice_items")}["ix_invoice_items_hsn_rate"] == ["hsn_sac", "gst_rate", "invoice_id"]
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT hsn_sac, gst_rate FROM invoice_items").all() == [("8414", 18)]
+
+    command.downgrade(alembic_config(engine), "0014_products")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT hsn_code FROM invoice_items").scalar() == "8414"
+
+
+def test_chain_statuses_are_brought_back_to_the_models(engine):
+    command.upgrade(alembic_config(engine), "0014_products")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO invoices (id, seller_id, buyer_id, invoice_number, invoice_type, reverse_charge, supply_type, status, "
+            "total_taxable, total_cgst, total_sgst, total_igst, grand_total, grand_total_words, created_at) "
+            "VALUES (1, 1, 1, '2026-27/07/000001', 'B2B', 0, 'inter', 'FINAL', 0, 0, 0, 0, 0, '', '2026-05-04 20:00:00'), "
+            "(2, 1, 1, NULL, 'B2B', 0, 'inter', 'DRAFT', 0, 0, 0, 0, 0, '', '2026-05-05 10:00:00')"
+        )
+    command.upgrade(alembic_config(engine), "head")
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT status, issued_on FROM invoices ORDER BY id").all()
+    assert rows == [("finalized", "2026-05-05"), ("draft", None)]
+
+    command.downgrade(alembic_config(engine), "0014_products")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT status FROM invoices ORDER BY id").scalars().all() == ["FINAL", "DRAFT"]
+
+
+def _seed_parties(engine, users: int, buyers: int) -> None:
+    with engine.begin() as connection:
+        for user_id in range(1, users + 1):
+            connection.exec_driver_sql(
+                f"INSERT INTO users (id, email, full_name, password_hash, created_at) "
+                f"VALUES ({user_id}, 'user{user_id}@example.com', 'User {user_id}', 'x', '2026-04-01 00:00:00')"
+            )
+            connection.exec_driver_sql(
+                f"INSERT INTO sellers (id, user_id, name, gstin, address, state_code) "
+                f"VALUES ({user_id}, {user_id}, 'Seller {user_id}', '07ABCDE123{user_id}F1Z2', 'Delhi', '07')"
+            )
+        for buyer_id in range(1, buyers + 1):
+            connection.exec_driver_sql(
+                f"INSERT INTO buyers (id, name, gstin, address, state_code) VALUES ({buyer_id}, 'Buyer {buyer_id}', NULL, 'Pune', '27')"
+            )
+
+
+def _seed_invoice(engine, invoice_id: int, seller_id: int, buyer_id: int) -> None:
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO invoices (id, seller_id, buyer_id, invoice_number, invoice_type, reverse_charge, supply_type, status, "
+            "total_taxable, total_cgst, total_sgst, total_igst, grand_total, grand_total_words, created_at) "
+            f"VALUES ({invoice_id}, {seller_id}, {buyer_id}, 'INV-{invoice_id}', 'B2B', 0, 'inter', 'DRAFT', 0, 0, 0, 0, 0, '', '2026-05-04 10:00:00')"
+        )
+
+
+def test_buyers_invoiced_by_several_users_are_copied_per_user(engine):
+    command.upgrade(alembic_config(engine), "0005_buyer_gstin_index")
+    _seed_parties(engine, users=2, buyers=1)
+    _seed_invoice(engine, 1, seller_id=1, buyer_id=1)
+    _seed_invoice(engine, 2, seller_id=2, buyer_id=1)
+    command.upgrade(alembic_config(engine), "0006_buyer_search")
+    with engine.connect() as connection:
+        owners = connection.exec_driver_sql(
+            "SELECT invoices.id, buyers.user_id, buyers.name FROM invoices JOIN buyers ON buyers.id = invoices.buyer_id ORDER BY invoices.id"
+        ).all()
+        unowned = connection.exec_driver_sql("SELECT count(*) FROM buyers WHERE user_id IS NULL").scalar()
+    assert owners == [(1, 1, "Buyer 1"), (2, 2, "Buyer 1")]
+    assert unowned == 0
+
+
+def test_uninvoiced_buyers_go_to_the_only_user(engine):
+    command.upgrade(alembic_config(engine), "0005_buyer_gstin_index")
+    _seed_parties(engine, users=1, buyers=1)
+    command.upgrade(alembic_config(engine), "0006_buyer_search")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT user_id FROM buyers").scalars().all() == [1]
+
+
+def test_uninvoiced_buyers_without_a_single_owner_refuse_the_upgrade(engine):
+    command.upgrade(alembic_config(engine), "0005_buyer_gstin_index")
+    _seed_parties(engine, users=2, buyers=2)
+    _seed_invoice(engine, 1, seller_id=1, buyer_id=1)
+    with pytest.raises(RuntimeError, match="1 buyers have never been invoiced"):
+        command.upgrade(alembic_config(engine), "0006_buyer_search")
+    assert "user_id" not in {column["name"] for column in inspect(engine).get_columns("buyers")}
+
+
+def _batch_0002(op) -> None:
+    """The original, batch-based body of 0002, before it was made online."""
+    op.add_column("sellers", sa.Column("composition_flag", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_table(
+        "hsn_master",
+        sa.Column("code", sa.String(length=8), primary_key=True),
+        sa.Column("description", sa.String(length=255), nullable=False),
+        sa.Column("default_gst_rate", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "invoice_sequences",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("financial_year", sa.String(length=7), nullable=False),
+        sa.Column("state_code", sa.String(length=2), nullable=False),
+        sa.Column("current_value", sa.Integer(), nullable=False, server_default="0"),
+        sa.UniqueConstraint("financial_year", "state_code", name="uq_invoice_sequence_fy_state"),
+    )
+    op.create_index(op.f("ix_invoice_sequences_id"), "invoice_sequences", ["id"], unique=False)
+    op.add_column("invoices", sa.Column("export_flag", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column("invoices", sa.Column("composition_flag", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column("invoices", sa.Column("tax_shifted_to_recipient", sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.execute("UPDATE invoices SET status = 'DRAFT' WHERE status = 'draft'")
+    op.execute("UPDATE invoices SET status = 'FINAL' WHERE status = 'finalized'")
+    with op.batch_alter_table("invoices") as batch_op:
+        batch_op.create_check_constraint("ck_invoice_status", "status IN ('DRAFT', 'FINAL')")
+        batch_op.create_check_constraint("ck_supply_type", "supply_type IN ('intra', 'inter', 'export')")
+    op.add_column("invoice_items", sa.Column("hsn_code", sa.String(length=8), nullable=True))
+    op.execute("UPDATE invoice_items SET hsn_code = hsn_sac")
+    with op.batch_alter_table("invoice_items") as batch_op:
+        batch_op.drop_column("hsn_sac")
+        batch_op.alter_column("hsn_code", nullable=False)
+        batch_op.create_foreign_key("fk_invoice_items_hsn_code", "hsn_master", ["hsn_code"], ["code"])
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("key", sa.String(length=128), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def _snapshot(engine) -> dict:
+    schema = inspect(engine)
+    snapshot = {}
+    with engine.connect() as connection:
+        for table in schema.get_table_names():
+            if table in ("alembic_version", "online_migrations"):
+                continue
+            snapshot[table] = {
+                "columns": [(c["name"], str(c["type"]), c["nullable"], c["default"]) for c in schema.get_columns(table)],
+                "foreign_keys": sorted((fk["name"] or "", fk["constrained_columns"], fk["referred_table"]) for fk in schema.get_foreign_keys(table)),
+                "checks": sorted((check["name"], check["sqltext"]) for check in schema.get_check_constraints(table)),
+                "unique": sorted((c["name"] or "", c["column_names"]) for c in schema.get_unique_constraints(table)),
+                "indexes": sorted((i["name"], i["column_names"], i["unique"]) for i in schema.get_indexes(table)),
+                "rows": connection.exec_driver_sql(f"SELECT * FROM {table} ORDER BY 1").all(),
+            }
+    return snapshot
+
+
+def test_online_0002_matches_the_batch_revision(tmp_path):
+    engines = [create_engine(f"sqlite:///{tmp_path / name}") for name in ("batch.db", "online.db")]
+    for engine in engines:
+        command.upgrade(alembic_config(engine), "0001_init")
+        _seed_parties(engine, users=1, buyers=1)
+        with engine.begin() as connection:
+            for invoice_id, status in enumerate(("draft", "finalized", "finalized"), start=1):
+                connection.exec_driver_sql(
+                    "INSERT INTO invoices (id, seller_id, buyer_id, invoice_number, invoice_type, reverse_charge, supply_type, status, "
+                    "total_taxable, total_cgst, total_sgst, total_igst, grand_total, grand_total_words, created_at) "
+                    f"VALUES ({invoice_id}, 1, 1, 'INV-{invoice_id}', 'B2B', 0, 'inter', '{status}', 100, 0, 0, 18, 118, '', '2026-05-04 10:00:00')"
+                )
+                connection.exec_driver_sql(
+                    "INSERT INTO invoice_items (id, invoice_id, name, hsn_sac, quantity, unit_price, discount, gst_rate, taxable_value, tax_amount, total_value) "
+                    f"VALUES ({invoice_id}, {invoice_id}, 'Ceiling Fan', '841{invoice_id}', 1, 100, 0, 18, 100, 18, 118)"
+                )
+    batch, online_ = engines
+    with batch.begin() as connection:
+        _batch_0002(Operations(MigrationContext.configure(connection)))
+    command.upgrade(alembic_config(online_), "0002_industry_upgrade")
+
+    expected, actual = _snapshot(batch), _snapshot(online_)
+    assert actual == expected
+    assert [row.status for row in actual["invoices"]["rows"]] == ["DRAFT", "FINAL", "FINAL"]
+    for engine in engines:
+        engine.dispose()
+
+
+def test_logos_that_cannot_be_decoded_refuse_the_upgrade(engine):
+    command.upgrade(alembic_config(engine), "0007_invoice_search")
+    _seed_parties(engine, users=1, buyers=1)
+    _seed_invoice(engine, 1, seller_id=1, buyer_id=1)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE invoices SET logo_base64 = 'bm90IGFuIGltYWdl'")
+    with pytest.raises(RuntimeError, match=r"1 invoice logos are not base64 PNG, JPEG or GIF images \(invoice ids 1\)"):
+        command.upgrade(alembic_config(engine), "0008_logo_assets")
+    assert "assets" not in inspect(engine).get_table_names()
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT logo_base64 FROM invoices").scalar() == "bm90IGFuIGltYWdl"
+
+
+def test_chain_upgrades_again_after_a_full_downgrade(engine):
+    command.upgrade(alembic_config(engine), "head")
+    command.downgrade(alembic_config(engine), "base")
+    command.upgrade(alembic_config(engine), "head")
+    assert "hsn_sac" in {column["name"] for column in inspect(engine).get_columns("invoice_items")}
@@ -0,0 +1,68 @@
+import pytest
+
+from app.utils import number_words
+from app.utils.number_words import (
+    ENGLISH,
+    WordsLanguage,
+    amount_to_words,
+    available_languages,
+    integer_to_words,
+    register_language,
+)
+
+
+def test_english_amount_with_paise():
+    assert amount_to_words(1234.5) == "One Thousand Two Hundred Thirty Four Rupees and Fifty Paise Only"
+
+
+def test_round_chunks_have_no_trailing_zero():
+    assert integer_to_words(100) == "One Hundred"
+    assert integer_to_words(1_00_000) == "One Lakh"
+    assert integer_to_words(1_00_00_000) == "One Crore"
+    assert integer_to_words(0) == "Zero"
+
+
+def test_crore_chunking():
+    assert integer_to_words(12_34_56_789) == "Twelve Crore Thirty Four Lakh Fifty Six Thousand Seven Hundred Eighty Nine"
+    assert integer_to_words(150_00_00_000) == "One Hundred Fifty Crore"
+
+
+def test_hindi_amount():
+    assert amount_to_words(1250.75, "hi") == "एक हज़ार दो सौ पचास रुपये और पचहत्तर पैसे मात्र"
+    assert integer_to_words(99, "hi") == "निन्यानबे"
+
+
+def test_unknown_language_rejected():
+    with pytest.raises(ValueError):
+        amount_to_words(10, "xx")
+
+
+@pytest.fixture
+def language_registry(monkeypatch):
+    """Let a test register languages without leaking them into other tests."""
+    monkeypatch.setattr(number_words, "_LANGUAGES", dict(number_words._LANGUAGES))
+    monkeypatch.setattr(number_words, "_TABLES", dict(number_words._TABLES))
+    yield
+    amount_to_words.cache_clear()
+
+
+def test_registered_language_is_selectable(language_registry):
+    register_language(
+        WordsLanguage(
+            code="test",
+            below_hundred=tuple(str(n) for n in range(100)),
+            hundred="H",
+            thousand="T",
+            lakh="L",
+            crore="C",
+            currency="R",
+            subunit="P",
+            conjunction="+",
+            suffix="!",
+            hundreds=tuple(f"{n}H" for n in range(1, 10)),
+        )
+    )
+    assert "test" in available_languages()
+    assert amount_to_words(2_05_301.5, "test") == "2 L 5 T 3H 1 R + 50 P !"
+    with pytest.raises(ValueError):
+        register_language(WordsLanguage(**{**ENGLISH.__dict__, "code": "bad", "below_hundred": ("x",)}))
@@ -0,0 +1,102 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.online_migration import OnlineMigration, checkpoints
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'online.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE parts (id INTEGER NOT NULL PRIMARY KEY, code VARCHAR(12) NOT NULL, status VARCHAR(20) NOT NULL)")
+        connection.exec_driver_sql("CREATE INDEX ix_parts_status ON parts (status)")
+        connection.exec_driver_sql("CREATE UNIQUE INDEX ux_parts_code ON parts (code)")
+        connection.exec_driver_sql("CREATE TABLE audit (part_id INTEGER)")
+        connection.exec_driver_sql("CREATE TRIGGER parts_audit AFTER INSERT ON parts BEGIN INSERT INTO audit VALUES (new.id); END")
+        connection.execute(text("INSERT INTO parts VALUES (:id, :code, :status)"), [{"id": n, "code": f"P{n}", "status": "draft" if n % 2 else "finalized"} for n in range(1, 1001)])
+    yield engine
+    engine.dispose()
+
+
+class Interrupt(Exception):
+    pass
+
+
+def interrupt_after(chunks):
+    seen = []
+
+    def progress(report):
+        seen.append(report)
+        if len(seen) == chunks:
+            raise Interrupt
+
+    return progress, seen
+
+
+def test_backfill_commits_chunks_and_resumes(engine):
+    with engine.connect() as connection, pytest.raises(ValueError):
+        OnlineMigration(connection, "0099_test")
+
+    progress, seen = interrupt_after(3)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection, pytest.raises(Interrupt):
+        OnlineMigration(connection, "0099_test", chunk_size=100, pause_ms=0, progress=progress).backfill("parts", {"status": "upper(status)"}, where="status = 'draft'")
+    with engine.connect() as connection:
+        assert connection.scalar(text("SELECT max(id) FROM parts WHERE status = 'DRAFT'")) == 299
+        assert connection.execute(sa.select(checkpoints.c.last_key, checkpoints.c.rows_done)).one() == (300, 300)
+
+    seen.clear()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        rows = OnlineMigration(connection, "0099_test", chunk_size=100, pause_ms=0, progress=seen.append).backfill("parts", {"status": "upper(status)"}, where="status = 'draft'")
+        assert rows == 1000 and seen[-1].finished and seen[0].total_rows == 1000
+        assert OnlineMigration(connection, "0099_test").backfill("parts", {"status": "upper(status)"}, where="status = 'draft'") == 0
+    with engine.connect() as connection:
+        counts = dict(connection.execute(text("SELECT status, count(*) FROM parts GROUP BY status")).all())
+        assert counts == {"DRAFT": 500, "finalized": 500}
+
+
+def test_copy_and_swap_keeps_concurrent_writes_and_resumes(engine):
+    def write_while_copying(report):
+        if report.rows_done == 300:
+            with engine.begin() as other:
+                other.exec_driver_sql("UPDATE parts SET code = 'P5-changed' WHERE id = 5")
+                other.exec_driver_sql("DELETE FROM parts WHERE id IN (7, 800)")
+                other.exec_driver_sql("INSERT INTO parts VALUES (2000, 'P2000', 'draft')")
+            raise Interrupt
+
+    options = {"drop": ["code"], "columns": [sa.Column("sku", sa.String(16), nullable=False), sa.Column("flag", sa.Boolean(), server_default=sa.false(), nullable=False)]}
+    values = {"sku": "'SKU-' || code", "status": "upper(status)"}
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection, pytest.raises(Interrupt):
+        OnlineMigration(connection, "0099_test", chunk_size=100, pause_ms=0, progress=write_while_copying).copy_and_swap("parts", values=values, **options)
+    with engine.connect() as connection:
+        assert connection.scalar(text("SELECT count(*) FROM _parts_shadow")) == 300
+        assert "code" in {column["name"] for column in inspect(connection).get_columns("parts")}
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        rows = OnlineMigration(connection, "0099_test", chunk_size=100, pause_ms=0, progress=lambda report: None).copy_and_swap("parts", values=values, **options)
+    assert rows == 1000
+
+    with engine.connect() as connection:
+        schema = inspect(connection)
+        assert not schema.has_table("_parts_shadow")
+        assert [column["name"] for column in schema.get_columns("parts")] == ["id", "status", "sku", "flag"]
+        assert {index["name"] for index in schema.get_indexes("parts")} == {"ix_parts_status"}
+        rows = connection.execute(text("SELECT id, sku, status, flag FROM parts ORDER BY id")).all()
+        assert len(rows) == 999 and rows[-1] == (2000, "SKU-P2000", "DRAFT", 0)
+        assert (4, "SKU-P4", "FINALIZED", 0) in rows and (5, "SKU-P5-changed", "DRAFT", 0) in rows
+        assert not {7, 800} & {row.id for row in rows}
+        triggers = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars().all()
+        assert triggers == ["parts_audit"]
+        connection.exec_driver_sql("INSERT INTO parts (id, status, sku) VALUES (3000, 'DRAFT', 'SKU-X')")
+        assert connection.scalar(text("SELECT count(*) FROM audit WHERE part_id = 3000")) == 1
+
+
+def test_copy_and_swap_can_drop_a_unique_constraint(engine):
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE tags (id INTEGER NOT NULL PRIMARY KEY, owner INTEGER NOT NULL, name VARCHAR(12) UNIQUE, UNIQUE (owner, id))")
+        connection.exec_driver_sql("INSERT INTO tags VALUES (1, 1, 'urgent'), (2, 2, 'later')")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        assert OnlineMigration(connection, "0099_test", pause_ms=0).copy_and_swap("tags", drop_unique=[["name"]]) == 2
+    with engine.begin() as connection:
+        assert [constraint["column_names"] for constraint in inspect(connection).get_unique_constraints("tags")] == [["owner", "id"]]
+        connection.exec_driver_sql("INSERT INTO tags VALUES (3, 2, 'urgent')")
@@ -0,0 +1,64 @@
+from app.core.security import create_access_token
+from app.models.models import Buyer, Seller, User
+from app.services.metrics_service import metrics_counter
+from app.services.party_cache import party_cache
+
+ITEM = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 2, "unit_price": 99.5, "gst_rate": 5}
+
+
+def create(client, seller_id=1, buyer_id=1):
+    return client.post("/api/v1/invoices", json={"seller_id": seller_id, "buyer_id": buyer_id, "invoice_type": "B2B", "items": [ITEM]})
+
+
+def test_invoice_paths_reuse_snapshots(client, max_queries):
+    invoice = create(client).json()
+    assert (party_cache.hits, party_cache.misses) == (0, 2)
+
+    with max_queries(2) as stats:
+        exported = client.get(f"/api/v1/invoices/{invoice['id']}/json").json()
+    assert exported["seller"] == {"name": "Delhi Grains", "gstin": "07ABCDE1234F1Z2"}
+    assert not any("FROM sellers" in shape or "FROM buyers" in shape for shape in stats.shapes)
+    assert create(client).status_code == 200
+    assert (party_cache.hits, party_cache.misses) == (4, 2)
+    assert metrics_counter['party_cache_hits_total{kind="seller"}'] >= 2
+    assert "party_cache_hit_ratio 0.6666666666666666" in client.get("/metrics").text
+
+
+def test_party_writes_invalidate_the_tenant(client, db_session):
+    assert create(client).json()["supply_type"] == "inter"
+    # Moved out of band: the cached snapshot still says Delhi.
+    db_session.get(Seller, 1).state_code = "29"
+    db_session.commit()
+    assert create(client).json()["supply_type"] == "inter"
+
+    buyer = {"name": "Walk-in", "gstin": None, "address": "Delhi", "state_code": "07"}
+    assert client.post("/api/v1/buyers", json=buyer).status_code == 200
+    assert create(client).json()["supply_type"] == "intra"
+
+
+def test_out_of_band_writes_are_seen_once_snapshots_expire(client, db_session, monkeypatch):
+    monkeypatch.setattr(party_cache, "ttl_seconds", 0)
+    assert create(client).json()["supply_type"] == "inter"
+    # Written by another worker: this process's versions never hear of it.
+    db_session.get(Seller, 1).state_code = "29"
+    db_session.commit()
+    assert create(client).json()["supply_type"] == "intra"
+
+
+def test_snapshots_are_scoped_to_the_tenant(client, db_session):
+    other = User(email="other@example.com", full_name="Other", password_hash="x")
+    db_session.add(other)
+    db_session.flush()
+    db_session.add(Seller(user_id=other.id, name="Other Co", gstin="27ABCDE1234F1Z0", address="Mumbai", state_code="27"))
+    db_session.add(Buyer(user_id=other.id, name="Other Buyer", gstin="27ABCDE1234F1Z0", address="Mumbai", state_code="27"))
+    db_session.commit()
+    assert party_cache.seller(db_session, other.id, 2).name == "Other Co"
+    assert party_cache.buyer(db_session, other.id, 2).name == "Other Buyer"
+
+    assert create(client, seller_id=2).status_code == 404
+    assert create(client, buyer_id=2).status_code == 404
+    assert party_cache.buyer(db_session, 1, 2) is None
+    invoice = create(client).json()
+    assert party_cache.seller(db_session, other.id, 1) is None
+    headers = {"Authorization": f"Bearer {create_access_token(other.email)}"}
+    assert client.get(f"/api/v1/invoices/{invoice['id']}/json", headers=headers).status_code == 404
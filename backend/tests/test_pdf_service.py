@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services import pdf_service
+from app.services.pdf_service import UNICODE_FONT, generate_invoice_pdf, words_font
+from app.utils.number_words import amount_to_words
+
+# Any TrueType font will do to check that it is registered and embedded.
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+
+
+def invoice(words):
+    party = {"name": "Delhi Grains", "gstin": "07ABCDE1234F1Z2"}
+    return {
+        "invoice_number": None, "seller": party, "buyer": party, "items": [], "total_taxable": 1000.0,
+        "total_cgst": 25.0, "total_sgst": 25.0, "total_igst": 0.0, "grand_total": 1050.0, "grand_total_words": words,
+    }
+
+
+@pytest.fixture
+def unicode_font(monkeypatch):
+    if not os.path.isfile(FONT):
+        pytest.skip("no TrueType font to embed")
+    monkeypatch.setattr(settings, "pdf_unicode_font_path", FONT)
+    monkeypatch.setattr(pdf_service, "_font_registered", None)
+
+
+def test_hindi_words_are_drawn_with_the_unicode_font(unicode_font):
+    hindi = amount_to_words(1050, "hi")
+    assert words_font(amount_to_words(1050)) == "Helvetica"
+    assert words_font(hindi) == UNICODE_FONT
+    assert b"DejaVuSans" in generate_invoice_pdf(invoice(hindi))
+    assert b"DejaVuSans" not in generate_invoice_pdf(invoice(amount_to_words(1050)))
+
+
+def test_missing_font_falls_back_to_helvetica(monkeypatch):
+    monkeypatch.setattr(settings, "pdf_unicode_font_path", "/nonexistent/font.ttf")
+    monkeypatch.setattr(pdf_service, "_font_registered", None)
+    assert words_font(amount_to_words(1050, "hi")) == "Helvetica"
+    assert generate_invoice_pdf(invoice(amount_to_words(1050, "hi"))).startswith(b"%PDF")
+
+
+def test_unreadable_font_falls_back_to_helvetica(monkeypatch, tmp_path):
+    broken = tmp_path / "broken.ttf"
+    broken.write_bytes(b"not a font")
+    monkeypatch.setattr(settings, "pdf_unicode_font_path", str(broken))
+    monkeypatch.setattr(pdf_service, "_font_registered", None)
+    assert words_font(amount_to_words(1050, "hi")) == "Helvetica"
+    assert pdf_service._font_registered is False
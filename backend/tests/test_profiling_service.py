@@ -0,0 +1,86 @@
+import pstats
+import threading
+import time
+
+import orjson
+import pytest
+
+from app.core.config import settings
+from app.services import profiling_service
+from app.services.tax_service import compute_line, compute_totals
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ["owner@example.com"])
+
+
+def wait_finished(client, profile_id):
+    for _ in range(100):
+        listed = {profile["id"]: profile for profile in client.get("/api/v1/admin/profiles").json()}
+        if listed[profile_id]["finished"]:
+            return listed[profile_id]
+        time.sleep(0.05)
+    raise AssertionError("profile did not finish")
+
+
+def busy_totals(stop):
+    lines = [compute_line(3, 99.5, 0, 18)] * 20
+    while not stop.is_set():
+        compute_totals(lines, intra_state=True)
+
+
+def test_admin_endpoints_require_admin(client):
+    assert client.get("/api/v1/admin/profiles").status_code == 403
+    response = client.get("/api/v1/invoices", headers={"X-Profile": "1"})
+    assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+
+
+def test_cpu_profile_downloads_as_speedscope_and_pstats(client, admin, tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_totals, args=(stop,))
+    worker.start()
+    try:
+        started = client.post("/api/v1/admin/profiles/cpu?seconds=0.3&interval_ms=2")
+        assert started.status_code == 202
+        assert client.post("/api/v1/admin/profiles/cpu?seconds=1").status_code == 409
+        assert client.get(f"/api/v1/admin/profiles/{started.json()['id']}").status_code == 409
+        summary = wait_finished(client, started.json()["id"])
+    finally:
+        stop.set()
+        worker.join()
+    assert summary["samples"] > 0 and summary["spans"]["compute_totals"]["calls"] > 0
+
+    speedscope = orjson.loads(client.get(f"/api/v1/admin/profiles/{summary['id']}").content)
+    names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+    assert "busy_totals" in names and "compute_totals" in names
+    assert all(profile["unit"] == "seconds" for profile in speedscope["profiles"])
+
+    path = tmp_path / "cpu.prof"
+    path.write_bytes(client.get(f"/api/v1/admin/profiles/{summary['id']}?format=pstats").content)
+    stats = pstats.Stats(str(path)).stats
+    [busy] = [entry for key, entry in stats.items() if key[2] == "busy_totals"]
+    # Cumulative time covers the sampled callees; own time is small.
+    assert busy[3] > 0 and busy[3] >= busy[2]
+
+
+def test_request_profile_keeps_the_request_threads(client, admin):
+    item = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 2, "unit_price": 99.5, "gst_rate": 5}
+    response = client.post("/api/v1/invoices", json={"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": [item]}, headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    profile = profiling_service.get_profile(response.headers["X-Profile-Id"])
+    assert profile.kind == "request" and profile.finished
+    assert profile.spans["compute_totals"].calls == 1 and profile.spans["db"].calls >= 3
+    assert set(profile.samples) <= profile.threads
+
+
+def test_memory_profile_reports_growth(client, admin):
+    held = []
+    started = client.post("/api/v1/admin/profiles/memory?seconds=0.3").json()
+    held.extend(bytearray(1024) for _ in range(2000))
+    summary = wait_finished(client, started["id"])
+    speedscope = orjson.loads(client.get(f"/api/v1/admin/profiles/{summary['id']}").content)
+    [profile] = speedscope["profiles"]
+    assert profile["unit"] == "bytes" and profile["endValue"] >= 2000 * 1024
+    assert any("test_profiling_service.py" in frame["file"] for frame in speedscope["shared"]["frames"])
+    assert client.get(f"/api/v1/admin/profiles/{summary['id']}?format=pstats").status_code == 400
@@ -0,0 +1,36 @@
+from app.db.instrumentation import statement_shape, track_queries
+
+
+def payload(lines):
+    items = [{"name": f"Rice {n}", "hsn_sac": "1006", "quantity": n + 1, "unit_price": 99.5, "gst_rate": 5} for n in range(lines)]
+    return {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": items}
+
+
+def test_statement_shape_collapses_parameters():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?) AND kind = 'x' LIMIT 10") == "SELECT * FROM t WHERE id IN (?) AND kind = ? LIMIT ?"
+
+
+def test_invoice_endpoints_stay_within_query_budget(client, max_queries):
+    # Budgets exclude per-row item INSERTs, which SQLite cannot batch with RETURNING.
+    with max_queries(10 + 20):
+        created = client.post("/api/v1/invoices", json=payload(20))
+    assert created.status_code == 200
+    invoice = created.json()
+
+    edit = {"modify": [{"id": invoice["items"][0]["id"], "quantity": 50}], "remove": [invoice["items"][1]["id"]]}
+    with max_queries(11):
+        assert client.patch(f"/api/v1/invoices/{invoice['id']}/items", json=edit).status_code == 200
+
+    with max_queries(2):
+        assert len(client.get("/api/v1/invoices").json()) == 1
+    with max_queries(2):
+        assert client.get(f"/api/v1/invoices/{invoice['id']}/json").status_code == 200
+
+
+def test_response_reports_db_time_without_outer_tracking(client):
+    with track_queries() as outer:
+        response = client.get("/api/v1/invoices")
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert "queries" in response.headers["Server-Timing"]
+    assert outer.statements >= 2
+
@@ -0,0 +1,88 @@
+import io
+from datetime import date, datetime
+
+import orjson
+
+from app.models.models import Invoice
+from app.services import reconciliation_service
+from app.services.reconciliation_service import iter_gstr2b_invoices, normalize_invoice_number
+
+SELLER_GSTIN = "07ABCDE1234F1Z2"
+RECIPIENT = "29ABCDE1234F1ZW"
+
+
+def gstr2b(suppliers):
+    b2b = [{"trdnm": "Supplier", "ctin": ctin, "inv": invoices} for ctin, invoices in suppliers]
+    return orjson.dumps({"data": {"gstin": RECIPIENT, "rtnprd": "052026", "docdata": {"b2b": b2b}}})
+
+
+def record(number, date, value, taxable):
+    return {"inum": number, "dt": date, "val": value, "typ": "R", "items": [{"num": 1, "rt": 5, "txval": taxable}]}
+
+
+def test_normalize_invoice_number_ignores_separators_case_and_zero_padding():
+    assert normalize_invoice_number("2026-27/07/000042") == normalize_invoice_number("2026 27-7-42")
+    assert normalize_invoice_number("inv/0042") == "INV42"
+    assert normalize_invoice_number("INV-000") == "INV0"
+
+
+def test_invoices_are_attributed_to_their_supplier_across_reads(monkeypatch):
+    monkeypatch.setattr(reconciliation_service, "_READ_SIZE", 7)
+    suppliers = [(f"07AAAAA{index:04d}A1Z5", [record(f"{index}-{n}", "01-05-2026", 10, 9) for n in range(index % 3)]) for index in range(20)]
+    parsed = [(ctin, invoice["inum"]) for ctin, invoice in iter_gstr2b_invoices(io.BytesIO(gstr2b(suppliers)))]
+    assert parsed == [(ctin, invoice["inum"]) for ctin, invoices in suppliers for invoice in invoices]
+
+
+def test_reconcile_classifies_records_and_reports_missing(client, db_session):
+    item = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 2, "unit_price": 99.5, "gst_rate": 5}
+    ids = [client.post("/api/v1/invoices", json={"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "items": [item]}).json()["id"] for _ in range(4)]
+    finalized = client.post("/api/v1/invoices/finalize", json={"invoice_ids": ids[:3]}).json()["finalized"]
+    # Drafts created late in April UTC, issued in May IST: the issue date counts.
+    db_session.query(Invoice).update({Invoice.created_at: datetime(2026, 4, 30, 20, 0), Invoice.issued_on: date(2026, 5, 14)})
+    db_session.commit()
+    matched, mismatched, missing_in_2b = (row["invoice_number"] for row in finalized)
+
+    body = gstr2b(
+        [
+            ("27ZZZZZ9999Z1Z5", [record("X-1", "14-05-2026", 100, 90)]),
+            (
+                SELLER_GSTIN,
+                [
+                    record(matched.replace("/", "-").replace("000", ""), "14-05-2026", 208.95, 199),
+                    record(mismatched, "14-05-2026", 250.0, 199),
+                    record("UNKNOWN/1", "14-05-2026", 50, 45),
+                    record(missing_in_2b, "15-04-2026", 208.95, 199),
+                ],
+            ),
+        ]
+    )
+    response = client.post(f"/api/v1/reconciliation/gstr2b?period=052026&recipient_gstin={RECIPIENT}", content=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    *rows, summary = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [(row["status"], row.get("books_invoice_number")) for row in rows] == [
+        ("matched", matched),
+        ("amount_mismatch", mismatched),
+        ("missing_in_books", None),
+        ("missing_in_books", None),
+        ("missing_in_2b", missing_in_2b),
+    ]
+    assert rows[1]["difference"] == 41.05
+    assert summary["summary"] == {
+        "records": 5,
+        "matched": 1,
+        "amount_mismatch": 1,
+        "missing_in_books": 2,
+        "missing_in_2b": 1,
+        "other_suppliers": 1,
+        "books_queries": 2,
+    }
+
+
+def test_reconcile_rejects_bad_input(client):
+    url = "/api/v1/reconciliation/gstr2b"
+    assert client.post(f"{url}?period=2026-13&recipient_gstin={RECIPIENT}", content=b"{}").status_code == 400
+    assert client.post(f"{url}?period=2026-05&recipient_gstin=29ABCDE1234F1ZX", content=b"{}").status_code == 400
+    assert client.post(f"{url}?period=2026-05&recipient_gstin={RECIPIENT}", content=b"").status_code == 400
+    truncated = client.post(f"{url}?period=2026-05&recipient_gstin={RECIPIENT}", content=b'{"data": {"docdata": {"b2b": [')
+    assert "error" in orjson.loads(truncated.content.splitlines()[-1])
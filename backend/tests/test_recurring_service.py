@@ -0,0 +1,97 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Buyer, Invoice, InvoiceEvent, InvoiceItem, RecurringTemplate
+from app.services import recurring_service
+from app.services.recurring_service import generate_due, period_date
+from app.services.sequence_service import get_financial_year
+
+
+def template(cadence="monthly", start_on="2026-01-31"):
+    item = {"name": "Support plan", "hsn_sac": "998313", "quantity": 1, "unit_price": 1000, "gst_rate": 18}
+    return {"seller_id": 1, "buyer_id": 1, "invoice_type": "B2B", "cadence": cadence, "start_on": start_on, "items": [item]}
+
+
+def sessions(db_session):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_session.get_bind())
+
+
+def test_periods_are_counted_from_the_start_date():
+    start = date(2026, 1, 31)
+    assert [period_date(start, "monthly", index) for index in range(4)] == [
+        date(2026, 1, 31),
+        date(2026, 2, 28),
+        date(2026, 3, 31),
+        date(2026, 4, 30),
+    ]
+    assert period_date(start, "quarterly", 4) == date(2027, 1, 31)
+    assert period_date(date(2024, 2, 29), "yearly", 1) == date(2025, 2, 28)
+    assert period_date(start, "weekly", 2) == date(2026, 2, 14)
+
+
+def test_due_periods_are_issued_once_with_consecutive_numbers(client, db_session):
+    monthly = client.post("/api/v1/recurring", json=template()).json()
+    weekly = client.post("/api/v1/recurring", json=template("weekly", "2026-03-01")).json()
+    assert monthly["next_run_on"] == "2026-01-31" and monthly["items"][0]["gst_rate"] == 18
+
+    report = generate_due(sessions(db_session), today=date(2026, 3, 10))
+    # Monthly: Jan 31, Feb 28. Weekly: Mar 1, Mar 8.
+    assert (report.templates, report.invoices, report.chunks, report.failed_chunks) == (2, 4, 1, 0)
+    invoices = db_session.execute(select(Invoice).order_by(Invoice.id)).scalars().all()
+    fy = get_financial_year(date(2026, 3, 10))
+    assert [invoice.invoice_number for invoice in invoices] == [f"{fy}/07/{value:06d}" for value in range(1, 5)]
+    assert {invoice.issued_on for invoice in invoices} == {date(2026, 3, 10)}
+    assert [(invoice.recurring_template_id, invoice.recurring_period) for invoice in invoices] == [
+        (monthly["id"], date(2026, 1, 31)),
+        (monthly["id"], date(2026, 2, 28)),
+        (weekly["id"], date(2026, 3, 1)),
+        (weekly["id"], date(2026, 3, 8)),
+    ]
+    assert {invoice.status for invoice in invoices} == {"finalized"}
+    assert invoices[0].supply_type == "inter" and invoices[0].total_igst == 180 and invoices[0].grand_total == 1180
+    assert invoices[0].tax_summary.total_tax == 180 and len(invoices[0].items) == 1
+    assert db_session.scalar(select(func.count()).select_from(InvoiceEvent).where(InvoiceEvent.type == "invoice.created")) == 4
+
+    assert generate_due(sessions(db_session), today=date(2026, 3, 10)).invoices == 0
+    listed = {row["id"]: row for row in client.get("/api/v1/recurring").json()}
+    assert listed[monthly["id"]]["next_run_on"] == "2026-03-31" and listed[monthly["id"]]["periods_generated"] == 2
+
+    assert client.delete(f"/api/v1/recurring/{weekly['id']}").json()["active"] is False
+    assert generate_due(sessions(db_session), today=date(2026, 3, 31)).invoices == 1
+
+
+def test_run_resumes_after_a_failed_chunk(client, db_session, monkeypatch):
+    ids = [client.post("/api/v1/recurring", json=template(start_on="2026-01-15")).json()["id"] for _ in range(3)]
+    record_events = recurring_service.record_events
+    calls = []
+
+    def crash_on_second_chunk(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        record_events(*args)
+
+    monkeypatch.setattr(recurring_service, "record_events", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        generate_due(sessions(db_session), today=date(2026, 2, 20), chunk_size=1)
+    db_session.expire_all()
+    assert db_session.execute(select(Invoice.recurring_template_id).distinct()).scalars().all() == [ids[0]]
+
+    report = generate_due(sessions(db_session), today=date(2026, 2, 20), chunk_size=1)
+    assert (report.templates, report.invoices, report.chunks) == (2, 4, 2)
+    rows = db_session.execute(select(Invoice.recurring_template_id, Invoice.recurring_period).order_by(Invoice.id)).all()
+    assert len(rows) == len(set(rows)) == 6
+    assert db_session.scalar(select(func.count()).select_from(InvoiceItem)) == 6
+    numbers = db_session.execute(select(Invoice.invoice_number).order_by(Invoice.invoice_number)).scalars().all()
+    assert [int(number.rsplit("/", 1)[1]) for number in numbers] == list(range(1, 7))
+    assert {t.periods_generated for t in db_session.execute(select(RecurringTemplate)).scalars()} == {2}
+
+
+def test_templates_only_bill_the_users_own_buyers(client, db_session):
+    db_session.add(Buyer(user_id=2, name="Other tenant", gstin="27AAPFU0939F1ZV", address="Mumbai", state_code="27"))
+    db_session.commit()
+    assert client.post("/api/v1/recurring", json={**template(), "buyer_id": 2}).status_code == 404
+    assert client.get("/api/v1/recurring").json() == []
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+import orjson
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.models import Invoice, InvoiceEvent, TaxSummary
+from app.services.repricing_service import RateNotYetEffective, reprice_drafts
+
+RICE = {"name": "Basmati Rice", "hsn_sac": "1006", "quantity": 3, "unit_price": 99.5, "gst_rate": 5}
+FAN = {"name": "Ceiling Fan", "hsn_sac": "8414", "quantity": 1, "unit_price": 2450, "gst_rate": 18}
+
+
+@pytest.fixture
+def admin(monkeypatch):
+    monkeypatch.setattr(settings, "admin_emails", ["owner@example.com"])
+
+
+def create(client, items, buyer_id=1):
+    return client.post("/api/v1/invoices", json={"seller_id": 1, "buyer_id": buyer_id, "invoice_type": "B2B", "items": items}).json()
+
+
+def reprice(client, **overrides):
+    change = {"hsn_sac": "1006", "old_rate": 5, "new_rate": 12, "effective_on": date.today().isoformat(), **overrides}
+    return client.post("/api/v1/admin/repricing", json=change)
+
+
+def test_drafts_are_repriced_like_freshly_created_invoices(client, admin, db_session):
+    local = client.post("/api/v1/buyers", json={"name": "Delhi Mart", "gstin": "07ABCDE1234F1Z2", "address": "Delhi", "state_code": "07"}).json()
+    mixed = create(client, [RICE, FAN, {**RICE, "discount": 10}])
+    intra = create(client, [RICE], buyer_id=local["id"])
+    finalized = create(client, [RICE])
+    client.post(f"/api/v1/invoices/{finalized['id']}/finalize")
+    untouched = create(client, [FAN])
+
+    report = reprice(client).json()
+    assert {key: report[key] for key in ("lines", "invoices", "batches")} == {"lines": 3, "invoices": 2, "batches": 1}
+
+    for invoice, items, buyer_id in ((mixed, [RICE, FAN, {**RICE, "discount": 10}], 1), (intra, [RICE], local["id"])):
+        expected = create(client, [{**item, "gst_rate": 12} if item["hsn_sac"] == "1006" else item for item in items], buyer_id)
+        repriced = client.get(f"/api/v1/invoices/{invoice['id']}/json").json()
+        fields = ("total_taxable", "total_cgst", "total_sgst", "total_igst", "grand_total", "grand_total_words")
+        assert {name: repriced[name] for name in fields} == {name: expected[name] for name in fields}
+        assert [line["total_value"] for line in repriced["items"]] == [line["total_value"] for line in expected["items"]]
+        summary = db_session.scalar(select(TaxSummary).where(TaxSummary.invoice_id == invoice["id"]))
+        db_session.refresh(summary)
+        assert summary.total_tax == expected["total_cgst"] + expected["total_sgst"] + expected["total_igst"]
+
+    assert client.get(f"/api/v1/invoices/{finalized['id']}/json").json()["grand_total"] == finalized["grand_total"]
+    assert client.get(f"/api/v1/invoices/{untouched['id']}/json").json()["grand_total"] == untouched["grand_total"]
+    events = db_session.execute(select(InvoiceEvent.invoice_id, InvoiceEvent.payload).where(InvoiceEvent.type == "invoice.updated")).all()
+    assert [(invoice_id, orjson.loads(payload)["line_count"]) for invoice_id, payload in events] == [(mixed["id"], 3), (intra["id"], 1)]
+
+
+def test_batches_resume_and_use_the_index(client, db_session):
+    ids = [create(client, [RICE, RICE])["id"] for _ in range(5)]
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=db_session.get_bind())
+    with pytest.raises(RateNotYetEffective):
+        reprice_drafts(sessions, "1006", 5, 12, date.today() + timedelta(days=1))
+
+    report = reprice_drafts(sessions, "1006", 5, 12, date.today(), batch_size=2)
+    assert (report.lines, report.invoices, report.batches) == (10, 5, 3)
+    assert reprice_drafts(sessions, "1006", 5, 12, date.today()).lines == 0
+    totals = db_session.execute(select(Invoice.total_igst).where(Invoice.id.in_(ids))).scalars().all()
+    assert totals == [2 * 35.82] * 5
+
+    plan = " ".join(row[-1] for row in db_session.execute(text("EXPLAIN QUERY PLAN SELECT invoice_id FROM invoice_items WHERE hsn_sac = '1006' AND gst_rate = 5 AND invoice_id > 0")))
+    assert "ix_invoice_items_hsn_rate" in plan
+
+
+def test_repricing_is_admin_only_and_validated(client, admin, monkeypatch):
+    assert reprice(client, new_rate=12.5).status_code == 422
+    assert reprice(client, new_rate=5).status_code == 422
+    assert reprice(client, effective_on=(date.today() + timedelta(days=1)).isoformat()).status_code == 409
+    monkeypatch.setattr(settings, "admin_emails", [])
+    assert reprice(client).status_code == 403
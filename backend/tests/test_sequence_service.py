@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime, timezone
 
-from app.services.sequence_service import get_financial_year
+from app.models.models import Seller, User
+from app.services.sequence_service import get_financial_year, issue_date
 
 
 def test_financial_year_before_april():
@@ -9,3 +10,26 @@ def test_financial_year_before_april():
 
 def test_financial_year_after_april():
     assert get_financial_year(datetime(2026, 4, 1)) == "2026-27"
+
+
+def test_issue_date_is_the_date_in_india():
+    assert issue_date(datetime(2026, 3, 31, 18, 30, tzinfo=timezone.utc)) == date(2026, 4, 1)
+    assert get_financial_year(issue_date(datetime(2026, 3, 31, 18, 29, tzinfo=timezone.utc))) == "2025-26"
+
+
+def test_allocations_continue_the_sequence_per_seller(db_session):
+    from app.services.sequence_service import allocate_invoice_numbers, next_invoice_number
+
+    db_session.add(User(id=1, email="owner@example.com", full_name="Owner", password_hash="x"))
+    db_session.add_all(
+        [
+            Seller(id=1, user_id=1, name="Delhi Grains", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07"),
+            Seller(id=2, user_id=1, name="Delhi Mills", gstin="07AAPFU0939F1ZV", address="Delhi", state_code="07"),
+        ]
+    )
+    db_session.flush()
+    assert allocate_invoice_numbers(db_session, 1, "07", 3, "2020-21") == ["2020-21/07/000001", "2020-21/07/000002", "2020-21/07/000003"]
+    # Another seller in the same state has its own gap-free series.
+    assert allocate_invoice_numbers(db_session, 2, "07", 1, "2020-21") == ["2020-21/07/000001"]
+    assert allocate_invoice_numbers(db_session, 1, "07", 2, "2020-21") == ["2020-21/07/000004", "2020-21/07/000005"]
+    assert next_invoice_number(db_session, 1, "07").endswith("/07/000001")
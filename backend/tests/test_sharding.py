@@ -0,0 +1,67 @@
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from app.cli import shard_summary
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db import sharding
+from app.db.schema import ALEMBIC_DIR, alembic_config
+from app.db.sharding import ShardRouter, migrate_shards, scan_shards
+from app.models.models import Seller, User
+from app.services.metrics_service import metrics_counter
+
+
+def test_shard_for_is_stable_and_bounded(tmp_path):
+    hashed = ShardRouter(tmp_path, "hashed", 4, 8, "create_all")
+    names = {hashed.shard_for(f"user{n}@example.com") for n in range(200)}
+    assert names == {f"shard-{n:03d}" for n in range(4)}
+    per_user = ShardRouter(tmp_path, "per_user", 1, 8, "create_all")
+    assert per_user.shard_for("a@example.com") == per_user.shard_for("a@example.com") != per_user.shard_for("b@example.com")
+
+
+def test_engine_cache_evicts_and_disposes_least_recent(tmp_path):
+    router = ShardRouter(tmp_path, "hashed", 8, 2, "create_all")
+    evictions = metrics_counter["shard_engine_evictions_total"]
+    first = router.engine("shard-000")
+    router.engine("shard-001")
+    router.engine("shard-000")
+    router.engine("shard-002")
+    assert metrics_counter["shard_engine_evictions_total"] == evictions + 1
+    assert router.engine("shard-000") is first
+    assert router.engine("shard-001") is not first
+    assert router.shard_names() == ["shard-000", "shard-001", "shard-002"]
+    router.dispose()
+
+
+def test_new_shards_are_stamped_and_migrated_at_head(tmp_path):
+    router = ShardRouter(tmp_path, "per_user", 1, 4, "alembic")
+    head = ScriptDirectory.from_config(alembic_config(router.engine("user-a"))).get_current_head()
+    assert head and ALEMBIC_DIR.is_dir()
+    router.engine("user-b")
+    router.dispose()
+    assert migrate_shards(ShardRouter(tmp_path, "per_user", 1, 4, "alembic")) == ["user-a", "user-b"]
+    for result in scan_shards(router, lambda db: db.execute(text("SELECT version_num FROM alembic_version")).scalar()):
+        assert result.value == head
+
+
+def test_tenant_data_is_routed_to_the_principals_shard(client, db_session, tmp_path, monkeypatch):
+    router = ShardRouter(tmp_path, "per_user", 1, 4, "create_all")
+    monkeypatch.setattr(settings, "shard_mode", "per_user")
+    monkeypatch.setattr(sharding, "shard_router", router)
+    db_session.add(User(email="other@example.com", full_name="Other", password_hash="x"))
+    db_session.commit()
+    other = {"Authorization": f"Bearer {create_access_token('other@example.com')}"}
+    seller = {"name": "Mumbai Mills", "gstin": "27ABCDE1234F1Z0", "address": "Mumbai", "state_code": "27"}
+
+    assert client.post("/api/v1/sellers", json=seller).status_code == 200
+    assert client.post("/api/v1/sellers", json={**seller, "name": "Other Mills"}, headers=other).status_code == 200
+    assert [row["name"] for row in client.get("/api/v1/sellers").json()] == ["Mumbai Mills"]
+    assert [row["name"] for row in client.get("/api/v1/sellers", headers=other).json()] == ["Other Mills"]
+    # The directory only holds users (and the fixture's own rows).
+    assert db_session.query(Seller).filter(Seller.name.like("%Mills")).count() == 0
+    assert client.get("/api/v1/sellers", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+    results = list(scan_shards(router, shard_summary))
+    assert sorted(result.shard for result in results) == sorted({router.shard_for("owner@example.com"), router.shard_for("other@example.com")})
+    assert [result.value["sellers"] for result in results] == [1, 1]
+    router.dispose()
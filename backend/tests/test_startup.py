@@ -0,0 +1,52 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect, select
+from sqlalchemy.orm import Session
+
+from app.db import schema
+from app.models.models import Buyer, Invoice, InvoiceItem, Seller, User
+from app.services.finalize_service import finalize_invoices
+
+LAZY_MODULES = ("reportlab", "PIL", "jose", "passlib", "alembic")
+
+
+def test_importing_app_skips_heavy_dependencies():
+    probe = f"import sys, app.main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=Path(__file__).parents[1], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_prepare_schema_modes(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    monkeypatch.setattr(schema, "engine", engine)
+    schema.prepare_schema("none")
+    assert inspect(engine).get_table_names() == []
+    schema.prepare_schema("create_all")
+    assert "invoices" in inspect(engine).get_table_names()
+    engine.dispose()
+
+
+def test_alembic_mode_builds_a_working_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'alembic.db'}")
+    schema.prepare_schema("alembic", bind=engine)
+    assert "ck_invoice_status" not in {check["name"] for check in inspect(engine).get_check_constraints("invoices")}
+
+    with Session(engine) as db:
+        user = User(email="owner@example.com", full_name="Owner", password_hash="x")
+        db.add(user)
+        db.flush()
+        seller = Seller(owner=user, name="Acme Traders", gstin="07ABCDE1234F1Z2", address="Delhi", state_code="07")
+        buyer = Buyer(user_id=user.id, name="Bharat Stores", address="Bengaluru", state_code="29")
+        invoice = Invoice(seller=seller, buyer=buyer, invoice_type="B2B", supply_type="inter")
+        invoice.items.append(
+            InvoiceItem(name="Ceiling Fan", hsn_sac="8414", quantity=1, unit_price=2450, gst_rate=18, taxable_value=2450, tax_amount=441, total_value=2891)
+        )
+        db.add(invoice)
+        db.flush()
+        result = finalize_invoices(db, user.id, [invoice.id])
+        db.commit()
+        assert list(result.finalized) == [invoice.id]
+        assert db.scalar(select(Invoice.status)) == "finalized"
+    engine.dispose()